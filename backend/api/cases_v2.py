@@ -457,19 +457,20 @@ import uuid
 import os
 
 
-@router.post('/{case_id}/documents', status_code=status.HTTP_201_CREATED)
-async def upload_document(
-    case_id: str,
-    file: UploadFile = File(...),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    '''
-    Upload a document/file for a case.
-    
-    File is stored in MinIO and metadata in case_documents table.
-    '''
-    # Get case
+class CaseDocumentUploadRequest(BaseModel):
+    file_name: str
+    size: int
+    content_type: Optional[str] = None
+
+
+class CaseDocumentUploadComplete(BaseModel):
+    file_key: str
+    file_name: str
+    upload_id: Optional[str] = None  # only for multipart uploads
+
+
+def _get_case_for_upload(case_id: str, current_user, db: Session) -> Case:
+    '''Get case and check the user may upload documents to it.'''
     case = db.query(Case).filter(Case.id == case_id).first()
     
     if not case:
@@ -480,25 +481,20 @@ async def upload_document(
         if case.user_id != current_user.id:
             raise HTTPException(status_code=403, detail='Not authorized')
     
-    # Generate unique file key for MinIO
-    file_extension = os.path.splitext(file.filename)[1]
-    file_key = f'cases/{case_id}/{uuid.uuid4()}{file_extension}'
-    
-    # Read file content
-    file_content = await file.read()
-    
-    # Store in MinIO (using existing MinIO service)
-    try:
-        from services.doc_processor.storage import MinIOStorage
-        storage = MinIOStorage()
-        storage.upload_file(file_key, file_content)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f'Failed to upload file: {str(e)}')
-    
-    # Save metadata to database
+    return case
+
+
+def _new_file_key(case_id: str, file_name: str) -> str:
+    '''Generate unique file key for MinIO.'''
+    file_extension = os.path.splitext(file_name)[1]
+    return f'cases/{case_id}/{uuid.uuid4()}{file_extension}'
+
+
+def _save_case_document(case_id: str, file_name: str, file_key: str, current_user, db: Session) -> dict:
+    '''Save document metadata and log entry, return upload response.'''
     doc_entry = CaseDocument(
         case_id=case_id,
-        file_name=file.filename,
+        file_name=file_name,
         file_key=file_key,
         uploaded_by=current_user.id
     )
@@ -510,9 +506,9 @@ async def upload_document(
     log_entry = CaseLog(
         case_id=case_id,
         event_type='document_uploaded',
-        new_value=file.filename,
+        new_value=file_name,
         created_by=current_user.id,
-        comment=f'Document uploaded: {file.filename}'
+        comment=f'Document uploaded: {file_name}'
     )
     db.add(log_entry)
     db.commit()
@@ -530,6 +526,113 @@ async def upload_document(
     }
 
 
+@router.post('/{case_id}/documents', status_code=status.HTTP_201_CREATED)
+async def upload_document(
+    case_id: str,
+    file: UploadFile = File(...),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    '''
+    Upload a document/file for a case.
+    
+    File is stored in MinIO and metadata in case_documents table.
+    '''
+    _get_case_for_upload(case_id, current_user, db)
+    
+    file_key = _new_file_key(case_id, file.filename)
+    
+    # Stream to MinIO (using existing MinIO service)
+    try:
+        from services.doc_processor.storage import get_storage
+        storage = get_storage()
+        await storage.upload_stream_async(
+            storage.BUCKET_RAW,
+            file.file,
+            file_key,
+            content_type=file.content_type
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f'Failed to upload file: {str(e)}')
+    
+    return _save_case_document(case_id, file.filename, file_key, current_user, db)
+
+
+@router.post('/{case_id}/documents/upload-url')
+async def request_document_upload(
+    case_id: str,
+    upload: CaseDocumentUploadRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    '''
+    Issue a presigned URL for uploading a case document straight to MinIO.
+    
+    Large files get a multipart plan (one URL per part). After uploading,
+    call /{case_id}/documents/complete-upload to register the document.
+    '''
+    _get_case_for_upload(case_id, current_user, db)
+    
+    from services.doc_processor.storage import get_storage
+    storage = get_storage()
+    
+    if upload.size <= 0 or upload.size > storage.MAX_DIRECT_UPLOAD_SIZE:
+        raise HTTPException(status_code=400, detail='Invalid file size')
+    
+    file_key = _new_file_key(case_id, upload.file_name)
+    
+    try:
+        plan = await storage.create_presigned_upload_async(
+            storage.BUCKET_RAW,
+            file_key,
+            upload.size,
+            content_type=upload.content_type
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f'Failed to prepare upload: {str(e)}')
+    
+    return {
+        'file_key': file_key,
+        'upload': plan
+    }
+
+
+@router.post('/{case_id}/documents/complete-upload', status_code=status.HTTP_201_CREATED)
+async def complete_document_upload(
+    case_id: str,
+    body: CaseDocumentUploadComplete,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    '''
+    Verify a presigned upload landed in MinIO and save document metadata.
+    '''
+    _get_case_for_upload(case_id, current_user, db)
+    
+    # Only keys issued for this case can be registered
+    if not body.file_key.startswith(f'cases/{case_id}/'):
+        raise HTTPException(status_code=400, detail='Invalid file key')
+    
+    from services.doc_processor.storage import get_storage
+    storage = get_storage()
+    
+    try:
+        stored = await storage.complete_presigned_upload_async(
+            storage.BUCKET_RAW,
+            body.file_key,
+            upload_id=body.upload_id
+        )
+    except Exception:
+        raise HTTPException(status_code=400, detail='Upload not found or incomplete')
+    
+    # The declared size is only checked when the URL is issued
+    if stored['size'] > storage.MAX_DIRECT_UPLOAD_SIZE:
+        await storage.delete_file_async(storage.BUCKET_RAW, body.file_key)
+        raise HTTPException(status_code=400, detail='Invalid file size')
+    
+    return _save_case_document(case_id, body.file_name, body.file_key, current_user, db)
+
+
 @router.get('/{case_id}/documents', response_model=List[CaseDocumentResponse])
 async def list_documents(
     case_id: str,
@@ -592,9 +695,9 @@ async def delete_document(
     
     # Delete from MinIO
     try:
-        from services.doc_processor.storage import MinIOStorage
-        storage = MinIOStorage()
-        storage.delete_file(document.file_key)
+        from services.doc_processor.storage import get_storage
+        storage = get_storage()
+        await storage.delete_file_async(storage.BUCKET_RAW, document.file_key)
     except Exception as e:
         # Log error but continue with database deletion
         print(f'Warning: Failed to delete file from MinIO: {e}')
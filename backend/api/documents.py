@@ -19,7 +19,7 @@ from services.doc_processor import (
     classify_document,
     extract_document_fields,
     DocumentType,
-    MinIOStorage
+    get_storage
 )
 from auth.rbac import get_current_user, require_admin
 
@@ -70,7 +70,7 @@ class DocumentResult(BaseModel):
 
 
 # Initialize services
-storage = MinIOStorage()
+storage = get_storage()
 
 
 @router.post("/upload", response_model=DocumentUploadResponse)
@@ -111,7 +111,7 @@ async def upload_document(
         file_data = await file.read()
         
         # Upload to MinIO raw-docs bucket
-        object_name = storage.upload_raw_document(
+        object_name = await storage.upload_raw_document_async(
             file_data=file_data,
             filename=file.filename,
             user_id=current_user.id,
@@ -208,13 +208,13 @@ async def get_document_result(
             
             # Generate presigned URLs
             if job.raw_object_name:
-                result.raw_document_url = storage.get_presigned_url(
+                result.raw_document_url = await storage.get_presigned_url_async(
                     storage.BUCKET_RAW,
                     job.raw_object_name
                 )
             
             if job.processed_object_name:
-                result.processed_document_url = storage.get_presigned_url(
+                result.processed_document_url = await storage.get_presigned_url_async(
                     storage.BUCKET_PROCESSED,
                     job.processed_object_name
                 )
@@ -358,13 +358,13 @@ async def delete_document(
         # Delete from MinIO
         if job.raw_object_name:
             try:
-                storage.delete_file(storage.BUCKET_RAW, job.raw_object_name)
+                await storage.delete_file_async(storage.BUCKET_RAW, job.raw_object_name)
             except Exception as e:
                 logger.warning(f"Failed to delete raw file: {e}")
         
         if job.processed_object_name:
             try:
-                storage.delete_file(storage.BUCKET_PROCESSED, job.processed_object_name)
+                await storage.delete_file_async(storage.BUCKET_PROCESSED, job.processed_object_name)
             except Exception as e:
                 logger.warning(f"Failed to delete processed file: {e}")
         
@@ -460,7 +460,7 @@ async def process_document_pipeline(
         
         # Step 4: Save processed text to MinIO
         processed_filename = f"{filename}_processed.txt"
-        processed_object = storage.upload_processed_document(
+        processed_object = await storage.upload_processed_document_async(
             file_data=text.encode('utf-8'),
             filename=processed_filename,
             original_object_name=job.raw_object_name,
@@ -6,7 +6,7 @@ Base path: /api/marketplace/lawyers
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
-from typing import List, Optional
+from typing import Optional
 from sqlalchemy.orm import Session
 import json
 
@@ -15,11 +15,13 @@ from models.marketplace import (
     LawyerUpdateRequest,
     AvailabilityRequest,
     LawyerPublicProfile,
+    LawyerSearchResponse,
     LawyerPrivateProfile,
     DashboardStats,
     ApiResponse
 )
 from main import get_db, get_current_user
+from services import lawyer_ranking
 from config.jurisdictions import (
     validate_jurisdictions,
     get_active_jurisdiction_codes,
@@ -148,7 +150,108 @@ async def register_lawyer(
         )
 
 
-@router.get("/search", response_model=List[LawyerPublicProfile])
+FACET_CACHE_TTL = 60  # seconds
+LAWYERS_CACHE_TAG = "lawyers"
+
+# Facet name -> Lawyer JSONB column
+FACET_COLUMNS = {
+    "specializations": "specializations",
+    "languages": "languages",
+    "jurisdictions": "jurisdictions",
+}
+
+
+def _invalidate_lawyer_caches():
+    """Drop ranking snapshots and cached search facets after a profile change"""
+    from services.cache_service import cache
+    
+    lawyer_ranking.invalidate()
+    cache.invalidate_tags(LAWYERS_CACHE_TAG)
+
+
+def _jsonb_contains(column, value: str):
+    """column @> '["value"]' so the GIN index on the JSONB column is used"""
+    from sqlalchemy import cast
+    from sqlalchemy.dialects.postgresql import JSONB
+    return cast(column, JSONB).op('@>')(cast([value], JSONB))
+
+
+def _encode_cursor(lawyer) -> str:
+    """Keyset cursor "<average_rating>:<id>" ("null" for unrated lawyers)"""
+    rating = "null" if lawyer.average_rating is None else str(lawyer.average_rating)
+    return f"{rating}:{lawyer.id}"
+
+
+def _decode_cursor(cursor: str):
+    """Parse a keyset cursor into (average_rating or None, id)"""
+    try:
+        rating, lawyer_id = cursor.split(":", 1)
+        return (None if rating == "null" else float(rating)), int(lawyer_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Neplatný kurzor / Invalid cursor: {cursor}"
+        )
+
+
+def _after_cursor(query, Lawyer, cursor: str):
+    """
+    Rows after the cursor in (average_rating DESC NULLS LAST, id DESC) order
+    """
+    from sqlalchemy import and_, or_
+    
+    rating, lawyer_id = _decode_cursor(cursor)
+    if rating is None:
+        return query.filter(Lawyer.average_rating.is_(None), Lawyer.id < lawyer_id)
+    return query.filter(or_(
+        Lawyer.average_rating < rating,
+        and_(Lawyer.average_rating == rating, Lawyer.id < lawyer_id),
+        Lawyer.average_rating.is_(None)
+    ))
+
+
+def _facet_counts(db: Session, query, cache_key: str) -> dict:
+    """
+    Count matching lawyers per specialization, language and jurisdiction.
+    
+    One grouped UNION ALL query over the filtered set, cached briefly in Redis.
+    """
+    from sqlalchemy import select, literal, func, true, union_all, cast
+    from sqlalchemy.dialects.postgresql import JSONB
+    from services.cache_service import cache
+    
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    from main import Lawyer
+    
+    # CTE so the filtered lawyers are scanned once for all three facets
+    matching = query.with_entities(*(
+        getattr(Lawyer, column) for column in FACET_COLUMNS.values()
+    )).cte("matching_lawyers")
+    
+    selects = []
+    for facet, column in FACET_COLUMNS.items():
+        values = func.jsonb_array_elements_text(
+            cast(matching.c[column], JSONB)
+        ).table_valued("value").render_derived()
+        selects.append(
+            select(literal(facet).label("facet"), values.c.value, func.count().label("count"))
+            .select_from(matching)
+            .join(values, true())
+            .group_by(values.c.value)
+        )
+    
+    facets = {facet: {} for facet in FACET_COLUMNS}
+    for facet, value, count in db.execute(union_all(*selects)):
+        facets[facet][value] = count
+    
+    cache.set(cache_key, facets, ttl=FACET_CACHE_TTL, tags=[LAWYERS_CACHE_TAG])
+    return facets
+
+
+@router.get("/search", response_model=LawyerSearchResponse)
 async def search_lawyers(
     jurisdiction: Optional[str] = Query(None, description="Filter by jurisdiction (e.g., SK, CZ, PL)"),
     specialization: Optional[str] = Query(None, description="Filter by specialization"),
@@ -156,7 +259,8 @@ async def search_lawyers(
     available: Optional[bool] = Query(None, description="Only available lawyers"),
     language: Optional[str] = Query(None, description="Filter by language"),
     limit: int = Query(10, ge=1, le=50),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_facets: bool = Query(False, description="Return lawyer counts per specialization/language/jurisdiction"),
     db: Session = Depends(get_db)
 ):
     """
@@ -166,10 +270,13 @@ async def search_lawyers(
     
     Returns list of verified and available lawyers matching criteria.
     Lawyers are filtered by jurisdiction - only lawyers licensed in the specified jurisdiction are returned.
+    
+    Results are ordered by rating and paginated by keyset: pass `next_cursor`
+    back as `cursor` for the following page. With `include_facets`, counts
+    for the current filters are included so the filter UI can show them.
     """
     try:
         from main import Lawyer
-        from sqlalchemy import and_, or_
         
         query = db.query(Lawyer).filter(
             Lawyer.is_verified == True,
@@ -178,6 +285,7 @@ async def search_lawyers(
         
         # CRITICAL: Filter by jurisdiction
         # Only show lawyers who are licensed in the requested jurisdiction
+        jurisdiction_upper = None
         if jurisdiction:
             jurisdiction_upper = jurisdiction.upper()
             # Validate jurisdiction
@@ -186,31 +294,39 @@ async def search_lawyers(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Neplatná alebo neaktívna jurisdikcia / Invalid or inactive jurisdiction: {jurisdiction}"
                 )
-            # PostgreSQL JSONB contains
-            query = query.filter(Lawyer.jurisdictions.contains([jurisdiction_upper]))
+            query = query.filter(_jsonb_contains(Lawyer.jurisdictions, jurisdiction_upper))
         
         # Apply other filters
         if specialization:
-            # PostgreSQL JSONB contains
-            query = query.filter(Lawyer.specializations.contains([specialization]))
+            query = query.filter(_jsonb_contains(Lawyer.specializations, specialization))
         
         if rating_min:
             query = query.filter(Lawyer.average_rating >= rating_min)
         
         if language:
-            # PostgreSQL JSONB contains - need to cast the array to JSONB
-            from sqlalchemy import cast
-            from sqlalchemy.dialects.postgresql import JSONB
-            query = query.filter(Lawyer.languages.op('@>')(cast([language], JSONB)))
+            query = query.filter(_jsonb_contains(Lawyer.languages, language))
         
-        # Order by rating
-        query = query.order_by(Lawyer.average_rating.desc().nullslast())
+        facets = None
+        if include_facets:
+            cache_key = f"lawyer_facets:{jurisdiction_upper}:{specialization}:{language}:{rating_min}"
+            facets = _facet_counts(db, query, cache_key)
         
-        # Pagination
-        lawyers = query.offset(offset).limit(limit).all()
+        # Keyset pagination over (rating, id)
+        if cursor:
+            query = _after_cursor(query, Lawyer, cursor)
+        query = query.order_by(Lawyer.average_rating.desc().nullslast(), Lawyer.id.desc())
         
-        return lawyers
+        lawyers = query.limit(limit + 1).all()
+        next_cursor = _encode_cursor(lawyers[limit - 1]) if len(lawyers) > limit else None
         
+        return LawyerSearchResponse(
+            lawyers=lawyers[:limit],
+            next_cursor=next_cursor,
+            facets=facets
+        )
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -363,6 +479,7 @@ async def update_profile(
             lawyer.is_active = is_active
         
         db.commit()
+        _invalidate_lawyer_caches()
         
         return ApiResponse(
             success=True,
@@ -454,6 +571,7 @@ async def set_availability(
         
         lawyer.is_active = is_active
         db.commit()
+        _invalidate_lawyer_caches()
         
         return ApiResponse(
             success=True,
@@ -542,6 +660,7 @@ async def verify_lawyer(
         lawyer.is_verified = True
         lawyer.verification_date = datetime.utcnow()
         db.commit()
+        _invalidate_lawyer_caches()
         
         return ApiResponse(
             success=True,
@@ -591,6 +710,7 @@ async def reject_lawyer(
         # Delete lawyer record
         db.delete(lawyer)
         db.commit()
+        _invalidate_lawyer_caches()
         
         return ApiResponse(
             success=True,
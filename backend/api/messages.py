@@ -99,7 +99,8 @@ async def send_message(
 async def get_conversation(
     order_id: int,
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    before_id: Optional[int] = Query(None, ge=1, description="Load messages older than this message ID"),
+    after_id: Optional[int] = Query(None, ge=0, description="Load messages newer than this message ID"),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -107,6 +108,9 @@ async def get_conversation(
     Get conversation for an order
     
     **Získať konverzáciu pre objednávku**
+    
+    Paginated by message ID: pass the oldest loaded ID as `before_id` to
+    scroll back, or the newest as `after_id` to poll for new messages.
     """
     try:
         # Get messages
@@ -115,7 +119,8 @@ async def get_conversation(
             order_id=order_id,
             user_id=current_user['id'],
             limit=limit,
-            offset=offset
+            before_id=before_id,
+            after_id=after_id
         )
         
         return conversation
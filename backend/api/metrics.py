@@ -1,38 +1,45 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-University Chat Metrics Endpoint
-Provides monitoring and metrics for university chat system
+Metrics Endpoints
+Prometheus exposition (/metrics) and university chat monitoring
+
+All values come from the process-wide registry in services/metrics.py and
+are aggregated across worker processes through Redis.
 """
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from typing import Dict
-from services.university_chat_service import UniversityChatService
-from api.university_chat import get_chat_service
+from auth.rbac import require_admin
+from services import metrics
+from services.university_chat_service import METRICS_SERVICE, get_chat_metrics
 
 router = APIRouter(
     prefix="/api/metrics",
     tags=["metrics"]
 )
 
+# Scrape endpoint lives at the conventional root path
+prometheus_router = APIRouter(tags=["metrics"])
+
 
-# Global metrics storage (in production, use Redis or similar)
-_global_metrics = {
-    "total_requests": 0,
-    "successful_requests": 0,
-    "failed_requests": 0,
-    "rag_hits": 0,
-    "rag_misses": 0,
-    "web_searches": 0,
-    "total_tokens_used": 0,
-    "total_cost_usd": 0.0
-}
+@prometheus_router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    """
+    Prometheus scrape endpoint
+    
+    Returns:
+        All registered metrics in the Prometheus text format
+    """
+    return PlainTextResponse(
+        metrics.registry.exposition(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 @router.get("/university-chat")
-def get_university_chat_metrics(
-    chat_service: UniversityChatService = Depends(get_chat_service)
-) -> Dict:
+def get_university_chat_metrics() -> Dict:
     """
     Get metrics for university chat system
     
@@ -43,50 +50,40 @@ def get_university_chat_metrics(
         - OpenAI usage (tokens, cost)
         - Success rate
     """
-    return chat_service.get_metrics()
+    return get_chat_metrics()
 
 
 @router.get("/university-chat/summary")
-def get_metrics_summary(
-    chat_service: UniversityChatService = Depends(get_chat_service)
-) -> Dict:
+def get_metrics_summary() -> Dict:
     """
     Get summary of key metrics
     
     Returns:
         Dict with high-level metrics for dashboard
     """
-    metrics = chat_service.get_metrics()
+    chat_metrics = get_chat_metrics()
     
     return {
-        "status": "healthy" if metrics["success_rate"] > 0.95 else "degraded",
-        "total_requests": metrics["total_requests"],
-        "success_rate_percent": round(metrics["success_rate"] * 100, 2),
-        "rag_hit_rate_percent": round(metrics["rag_hit_rate"] * 100, 2),
-        "total_cost_usd": round(metrics["total_cost_usd"], 2),
-        "avg_cost_per_request_usd": round(metrics["avg_cost_per_request"], 4)
+        "status": "healthy" if chat_metrics["success_rate"] > 0.95 else "degraded",
+        "total_requests": chat_metrics["total_requests"],
+        "success_rate_percent": round(chat_metrics["success_rate"] * 100, 2),
+        "rag_hit_rate_percent": round(chat_metrics["rag_hit_rate"] * 100, 2),
+        "total_cost_usd": round(chat_metrics["total_cost_usd"], 2),
+        "avg_cost_per_request_usd": round(chat_metrics["avg_cost_per_request"], 4)
     }
 
 
 @router.post("/university-chat/reset")
-def reset_metrics(
-    chat_service: UniversityChatService = Depends(get_chat_service)
-) -> Dict:
+def reset_metrics(current_user = Depends(require_admin)) -> Dict:
     """
-    Reset metrics (admin only - add auth in production)
+    Reset university chat metrics (admin only)
+    
+    Clears only the counters labelled with the university chat service;
+    Prometheus treats this as a counter reset of those series.
     
     Returns:
         Confirmation message
     """
-    chat_service.metrics = {
-        "total_requests": 0,
-        "successful_requests": 0,
-        "failed_requests": 0,
-        "rag_hits": 0,
-        "rag_misses": 0,
-        "web_searches": 0,
-        "total_tokens_used": 0,
-        "total_cost_usd": 0.0
-    }
+    metrics.registry.reset(service=METRICS_SERVICE)
     
     return {"message": "Metrics reset successfully"}
@@ -12,6 +12,7 @@ from datetime import datetime
 
 from auth.rbac import get_current_user
 from main import get_db
+from services import unread_counters
 
 router = APIRouter(prefix="/api/notifications", tags=["Notifications"])
 
@@ -111,12 +112,18 @@ async def mark_as_read(
         raise HTTPException(status_code=404, detail="Notification not found")
     
     # Mark as read
+    was_unread = not notification.read
     notification.read = True
     notification.read_at = datetime.utcnow()
+    if was_unread:
+        unread_counters.adjust(db, current_user.id, unread_counters.NOTIFICATIONS, -1)
     
     db.commit()
     db.refresh(notification)
     
+    if was_unread:
+        await unread_counters.publish(db, [current_user.id])
+    
     return notification
 
 
@@ -140,16 +147,20 @@ async def mark_all_as_read(
         read_at = Column(DateTime)
     
     # Update all unread notifications
-    db.query(Notification).filter(
+    updated = db.query(Notification).filter(
         Notification.user_id == current_user.id,
         Notification.read == False
     ).update({
         "read": True,
         "read_at": datetime.utcnow()
     })
+    unread_counters.adjust(db, current_user.id, unread_counters.NOTIFICATIONS, -updated)
     
     db.commit()
     
+    if updated:
+        await unread_counters.publish(db, [current_user.id])
+    
     return {"success": True, "message": "All notifications marked as read"}
 
 
@@ -162,19 +173,7 @@ async def get_unread_count(
     db: Session = Depends(get_db)
 ):
     """Get count of unread notifications."""
-    from sqlalchemy import Column, Integer, ForeignKey, Boolean, func
-    from main import Base
-    
-    class Notification(Base):
-        __tablename__ = "notifications"
-        id = Column(Integer, primary_key=True)
-        user_id = Column(Integer, ForeignKey("users.id"))
-        read = Column(Boolean)
-    
-    count = db.query(func.count(Notification.id)).filter(
-        Notification.user_id == current_user.id,
-        Notification.read == False
-    ).scalar()
+    count = unread_counters.get_count(db, current_user.id, unread_counters.NOTIFICATIONS)
     
     return {"unread_count": count}
 
@@ -189,13 +188,14 @@ async def delete_notification(
     db: Session = Depends(get_db)
 ):
     """Delete a notification."""
-    from sqlalchemy import Column, Integer, ForeignKey
+    from sqlalchemy import Column, Integer, ForeignKey, Boolean
     from main import Base
     
     class Notification(Base):
         __tablename__ = "notifications"
         id = Column(Integer, primary_key=True)
         user_id = Column(Integer, ForeignKey("users.id"))
+        read = Column(Boolean)
     
     # Get notification
     notification = db.query(Notification).filter(
@@ -206,9 +206,15 @@ async def delete_notification(
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
     
+    was_unread = not notification.read
     db.delete(notification)
+    if was_unread:
+        unread_counters.adjust(db, current_user.id, unread_counters.NOTIFICATIONS, -1)
     db.commit()
     
+    if was_unread:
+        await unread_counters.publish(db, [current_user.id])
+    
     return {"success": True, "message": "Notification deleted"}
 
 
@@ -249,6 +255,8 @@ def create_notification(
     )
     
     db.add(notification)
+    unread_counters.adjust(db, user_id, unread_counters.NOTIFICATIONS, 1)
     db.commit()
+    unread_counters.refresh(db, [user_id])
     
     return notification
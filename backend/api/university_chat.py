@@ -5,14 +5,13 @@ University Chat API Router
 Isolated endpoints for university AI chat functionality
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
-from datetime import datetime
 from typing import Optional
-import os
 
 # Import dependencies
 from main import get_db, University, UniversityChatSession
+from services.chat_memory import chat_memory
 from services.university_chat_service import UniversityChatService
 
 
@@ -29,7 +28,7 @@ from pydantic import BaseModel
 class UniversityChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
-    conversation_history: list = []  # Add conversation history from frontend
+    conversation_history: list = []  # Deprecated: history is kept server-side by session_id
     language: Optional[str] = None  # User's platform language
 
 
@@ -51,15 +50,20 @@ def get_chat_service() -> UniversityChatService:
 async def chat_with_university(
     university_id: int,
     chat_request: UniversityChatRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     chat_service: UniversityChatService = Depends(get_chat_service)
 ):
     """
     Chat with AI about a specific university using RAG
     
+    The conversation is kept server-side: clients send only the new message
+    and the session_id returned by the first response.
+    
     Args:
         university_id: ID of the university
         chat_request: Chat request with message and optional session_id
+        background_tasks: Runs the rolling summary after responding
         db: Database session (injected)
         chat_service: University chat service (injected)
     
@@ -75,13 +79,15 @@ async def chat_with_university(
     if not university:
         raise HTTPException(status_code=404, detail="University not found")
     
-    # Generate session ID if not provided
+    # Load the session's history; unknown sessions (or another university's) start fresh
+    memory = None
     session_id = chat_request.session_id
-    if not session_id:
-        session_id = f"univ_{university_id}_{datetime.utcnow().timestamp()}_{os.urandom(4).hex()}"
-    
-    # Use conversation history from request (frontend manages it)
-    conversation_history = chat_request.conversation_history
+    if session_id:
+        memory = chat_memory.history(db, session_id, university_id)
+    if memory is None:
+        session_id = chat_memory.new_session_id(university_id)
+        # Older clients still send their own history
+        memory = {"summary": None, "messages": chat_request.conversation_history}
     
     try:
         # Get AI response with RAG (using platform language if provided)
@@ -92,7 +98,8 @@ async def chat_with_university(
             university_name=university.name,
             university_website=university.website_url or "https://university-website.com",
             university_description=university.description or "A prestigious university",
-            conversation_history=conversation_history,
+            conversation_history=memory["messages"],
+            conversation_summary=memory["summary"],
             language=chat_request.language  # Pass platform language
         )
     except Exception as e:
@@ -100,11 +107,8 @@ async def chat_with_university(
         print(f"Error in university chat: {e}")
         
         # Detect language for error message
-        from langdetect import detect
-        try:
-            lang = detect(chat_request.message)
-        except:
-            lang = 'en'
+        from services.language_detection import detect_language
+        lang = chat_request.language or detect_language(chat_request.message)
         
         # Get error message in user's language
         error_messages = {
@@ -119,9 +123,15 @@ async def chat_with_university(
             'es': 'Lo siento, ocurrió un error. Por favor, inténtalo más tarde.',
             'it': 'Spiacente, si è verificato un errore. Riprova più tardi.'
         }
+        # Not stored in the session: the error text is not an answer
         ai_response_text = error_messages.get(lang, error_messages['en'])
+    else:
+        chat_memory.append(session_id, university_id, [
+            ("user", chat_request.message),
+            ("assistant", ai_response_text)
+        ])
+        background_tasks.add_task(chat_memory.summarize, session_id)
     
-    # Return response (frontend manages conversation history)
     return UniversityChatResponse(
         response=ai_response_text,
         session_id=session_id
@@ -143,11 +153,16 @@ def get_chat_history(
         db: Database session (injected)
     
     Returns:
-        Dict with messages array
+        Dict with messages array (and rolling summary, if any)
     """
+    transcript = chat_memory.transcript(db, session_id, university_id)
+    if transcript is not None:
+        return transcript
+    
+    # Sessions from before server-side memory kept their messages on the row
     chat_session = db.query(UniversityChatSession).filter_by(
-        university_id=university_id,
-        is_active=True
+        session_id=session_id,
+        university_id=university_id
     ).first()
     
     if not chat_session:
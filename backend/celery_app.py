@@ -29,6 +29,14 @@ celery_app.conf.update(
             'schedule': 86400.0,  # Every 24 hours (in seconds)
             # 'schedule': crontab(hour=9, minute=0),  # Alternative: every day at 9 AM
         },
+        'openai-usage-rollup': {
+            'task': 'tasks.price_monitoring.rollup_openai_usage',
+            'schedule': 60.0,  # Drain the OpenAI usage stream every minute
+        },
+        'chat-sessions-persist': {
+            'task': 'tasks.chat_sessions.persist_chat_sessions',
+            'schedule': 30.0,  # Copy changed chat sessions from Redis to Postgres
+        },
     },
 )
 
@@ -47,3 +55,8 @@ try:
     from tasks import university_scraping  # noqa
 except (ImportError, ModuleNotFoundError):
     pass  # Import scraping tasks
+
+try:
+    from tasks import chat_sessions  # noqa
+except (ImportError, ModuleNotFoundError):
+    pass  # Flower не потребує цих задач
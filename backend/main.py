@@ -1,10 +1,10 @@
 import os
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Request, WebSocket, WebSocketDisconnect, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean, UniqueConstraint, func
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, JSON, Boolean, Float, UniqueConstraint, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
 from passlib.context import CryptContext
@@ -14,6 +14,7 @@ import openai
 from services.ocr_service import OCRService, OCRProvider
 # from services.ocr_service import classify_document  # DISABLED: Requires ML libraries
 from services.cache_service import cache, cached
+from services.answer_cache import invalidate_on_agency_change
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -114,6 +115,9 @@ class User(Base):
     consent_terms_version = Column(String, default="1.0")
     consent_upl_version = Column(String, default="1.0")
     consent_user_agent = Column(String, nullable=True)
+    # Unread badges (maintained by services.unread_counters, cached in Redis)
+    unread_messages_count = Column(Integer, nullable=False, default=0)
+    unread_notifications_count = Column(Integer, nullable=False, default=0)
     documents = relationship("Document", back_populates="owner")
     messages = relationship("ChatMessage", back_populates="user")
     subscriptions = relationship("Subscription", back_populates="user")
@@ -133,6 +137,27 @@ class Document(Base):
     owner = relationship("User", back_populates="documents")
     jurisdiction = relationship("Jurisdiction", back_populates="documents")
 
+class DocumentProcessingJob(Base):
+    """Uploaded document and its OCR/classification pipeline state"""
+    __tablename__ = "document_processing_jobs"
+    document_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    raw_object_name = Column(String, nullable=False)  # raw-docs bucket
+    processed_object_name = Column(String)  # processed-docs bucket
+    upload_id = Column(String)  # multipart upload of a presigned direct upload
+    status = Column(String, default="pending", index=True)  # uploading, pending, processing, completed, failed
+    progress = Column(Integer, default=0)
+    document_type = Column(String)
+    confidence = Column(Float)
+    extracted_fields = Column(JSON)
+    summary = Column(Text)
+    filled_template_path = Column(String)
+    error_message = Column(Text)
+    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    processing_started_at = Column(DateTime)
+    processed_at = Column(DateTime)
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
     id = Column(Integer, primary_key=True, index=True)
@@ -182,6 +207,32 @@ class UsageHistory(Base):
     cost_estimate = Column(Integer)  # Using Integer for cents to avoid float issues
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class OpenAIUsage(Base):
+    """One OpenAI API call, drained from the openai_usage Redis stream"""
+    __tablename__ = "openai_usage"
+    id = Column(Integer, primary_key=True, index=True)
+    stream_id = Column(String(32), unique=True)  # Redis stream entry id; NULL for direct writes
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    service = Column(String(50), nullable=False)
+    model = Column(String(50), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cost_microusd = Column(Integer, nullable=False, default=0)  # Millionths of a USD to avoid float issues
+    duration_ms = Column(Integer)
+
+class OpenAIUsageRollup(Base):
+    """OpenAI calls, tokens and cost per hour/day bucket, service and model"""
+    __tablename__ = "openai_usage_rollups"
+    granularity = Column(String(10), primary_key=True)  # 'hour' or 'day'
+    bucket_start = Column(DateTime, primary_key=True)
+    service = Column(String(50), primary_key=True)
+    model = Column(String(50), primary_key=True)
+    calls = Column(BigInteger, nullable=False, default=0)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    cost_microusd = Column(BigInteger, nullable=False, default=0)
+
 class SubscriptionPlan(Base):
     __tablename__ = "subscription_plans"
     id = Column(Integer, primary_key=True, index=True)
@@ -222,6 +273,19 @@ class Message(Base):
     read_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Keyset pagination walks a conversation by (order_id, id)
+    __table_args__ = (
+        Index('idx_messages_order_id_id', 'order_id', 'id'),
+    )
+
+class ConversationCounter(Base):
+    """Per-order, per-recipient unread message counter, maintained on write"""
+    __tablename__ = "conversation_counters"
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Notification(Base):
     """User notifications"""
     __tablename__ = "notifications"
@@ -457,6 +521,9 @@ class Order(Base):
     # Status
     status = Column(String(50), default='pending')  # pending, accepted, in_progress, completed, cancelled
     
+    # Messaging (maintained by services.message_service on write)
+    message_count = Column(Integer, nullable=False, default=0)
+    
     # Metadata
     terms_agreed = Column(Boolean, default=False)
     terms_agreed_at = Column(DateTime)
@@ -690,13 +757,16 @@ class UniversityChatSession(Base):
     """Chat sessions with AI about specific universities"""
     __tablename__ = "university_chat_sessions"
     id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String(100), unique=True, index=True)  # Public id used by the chat API
     user_id = Column(Integer, ForeignKey("users.id"))
     university_id = Column(Integer, ForeignKey("universities.id"))
     program_id = Column(Integer, ForeignKey("programs.id"), nullable=True)
     
     # Chat Data
-    messages = Column(JSON)  # Array of {role, content, timestamp}
+    messages = Column(JSON)  # Legacy array of {role, content, timestamp}; turns now live in university_chat_messages
     context = Column(JSON)  # University data context
+    summary = Column(Text)  # Rolling summary of the oldest turns
+    summarized_turns = Column(Integer, default=0)  # Turns folded into the summary
     
     # Session Info
     session_started = Column(DateTime, default=datetime.utcnow)
@@ -704,12 +774,23 @@ class UniversityChatSession(Base):
     is_active = Column(Boolean, default=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User")
     university = relationship("University")
 
 
+class UniversityChatMessage(Base):
+    """One turn of a university chat session (append-only, persisted from Redis)"""
+    __tablename__ = "university_chat_messages"
+    chat_session_id = Column(Integer, ForeignKey("university_chat_sessions.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)  # 0-based position in the session
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class RealEstateAgency(Base):
     """Real estate agencies for student housing"""
     __tablename__ = "real_estate_agencies"
@@ -748,6 +829,11 @@ class JobAgency(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+# Cached jobs/housing answers and agencies context are tagged per city
+invalidate_on_agency_change(RealEstateAgency, "housing")
+invalidate_on_agency_change(JobAgency, "jobs")
+
+
 
 # RAG Models
 class UniversityContent(Base):
@@ -767,6 +853,11 @@ class UniversityContent(Base):
     # Relationship
     university = relationship("University")
 
+    # One row per page: web search write-back relies on ON CONFLICT (university_id, url)
+    __table_args__ = (
+        UniqueConstraint('university_id', 'url', name='uq_university_content_university_url'),
+    )
+
 
 class UniversityEmbedding(Base):
     """Vector embeddings for university content"""
@@ -856,6 +947,11 @@ class DocumentResponse(BaseModel):
     id: int
     filename: str
 
+class DocumentUploadRequest(BaseModel):
+    filename: str
+    size: int
+    content_type: Optional[str] = None
+
 class SubscriptionCreate(BaseModel):
     plan_type: str  # '1month', '6months', '1year'
     amount: int
@@ -909,8 +1005,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+def bootstrap_storage():
+    """Create MinIO buckets once per process instead of on every request"""
+    try:
+        from services.doc_processor.storage import get_storage
+        get_storage().ensure_buckets()
+    except Exception as e:
+        # Uploads retry the bucket check lazily
+        logger.warning("minio_bootstrap_failed", error=str(e))
+
+
+@app.on_event("startup")
+def preload_language_profiles():
+    """Load language detection profiles before the first chat message"""
+    from services.language_detection import preload
+    preload()
+
+
 # Add request logging middleware
 import time
+from services import metrics, openai_usage
+
+metrics.watch_pool(engine)
+
+
+def _record_request_metrics(request: Request, status_code: int, duration: float):
+    """Count a request and its latency under its route template (bounded label values)"""
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    metrics.HTTP_REQUESTS.inc(method=request.method, route=path, status=status_code)
+    metrics.HTTP_LATENCY.observe(duration, method=request.method, route=path)
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -950,6 +1076,7 @@ async def log_requests(request: Request, call_next):
     # Process request
     try:
         response = await call_next(request)
+        _record_request_metrics(request, response.status_code, time.time() - start)
         duration = (time.time() - start) * 1000
         
         # Log successful request
@@ -963,6 +1090,7 @@ async def log_requests(request: Request, call_next):
         
         return response
     except Exception as e:
+        _record_request_metrics(request, 500, time.time() - start)
         duration = (time.time() - start) * 1000
         
         # Log failed request
@@ -1260,20 +1388,23 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 @app.get("/api/jurisdictions", response_model=List[JurisdictionResponse])
 def get_jurisdictions(db: Session = Depends(get_db)):
     """Get all active jurisdictions"""
-    jurisdictions = db.query(Jurisdiction).filter(Jurisdiction.is_active == True).all()
-    
-    # Initialize default jurisdictions if none exist
-    if not jurisdictions:
-        default_jurisdictions = [
-            Jurisdiction(code="SK", name="Slovenská Republika", flag_emoji="🇸🇰", is_active=True),
-            Jurisdiction(code="CZ", name="Česká Republika", flag_emoji="🇨🇿", is_active=True),
-            Jurisdiction(code="PL", name="Polska", flag_emoji="🇵🇱", is_active=True),
-        ]
-        db.add_all(default_jurisdictions)
-        db.commit()
-        jurisdictions = default_jurisdictions
+    def load():
+        jurisdictions = db.query(Jurisdiction).filter(Jurisdiction.is_active == True).all()
+        
+        # Initialize default jurisdictions if none exist
+        if not jurisdictions:
+            default_jurisdictions = [
+                Jurisdiction(code="SK", name="Slovenská Republika", flag_emoji="🇸🇰", is_active=True),
+                Jurisdiction(code="CZ", name="Česká Republika", flag_emoji="🇨🇿", is_active=True),
+                Jurisdiction(code="PL", name="Polska", flag_emoji="🇵🇱", is_active=True),
+            ]
+            db.add_all(default_jurisdictions)
+            db.commit()
+            jurisdictions = default_jurisdictions
+        
+        return [JurisdictionResponse.model_validate(j, from_attributes=True).model_dump() for j in jurisdictions]
     
-    return jurisdictions
+    return cache.get_or_set("jurisdictions:active", load, ttl=3600, tags=["jurisdictions"])
 
 # Documents endpoints
 @app.get("/api/documents", response_model=List[DocumentResponse])
@@ -1294,18 +1425,20 @@ async def upload_document(
     Upload documents and queue them for async processing with Celery
     """
     from services.doc_processor.tasks import process_document_task
-    from services.doc_processor.storage import MinIOStorage
+    from services.doc_processor.storage import get_storage
     
-    storage = MinIOStorage()
+    storage = get_storage()
     uploaded_jobs = []
     
     for file in files:
-        # Read file content
-        content = await file.read()
-        
-        # Upload to MinIO
+        # Stream to MinIO in parts instead of buffering the whole file
         object_name = f"uploads/{current_user.id}/{file.filename}"
-        storage.upload_file(content, object_name)
+        upload = await storage.upload_stream_async(
+            storage.BUCKET_RAW,
+            file.file,
+            object_name,
+            content_type=file.content_type
+        )
         
         # Create processing job in database
         job = DocumentProcessingJob(
@@ -1326,7 +1459,8 @@ async def upload_document(
                     user_id=current_user.id,
                     document_id=job.document_id,
                     filename=file.filename,
-                    size_bytes=len(content),
+                    size_bytes=upload['size'],
+                    sha256=upload['sha256'],
                     task_id=task.id)
         
         uploaded_jobs.append({
@@ -1345,6 +1479,120 @@ async def upload_document(
     }
 
 
+@app.post("/api/documents/upload-url")
+@limiter.limit("20/minute")
+async def request_document_upload(
+    request: Request,
+    upload: DocumentUploadRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Issue a presigned URL so the client uploads straight to MinIO.
+    
+    Large files get a multipart plan (one URL per part). After uploading,
+    call /api/documents/{document_id}/complete-upload to queue processing.
+    """
+    from services.doc_processor.storage import get_storage
+    
+    storage = get_storage()
+    if upload.size <= 0 or upload.size > storage.MAX_DIRECT_UPLOAD_SIZE:
+        raise HTTPException(status_code=400, detail="Invalid file size")
+    
+    filename = os.path.basename(upload.filename)
+    object_name = f"uploads/{current_user.id}/{filename}"
+    
+    plan = await storage.create_presigned_upload_async(
+        storage.BUCKET_RAW,
+        object_name,
+        upload.size,
+        content_type=upload.content_type
+    )
+    
+    # Job waits in "uploading" until the client confirms the upload
+    job = DocumentProcessingJob(
+        user_id=current_user.id,
+        filename=filename,
+        raw_object_name=object_name,
+        upload_id=plan.get("upload_id"),
+        status="uploading",
+        progress=0
+    )
+    db.add(job)
+    db.commit()
+    
+    return {
+        "job_id": job.document_id,
+        "upload": plan
+    }
+
+
+@app.post("/api/documents/{document_id}/complete-upload")
+@limiter.limit("20/minute")
+async def complete_document_upload(
+    request: Request,
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Verify a presigned upload landed in MinIO and queue it for processing
+    """
+    from services.doc_processor.tasks import process_document_task
+    from services.doc_processor.storage import get_storage
+    
+    job = db.query(DocumentProcessingJob).filter(
+        DocumentProcessingJob.document_id == document_id,
+        DocumentProcessingJob.user_id == current_user.id
+    ).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status != "uploading":
+        raise HTTPException(status_code=409, detail="Upload already completed")
+    
+    storage = get_storage()
+    try:
+        stored = await storage.complete_presigned_upload_async(
+            storage.BUCKET_RAW,
+            job.raw_object_name,
+            upload_id=job.upload_id
+        )
+    except Exception as e:
+        logger.warning("document_upload_incomplete", document_id=document_id, error=str(e))
+        raise HTTPException(status_code=400, detail="Upload not found or incomplete")
+    
+    if stored["size"] > storage.MAX_DIRECT_UPLOAD_SIZE:
+        await storage.delete_file_async(storage.BUCKET_RAW, job.raw_object_name)
+        db.delete(job)
+        db.commit()
+        raise HTTPException(status_code=400, detail="Invalid file size")
+    
+    job.status = "pending"
+    job.upload_id = None
+    db.commit()
+    
+    # Queue Celery task for async processing
+    task = process_document_task.delay(job.document_id)
+    
+    logger.info("document_upload",
+                user_id=current_user.id,
+                document_id=job.document_id,
+                filename=job.filename,
+                size_bytes=stored["size"],
+                task_id=task.id,
+                direct=True)
+    
+    return {
+        "filename": job.filename,
+        "job_id": job.document_id,
+        "task_id": task.id,
+        "status": "pending",
+        "message": "Document queued for processing"
+    }
+
+
 @app.get("/api/documents/{document_id}/progress")
 def get_document_progress(
     document_id: int,
@@ -1511,6 +1759,7 @@ async def chat(
                     total_tokens=response.usage.total_tokens,
                     cost_usd=round((response.usage.prompt_tokens * 0.00003 + response.usage.completion_tokens * 0.00006), 4),
                     duration_ms=openai_duration)
+        openai_usage.record("tax_chat", "gpt-4", openai_duration / 1000, response.usage, user_id=current_user.id)
     except Exception as e:
         logger.error("openai_api_error",
                      user_id=current_user.id,
@@ -1576,58 +1825,53 @@ async def get_usage(
 # EDUCATIONAL PLATFORM ENDPOINTS
 # ============================================
 
+def _catalog_response(request: Request, etag: str, load, cache_key: str, tags: List[str]):
+    """Serve a catalog listing with ETag revalidation (304 when unchanged)"""
+    from fastapi.responses import JSONResponse, Response
+    from services import catalog_service
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if catalog_service.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    # Cached for 1 hour; only one worker rebuilds an expired entry
+    result = cache.get_or_set(cache_key, load, ttl=catalog_service.CATALOG_TTL, tags=tags)
+    return JSONResponse(content=result, headers=headers)
+
+
 @app.get("/api/universities")
 def get_universities(
+    request: Request,
     jurisdiction_code: Optional[str] = None,
     type: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,name,city"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (all matches if omitted)"),
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor from the previous page"),
     db: Session = Depends(get_db)
 ):
-    """Get all universities, optionally filtered by jurisdiction and type (with caching)"""
-    
-    # Generate cache key
-    cache_key = f"universities:{jurisdiction_code or 'all'}:{type or 'all'}"
-    
-    # Try to get from cache
-    cached_data = cache.get(cache_key)
-    if cached_data:
-        return cached_data
-    
-    # Query database
-    query = db.query(University).filter(University.is_active == True)
-    
-    if jurisdiction_code:
-        # Filter by jurisdiction code through join with jurisdictions table
-        query = query.join(Jurisdiction, University.jurisdiction_id == Jurisdiction.id).filter(Jurisdiction.code == jurisdiction_code)
-    
-    if type:
-        query = query.filter(University.type == type)
-    
-    universities = query.all()
-    
-    result = {
-        "universities": [
-            {
-                "id": u.id,
-                "name": u.name,
-                "name_local": u.name_local,
-                "type": u.type,
-                "city": u.city,
-                "country": u.country,
-                "description": u.description,
-                "website_url": u.website_url,
-                "logo_url": u.logo_url,
-                "student_count": u.student_count,
-                "ranking_position": u.ranking_position,
-                "programs_count": len(u.programs) if u.programs else 0
-            }
-            for u in universities
-        ]
-    }
+    """
+    Get universities, optionally filtered by jurisdiction and type (with caching)
     
-    # Cache for 1 hour
-    cache.set(cache_key, result, ttl=3600)
+    Supports column projection (`fields`), keyset pagination (`limit`/`cursor`)
+    and ETag revalidation against the catalog version.
+    """
+    from services import catalog_service
     
-    return result
+    try:
+        field_list = catalog_service.parse_fields(fields, catalog_service.UNIVERSITY_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    version = catalog_service.catalog_version(db)
+    params = ("universities", jurisdiction_code or 'all', type or 'all', field_list, limit, cursor)
+    
+    return _catalog_response(
+        request,
+        catalog_service.make_etag(version, *params),
+        lambda: catalog_service.list_universities(db, jurisdiction_code, type, field_list, limit, cursor),
+        cache.make_key("catalog", version, *params),
+        [catalog_service.CATALOG_CACHE_TAG, f"universities:{jurisdiction_code or 'all'}"]
+    )
 
 
 @app.get("/api/universities/{university_id}")
@@ -1685,39 +1929,59 @@ def get_university(
 
 @app.get("/api/programs")
 def get_programs(
+    request: Request,
     university_id: Optional[int] = None,
     degree_level: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,name,degree_level"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (all matches if omitted)"),
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor from the previous page"),
     db: Session = Depends(get_db)
 ):
-    """Get programs, optionally filtered by university or degree level"""
-    query = db.query(Program).filter(Program.is_active == True)
+    """
+    Get programs, optionally filtered by university or degree level
     
-    if university_id:
-        query = query.filter(Program.university_id == university_id)
+    Supports column projection (`fields`), keyset pagination (`limit`/`cursor`)
+    and ETag revalidation against the catalog version.
+    """
+    from services import catalog_service
     
-    if degree_level:
-        query = query.filter(Program.degree_level == degree_level)
+    try:
+        field_list = catalog_service.parse_fields(fields, catalog_service.PROGRAM_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    version = catalog_service.catalog_version(db)
+    params = ("programs", university_id, degree_level, field_list, limit, cursor)
+    
+    return _catalog_response(
+        request,
+        catalog_service.make_etag(version, *params),
+        lambda: catalog_service.list_programs(db, university_id, degree_level, field_list, limit, cursor),
+        cache.make_key("catalog", version, *params),
+        [catalog_service.CATALOG_CACHE_TAG]
+    )
+
+
+@app.get("/api/catalog/search")
+def search_catalog(
+    q: str = Query(..., min_length=1, max_length=100, description="Search text; words match as prefixes"),
+    kind: str = Query("all", description="all, universities or programs"),
+    jurisdiction_code: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked search and autocomplete over universities and programs
     
-    programs = query.all()
+    Accent-insensitive and typo-tolerant; backed by the full-text and
+    trigram indexes from migration 015.
+    """
+    from services import catalog_service
     
-    return {
-        "programs": [
-            {
-                "id": p.id,
-                "university_id": p.university_id,
-                "university_name": p.university.name if p.university else None,
-                "name": p.name,
-                "name_local": p.name_local,
-                "degree_level": p.degree_level,
-                "field_of_study": p.field_of_study,
-                "language": p.language,
-                "duration_years": p.duration_years,
-                "tuition_fee": p.tuition_fee,
-                "description": p.description
-            }
-            for p in programs
-        ]
-    }
+    try:
+        return catalog_service.search_catalog(db, q, kind, jurisdiction_code, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # Import and include Case Management routers
@@ -2008,8 +2272,9 @@ except ImportError as e:
 
 # Import Metrics router
 try:
-    from api.metrics import router as metrics_router
+    from api.metrics import router as metrics_router, prometheus_router
     app.include_router(metrics_router)
+    app.include_router(prometheus_router)
     print("✅ Metrics router loaded successfully!")
 except ImportError as e:
     import traceback
@@ -0,0 +1,53 @@
+-- Migration 012: Add conversation counters and keyset pagination index
+-- Created: 2026-10-19
+-- Purpose: Load order conversations without per-message lookups or COUNT scans
+
+-- ============================================
+-- ORDERS: MESSAGE COUNT
+-- ============================================
+
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS message_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE orders o
+SET message_count = m.total
+FROM (
+    SELECT order_id, COUNT(*) AS total
+    FROM messages
+    WHERE order_id IS NOT NULL
+    GROUP BY order_id
+) m
+WHERE m.order_id = o.id;
+
+-- ============================================
+-- CONVERSATION COUNTERS TABLE
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS conversation_counters (
+    order_id INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (order_id, user_id)
+);
+
+-- Backfill from existing unread messages
+INSERT INTO conversation_counters (order_id, user_id, unread_count)
+SELECT order_id, recipient_id, COUNT(*)
+FROM messages
+WHERE order_id IS NOT NULL AND is_read = FALSE
+GROUP BY order_id, recipient_id
+ON CONFLICT (order_id, user_id) DO UPDATE SET unread_count = EXCLUDED.unread_count;
+
+-- ============================================
+-- INDEXES
+-- ============================================
+
+-- Keyset pagination: WHERE order_id = ? AND id < ? ORDER BY id DESC
+CREATE INDEX IF NOT EXISTS idx_messages_order_id_id ON messages(order_id, id);
+
+-- ============================================
+-- COMMENTS
+-- ============================================
+
+COMMENT ON TABLE conversation_counters IS 'Unread messages per order and recipient, maintained on write';
+COMMENT ON COLUMN orders.message_count IS 'Total messages in the order conversation, maintained on write';
@@ -0,0 +1,30 @@
+-- Migration 013: Add per-user unread counters
+-- Created: 2026-10-19
+-- Purpose: Serve unread badges without COUNT(*) scans (cached in Redis as unread:{user_id})
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS unread_messages_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS unread_notifications_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill from existing unread rows
+UPDATE users u
+SET unread_messages_count = m.total
+FROM (
+    SELECT recipient_id, COUNT(*) AS total
+    FROM messages
+    WHERE is_read = FALSE
+    GROUP BY recipient_id
+) m
+WHERE m.recipient_id = u.id;
+
+UPDATE users u
+SET unread_notifications_count = n.total
+FROM (
+    SELECT user_id, COUNT(*) AS total
+    FROM notifications
+    WHERE is_read = FALSE
+    GROUP BY user_id
+) n
+WHERE n.user_id = u.id;
+
+COMMENT ON COLUMN users.unread_messages_count IS 'Unread messages, maintained on write; Postgres fallback for the Redis badge cache';
+COMMENT ON COLUMN users.unread_notifications_count IS 'Unread notifications, maintained on write; Postgres fallback for the Redis badge cache';
@@ -0,0 +1,33 @@
+-- Migration 014: Index lawyer search filters and keyset pagination
+-- Created: 2026-10-19
+-- Purpose: Serve /api/marketplace/lawyers/search from indexes (JSONB @> filters,
+--          (rating, id) keyset pages, facet counts)
+
+-- ============================================
+-- JSONB COLUMNS
+-- ============================================
+
+-- Tables created through SQLAlchemy metadata have plain JSON columns, which
+-- cannot be GIN-indexed; normalize them to JSONB.
+ALTER TABLE lawyers ALTER COLUMN specializations TYPE JSONB USING specializations::jsonb;
+ALTER TABLE lawyers ALTER COLUMN languages TYPE JSONB USING languages::jsonb;
+ALTER TABLE lawyers ALTER COLUMN jurisdictions TYPE JSONB USING jurisdictions::jsonb;
+
+-- ============================================
+-- GIN INDEXES (containment filters)
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_lawyers_specializations ON lawyers USING GIN (specializations);
+CREATE INDEX IF NOT EXISTS idx_lawyers_languages ON lawyers USING GIN (languages);
+CREATE INDEX IF NOT EXISTS idx_lawyers_jurisdictions ON lawyers USING GIN (jurisdictions);
+
+-- ============================================
+-- KEYSET PAGINATION
+-- ============================================
+
+-- ORDER BY average_rating DESC NULLS LAST, id DESC over searchable lawyers
+CREATE INDEX IF NOT EXISTS idx_lawyers_search_keyset
+ON lawyers (average_rating DESC NULLS LAST, id DESC)
+WHERE is_verified = TRUE AND is_active = TRUE;
+
+ANALYZE lawyers;
@@ -0,0 +1,51 @@
+-- Migration 015: Full-text and trigram search over the university catalog
+-- Created: 2026-10-19
+-- Purpose: Serve /api/catalog/search (ranked search and autocomplete) from
+--          indexes instead of filtering the full catalog client-side
+
+-- ============================================
+-- EXTENSIONS
+-- ============================================
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() is only STABLE (it depends on the dictionary search path), so it
+-- cannot be used in index expressions directly. This wrapper pins the
+-- dictionary and is safe to declare IMMUTABLE.
+CREATE OR REPLACE FUNCTION f_unaccent(text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+-- ============================================
+-- UNIVERSITIES
+-- ============================================
+-- Expressions must match services/catalog_service.py exactly.
+
+CREATE INDEX IF NOT EXISTS idx_universities_search ON universities USING GIN (
+    to_tsvector('simple', f_unaccent(
+        coalesce(name, '') || ' ' || coalesce(name_local, '') || ' ' || coalesce(city, '')
+    ))
+);
+
+CREATE INDEX IF NOT EXISTS idx_universities_name_trgm ON universities USING GIN (
+    lower(f_unaccent(coalesce(name, '') || ' ' || coalesce(name_local, ''))) gin_trgm_ops
+);
+
+-- ============================================
+-- PROGRAMS
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_programs_search ON programs USING GIN (
+    to_tsvector('simple', f_unaccent(
+        coalesce(name, '') || ' ' || coalesce(field_of_study, '')
+    ))
+);
+
+CREATE INDEX IF NOT EXISTS idx_programs_name_trgm ON programs USING GIN (
+    lower(f_unaccent(coalesce(name, ''))) gin_trgm_ops
+);
+
+ANALYZE universities;
+ANALYZE programs;
@@ -0,0 +1,33 @@
+-- Migration 016: Add OpenAI usage events and rollups
+-- Created: 2026-10-19
+-- Purpose: Price monitoring reads hourly/daily aggregates instead of re-parsing codex.log
+--          (events arrive through the sa:openai_usage Redis stream, see services/openai_usage.py)
+
+CREATE TABLE IF NOT EXISTS openai_usage (
+    id SERIAL PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    service VARCHAR(50) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cost_microusd INTEGER NOT NULL DEFAULT 0,
+    duration_ms INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_openai_usage_created_at ON openai_usage(created_at);
+
+CREATE TABLE IF NOT EXISTS openai_usage_rollups (
+    granularity VARCHAR(10) NOT NULL CHECK (granularity IN ('hour', 'day')),
+    bucket_start TIMESTAMP NOT NULL,
+    service VARCHAR(50) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    calls BIGINT NOT NULL DEFAULT 0,
+    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    completion_tokens BIGINT NOT NULL DEFAULT 0,
+    cost_microusd BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, service, model)
+);
+
+COMMENT ON TABLE openai_usage IS 'One row per OpenAI API call; cost in millionths of a USD';
+COMMENT ON TABLE openai_usage_rollups IS 'OpenAI calls, tokens and cost per hour/day bucket, maintained by tasks.price_monitoring.rollup_openai_usage';
@@ -0,0 +1,13 @@
+-- Migration 017: Content hashes for incremental document import
+-- Created: 2026-10-19
+-- Purpose: services/rag/load_documents.py skips unchanged documents and reuses
+--          embeddings of unchanged chunks instead of re-embedding every run
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE IF EXISTS document_chunks ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+-- Re-imports look documents up by source path
+CREATE INDEX IF NOT EXISTS idx_documents_file_path ON documents(file_path);
+
+-- Embedding reuse looks chunks up by content hash
+CREATE INDEX IF NOT EXISTS idx_document_chunks_content_hash ON document_chunks(content_hash);
@@ -0,0 +1,22 @@
+-- Migration 018: Server-side university chat memory
+-- Created: 2026-10-19
+-- Purpose: Chat sessions are looked up by session_id and their turns stored append-only
+--          (live state in Redis, persisted by tasks.chat_sessions.persist_chat_sessions)
+
+ALTER TABLE university_chat_sessions ADD COLUMN IF NOT EXISTS session_id VARCHAR(100);
+ALTER TABLE university_chat_sessions ADD COLUMN IF NOT EXISTS summary TEXT;
+ALTER TABLE university_chat_sessions ADD COLUMN IF NOT EXISTS summarized_turns INTEGER DEFAULT 0;
+ALTER TABLE university_chat_sessions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW();
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_university_chat_sessions_session_id ON university_chat_sessions(session_id);
+
+CREATE TABLE IF NOT EXISTS university_chat_messages (
+    chat_session_id INTEGER NOT NULL REFERENCES university_chat_sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (chat_session_id, seq)
+);
+
+COMMENT ON TABLE university_chat_messages IS 'Append-only turns of university chat sessions; seq is the 0-based position in the session';
@@ -0,0 +1,27 @@
+-- Migration 019: Document processing jobs
+-- Created: 2026-10-19
+-- Purpose: Table behind main.DocumentProcessingJob (document uploads, presigned
+--          direct uploads waiting in "uploading", and the OCR pipeline state)
+
+CREATE TABLE IF NOT EXISTS document_processing_jobs (
+    document_id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    filename VARCHAR NOT NULL,
+    raw_object_name VARCHAR NOT NULL,
+    processed_object_name VARCHAR,
+    upload_id VARCHAR,
+    status VARCHAR DEFAULT 'pending',
+    progress INTEGER DEFAULT 0,
+    document_type VARCHAR,
+    confidence DOUBLE PRECISION,
+    extracted_fields JSON,
+    summary TEXT,
+    filled_template_path VARCHAR,
+    error_message TEXT,
+    uploaded_at TIMESTAMP DEFAULT NOW(),
+    processing_started_at TIMESTAMP,
+    processed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_processing_jobs_user_id ON document_processing_jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_document_processing_jobs_status ON document_processing_jobs(status);
@@ -0,0 +1,33 @@
+-- Migration 020: Catalog version counter
+-- Created: 2026-10-19
+-- Purpose: services/catalog_service.catalog_version() reads one counter that
+--          every write to universities or programs bumps (in-place edits and
+--          deactivations included), for catalog cache keys and ETags
+
+CREATE TABLE IF NOT EXISTS catalog_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO catalog_state (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_catalog_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END
+$$;
+
+-- Statement-level, so a bulk import bumps the version once
+DROP TRIGGER IF EXISTS trg_universities_catalog_version ON universities;
+CREATE TRIGGER trg_universities_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON universities
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+
+DROP TRIGGER IF EXISTS trg_programs_catalog_version ON programs;
+CREATE TRIGGER trg_programs_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON programs
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
@@ -0,0 +1,9 @@
+-- Migration 021: Idempotent OpenAI usage drain
+-- Created: 2026-10-19
+-- Purpose: Store each event under its Redis stream entry id, so an entry delivered
+--          twice (crash before XACK, claimed by another drain) is inserted and
+--          rolled up once (see services/openai_usage.py)
+
+ALTER TABLE openai_usage ADD COLUMN IF NOT EXISTS stream_id VARCHAR(32);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_openai_usage_stream_id ON openai_usage(stream_id);
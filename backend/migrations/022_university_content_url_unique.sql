@@ -0,0 +1,18 @@
+-- Migration 022: One university_content row per (university_id, url)
+-- Created: 2026-10-19
+-- Purpose: Web search write-back inserts with ON CONFLICT (university_id, url),
+--          which needs a unique index; tables built by create_all never had one
+--          (see services/web_search.py)
+
+-- Keep the oldest row of any duplicated page
+DELETE FROM university_content a
+USING university_content b
+WHERE a.university_id = b.university_id
+  AND a.url = b.url
+  AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_university_content_university_url
+    ON university_content(university_id, url);
+
+-- Rows written by raw INSERTs before is_active was set explicitly
+UPDATE university_content SET is_active = TRUE WHERE is_active IS NULL;
@@ -149,6 +149,20 @@ class LawyerPublicProfile(BaseModel):
         from_attributes = True
 
 
+class LawyerSearchFacets(BaseModel):
+    """Number of matching lawyers per facet value"""
+    specializations: dict = {}
+    languages: dict = {}
+    jurisdictions: dict = {}
+
+
+class LawyerSearchResponse(BaseModel):
+    """Lawyer search page with keyset cursor and optional facet counts"""
+    lawyers: List[LawyerPublicProfile]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+    facets: Optional[LawyerSearchFacets] = None
+
+
 class LawyerPrivateProfile(BaseModel):
     """Private lawyer profile (for lawyer themselves)"""
     id: int
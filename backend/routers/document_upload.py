@@ -8,6 +8,7 @@ from typing import Optional
 import logging
 from pathlib import Path
 import tempfile
+import shutil
 import os
 
 from services.document_classifier import DocumentClassifier
@@ -16,6 +17,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/documents", tags=["Documents"])
 
+# Chunk size for copying uploads to disk
+COPY_CHUNK_SIZE = 1024 * 1024
+
 
 @router.post("/upload-with-classification")
 async def upload_document_with_classification(
@@ -56,10 +60,9 @@ async def upload_document_with_classification(
                 detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Save file temporarily
+        # Save file temporarily (copied in chunks, never fully in memory)
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
+            shutil.copyfileobj(file.file, tmp_file, COPY_CHUNK_SIZE)
             tmp_path = tmp_file.name
         
         try:
@@ -65,13 +65,19 @@ async def detailed_health():
     
     # 3. Перевірити MinIO
     try:
-        from services.doc_processor.storage import MinIOStorage
-        storage = MinIOStorage()
-        # Просто перевірити що підключення є
-        health_status["components"]["minio"] = {
-            "status": "healthy",
-            "message": "Connected"
-        }
+        from services.doc_processor.storage import get_storage
+        storage = get_storage()
+        # Один запит через спільний клієнт
+        if await storage.is_available_async():
+            health_status["components"]["minio"] = {
+                "status": "healthy",
+                "message": "Connected"
+            }
+        else:
+            health_status["components"]["minio"] = {
+                "status": "unhealthy",
+                "message": "Not reachable"
+            }
     except Exception as e:
         health_status["components"]["minio"] = {
             "status": "unhealthy",
@@ -11,15 +11,21 @@ router = APIRouter()
 get_db = None
 get_current_user = None
 
+
+def _db():
+    """Resolve the injected get_db at request time"""
+    yield from get_db()
+
 @router.get("/api/admin/price-monitoring/status")
 async def get_price_monitoring_status(
     current_user=Depends(lambda: get_current_user),
-    db: Session = Depends(lambda: get_db)
+    db: Session = Depends(_db)
 ):
     """
     Get current pricing metrics and alert status
     """
-    from tasks.price_monitoring import analyze_margin_from_logs, analyze_openai_cost_trend, THRESHOLDS
+    from tasks.price_monitoring import analyze_margin, analyze_openai_cost_trend, THRESHOLDS
+    from services import openai_usage
     from main import User
     
     # Calculate metrics
@@ -29,8 +35,8 @@ async def get_price_monitoring_status(
     ).count()
     
     high_usage_percent = (high_usage_users / total_users * 100) if total_users > 0 else 0
-    margin_data = analyze_margin_from_logs()
-    cost_trend = analyze_openai_cost_trend()
+    margin_data = analyze_margin(db)
+    cost_trend = analyze_openai_cost_trend(db)
     
     # Determine alert status
     alerts = []
@@ -55,6 +61,7 @@ async def get_price_monitoring_status(
             'high_usage_users': high_usage_users,
             'margin_data': margin_data,
             'cost_trend': cost_trend,
+            'openai_usage': openai_usage.usage_summary(db),
         }
     }
 
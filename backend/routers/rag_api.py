@@ -15,7 +15,9 @@ from datetime import datetime
 import logging
 
 from services.rag.retrieval_chain import RetrievalChain
-from services.cache import cache
+from services.cache_service import cache
+
+DOCUMENTS_CACHE_TAG = "rag:documents"
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -175,7 +177,7 @@ async def list_documents(
     """
     try:
         # Generate cache key based on filters
-        cache_key = cache.generate_key(
+        cache_key = cache.make_key(
             "documents_list",
             current_user.get('sub', 'unknown'),
             practice_area or '',
@@ -263,8 +265,8 @@ async def list_documents(
             total=total
         )
         
-        # Cache for 5 minutes
-        cache.set(cache_key, result.dict(), expire=300)
+        # Cache for 5 minutes; the list is shared, so any document change invalidates it
+        cache.set(cache_key, result.dict(), ttl=300, tags=[DOCUMENTS_CACHE_TAG])
         
         return result
     
@@ -383,10 +385,8 @@ async def delete_document(
         db.execute(delete_query, {'doc_id': document_id})
         db.commit()
         
-        # Invalidate document list cache for this user
-        user_id = current_user.get('sub', 'unknown')
-        # Delete all possible cache variations for this user
-        print(f"🗑️ Інвалідація кешу документів для користувача {user_id}")
+        # Invalidate every cached document list page/filter combination
+        cache.invalidate_tags(DOCUMENTS_CACHE_TAG)
         
         return {
             'message': f'Document {document_id} deleted successfully',
@@ -5,6 +5,9 @@ Analyzes legal cases using RAG and provides recommendations with MANDATORY legal
 Every response MUST include references to specific laws, paragraphs, and articles.
 
 Integrates with RAG system to extract citations from real Slovak laws.
+Citations are validated against the local statute index (legal_docs/), and
+answers without citations get them attached from the index instead of a
+second LLM round-trip.
 """
 
 from typing import Dict, List, Optional, Tuple
@@ -15,17 +18,24 @@ from sqlalchemy.orm import Session
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 
-from services.rag import create_rag_chain
+from services.rag import create_rag_chain, get_embedding_service
+from services.statute_index import get_statute_index
+
+# Minimum statute search score (0..1, absolute) for attaching a statute;
+# without embeddings this is a BM25 score of ~3.3, more than one common word
+MIN_ATTACH_SCORE = 0.4
+MAX_ATTACHED_CITATIONS = 3
 
 
 class LegalCitation:
     """Represents a legal citation with law, paragraph, and article."""
     
-    def __init__(self, law_name: str, paragraph: str, article: str = None, text: str = None):
+    def __init__(self, law_name: str, paragraph: str, article: str = None, text: str = None, verified: bool = False):
         self.law_name = law_name
         self.paragraph = paragraph
         self.article = article
         self.text = text
+        self.verified = verified  # Found in the local statute index
     
     def format(self) -> str:
         """Format citation for display."""
@@ -43,6 +53,7 @@ class LegalCitation:
             "paragraph": self.paragraph,
             "article": self.article,
             "text": self.text,
+            "verified": self.verified,
             "formatted": self.format()
         }
 
@@ -57,6 +68,7 @@ class AICaseAnalyzer:
     
     def __init__(self, db: Session):
         self.db = db
+        self.statutes = get_statute_index()
         self.llm = ChatOpenAI(model="gpt-4", temperature=0.1)
         
         # Initialize RAG chain with legal-specific prompt
@@ -161,14 +173,13 @@ Base your answer ONLY on this context."""
         rag_response = rag_result['answer']
         sources = rag_result.get('sources', [])
         
-        # Extract citations
-        citations = self.extract_citations(rag_response)
+        # Extract citations and check them against the statute index
+        citations = self.validate_citations(self.extract_citations(rag_response))
         
-        # Validate that citations exist
+        # No citations: attach the most relevant statutes from the local index
         if not citations:
-            # Force citation by querying specific laws
-            rag_response = self._force_citation(query, rag_response)
-            citations = self.extract_citations(rag_response)
+            case_text = f"{case_data.get('title', '')}\n{case_data.get('description', '')}\n{rag_response}"
+            rag_response, citations = await self._attach_citations(case_text, rag_response)
         
         # Determine if lawyer is needed
         needs_lawyer, confidence = self._assess_complexity(case_data, rag_response)
@@ -205,28 +216,53 @@ Description: {case_data.get('description', 'N/A')}
         
         return query
     
-    async def _force_citation(self, query: str, response: str) -> str:
-        """Force AI to provide citations if none found."""
-        follow_up = f"""Your previous response lacked specific legal citations.
-
-Original query: {query}
-
-Please provide the EXACT same analysis but with:
-- Specific law names (e.g., **Občiansky zákonník**)
-- Paragraph numbers (§ 420)
-- Article numbers where applicable (čl. 1)
-
-Format: **Law Name**, § paragraph, čl. article
-
-Use ONLY the legal context from the database."""
+    def validate_citations(self, citations: List[LegalCitation]) -> List[LegalCitation]:
+        """
+        Resolve citations against the statute index.
         
-        # Use RAG again with stricter prompt
-        result = await self.rag_chain.query(
-            question=follow_up,
-            filters={'practice_area': 'civil'},
-            top_k=5
+        Resolved citations get the canonical law name, the statute text
+        (the cited subsection if čl. matches one) and verified=True. Others
+        are kept unverified, since the index only holds excerpts.
+        """
+        for citation in citations:
+            paragraph = self.statutes.get(citation.law_name, citation.paragraph)
+            if paragraph is None:
+                continue
+            citation.law_name = paragraph.code
+            citation.text = paragraph.subsections.get(citation.article) or paragraph.text
+            citation.verified = True
+        return citations
+    
+    async def _attach_citations(self, text: str, response: str) -> Tuple[str, List[LegalCitation]]:
+        """
+        Attach the statutes most relevant to a case when the answer cites none.
+        
+        Returns:
+            (response with a legal basis section appended, citations)
+        """
+        matches = await self.statutes.search(
+            text,
+            top_k=MAX_ATTACHED_CITATIONS,
+            embedding_service=get_embedding_service()
         )
-        return result['answer']
+        paragraphs = [paragraph for paragraph, score in matches if score >= MIN_ATTACH_SCORE]
+        citations = [
+            LegalCitation(
+                law_name=paragraph.code,
+                paragraph=paragraph.number,
+                text=paragraph.text,
+                verified=True
+            )
+            for paragraph in paragraphs
+        ]
+        if not citations:
+            return response, citations
+        
+        legal_basis = "\n".join(
+            f"- {citation.format()} ({paragraph.title})"
+            for citation, paragraph in zip(citations, paragraphs)
+        )
+        return f"{response}\n\n**Právny základ:**\n{legal_basis}", citations
     
     def _assess_complexity(self, case_data: Dict, analysis: str) -> Tuple[bool, float]:
         """
@@ -387,13 +423,10 @@ Provide answer with specific legal citations (law name, §, čl.)"""
         )
         response = rag_result['answer']
         
-        # Extract citations
-        citations = self.extract_citations(response)
-        
-        # Force citation if none found
+        # Extract and validate citations; attach from the statute index if none
+        citations = self.validate_citations(self.extract_citations(response))
         if not citations:
-            response = self._force_citation(query, response)
-            citations = self.extract_citations(response)
+            response, citations = await self._attach_citations(f"{message}\n{response}", response)
         
         return {
             "answer": response,
@@ -0,0 +1,240 @@
+"""
+Answer Cache
+
+Semantic cache of chat answers for repeated first-turn questions
+("tuition at Comenius University", "brigády v Bratislave").
+
+Answers are stored per scope (service, university or city, language, ...)
+together with the embedding of the question. A new question is answered
+from the cache when its embedding is within SIMILARITY_THRESHOLD (cosine)
+of a stored question in the same scope, so near-duplicates skip retrieval,
+web search and the chat completion entirely.
+
+Entries expire after ANSWER_TTL and are tied to cache tags (see
+CacheService.invalidate_tags): refreshing the underlying content, e.g.
+re-scraping a university or changing a city's agencies, invalidates every
+answer built from it.
+Only first-turn questions are cached; follow-ups depend on the conversation.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+
+from services.cache_service import cache, dumps, key_part, loads
+from services.embedding_cache import normalize
+from services.metrics import CACHE_EVENTS
+
+ANSWER_TTL = int(os.getenv('ANSWER_CACHE_TTL', 86400))  # 1 day
+SIMILARITY_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', 0.96))  # ada-002 paraphrases score ~0.95+
+MAX_ENTRIES_PER_SCOPE = 200
+SCOPE_MIRROR_TTL = 30  # seconds a worker reuses its copy of a scope's question vectors
+
+DTYPE = np.dtype("<f4")
+
+
+def university_tag(university_id: int) -> str:
+    """Tag of everything derived from a university's scraped content"""
+    return f"university:{university_id}"
+
+
+def agencies_tag(kind: str, country_code: str, city: str) -> str:
+    """Tag of everything derived from a city's agencies (kind: 'jobs' or 'housing')"""
+    return f"agencies:{kind}:{country_code.upper()}:{city.strip().lower()}"
+
+
+AGENCY_TAGS = "answer_cache_agency_tags"  # Session.info key of tags to invalidate on commit
+
+
+def invalidate_on_agency_change(model, kind: str):
+    """
+    Invalidate the agencies tag of every city whose `model` rows change.
+
+    Tags are collected while a session flushes and invalidated once it
+    commits; an updated row invalidates both its old and new city.
+    Writes that bypass the ORM must call answer_cache.invalidate themselves.
+    """
+    def collect(mapper, connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        countries = {target.country_code, *get_history(target, "country_code").deleted}
+        cities = {target.city, *get_history(target, "city").deleted}
+        session.info.setdefault(AGENCY_TAGS, set()).update(
+            agencies_tag(kind, country, city) for country in countries for city in cities if country and city
+        )
+
+    for change in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, change, collect)
+    # Load the old city and country before they are overwritten, so the history has them
+    for attribute in (model.city, model.country_code):
+        event.listen(attribute, "set", lambda *args: None, active_history=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_agency_tags(session):
+    tags = session.info.pop(AGENCY_TAGS, None)
+    if tags:
+        answer_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_agency_tags(session):
+    session.info.pop(AGENCY_TAGS, None)
+
+
+class AnswerCache:
+    """Per-scope semantic answer cache in Redis"""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, ttl: int = ANSWER_TTL):
+        self.threshold = threshold
+        self.ttl = ttl
+        self._embedding_service = None
+        # scope key -> (expires at, entry ids, normalized question vectors)
+        self._mirror: Dict[str, Tuple[float, List[bytes], np.ndarray]] = {}
+        self._mirror_lock = threading.Lock()
+
+    def _embedder(self):
+        if self._embedding_service is None:
+            from services.embedding_service import EmbeddingService
+            self._embedding_service = EmbeddingService()
+        return self._embedding_service
+
+    def _scope_key(self, scope: Iterable) -> str:
+        return f"{cache.prefix}answers:{key_part(list(scope))}"
+
+    def _count(self, event: str):
+        CACHE_EVENTS.inc(event=f"answer_{event}")
+
+    async def embed(self, question: str) -> Optional[np.ndarray]:
+        """Unit-length embedding of a question, or None if unavailable"""
+        vector = np.asarray(await self._embedder().generate_embedding(normalize(question)), dtype=DTYPE)
+        norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+        return vector / norm if norm > 0 else None
+
+    def _vectors(self, key: str) -> Tuple[List[bytes], np.ndarray]:
+        """Entry ids and question vectors of a scope (mirrored briefly in process)"""
+        with self._mirror_lock:
+            mirrored = self._mirror.get(key)
+        if mirrored and mirrored[0] > time.monotonic():
+            return mirrored[1], mirrored[2]
+
+        stored = cache.redis_client.hgetall(f"{key}:vectors")
+        ids = list(stored)
+        matrix = (
+            np.stack([np.frombuffer(stored[entry_id], dtype=DTYPE) for entry_id in ids])
+            if ids else np.zeros((0, 0), dtype=DTYPE)
+        )
+        with self._mirror_lock:
+            self._mirror[key] = (time.monotonic() + SCOPE_MIRROR_TTL, ids, matrix)
+        return ids, matrix
+
+    def _forget(self, key: str):
+        with self._mirror_lock:
+            self._mirror.pop(key, None)
+
+    async def lookup(self, scope: Iterable, question: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Cached answer for a question similar to this one.
+
+        Args:
+            scope: Values that must match exactly (service, university, language, ...)
+            question: User's question
+
+        Returns:
+            (answer or None, question embedding to pass to store())
+        """
+        try:
+            embedding = await self.embed(question)
+            if embedding is None:
+                return None, None
+
+            key = self._scope_key(scope)
+            ids, matrix = self._vectors(key)
+            if not ids or matrix.shape[1] != embedding.shape[0]:
+                self._count("misses")
+                return None, embedding
+
+            similarities = matrix @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self._count("misses")
+                return None, embedding
+
+            entry_id = ids[best]
+            data = cache.redis_client.hget(f"{key}:answers", entry_id)
+            entry = loads(data) if data is not None else None
+            stale = entry is None or entry["expires_at"] < time.time()
+            if not stale and entry["versions"]:
+                current = cache.tag_versions(entry["versions"])
+                stale = any(current[tag] != version for tag, version in entry["versions"].items())
+
+            if stale:
+                cache.redis_client.hdel(f"{key}:vectors", entry_id)
+                cache.redis_client.hdel(f"{key}:answers", entry_id)
+                self._forget(key)
+                self._count("stale")
+                return None, embedding
+
+            self._count("hits")
+            return entry["answer"], embedding
+
+        except Exception as e:
+            print(f"Answer cache lookup error: {e}")
+            return None, None
+
+    def store(self, scope: Iterable, question: str, answer: str, embedding: Optional[np.ndarray], tags: Iterable[str] = ()):
+        """
+        Cache an answer to a first-turn question.
+
+        Args:
+            scope: Same scope as passed to lookup()
+            question: User's question
+            answer: Generated answer
+            embedding: Question embedding returned by lookup()
+            tags: Invalidation tags the answer depends on
+        """
+        if embedding is None or not answer:
+            return
+
+        try:
+            key = self._scope_key(scope)
+            entry_id = hashlib.sha256(normalize(question).encode("utf-8")).hexdigest()[:16].encode()
+            versions = cache.tag_versions(tags) if tags else {}
+            entry = {
+                "question": question,
+                "answer": answer,
+                "expires_at": time.time() + self.ttl,
+                "versions": versions,
+            }
+
+            pipe = cache.redis_client.pipeline(transaction=False)
+            pipe.hset(f"{key}:vectors", entry_id, embedding.astype(DTYPE).tobytes())
+            pipe.hset(f"{key}:answers", entry_id, dumps(entry))
+            pipe.expire(f"{key}:vectors", self.ttl)
+            pipe.expire(f"{key}:answers", self.ttl)
+            pipe.hlen(f"{key}:vectors")
+            size = pipe.execute()[-1]
+
+            if size > MAX_ENTRIES_PER_SCOPE:
+                # Scope full: drop it and start over rather than tracking LRU order
+                cache.redis_client.delete(f"{key}:vectors", f"{key}:answers")
+            self._forget(key)
+
+        except Exception as e:
+            print(f"Answer cache store error: {e}")
+
+    def invalidate(self, *tags: str) -> bool:
+        """Invalidate every cached answer stored under these tags"""
+        return cache.invalidate_tags(*tags)
+
+
+# Global answer cache instance
+answer_cache = AnswerCache()
@@ -2,107 +2,571 @@
 Redis Cache Service for Student Advisor Platform
 
 Provides caching layer for frequently accessed data to reduce database load.
+
+Two tiers:
+- L1: a per-process LRU with short TTLs, so hot keys are served without a
+  network round trip
+- L2: Redis, shared by every worker
+
+Keys are namespaced and versioned (``sa:v1:<key>``); bumping CACHE_VERSION
+after a serialization change orphans old entries instead of misreading
+them. Values are serialized with orjson when it is installed, json
+otherwise. get_or_set() lets only one worker recompute an expired key while
+the others wait for its result.
+
+Entries can be stored under tags (e.g. ``universities:SK`` or
+``user:42:documents``). Each tag has a version counter in Redis and every
+entry records the versions it was computed against; invalidate_tags()
+bumps the counters, which makes all of those entries stale in O(1)
+without scanning the keyspace.
 """
 
-import redis
+import asyncio
+import hashlib
+import inspect
 import json
 import os
-from typing import Optional, Any
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import wraps
-import hashlib
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple, Union
+
+import redis
+
+from services.metrics import CACHE_EVENTS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+CACHE_NAMESPACE = os.getenv('CACHE_NAMESPACE', 'sa')
+CACHE_VERSION = 2  # 2: values stored as [tag versions, value]
+
+L1_MAX_ENTRIES = int(os.getenv('CACHE_L1_MAX_ENTRIES', 1024))
+L1_TTL = int(os.getenv('CACHE_L1_TTL', 30))  # seconds; bounds cross-worker staleness
+
+LOCK_TIMEOUT = 10.0  # seconds a recompute may hold the single-flight lock
+LOCK_POLL_INTERVAL = 0.05
+
+TAG_VERSION_TTL = 5  # seconds a worker trusts its copy of a tag version
+TAG_CACHE_MAX_ENTRIES = 10000
+
+MAX_KEY_PART_LENGTH = 64
+
+_MISSING = object()
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a value for storage"""
+    if orjson is not None:
+        return orjson.dumps(
+            value,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(value, default=str, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """Deserialize a stored value"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def key_part(value: Any) -> str:
+    """
+    Render one component of a cache key.
+
+    Short primitives are used verbatim; long strings and structured values
+    (lists, dicts, pydantic models, ...) are replaced by a digest of their
+    serialized form, so every argument contributes to the key.
+
+    Raises:
+        TypeError: If the value cannot be serialized
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return str(value)
+    if isinstance(value, str) and len(value) <= MAX_KEY_PART_LENGTH and ':' not in value:
+        return value
+
+    if hasattr(value, 'model_dump'):
+        value = value.model_dump()
+    try:
+        data = dumps(value)
+    except TypeError as e:
+        raise TypeError(f"Cannot build cache key from {type(value).__name__}: {e}")
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int = L1_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes, ttl: float):
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
 
 class CacheService:
-    """Redis caching service with automatic serialization"""
-    
-    def __init__(self):
-        redis_url = os.getenv('REDIS_URL', 'redis://redis:6379/0')
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+    """Two-tier (in-process LRU + Redis) cache with single-flight recomputation"""
+
+    # Delete the lock only if we still own it
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        namespace: str = CACHE_NAMESPACE,
+        version: int = CACHE_VERSION,
+        l1_max_entries: int = L1_MAX_ENTRIES,
+        l1_ttl: float = L1_TTL
+    ):
+        redis_url = redis_url or os.getenv('REDIS_URL', 'redis://redis:6379/0')
+        self.redis_client = redis.from_url(
+            redis_url,
+            decode_responses=False,
+            socket_connect_timeout=2,
+            socket_timeout=2
+        )
+        self.prefix = f"{namespace}:v{version}:"
         self.default_ttl = 3600  # 1 hour
-    
-    def get(self, key: str) -> Optional[Any]:
+        self.l1 = LRUCache(l1_max_entries)
+        self.l1_ttl = l1_ttl
+
+        self._stats = dict.fromkeys(
+            ('l1_hits', 'l2_hits', 'misses', 'stale', 'sets', 'computes', 'lock_waits', 'invalidations', 'errors'), 0
+        )
+        self._stats_lock = threading.Lock()
+        self._flights: Dict[str, list] = {}
+        self._flights_lock = threading.Lock()
+        self._async_flights: Dict[str, list] = {}
+        self._tags: Dict[str, Tuple[float, int]] = {}
+        self._tags_lock = threading.Lock()
+
+    # ----------------------------------------
+    # Keys and metrics
+    # ----------------------------------------
+
+    def make_key(self, prefix: str, *parts: Any) -> str:
+        """Build a cache key like ``prefix:part1:part2`` (see key_part)"""
+        return ':'.join([prefix, *(key_part(part) for part in parts)])
+
+    def _full_key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+        CACHE_EVENTS.inc(amount, event=name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['l1_hits'] + stats['l2_hits'] + stats['misses'] + stats['stale']
+        stats['hit_ratio'] = round((stats['l1_hits'] + stats['l2_hits']) / lookups, 4) if lookups else 0.0
+        stats['l1_entries'] = len(self.l1)
+        return stats
+
+    # ----------------------------------------
+    # Basic operations
+    # ----------------------------------------
+
+    def _lookup(self, key: str) -> Any:
+        """Value for key from L1, then L2; _MISSING if absent or stale"""
+        full_key = self._full_key(key)
+
+        data = self.l1.get(full_key)
+        tier = 'l1_hits'
+        if data is None:
+            try:
+                data = self.redis_client.get(full_key)
+            except Exception as e:
+                print(f"Cache get error: {e}")
+                self._count('errors')
+                data = None
+
+            if data is None:
+                self._count('misses')
+                return _MISSING
+
+            tier = 'l2_hits'
+            self.l1.set(full_key, data, self.l1_ttl)
+
+        versions, value = loads(data)
+        if versions:
+            current = self.tag_versions(versions)
+            if any(current[tag] != version for tag, version in versions.items()):
+                self._count('stale')
+                self.l1.delete(full_key)
+                return _MISSING
+
+        self._count(tier)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
         """Get value from cache"""
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None) -> bool:
+        """Set value in cache with TTL, optionally under invalidation tags"""
+        return self._store(key, value, ttl, self.tag_versions(tags) if tags else None)
+
+    def _store(self, key: str, value: Any, ttl: Optional[int], versions: Optional[Dict[str, int]]) -> bool:
+        """Write [versions, value] to both tiers"""
+        ttl = ttl or self.default_ttl
+        full_key = self._full_key(key)
         try:
-            value = self.redis_client.get(key)
-            if value:
-                return json.loads(value)
-            return None
-        except Exception as e:
-            print(f"Cache get error: {e}")
-            return None
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in cache with TTL"""
+            data = dumps([versions, value])
+        except TypeError as e:
+            print(f"Cache set error: {e}")
+            self._count('errors')
+            return False
+
+        self.l1.set(full_key, data, min(ttl, self.l1_ttl))
+        self._count('sets')
         try:
-            ttl = ttl or self.default_ttl
-            serialized = json.dumps(value, default=str)
-            self.redis_client.setex(key, ttl, serialized)
+            self.redis_client.setex(full_key, ttl, data)
             return True
         except Exception as e:
             print(f"Cache set error: {e}")
+            self._count('errors')
             return False
-    
+
     def delete(self, key: str) -> bool:
         """Delete key from cache"""
+        full_key = self._full_key(key)
+        self.l1.delete(full_key)
         try:
-            self.redis_client.delete(key)
+            self.redis_client.delete(full_key)
             return True
         except Exception as e:
             print(f"Cache delete error: {e}")
+            self._count('errors')
             return False
-    
-    def clear_pattern(self, pattern: str) -> int:
-        """Clear all keys matching pattern"""
+
+    # ----------------------------------------
+    # Tags
+    # ----------------------------------------
+
+    def _tag_key(self, tag: str) -> str:
+        return self._full_key(f"tag:{tag}")
+
+    def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        """
+        Current version of each tag (0 if never invalidated).
+
+        Versions are remembered per process for TAG_VERSION_TTL seconds, so
+        validating L1 hits rarely needs Redis; the rest come from one MGET.
+        """
+        now = time.monotonic()
+        versions: Dict[str, int] = {}
+        missing = []
+        with self._tags_lock:
+            for tag in tags:
+                entry = self._tags.get(tag)
+                if entry is not None and entry[0] > now:
+                    versions[tag] = entry[1]
+                else:
+                    missing.append(tag)
+
+        if not missing:
+            return versions
+
+        try:
+            fetched = self.redis_client.mget([self._tag_key(tag) for tag in missing])
+        except Exception as e:
+            print(f"Cache tag error: {e}")
+            self._count('errors')
+            versions.update(dict.fromkeys(missing, 0))
+            return versions
+
+        with self._tags_lock:
+            if len(self._tags) > TAG_CACHE_MAX_ENTRIES:
+                self._tags = {tag: entry for tag, entry in self._tags.items() if entry[0] > now}
+            for tag, raw in zip(missing, fetched):
+                version = int(raw) if raw is not None else 0
+                versions[tag] = version
+                self._tags[tag] = (now + TAG_VERSION_TTL, version)
+        return versions
+
+    def invalidate_tags(self, *tags: str) -> bool:
+        """
+        Invalidate every entry stored under any of the tags.
+
+        One INCR per tag; no keys are scanned or deleted. Other workers see
+        the change within TAG_VERSION_TTL seconds, this one immediately.
+        """
+        if not tags:
+            return True
+
+        self._count('invalidations', len(tags))
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(self._tag_key(tag))
+            new_versions = pipe.execute()
+        except Exception as e:
+            print(f"Cache invalidate error: {e}")
+            self._count('errors')
+            # Tag versions are unknown; at least stop serving this worker's copies
+            self.l1.clear()
+            with self._tags_lock:
+                for tag in tags:
+                    self._tags.pop(tag, None)
+            return False
+
+        expires_at = time.monotonic() + TAG_VERSION_TTL
+        with self._tags_lock:
+            for tag, version in zip(tags, new_versions):
+                self._tags[tag] = (expires_at, int(version))
+        return True
+
+    # ----------------------------------------
+    # Single-flight
+    # ----------------------------------------
+
+    def _acquire(self, key: str, token: str) -> bool:
+        """Take the cross-worker recompute lock; fails open if Redis is down"""
+        try:
+            return bool(self.redis_client.set(
+                self._full_key(f"lock:{key}"), token, nx=True, px=int(LOCK_TIMEOUT * 1000)
+            ))
+        except Exception as e:
+            print(f"Cache lock error: {e}")
+            self._count('errors')
+            return True
+
+    def _release(self, key: str, token: str):
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
-            return 0
+            self.redis_client.eval(self._RELEASE_SCRIPT, 1, self._full_key(f"lock:{key}"), token)
         except Exception as e:
-            print(f"Cache clear error: {e}")
-            return 0
+            print(f"Cache unlock error: {e}")
+            self._count('errors')
+
+    def _lock_held(self, key: str) -> bool:
+        try:
+            return bool(self.redis_client.exists(self._full_key(f"lock:{key}")))
+        except Exception:
+            return False
+
+    @contextmanager
+    def _local_flight(self, key: str):
+        """Serialize recomputation of one key among threads of this process"""
+        with self._flights_lock:
+            entry = self._flights.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._flights_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._flights.pop(key, None)
+
+    def get_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """
+        Get a cached value, computing and storing it on a miss.
+
+        Only one caller across all workers runs compute() for a given key at
+        a time; the others wait (up to LOCK_TIMEOUT) for its result.
+
+        Args:
+            key: Cache key (see make_key)
+            compute: Zero-argument function producing the value
+            ttl: Time to live in seconds (default: 1 hour)
+            tags: Invalidation tags for the stored value (see invalidate_tags)
+
+        Returns:
+            Cached or freshly computed value
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        with self._local_flight(key):
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+
+            token = uuid.uuid4().hex
+            acquired = self._acquire(key, token)
+            if not acquired:
+                self._count('lock_waits')
+                deadline = time.monotonic() + LOCK_TIMEOUT
+                while time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    value = self._lookup(key)
+                    if value is not _MISSING:
+                        return value
+                    if not self._lock_held(key):
+                        break
+
+            try:
+                self._count('computes')
+                # Versions are read before computing so an invalidation that
+                # lands mid-compute leaves the result already stale
+                versions = self.tag_versions(tags) if tags else None
+                value = compute()
+                self._store(key, value, ttl, versions)
+                return value
+            finally:
+                if acquired:
+                    self._release(key, token)
+
+    async def aget_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """Async get_or_set(); compute is a coroutine function"""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        entry = self._async_flights.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    return value
+
+                token = uuid.uuid4().hex
+                acquired = self._acquire(key, token)
+                if not acquired:
+                    self._count('lock_waits')
+                    deadline = time.monotonic() + LOCK_TIMEOUT
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(LOCK_POLL_INTERVAL)
+                        value = self._lookup(key)
+                        if value is not _MISSING:
+                            return value
+                        if not self._lock_held(key):
+                            break
+
+                try:
+                    self._count('computes')
+                    versions = self.tag_versions(tags) if tags else None
+                    value = await compute()
+                    self._store(key, value, ttl, versions)
+                    return value
+                finally:
+                    if acquired:
+                        self._release(key, token)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._async_flights.pop(key, None)
 
 
 # Global cache instance
 cache = CacheService()
 
 
-def cached(ttl: int = 3600, key_prefix: str = ""):
+TagsSpec = Union[Iterable[str], Callable[..., Iterable[str]]]
+
+
+def cached(
+    ttl: int = 3600,
+    key_prefix: str = "",
+    ignore: Tuple[str, ...] = ("db",),
+    tags: Optional[TagsSpec] = None
+):
     """
-    Decorator for caching function results
-    
+    Decorator for caching function results (sync or async)
+
+    Every argument except those named in ``ignore`` (and self/cls) is part
+    of the key; non-primitive arguments are hashed rather than dropped.
+    Recomputation is single-flight (see CacheService.get_or_set).
+
+    ``tags`` is either a fixed list or a function called with the bound
+    arguments that returns the tags for that call.
+
     Usage:
-        @cached(ttl=1800, key_prefix="universities")
-        def get_universities(country: str):
+        @cached(ttl=1800, key_prefix="universities",
+                tags=lambda country, **_: ["universities", f"universities:{country}"])
+        def get_universities(db, country: str):
             return db.query(...)
     """
     def decorator(func):
+        signature = inspect.signature(func)
+        prefix = key_prefix or f"{func.__module__}.{func.__qualname__}"
+        skipped = set(ignore) | {"self", "cls"}
+
+        def build_key(args, kwargs) -> Tuple[str, Optional[list]]:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            parts = [
+                f"{name}={key_part(value)}"
+                for name, value in bound.arguments.items()
+                if name not in skipped
+            ]
+            entry_tags = tags(**bound.arguments) if callable(tags) else tags
+            return cache.make_key(prefix, *parts), (list(entry_tags) if entry_tags else None)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key, entry_tags = build_key(args, kwargs)
+                return await cache.aget_or_set(key, lambda: func(*args, **kwargs), ttl, entry_tags)
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key from function name and arguments
-            key_parts = [key_prefix or func.__name__]
-            
-            # Add positional args
-            for arg in args:
-                if isinstance(arg, (str, int, float, bool)):
-                    key_parts.append(str(arg))
-            
-            # Add keyword args
-            for k, v in sorted(kwargs.items()):
-                if isinstance(v, (str, int, float, bool)):
-                    key_parts.append(f"{k}:{v}")
-            
-            cache_key = ":".join(key_parts)
-            
-            # Try to get from cache
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
-            return result
-        
+            key, entry_tags = build_key(args, kwargs)
+            return cache.get_or_set(key, lambda: func(*args, **kwargs), ttl, entry_tags)
+
         return wrapper
     return decorator
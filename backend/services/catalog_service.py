@@ -0,0 +1,329 @@
+"""
+CATALOG SERVICE
+University and program catalog queries for the educational platform
+
+Listings are built in a single query each: only the requested columns are
+selected, program counts come from one grouped subquery and the university
+name for programs from a join. Pages are keyset-paginated by id.
+
+search_catalog() does ranked full-text and trigram search for the search
+box and autocomplete, using the expression indexes from migration 015.
+
+Every response is tied to a catalog version (a counter bumped by triggers on
+every write to either table, see migration 020; cached briefly and reset
+whenever the "universities" cache tag is invalidated), which is used both in
+cache keys and as the HTTP ETag.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, literal_column, or_, text
+from sqlalchemy.orm import Session
+
+from services.cache_service import cache, key_part
+
+CATALOG_CACHE_TAG = "universities"
+CATALOG_VERSION_TTL = 60  # seconds; picks up direct database edits (import scripts)
+CATALOG_TTL = 3600
+SEARCH_TTL = 300
+
+# Columns a client may request with ?fields=; "id" is always returned
+UNIVERSITY_FIELDS = (
+    "id", "name", "name_local", "type", "city", "country", "description",
+    "website_url", "logo_url", "student_count", "ranking_position", "programs_count"
+)
+PROGRAM_FIELDS = (
+    "id", "university_id", "university_name", "name", "name_local", "degree_level",
+    "field_of_study", "language", "duration_years", "tuition_fee", "description"
+)
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """
+    Parse a comma-separated ?fields= value.
+
+    Args:
+        fields: Requested fields, or None for all
+        allowed: Fields the endpoint supports
+
+    Returns:
+        Field names in canonical order, always including "id"
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        return list(allowed)
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    requested.add("id")
+    return [field for field in allowed if field in requested]
+
+
+def catalog_version(db: Session) -> str:
+    """
+    Current version of the university and program tables.
+
+    Any insert, update (including deactivation) or delete on either table
+    bumps the counter in the same transaction. Cached for
+    CATALOG_VERSION_TTL seconds under the catalog tag, so the common path
+    costs no query and invalidate_tags("universities") takes effect
+    immediately.
+    """
+    def load() -> str:
+        version = db.execute(text("SELECT version FROM catalog_state WHERE id = 1")).scalar()
+        return f"v{version or 0}"
+
+    return cache.get_or_set("catalog:version", load, ttl=CATALOG_VERSION_TTL, tags=[CATALOG_CACHE_TAG])
+
+
+def make_etag(version: str, *params) -> str:
+    """Strong ETag for a catalog response: catalog version + request parameters"""
+    return f'"{version}-{key_part(list(params))[:16]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header matches the ETag"""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _page(rows: list, limit: Optional[int]) -> Dict:
+    """Trim a limit + 1 fetch and compute the next cursor"""
+    if limit is None or len(rows) <= limit:
+        return {"rows": rows, "next_cursor": None}
+    rows = rows[:limit]
+    return {"rows": rows, "next_cursor": rows[-1]["id"]}
+
+
+def list_universities(
+    db: Session,
+    jurisdiction_code: Optional[str] = None,
+    type: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None
+) -> Dict:
+    """
+    List active universities in one query.
+
+    Args:
+        db: Database session
+        jurisdiction_code: Filter by jurisdiction code (e.g. SK, DE)
+        type: Filter by institution type
+        fields: Columns to return (see UNIVERSITY_FIELDS)
+        limit: Page size; None returns every match
+        cursor: Return universities with id greater than this
+
+    Returns:
+        Dict with "universities" and "next_cursor"
+    """
+    from main import University, Program, Jurisdiction
+
+    fields = fields or list(UNIVERSITY_FIELDS)
+    columns = [getattr(University, field).label(field) for field in fields if field != "programs_count"]
+
+    query = db.query(*columns)
+    if "programs_count" in fields:
+        counts = db.query(
+            Program.university_id.label("university_id"),
+            func.count(Program.id).label("programs_count")
+        ).group_by(Program.university_id).subquery()
+        query = query.add_columns(
+            func.coalesce(counts.c.programs_count, 0).label("programs_count")
+        ).outerjoin(counts, counts.c.university_id == University.id)
+
+    query = query.filter(University.is_active == True)
+
+    if jurisdiction_code:
+        # Filter by jurisdiction code through join with jurisdictions table
+        query = query.join(Jurisdiction, University.jurisdiction_id == Jurisdiction.id).filter(Jurisdiction.code == jurisdiction_code)
+
+    if type:
+        query = query.filter(University.type == type)
+
+    if cursor is not None:
+        query = query.filter(University.id > cursor)
+
+    query = query.order_by(University.id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    page = _page([dict(row._mapping) for row in query.all()], limit)
+    return {"universities": page["rows"], "next_cursor": page["next_cursor"]}
+
+
+def list_programs(
+    db: Session,
+    university_id: Optional[int] = None,
+    degree_level: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None
+) -> Dict:
+    """
+    List active programs in one query, with the university name joined in.
+
+    Args:
+        db: Database session
+        university_id: Filter by university
+        degree_level: Filter by degree level
+        fields: Columns to return (see PROGRAM_FIELDS)
+        limit: Page size; None returns every match
+        cursor: Return programs with id greater than this
+
+    Returns:
+        Dict with "programs" and "next_cursor"
+    """
+    from main import University, Program
+
+    fields = fields or list(PROGRAM_FIELDS)
+    columns = [
+        University.name.label(field) if field == "university_name" else getattr(Program, field).label(field)
+        for field in fields
+    ]
+
+    query = db.query(*columns).select_from(Program)
+    if "university_name" in fields:
+        query = query.outerjoin(University, University.id == Program.university_id)
+
+    query = query.filter(Program.is_active == True)
+
+    if university_id:
+        query = query.filter(Program.university_id == university_id)
+
+    if degree_level:
+        query = query.filter(Program.degree_level == degree_level)
+
+    if cursor is not None:
+        query = query.filter(Program.id > cursor)
+
+    query = query.order_by(Program.id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    page = _page([dict(row._mapping) for row in query.all()], limit)
+    return {"programs": page["rows"], "next_cursor": page["next_cursor"]}
+
+
+# Search expressions; these must match the indexes in migrations/015_catalog_search.sql
+_UNIVERSITY_DOCUMENT = literal_column(
+    "to_tsvector('simple', f_unaccent("
+    "coalesce(universities.name, '') || ' ' || coalesce(universities.name_local, '') || ' ' || coalesce(universities.city, '')"
+    "))"
+)
+_UNIVERSITY_NAME = literal_column(
+    "lower(f_unaccent(coalesce(universities.name, '') || ' ' || coalesce(universities.name_local, '')))"
+)
+_PROGRAM_DOCUMENT = literal_column(
+    "to_tsvector('simple', f_unaccent("
+    "coalesce(programs.name, '') || ' ' || coalesce(programs.field_of_study, '')"
+    "))"
+)
+_PROGRAM_NAME = literal_column("lower(f_unaccent(coalesce(programs.name, '')))")
+
+SEARCH_KINDS = ("all", "universities", "programs")
+
+
+def _prefix_query(q: str) -> Optional[str]:
+    """
+    Turn free text into a prefix tsquery ("tech univ" -> "tech:* & univ:*").
+
+    Only word characters are kept so user input can never produce tsquery
+    syntax errors. Returns None if nothing searchable is left.
+    """
+    terms = re.findall(r"\w+", q.lower())
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _search(db: Session, model, document, name, columns: list, q: str, tsquery: str, limit: int, filters: list) -> List[Dict]:
+    """Rank rows matching the full-text prefix query or similar by name"""
+    query_tokens = func.to_tsquery(literal_column("'simple'"), func.f_unaccent(tsquery))
+    needle = func.lower(func.f_unaccent(q))
+    rank = (func.ts_rank(document, query_tokens) + func.similarity(name, needle)).label("rank")
+
+    rows = db.query(*columns, rank).select_from(model).filter(
+        model.is_active == True,
+        or_(document.op("@@")(query_tokens), name.op("%")(needle)),
+        *filters
+    ).order_by(rank.desc(), model.id).limit(limit).all()
+
+    return [dict(row._mapping, rank=round(float(row.rank), 4)) for row in rows]
+
+
+def search_catalog(
+    db: Session,
+    q: str,
+    kind: str = "all",
+    jurisdiction_code: Optional[str] = None,
+    limit: int = 10
+) -> Dict:
+    """
+    Ranked search over university and program names.
+
+    Every word is matched as a prefix, so partial input works for
+    autocomplete, and accents are ignored on both sides ("kobenhavn" finds
+    "København"). Names within trigram similarity of the query also match,
+    which tolerates typos.
+
+    Args:
+        db: Database session
+        q: Search text
+        kind: "all", "universities" or "programs"
+        jurisdiction_code: Restrict to one jurisdiction (e.g. SK, DE)
+        limit: Maximum results per kind
+
+    Returns:
+        Dict with "universities" and/or "programs", best match first
+    """
+    from main import University, Program, Jurisdiction
+
+    if kind not in SEARCH_KINDS:
+        raise ValueError(f"kind must be one of: {', '.join(SEARCH_KINDS)}")
+
+    q = q.strip()
+    tsquery = _prefix_query(q)
+    if tsquery is None:
+        return {key: [] for key in SEARCH_KINDS[1:] if kind in ("all", key)}
+
+    def load() -> Dict:
+        jurisdiction_filters = []
+        if jurisdiction_code:
+            jurisdiction_ids = db.query(Jurisdiction.id).filter(Jurisdiction.code == jurisdiction_code)
+            jurisdiction_filters.append(University.jurisdiction_id.in_(jurisdiction_ids.scalar_subquery()))
+
+        result = {}
+        if kind in ("all", "universities"):
+            result["universities"] = _search(
+                db, University, _UNIVERSITY_DOCUMENT, _UNIVERSITY_NAME,
+                [University.id, University.name, University.name_local, University.city, University.type],
+                q, tsquery, limit, jurisdiction_filters
+            )
+        if kind in ("all", "programs"):
+            program_filters = []
+            if jurisdiction_filters:
+                program_filters.append(Program.university_id.in_(
+                    db.query(University.id).filter(*jurisdiction_filters).scalar_subquery()
+                ))
+            result["programs"] = _search(
+                db, Program, _PROGRAM_DOCUMENT, _PROGRAM_NAME,
+                [Program.id, Program.name, Program.field_of_study, Program.degree_level, Program.university_id],
+                q, tsquery, limit, program_filters
+            )
+        return result
+
+    return cache.get_or_set(
+        cache.make_key("catalog:search", q.lower(), kind, jurisdiction_code or "all", limit),
+        load,
+        ttl=SEARCH_TTL,
+        tags=[CATALOG_CACHE_TAG]
+    )
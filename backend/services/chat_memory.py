@@ -0,0 +1,330 @@
+"""
+CHAT MEMORY
+Server-side conversation memory for university chat sessions
+
+Sessions are looked up by session_id, so clients send only the new message.
+Live state is in Redis:
+- ``chat:<session_id>:turns``: append-only list of compact turns
+  ({"r": role, "c": content, "t": unix time})
+- ``chat:<session_id>:meta``: university, rolling summary and how many of
+  the oldest turns it covers
+
+The prompt history is the summary plus the turns after it, so prompt size
+stays flat as a conversation grows: once the unsummarized turns beyond the
+last KEEP_RECENT_TURNS exceed SUMMARY_TRIGGER_TOKENS, they are folded into
+the summary by a small model after the response has been sent.
+
+Changed sessions are marked dirty and persist() (a periodic task) appends
+their new turns to university_chat_messages. A session that expired from
+Redis is reloaded from Postgres on its next use.
+"""
+
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from openai import AsyncOpenAI
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from services import openai_usage
+from services.cache_service import cache, dumps, loads
+from services.context_assembler import count_tokens
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL = 604800  # 7 days of inactivity before a session leaves Redis
+KEEP_RECENT_TURNS = 6  # newest turns always sent verbatim
+SUMMARY_TRIGGER_TOKENS = 1500  # older unsummarized tokens before a summary is made
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_TOKENS = 300
+SUMMARY_TURN_CHARS = 2000  # per-turn cap in the summarization input
+SUMMARY_LOCK_TTL = 60
+PERSIST_BATCH = 200
+
+SUMMARY_PROMPT = (
+    "Summarize this conversation between a student and a university advisor so the summary can "
+    "replace the original messages. Keep facts, numbers, names, deadlines, the student's goals and "
+    "open questions. Merge in the previous summary if one is given. Write in the language of the "
+    "conversation, at most 150 words."
+)
+
+METRICS_SERVICE = "chat_summary"
+
+
+def _key(session_id: str, part: str) -> str:
+    return f"{cache.prefix}chat:{session_id}:{part}"
+
+
+def _dirty_key() -> str:
+    return f"{cache.prefix}chat:dirty"
+
+
+def _decode_meta(meta: Dict) -> Dict[str, str]:
+    return {
+        (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+        for key, value in meta.items()
+    }
+
+
+def _turn(data: bytes) -> Dict:
+    """Compact stored turn -> {role, content, timestamp}"""
+    turn = loads(data)
+    return {
+        "role": turn["r"],
+        "content": turn["c"],
+        "timestamp": datetime.utcfromtimestamp(turn["t"]).isoformat(),
+    }
+
+
+class ChatMemory:
+    """Redis-backed chat sessions with rolling summaries and Postgres persistence"""
+
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+        self._client = None
+
+    @property
+    def redis(self):
+        return cache.redis_client
+
+    @staticmethod
+    def new_session_id(university_id: int) -> str:
+        return f"univ_{university_id}_{uuid.uuid4().hex}"
+
+    # ----------------------------------------
+    # Loading
+    # ----------------------------------------
+
+    def _rehydrate(self, db: Session, session_id: str) -> Dict[str, str]:
+        """Load a persisted session back into Redis; empty dict if unknown"""
+        from main import UniversityChatSession, UniversityChatMessage
+
+        row = db.query(UniversityChatSession).filter_by(session_id=session_id).first()
+        if row is None:
+            return {}
+
+        messages = db.query(UniversityChatMessage).filter_by(
+            chat_session_id=row.id
+        ).order_by(UniversityChatMessage.seq).all()
+
+        meta = {
+            "university_id": str(row.university_id),
+            "summary": row.summary or "",
+            "summarized": str(row.summarized_turns or 0),
+        }
+        pipe = self.redis.pipeline()
+        pipe.delete(_key(session_id, "meta"), _key(session_id, "turns"))
+        pipe.hset(_key(session_id, "meta"), mapping=meta)
+        if messages:
+            pipe.rpush(_key(session_id, "turns"), *[
+                dumps({"r": m.role, "c": m.content, "t": int((m.created_at or datetime.utcnow()).timestamp())})
+                for m in messages
+            ])
+        pipe.expire(_key(session_id, "meta"), self.ttl)
+        pipe.expire(_key(session_id, "turns"), self.ttl)
+        pipe.execute()
+        return meta
+
+    def _session(self, db: Session, session_id: str, university_id: int) -> Optional[Dict[str, str]]:
+        """Session metadata, or None if unknown or owned by another university"""
+        meta = _decode_meta(self.redis.hgetall(_key(session_id, "meta")))
+        if not meta:
+            meta = self._rehydrate(db, session_id)
+        if not meta or meta.get("university_id") != str(university_id):
+            return None
+        return meta
+
+    def history(self, db: Session, session_id: str, university_id: int) -> Optional[Dict]:
+        """
+        Prompt history of a session: the rolling summary and the turns it
+        does not cover.
+
+        Returns:
+            Dict with "summary" (None if there is none yet) and "messages"
+            (oldest first), or None if the session is unknown, belongs to
+            another university or Redis is unavailable
+        """
+        try:
+            meta = self._session(db, session_id, university_id)
+            if meta is None:
+                return None
+
+            turns = self.redis.lrange(_key(session_id, "turns"), int(meta.get("summarized") or 0), -1)
+            return {
+                "summary": meta.get("summary") or None,
+                "messages": [{"role": turn["role"], "content": turn["content"]} for turn in map(_turn, turns)],
+            }
+        except Exception as e:
+            logger.warning(f"Chat memory unavailable for {session_id}: {e}")
+            return None
+
+    def transcript(self, db: Session, session_id: str, university_id: int) -> Optional[Dict]:
+        """All turns of a session with its summary, or None if unknown"""
+        try:
+            meta = self._session(db, session_id, university_id)
+            if meta is None:
+                return None
+            turns = self.redis.lrange(_key(session_id, "turns"), 0, -1)
+            return {"messages": [_turn(turn) for turn in turns], "summary": meta.get("summary") or None}
+        except Exception as e:
+            logger.warning(f"Chat memory unavailable for {session_id}: {e}")
+            return None
+
+    # ----------------------------------------
+    # Writing
+    # ----------------------------------------
+
+    def append(self, session_id: str, university_id: int, turns: List[Tuple[str, str]]):
+        """Append (role, content) turns to a session, creating it if needed"""
+        now = int(time.time())
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hsetnx(_key(session_id, "meta"), "university_id", str(university_id))
+            pipe.hsetnx(_key(session_id, "meta"), "summarized", "0")
+            pipe.rpush(_key(session_id, "turns"), *[dumps({"r": role, "c": content, "t": now}) for role, content in turns])
+            pipe.expire(_key(session_id, "meta"), self.ttl)
+            pipe.expire(_key(session_id, "turns"), self.ttl)
+            pipe.sadd(_dirty_key(), session_id)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Chat turns not stored for {session_id}: {e}")
+
+    async def summarize(self, session_id: str):
+        """
+        Fold old turns into the rolling summary if they exceed the trigger.
+
+        Runs after the response is sent; one summarization per session at a
+        time. Failures leave the session unchanged.
+        """
+        lock = _key(session_id, "summarizing")
+        try:
+            if not self.redis.set(lock, b"1", nx=True, ex=SUMMARY_LOCK_TTL):
+                return
+        except Exception:
+            return
+
+        try:
+            meta = _decode_meta(self.redis.hgetall(_key(session_id, "meta")))
+            summarized = int(meta.get("summarized") or 0)
+            end = self.redis.llen(_key(session_id, "turns")) - KEEP_RECENT_TURNS
+            if end <= summarized:
+                return
+
+            turns = [_turn(turn) for turn in self.redis.lrange(_key(session_id, "turns"), summarized, end - 1)]
+            if sum(count_tokens(turn["content"]) for turn in turns) < SUMMARY_TRIGGER_TOKENS:
+                return
+
+            conversation = "\n".join(f"{turn['role']}: {turn['content'][:SUMMARY_TURN_CHARS]}" for turn in turns)
+            if meta.get("summary"):
+                conversation = f"Previous summary: {meta['summary']}\n\n{conversation}"
+
+            if self._client is None:
+                self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+            started = time.time()
+            try:
+                response = await self._client.chat.completions.create(
+                    model=SUMMARY_MODEL,
+                    messages=[
+                        {"role": "system", "content": SUMMARY_PROMPT},
+                        {"role": "user", "content": conversation}
+                    ],
+                    temperature=0.2,
+                    max_tokens=SUMMARY_MAX_TOKENS
+                )
+            except Exception:
+                openai_usage.record(METRICS_SERVICE, SUMMARY_MODEL, time.time() - started, error=True)
+                raise
+            openai_usage.record(METRICS_SERVICE, SUMMARY_MODEL, time.time() - started, response.usage)
+
+            pipe = self.redis.pipeline()
+            pipe.hset(_key(session_id, "meta"), mapping={
+                "summary": response.choices[0].message.content.strip(),
+                "summarized": str(end),
+            })
+            pipe.sadd(_dirty_key(), session_id)
+            pipe.execute()
+
+        except Exception as e:
+            logger.warning(f"Chat summary failed for {session_id}: {e}")
+        finally:
+            try:
+                self.redis.delete(lock)
+            except Exception:
+                pass
+
+    # ----------------------------------------
+    # Persistence
+    # ----------------------------------------
+
+    def persist(self, db: Session, batch: int = PERSIST_BATCH) -> int:
+        """
+        Write changed sessions to Postgres: session row upserted, turns not
+        yet stored appended to university_chat_messages.
+
+        Returns:
+            Number of sessions persisted
+        """
+        from main import UniversityChatSession, UniversityChatMessage
+
+        session_ids = [
+            session_id.decode() if isinstance(session_id, bytes) else session_id
+            for session_id in self.redis.spop(_dirty_key(), batch) or []
+        ]
+
+        persisted = 0
+        for session_id in session_ids:
+            try:
+                meta = _decode_meta(self.redis.hgetall(_key(session_id, "meta")))
+                if not meta.get("university_id"):
+                    continue  # Expired before it was persisted
+                turns = [loads(turn) for turn in self.redis.lrange(_key(session_id, "turns"), 0, -1)]
+
+                row = db.query(UniversityChatSession).filter_by(session_id=session_id).first()
+                if row is None:
+                    row = UniversityChatSession(
+                        session_id=session_id,
+                        university_id=int(meta["university_id"]),
+                        session_started=datetime.utcfromtimestamp(turns[0]["t"]) if turns else datetime.utcnow(),
+                        is_active=True
+                    )
+                    db.add(row)
+                    db.flush()
+
+                row.summary = meta.get("summary") or None
+                row.summarized_turns = int(meta.get("summarized") or 0)
+                row.updated_at = datetime.utcnow()
+
+                stored = db.query(func.count(UniversityChatMessage.seq)).filter(
+                    UniversityChatMessage.chat_session_id == row.id
+                ).scalar()
+                db.bulk_insert_mappings(UniversityChatMessage, [
+                    {
+                        "chat_session_id": row.id,
+                        "seq": seq,
+                        "role": turns[seq]["r"],
+                        "content": turns[seq]["c"],
+                        "created_at": datetime.utcfromtimestamp(turns[seq]["t"]),
+                    }
+                    for seq in range(stored, len(turns))
+                ])
+                db.commit()
+                persisted += 1
+
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Chat session {session_id} not persisted: {e}")
+                try:
+                    self.redis.sadd(_dirty_key(), session_id)
+                except Exception:
+                    pass
+
+        return persisted
+
+
+# Global chat memory instance
+chat_memory = ChatMemory()
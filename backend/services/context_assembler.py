@@ -0,0 +1,203 @@
+"""
+Context Assembler
+
+Token-budgeted prompt assembly for the chat services.
+
+Every chat completion gets a prompt budget: the model's context window minus
+the completion, capped at MAX_PROMPT_TOKENS so cost per request is bounded.
+The fixed parts (system prompt template, current message) are counted
+first; what remains is split between retrieved context and conversation
+history:
+- retrieved chunks are ranked by score and added until the context budget
+  is used, the last one truncated to fit;
+- history keeps the most recent turns verbatim; older turns that do not fit
+  are replaced by a one-line digest of the user's earlier questions.
+
+Tokens are counted with tiktoken (cl100k_base) when its encoding can be
+loaded, otherwise estimated at ~4 characters per token.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - estimation fallback
+    tiktoken = None
+
+# Context windows (tokens) of the chat models in use
+CONTEXT_WINDOWS = {
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+MAX_PROMPT_TOKENS = 6000  # cost cap per request, even for large-window models
+HISTORY_SHARE = 0.3  # share of the flexible budget history may take when context needs the rest
+MESSAGE_OVERHEAD = 4  # tokens per chat message for role and separators
+MIN_CHUNK_TOKENS = 50  # don't add a truncated chunk shorter than this
+DIGEST_ITEM_CHARS = 120  # characters kept per earlier question in the history digest
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """cl100k_base encoding, loaded once; None if unavailable (e.g. offline)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    _encoding = tiktoken.get_encoding("cl100k_base") if tiktoken else None
+                except Exception as e:
+                    print(f"tiktoken unavailable, estimating tokens: {e}")
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = "...") -> str:
+    """Text cut to at most max_tokens tokens (suffix marks a cut)"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[:max(max_tokens - 1, 0)]) + suffix
+    return text[:max(max_tokens - 1, 0) * 4] + suffix
+
+
+def prompt_budget(model: str, max_completion_tokens: int, limit: int = MAX_PROMPT_TOKENS) -> int:
+    """Tokens available for the prompt of one completion"""
+    window = CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    return max(min(window - max_completion_tokens, limit), 0)
+
+
+def history_tokens(history: List[Dict]) -> int:
+    """Tokens the history would take verbatim"""
+    return sum(count_tokens(msg.get("content") or "") + MESSAGE_OVERHEAD for msg in _valid(history))
+
+
+def allocate(budget: int, fixed: List[str], history: List[Dict], context_tokens: int,
+             history_share: float = HISTORY_SHARE) -> Tuple[int, int]:
+    """
+    Split a prompt budget between retrieved context and history.
+
+    History takes what it needs, but no more than history_share of the
+    flexible budget unless the context leaves the rest unused.
+
+    Args:
+        budget: Prompt budget (see prompt_budget)
+        fixed: Prompt parts always sent verbatim (system template, message)
+        history: Conversation history
+        context_tokens: Tokens the full retrieved context would take
+
+    Returns:
+        (context budget, history budget) in tokens
+    """
+    available = max(budget - sum(count_tokens(part) + MESSAGE_OVERHEAD for part in fixed), 0)
+    needed = history_tokens(history)
+    history_budget = min(needed, max(int(available * history_share), available - context_tokens))
+    return available - history_budget, history_budget
+
+
+def select_chunks(
+    chunks: List[Dict],
+    max_tokens: int,
+    render: Callable[[int, Dict], str],
+    score_key: str = "similarity",
+    max_chunk_tokens: Optional[int] = None
+) -> List[str]:
+    """
+    Render the best-scoring chunks that fit in max_tokens.
+
+    Args:
+        chunks: Retrieved items with a score under score_key
+        max_tokens: Token budget for all rendered chunks
+        render: Function (rank starting at 1, chunk) -> text
+        score_key: Key holding the relevance score (higher is better)
+        max_chunk_tokens: Cap for any single chunk
+
+    Returns:
+        Rendered chunks, best first
+    """
+    ranked = sorted(chunks, key=lambda chunk: chunk.get(score_key) or 0, reverse=True)
+    parts = []
+    remaining = max_tokens
+
+    for rank, chunk in enumerate(ranked, 1):
+        rendered = render(rank, chunk)
+        if max_chunk_tokens:
+            rendered = truncate_to_tokens(rendered, max_chunk_tokens)
+        tokens = count_tokens(rendered)
+        if tokens > remaining:
+            if remaining >= MIN_CHUNK_TOKENS:
+                parts.append(truncate_to_tokens(rendered, remaining))
+            break
+        parts.append(rendered)
+        remaining -= tokens
+
+    return parts
+
+
+def _valid(history: List[Dict]) -> List[Dict]:
+    return [
+        msg for msg in history or []
+        if isinstance(msg, dict) and msg.get("role") in ("user", "assistant") and msg.get("content")
+    ]
+
+
+def fit_history(history: List[Dict], max_tokens: int) -> List[Dict]:
+    """
+    Conversation history within max_tokens.
+
+    The most recent turns are kept verbatim. If older turns do not fit, they
+    are replaced by a system message listing the user's earlier questions
+    (shortened, most recent first), as far as the remaining budget allows.
+
+    Returns:
+        Messages to send, oldest first
+    """
+    messages = _valid(history)
+    kept: List[Dict] = []
+    remaining = max_tokens
+
+    for position in range(len(messages) - 1, -1, -1):
+        msg = messages[position]
+        tokens = count_tokens(msg["content"]) + MESSAGE_OVERHEAD
+        if tokens > remaining:
+            dropped = messages[:position + 1]
+            break
+        kept.append({"role": msg["role"], "content": msg["content"]})
+        remaining -= tokens
+    else:
+        dropped = []
+
+    kept.reverse()
+
+    earlier = [msg["content"].strip().replace("\n", " ") for msg in reversed(dropped) if msg["role"] == "user"]
+    if earlier and remaining > MIN_CHUNK_TOKENS:
+        digest = "Earlier in this conversation the user asked (most recent first): " + "; ".join(
+            question[:DIGEST_ITEM_CHARS] for question in earlier
+        )
+        kept.insert(0, {"role": "system", "content": truncate_to_tokens(digest, remaining - MESSAGE_OVERHEAD)})
+
+    return kept
@@ -4,10 +4,10 @@ Document Processor Module
 Comprehensive document processing service for Student Advisor platform.
 """
 
-from .storage import MinIOStorage
+from .storage import MinIOStorage, get_storage
 from .ocr_engine import OCREngine
 from .classifier import DocumentClassifier
-from .field_extractor import FieldExtractor
+from .field_extractor import FieldExtractor, FieldScanner, ExtractedField
 from .template_filler import TemplateFiller
 from .processor import DocumentProcessor
 from .ocr_service import perform_ocr, perform_ocr_batch, get_ocr_info
@@ -32,9 +32,12 @@ from .template_filler import (
 
 __all__ = [
     'MinIOStorage',
+    'get_storage',
     'OCREngine',
     'DocumentClassifier',
     'FieldExtractor',
+    'FieldScanner',
+    'ExtractedField',
     'TemplateFiller',
     'DocumentProcessor',
     'perform_ocr',
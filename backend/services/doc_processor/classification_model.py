@@ -15,6 +15,90 @@ from .document_types import DocumentType
 logger = logging.getLogger(__name__)
 
 
+class _KeywordMatcher:
+    """
+    Single-pass keyword counter compiled from classification rules.
+    
+    All keywords are merged into one alternation (longest first) wrapped in a
+    zero-width lookahead, so the text is scanned once no matter how many
+    keywords exist. Keywords nested inside a longer keyword at the same
+    position ('objednávateľ' in 'objednávateľ diela') are credited from a
+    precomputed prefix table, so counts match separate ``\\bkeyword\\b`` scans.
+    """
+    
+    def __init__(self, rules: Dict):
+        self.doc_types = list(rules.keys())
+        
+        # Keywords are matched against lowercased text
+        self.keywords = []
+        self.keyword_index = {}
+        for type_rules in rules.values():
+            for keyword in type_rules['keywords']:
+                keyword = keyword.lower()
+                if keyword not in self.keyword_index:
+                    self.keyword_index[keyword] = len(self.keywords)
+                    self.keywords.append(keyword)
+        
+        alternation = '|'.join(
+            re.escape(keyword)
+            for keyword in sorted(self.keywords, key=len, reverse=True)
+        )
+        self.pattern = re.compile(r'\b(?=(' + alternation + r')\b)')
+        
+        # Shorter keywords that also match wherever a longer one matches
+        self.prefix_hits = {
+            keyword: [
+                self.keyword_index[other]
+                for other in self.keywords
+                if other != keyword
+                and keyword.startswith(other)
+                and re.match(re.escape(other) + r'\b', keyword)
+            ]
+            for keyword in self.keywords
+        }
+        
+        # (document types x keywords) weight matrix
+        self.weights = np.zeros((len(self.doc_types), len(self.keywords)))
+        for row, type_rules in enumerate(rules.values()):
+            for keyword in type_rules['keywords']:
+                self.weights[row, self.keyword_index[keyword.lower()]] += type_rules['weight']
+    
+    def count(self, text: str) -> np.ndarray:
+        """
+        Count occurrences of every keyword in one pass.
+        
+        Args:
+            text: Normalized text (lowercase)
+            
+        Returns:
+            Array of hit counts, indexed like ``self.keywords``
+        """
+        counts = np.zeros(len(self.keywords))
+        
+        for keyword, hits in Counter(m.group(1) for m in self.pattern.finditer(text)).items():
+            counts[self.keyword_index[keyword]] += hits
+            for other in self.prefix_hits[keyword]:
+                counts[other] += hits
+        
+        return counts
+    
+    def score(self, counts: np.ndarray) -> np.ndarray:
+        """
+        Turn keyword counts into per-type scores.
+        
+        Each matched keyword contributes ``weight * (1 + log1p(matches))``,
+        so scores grow with matches but with diminishing returns.
+        
+        Args:
+            counts: Keyword counts, shape (keywords,) or (documents, keywords)
+            
+        Returns:
+            Scores, shape (types,) or (documents, types)
+        """
+        hits = np.where(counts > 0, 1 + np.log1p(counts), 0.0)
+        return hits @ self.weights.T
+
+
 class DocumentClassificationModel:
     """
     Hybrid document classification model.
@@ -128,6 +212,9 @@ class DocumentClassificationModel:
         },
     }
     
+    # Compiled lazily from CLASSIFICATION_RULES, shared by all instances
+    _matcher: Optional[_KeywordMatcher] = None
+    
     def __init__(self, use_transformers: bool = False):
         """
         Initialize classification model.
@@ -180,12 +267,53 @@ class DocumentClassificationModel:
         text_lower = text.lower()
         
         # Calculate scores for each document type
-        scores = {}
+        scores = self._calculate_rule_scores(text_lower)
         
-        for doc_type, rules in self.CLASSIFICATION_RULES.items():
-            score = self._calculate_rule_score(text_lower, rules)
-            scores[doc_type] = score
+        result = self._build_result(scores, return_all_scores)
+        
+        logger.info(
+            f"Classification: {result['document_type'].value} "
+            f"(confidence: {result['confidence']:.2%})"
+        )
         
+        return result
+    
+    @classmethod
+    def _get_matcher(cls) -> _KeywordMatcher:
+        """Return the keyword matcher, compiling it on first use."""
+        if cls._matcher is None:
+            cls._matcher = _KeywordMatcher(cls.CLASSIFICATION_RULES)
+        return cls._matcher
+    
+    def _calculate_rule_scores(self, text: str) -> Dict[DocumentType, float]:
+        """
+        Calculate keyword scores for all document types in one pass.
+        
+        Args:
+            text: Normalized text (lowercase)
+            
+        Returns:
+            Score per document type
+        """
+        matcher = self._get_matcher()
+        scores = matcher.score(matcher.count(text))
+        return dict(zip(matcher.doc_types, scores.tolist()))
+    
+    def _build_result(
+        self,
+        scores: Dict[DocumentType, float],
+        return_all_scores: bool = False
+    ) -> Dict:
+        """
+        Build classification result from per-type scores.
+        
+        Args:
+            scores: Score per document type
+            return_all_scores: Return scores for all document types
+            
+        Returns:
+            Dictionary with document_type, confidence, and optionally all_scores
+        """
         # Get best match
         if not scores:
             return {
@@ -223,37 +351,8 @@ class DocumentClassificationModel:
                 for doc_type, score in scores.items()
             }
         
-        logger.info(f"Classification: {best_type.value} (confidence: {confidence:.2%})")
-        
         return result
     
-    def _calculate_rule_score(self, text: str, rules: Dict) -> float:
-        """
-        Calculate score based on keyword matching.
-        
-        Args:
-            text: Normalized text (lowercase)
-            rules: Classification rules
-            
-        Returns:
-            Score
-        """
-        keywords = rules['keywords']
-        weight = rules['weight']
-        
-        # Count keyword occurrences
-        score = 0.0
-        for keyword in keywords:
-            # Count occurrences (with word boundaries)
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            matches = len(re.findall(pattern, text))
-            
-            if matches > 0:
-                # Score increases with matches, but with diminishing returns
-                score += weight * (1 + np.log1p(matches))
-        
-        return score
-    
     def classify_with_context(
         self,
         text: str,
@@ -308,18 +407,32 @@ class DocumentClassificationModel:
         """
         logger.info(f"Batch classifying {len(texts)} documents")
         
-        results = []
+        matcher = self._get_matcher()
+        counts = np.zeros((len(texts), len(matcher.keywords)))
+        errors = {}
+        
         for i, text in enumerate(texts):
             try:
-                result = self.classify_document(text)
-                results.append(result)
+                counts[i] = matcher.count(text.lower())
             except Exception as e:
                 logger.error(f"Error classifying document {i}: {e}")
+                errors[i] = str(e)
+        
+        # Score all documents against all types at once
+        all_scores = matcher.score(counts)
+        
+        results = []
+        for i, row in enumerate(all_scores):
+            if i in errors:
                 results.append({
                     'document_type': DocumentType.OTHER,
                     'confidence': 0.0,
-                    'error': str(e)
+                    'error': errors[i]
                 })
+                continue
+            
+            scores = dict(zip(matcher.doc_types, row.tolist()))
+            results.append(self._build_result(scores))
         
         return results
     
@@ -347,13 +460,15 @@ class DocumentClassificationModel:
         rules = self.CLASSIFICATION_RULES[doc_type]
         matched_keywords = []
         
+        matcher = self._get_matcher()
+        counts = matcher.count(text_lower)
+        
         for keyword in rules['keywords']:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            matches = re.findall(pattern, text_lower)
+            matches = int(counts[matcher.keyword_index[keyword.lower()]])
             if matches:
                 matched_keywords.append({
                     'keyword': keyword,
-                    'count': len(matches)
+                    'count': matches
                 })
         
         return {
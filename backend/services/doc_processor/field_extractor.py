@@ -5,16 +5,292 @@ Extracts structured data from documents.
 """
 
 import re
+import bisect
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from datetime import datetime, date
 import json
 
-from .document_types import DocumentType, get_document_fields
+from .document_types import DocumentType, FieldType, get_document_fields, get_field_by_name
 
 logger = logging.getLogger(__name__)
 
 
+# Letters used in Slovak/Czech names and organizations
+_UPPER = 'A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ'
+_LOWER = 'a-záčďéěíňóřšťúůýž'
+
+# Scanned field kinds. Each kind is matched independently, so one piece of
+# text can be several fields ("Faktúra č. 2024001" is an invoice and a
+# contract number); the order only breaks ties between fields at the same
+# position. Values are (pattern, field type, context).
+SCAN_PATTERNS = {
+    'ico': (r'(?i:IČO:?\s*(?P<ico_value>\d{8}))', FieldType.IDENTIFIER, 40),
+    'dic': (r'(?i:DIČ:?\s*(?P<dic_value>\d{10}))', FieldType.IDENTIFIER, 40),
+    'case_number': (
+        r'(?i:(?:spisová značka|sp\. zn\.)[\s:]*(?P<case_number_value>[A-Z0-9\-/]+))',
+        FieldType.IDENTIFIER, 40
+    ),
+    'invoice_number': (
+        r'(?i:(?:faktúra|invoice|FA)[\s:]*(?:č\.)?[\s:]*(?P<invoice_number_value>[A-Z0-9\-/]+))',
+        FieldType.IDENTIFIER, 40
+    ),
+    'contract_number': (
+        r'(?i:(?:č\.|číslo|number|zmluva č\.)[\s:]*(?P<contract_number_value>[A-Z0-9\-/]+))',
+        FieldType.IDENTIFIER, 40
+    ),
+    'email': (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b', FieldType.TEXT, 40),
+    'date': (
+        r'(?P<dmy_day>\d{1,2})\.\s*(?P<dmy_month>\d{1,2})\.\s*(?P<dmy_year>\d{4})'  # DD.MM.YYYY
+        r'|(?P<slash_day>\d{1,2})/(?P<slash_month>\d{1,2})/(?P<slash_year>\d{4})'  # DD/MM/YYYY
+        r'|(?P<iso_year>\d{4})-(?P<iso_month>\d{2})-(?P<iso_day>\d{2})',  # YYYY-MM-DD
+        FieldType.DATE, 30
+    ),
+    'amount': (
+        r'(?P<amount_number>\d+(?:\s\d+)*(?:[,\.]\d{2})?)\s*(?P<amount_currency>€|EUR|Eur|Kč|CZK|PLN|zł)',
+        FieldType.AMOUNT, 40
+    ),
+    'phone': (r'(?:(?:\+421|00421)\s*)?\d{3}\s*\d{3}\s*\d{3}', FieldType.TEXT, 40),
+    'person_name': (
+        rf'(?i:(?:meno|name|zamestnanec|employee)[\s:]+(?P<person_name_value>[{_UPPER}][{_LOWER}]+\s+[{_UPPER}][{_LOWER}]+))',
+        FieldType.PERSON, 40
+    ),
+    'party': (
+        r'(?i:(?:zmluvná strana|strana|účastník|účastnik|meno|názov|name'
+        r'|predávajúci|kupujúci|prenajímateľ|nájomca)[\s:]+'
+        rf'(?P<party_value>[{_UPPER}][{_LOWER}\s]+))',
+        FieldType.PERSON, 40
+    ),
+    'organization': (
+        rf'(?i:\b(?P<organization_value>[{_UPPER}][{_LOWER}\s]+(?:s\.r\.o\.|a\.s\.|spol\. s r\.o\.)))',
+        FieldType.ORGANIZATION, 40
+    ),
+}
+
+CURRENCY_CODES = {'€': 'EUR', 'Eur': 'EUR', 'Kč': 'CZK', 'zł': 'PLN'}
+
+
+@dataclass
+class ExtractedField:
+    """Single field value found in document text."""
+    
+    kind: str
+    field_type: FieldType
+    value: str
+    typed_value: Any
+    position: int
+    context: str = ""
+    page: Optional[int] = None
+    currency: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        """Convert to JSON-serializable dictionary."""
+        data = asdict(self)
+        data['field_type'] = self.field_type.value
+        if isinstance(self.typed_value, date):
+            data['typed_value'] = self.typed_value.isoformat()
+        return data
+
+
+class FieldScanner:
+    """
+    Page-streaming scanner for all field kinds.
+    
+    Every kind in SCAN_PATTERNS has its own compiled pattern and is matched
+    independently, as overlapping kinds (invoice and contract numbers,
+    phone numbers) must not consume each other's text.
+    """
+    
+    _patterns: Optional[Dict[str, re.Pattern]] = None
+    
+    @classmethod
+    def get_patterns(cls) -> Dict[str, re.Pattern]:
+        """Return kind -> pattern, compiling them on first use."""
+        if cls._patterns is None:
+            cls._patterns = {
+                kind: re.compile(f'(?P<{kind}>{pattern})')
+                for kind, (pattern, _, _) in SCAN_PATTERNS.items()
+            }
+        return cls._patterns
+    
+    def scan(self, text: str) -> List[ExtractedField]:
+        """
+        Scan complete text.
+        
+        Args:
+            text: Document text
+            
+        Returns:
+            Extracted fields in document order
+        """
+        stream = self.stream()
+        return stream.feed(text) + stream.close()
+    
+    def stream(self, page_separator: str = '\n\n') -> 'FieldStream':
+        """
+        Start a page-by-page scan.
+        
+        Args:
+            page_separator: Text inserted between pages (matches OCR output)
+            
+        Returns:
+            FieldStream accepting pages as they arrive
+        """
+        return FieldStream(self.get_patterns(), page_separator)
+
+
+class FieldStream:
+    """
+    Incremental scan over pages of one document.
+    
+    Only a short tail of the previous pages is kept, so matches spanning a
+    page break are still found without joining the whole document into
+    one string.
+    """
+    
+    # Characters held back until the next page arrives (longest expected match)
+    LOOKAHEAD = 256
+    # Characters kept before the scan position for context windows
+    CONTEXT = 40
+    
+    def __init__(self, patterns: Dict[str, re.Pattern], page_separator: str = '\n\n'):
+        self.patterns = patterns
+        self.page_separator = page_separator
+        self._priority = {kind: index for index, kind in enumerate(patterns)}
+        self._buffer = ''
+        self._offset = 0  # absolute position of self._buffer[0]
+        self._scan_from = dict.fromkeys(patterns, 0)  # per kind, buffer index where the next scan starts
+        self._page_starts: List[int] = []
+        self._page_numbers: List[int] = []
+    
+    def feed(self, text: str, page: Optional[int] = None) -> List[ExtractedField]:
+        """
+        Add next page and return fields that are complete so far.
+        
+        Args:
+            text: Page text
+            page: Page number (defaults to running count)
+            
+        Returns:
+            Newly extracted fields
+        """
+        if self._page_starts:
+            self._buffer += self.page_separator
+        
+        self._page_starts.append(self._offset + len(self._buffer))
+        self._page_numbers.append(page if page is not None else len(self._page_numbers) + 1)
+        self._buffer += text
+        
+        return self._drain(final=False)
+    
+    def close(self) -> List[ExtractedField]:
+        """
+        Finish the document and return remaining fields.
+        
+        Returns:
+            Fields from the held-back tail
+        """
+        return self._drain(final=True)
+    
+    def _drain(self, final: bool) -> List[ExtractedField]:
+        """
+        Emit matches that can no longer grow and trim the buffer.
+        
+        A match ending in the held-back tail waits for the next page. Fields
+        of every kind that start after it wait too, so fields are always
+        emitted in document order.
+        """
+        buffer = self._buffer
+        safe_end = len(buffer) if final else len(buffer) - self.LOOKAHEAD
+        
+        complete: Dict[str, List[re.Match]] = {}
+        pending: Dict[str, int] = {}
+        for kind, pattern in self.patterns.items():
+            complete[kind] = []
+            for match in pattern.finditer(buffer, self._scan_from[kind]):
+                if match.end() > safe_end:
+                    # Might continue on the next page - rescan it then
+                    pending[kind] = match.start()
+                    break
+                complete[kind].append(match)
+        
+        limit = min(pending.values(), default=len(buffer))
+        
+        emitted = []
+        for kind, matches in complete.items():
+            resume = self._scan_from[kind]
+            held = pending.get(kind)
+            for match in matches:
+                if match.start() >= limit:
+                    held = match.start()
+                    break
+                emitted.append((match.start(), self._priority[kind], self._to_field(kind, match)))
+                resume = match.end()
+            self._scan_from[kind] = held if held is not None else max(resume, safe_end)
+        
+        cut = max(0, min(self._scan_from.values()) - self.CONTEXT)
+        self._buffer = buffer[cut:]
+        self._offset += cut
+        for kind in self._scan_from:
+            self._scan_from[kind] -= cut
+        
+        emitted.sort(key=lambda item: item[:2])
+        return [field for _, _, field in emitted]
+    
+    def _to_field(self, kind: str, match: re.Match) -> ExtractedField:
+        """Build typed field from a match of one kind's pattern."""
+        _, field_type, context_size = SCAN_PATTERNS[kind]
+        groups = match.groupdict()
+        
+        value_group = f'{kind}_value'
+        value = groups[value_group] if value_group in groups else match.group(kind)
+        value = value.strip()
+        
+        typed_value: Any = value
+        currency = None
+        
+        if kind == 'date':
+            typed_value = self._parse_date(groups)
+        elif kind == 'amount':
+            number = groups['amount_number'].replace(' ', '').replace(',', '.')
+            typed_value = float(number) if number else None
+            currency = CURRENCY_CODES.get(groups['amount_currency'], groups['amount_currency'])
+        
+        buffer = self._buffer
+        start = max(0, match.start() - context_size)
+        end = min(len(buffer), match.end() + context_size)
+        position = self._offset + match.start()
+        
+        page_index = bisect.bisect_right(self._page_starts, position) - 1
+        
+        return ExtractedField(
+            kind=kind,
+            field_type=field_type,
+            value=value,
+            typed_value=typed_value,
+            position=position,
+            context=buffer[start:end].strip(),
+            page=self._page_numbers[page_index] if page_index >= 0 else None,
+            currency=currency
+        )
+    
+    @staticmethod
+    def _parse_date(groups: Dict) -> Optional[date]:
+        """Convert date match groups to a date, None if invalid."""
+        for prefix in ('dmy', 'slash', 'iso'):
+            if groups[f'{prefix}_year']:
+                try:
+                    return date(
+                        int(groups[f'{prefix}_year']),
+                        int(groups[f'{prefix}_month']),
+                        int(groups[f'{prefix}_day'])
+                    )
+                except ValueError:
+                    return None
+        return None
+
+
 class FieldExtractor:
     """
     Extract structured fields from document text.
@@ -26,36 +302,72 @@ class FieldExtractor:
     - Addresses
     - Identification numbers (IČO, DIČ, etc.)
     - Contract numbers
+    
+    Text is scanned by FieldScanner; pages can be fed one by one with
+    iter_fields() as OCR produces them.
     """
     
     def __init__(self):
         """Initialize field extractor."""
-        self.patterns = self._compile_patterns()
+        self.scanner = FieldScanner()
         self.type_specific_extractors = self._init_type_extractors()
     
-    def _compile_patterns(self) -> Dict:
-        """Compile regex patterns for field extraction."""
-        return {
-            'dates': [
-                re.compile(r'(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})'),  # DD.MM.YYYY
-                re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'),          # DD/MM/YYYY
-                re.compile(r'(\d{4})-(\d{2})-(\d{2})')               # YYYY-MM-DD
-            ],
-            'amounts': [
-                re.compile(r'(\d+(?:\s?\d+)*(?:[,\.]\d{2})?)\s*(?:€|EUR|Eur)'),
-                re.compile(r'(\d+(?:\s?\d+)*(?:[,\.]\d{2})?)\s*(?:Kč|CZK)'),
-                re.compile(r'(\d+(?:\s?\d+)*(?:[,\.]\d{2})?)\s*(?:PLN|zł)')
-            ],
-            'ico': re.compile(r'IČO:?\s*(\d{8})', re.IGNORECASE),
-            'dic': re.compile(r'DIČ:?\s*(\d{10})', re.IGNORECASE),
-            'contract_number': re.compile(r'(?:č\.|číslo|number|zmluva č\.)[\s:]*([A-Z0-9\-/]+)', re.IGNORECASE),
-            'invoice_number': re.compile(r'(?:faktúra|invoice|FA)[\s:]*(č\.)?[\s:]*([A-Z0-9\-/]+)', re.IGNORECASE),
-            'case_number': re.compile(r'(?:spisová značka|sp\. zn\.)[\s:]*([A-Z0-9\-/]+)', re.IGNORECASE),
-            'email': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
-            'phone': re.compile(r'(?:\+421|00421)?\s*\d{3}\s*\d{3}\s*\d{3}'),
-            'person_name': re.compile(r'(?:meno|name|zamestnanec|employee)[\s:]+([A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ][a-záčďéěíňóřšťúůýž]+\s+[A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ][a-záčďéěíňóřšťúůýž]+)', re.IGNORECASE),
-            'organization': re.compile(r'([A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ][a-záčďéěíňóřšťúůýž\s]+(?:s\.r\.o\.|a\.s\.|spol\. s r\.o\.))', re.IGNORECASE),
-        }
+    def scan(self, text: str) -> Dict[str, List[ExtractedField]]:
+        """
+        Scan text and group fields by kind.
+        
+        Args:
+            text: Document text
+            
+        Returns:
+            Dictionary of kind -> fields in document order
+        """
+        return self._group(self.scanner.scan(text))
+    
+    def iter_fields(self, pages: Iterable[Union[str, Dict]]) -> Iterator[ExtractedField]:
+        """
+        Extract fields page by page.
+        
+        Args:
+            pages: Page texts or OCR page dicts ({'page_number', 'text'})
+            
+        Yields:
+            Fields as soon as their page has been scanned
+        """
+        stream = self.scanner.stream()
+        
+        for page in pages:
+            if isinstance(page, dict):
+                yield from stream.feed(page.get('text') or '', page.get('page_number'))
+            else:
+                yield from stream.feed(page)
+        
+        yield from stream.close()
+    
+    def scan_pages(self, pages: Iterable[Union[str, Dict]]) -> Dict[str, List[ExtractedField]]:
+        """
+        Scan OCR pages without joining them and group fields by kind.
+        
+        Args:
+            pages: Page texts or OCR page dicts
+            
+        Returns:
+            Dictionary of kind -> fields in document order
+        """
+        return self._group(self.iter_fields(pages))
+    
+    @staticmethod
+    def _group(fields: Iterable[ExtractedField]) -> Dict[str, List[ExtractedField]]:
+        """Group fields by kind."""
+        grouped = {kind: [] for kind in SCAN_PATTERNS}
+        for field in fields:
+            grouped[field.kind].append(field)
+        return grouped
+    
+    @staticmethod
+    def _first(found: Dict[str, List[ExtractedField]], kind: str) -> Optional[ExtractedField]:
+        """Return first field of a kind, if any."""
+        return found[kind][0] if found[kind] else None
     
     def extract_dates(self, text: str) -> List[Dict]:
         """
@@ -67,20 +379,17 @@ class FieldExtractor:
         Returns:
             List of date dictionaries
         """
-        dates = []
-        
-        for pattern in self.patterns['dates']:
-            for match in pattern.finditer(text):
-                # Get context
-                start = max(0, match.start() - 30)
-                end = min(len(text), match.end() + 30)
-                context = text[start:end].strip()
-                
-                dates.append({
-                    'value': match.group(0),
-                    'context': context,
-                    'position': match.start()
-                })
+        return self._dates(self.scan(text))
+    
+    def _dates(self, found: Dict[str, List[ExtractedField]]) -> List[Dict]:
+        dates = [
+            {
+                'value': field.value,
+                'context': field.context,
+                'position': field.position
+            }
+            for field in found['date']
+        ]
         
         logger.info(f"Extracted {len(dates)} dates")
         return dates
@@ -95,24 +404,19 @@ class FieldExtractor:
         Returns:
             List of amount dictionaries
         """
-        amounts = []
-        
-        for pattern in self.patterns['amounts']:
-            for match in pattern.finditer(text):
-                # Get context
-                start = max(0, match.start() - 40)
-                end = min(len(text), match.end() + 40)
-                context = text[start:end].strip()
-                
-                # Parse amount
-                amount_str = match.group(1).replace(' ', '').replace(',', '.')
-                
-                amounts.append({
-                    'value': match.group(0),
-                    'numeric_value': float(amount_str) if amount_str else None,
-                    'context': context,
-                    'position': match.start()
-                })
+        return self._amounts(self.scan(text))
+    
+    def _amounts(self, found: Dict[str, List[ExtractedField]]) -> List[Dict]:
+        amounts = [
+            {
+                'value': field.value,
+                'numeric_value': field.typed_value,
+                'currency': field.currency,
+                'context': field.context,
+                'position': field.position
+            }
+            for field in found['amount']
+        ]
         
         logger.info(f"Extracted {len(amounts)} amounts")
         return amounts
@@ -127,21 +431,16 @@ class FieldExtractor:
         Returns:
             List of party names
         """
-        parties = []
-        
-        # Patterns for party identification
-        patterns = [
-            r'(?:zmluvná strana|strana|účastník|účastnik)[\s:]+([A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ][a-záčďéěíňóřšťúůýž\s]+)',
-            r'(?:meno|názov|name)[\s:]+([A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ][a-záčďéěíňóřšťúůýž\s]+)',
-            r'(?:predávajúci|kupujúci|prenajímateľ|nájomca)[\s:]+([A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ][a-záčďéěíňóřšťúůýž\s]+)'
-        ]
+        return self._parties(self.scan(text))
+    
+    def _parties(self, found: Dict[str, List[ExtractedField]]) -> List[str]:
+        # Labelled person names are parties too
+        candidates = sorted(found['person_name'] + found['party'], key=lambda f: f.position)
         
-        for pattern_str in patterns:
-            pattern = re.compile(pattern_str, re.IGNORECASE)
-            for match in pattern.finditer(text):
-                party = match.group(1).strip()
-                if len(party) > 3 and party not in parties:
-                    parties.append(party)
+        parties = []
+        for field in candidates:
+            if len(field.value) > 3 and field.value not in parties:
+                parties.append(field.value)
         
         logger.info(f"Extracted {len(parties)} parties")
         return parties[:10]  # Limit to 10
@@ -156,22 +455,16 @@ class FieldExtractor:
         Returns:
             Dictionary of identifiers
         """
+        return self._identifiers(self.scan(text))
+    
+    def _identifiers(self, found: Dict[str, List[ExtractedField]]) -> Dict:
         identifiers = {}
         
-        # IČO (Company ID)
-        ico_match = self.patterns['ico'].search(text)
-        if ico_match:
-            identifiers['ico'] = ico_match.group(1)
-        
-        # DIČ (Tax ID)
-        dic_match = self.patterns['dic'].search(text)
-        if dic_match:
-            identifiers['dic'] = dic_match.group(1)
-        
-        # Contract number
-        contract_match = self.patterns['contract_number'].search(text)
-        if contract_match:
-            identifiers['contract_number'] = contract_match.group(1)
+        # IČO (Company ID), DIČ (Tax ID), contract number
+        for kind in ('ico', 'dic', 'contract_number'):
+            field = self._first(found, kind)
+            if field:
+                identifiers[kind] = field.value
         
         logger.info(f"Extracted identifiers: {list(identifiers.keys())}")
         return identifiers
@@ -186,17 +479,15 @@ class FieldExtractor:
         Returns:
             Dictionary of contact info
         """
+        return self._contact_info(self.scan(text))
+    
+    def _contact_info(self, found: Dict[str, List[ExtractedField]]) -> Dict:
         contact = {}
         
-        # Email
-        email_match = self.patterns['email'].search(text)
-        if email_match:
-            contact['email'] = email_match.group(0)
-        
-        # Phone
-        phone_match = self.patterns['phone'].search(text)
-        if phone_match:
-            contact['phone'] = phone_match.group(0)
+        for kind in ('email', 'phone'):
+            field = self._first(found, kind)
+            if field:
+                contact[kind] = field.value
         
         logger.info(f"Extracted contact info: {list(contact.keys())}")
         return contact
@@ -212,13 +503,28 @@ class FieldExtractor:
             Dictionary with all extracted fields
         """
         logger.info("Extracting all fields from document")
+        return self._all_fields(self.scan(text))
+    
+    def extract_all_fields_from_pages(self, pages: Iterable[Union[str, Dict]]) -> Dict:
+        """
+        Extract all fields from OCR pages.
         
+        Args:
+            pages: Page texts or OCR page dicts
+            
+        Returns:
+            Dictionary with all extracted fields
+        """
+        logger.info("Extracting all fields from document pages")
+        return self._all_fields(self.scan_pages(pages))
+    
+    def _all_fields(self, found: Dict[str, List[ExtractedField]]) -> Dict:
         return {
-            'dates': self.extract_dates(text),
-            'amounts': self.extract_amounts(text),
-            'parties': self.extract_parties(text),
-            'identifiers': self.extract_identifiers(text),
-            'contact': self.extract_contact_info(text),
+            'dates': self._dates(found),
+            'amounts': self._amounts(found),
+            'parties': self._parties(found),
+            'identifiers': self._identifiers(found),
+            'contact': self._contact_info(found),
             'extracted_at': datetime.utcnow().isoformat()
         }
     
@@ -243,14 +549,65 @@ class FieldExtractor:
             Dictionary with extracted fields in JSON format
         """
         logger.info(f"Extracting fields for {document_type.value}")
+        return self._fields_for_type(self.scan(text), document_type)
+    
+    def extract_fields_from_pages(
+        self,
+        pages: Iterable[Union[str, Dict]],
+        document_type: DocumentType
+    ) -> Dict:
+        """
+        Extract fields based on document type from OCR pages.
+        
+        Args:
+            pages: Page texts or OCR page dicts
+            document_type: Type of document
+            
+        Returns:
+            Dictionary with extracted fields in JSON format
+        """
+        logger.info(f"Extracting fields for {document_type.value} from pages")
+        return self._fields_for_type(self.scan_pages(pages), document_type)
+    
+    def extract_typed_fields(
+        self,
+        found: Dict[str, List[ExtractedField]],
+        document_type: DocumentType
+    ) -> Dict[str, ExtractedField]:
+        """
+        Map scanned fields onto the document type's field definitions.
         
-        # Get type-specific extractor
+        Args:
+            found: Result of scan() or scan_pages()
+            document_type: Type of document
+            
+        Returns:
+            Dictionary of field name -> typed field
+        """
         extractor = self.type_specific_extractors.get(document_type)
+        if not extractor:
+            return {}
         
-        if extractor:
-            fields = extractor(text)
+        fields = extractor(found)
+        
+        for name, field in fields.items():
+            definition = get_field_by_name(document_type, name)
+            if definition:
+                field.field_type = definition.field_type
+        
+        return fields
+    
+    def _fields_for_type(
+        self,
+        found: Dict[str, List[ExtractedField]],
+        document_type: DocumentType
+    ) -> Dict:
+        """Build extract_fields() output from scanned fields."""
+        if document_type in self.type_specific_extractors:
+            typed = self.extract_typed_fields(found, document_type)
+            fields = {name: field.value for name, field in typed.items()}
         else:
-            fields = self._extract_generic(text)
+            fields = self._extract_generic(found)
         
         # Add metadata
         fields['_metadata'] = {
@@ -262,105 +619,93 @@ class FieldExtractor:
         logger.info(f"Extracted {fields['_metadata']['field_count']} fields")
         return fields
     
-    def _extract_employment_contract(self, text: str) -> Dict:
+    def _extract_employment_contract(self, found: Dict) -> Dict[str, ExtractedField]:
         """Extract fields from employment contract."""
         fields = {}
         
-        match = self.patterns['contract_number'].search(text)
-        if match:
-            fields['contract_number'] = match.group(1)
+        if found['contract_number']:
+            fields['contract_number'] = found['contract_number'][0]
         
-        dates = self.extract_dates(text)
+        dates = found['date']
         if dates:
-            fields['contract_date'] = dates[0]['value']
+            fields['contract_date'] = dates[0]
             if len(dates) > 1:
-                fields['start_date'] = dates[1]['value']
+                fields['start_date'] = dates[1]
         
-        org_match = self.patterns['organization'].search(text)
-        if org_match:
-            fields['employer'] = org_match.group(1).strip()
+        if found['organization']:
+            fields['employer'] = found['organization'][0]
         
-        person_match = self.patterns['person_name'].search(text)
-        if person_match:
-            fields['employee'] = person_match.group(1).strip()
+        if found['person_name']:
+            fields['employee'] = found['person_name'][0]
         
-        amounts = self.extract_amounts(text)
-        if amounts:
-            fields['salary'] = amounts[0]['value']
+        if found['amount']:
+            fields['salary'] = found['amount'][0]
         
         return fields
     
-    def _extract_invoice(self, text: str) -> Dict:
+    def _extract_invoice(self, found: Dict) -> Dict[str, ExtractedField]:
         """Extract fields from invoice."""
         fields = {}
         
-        match = self.patterns['invoice_number'].search(text)
-        if match:
-            fields['invoice_number'] = match.group(2) if match.lastindex >= 2 else match.group(1)
+        if found['invoice_number']:
+            fields['invoice_number'] = found['invoice_number'][0]
         
-        dates = self.extract_dates(text)
+        dates = found['date']
         if dates:
-            fields['invoice_date'] = dates[0]['value']
+            fields['invoice_date'] = dates[0]
             if len(dates) > 1:
-                fields['due_date'] = dates[1]['value']
+                fields['due_date'] = dates[1]
         
-        amounts = self.extract_amounts(text)
+        amounts = found['amount']
         if amounts:
-            fields['total_amount'] = amounts[-1]['value']
+            fields['total_amount'] = amounts[-1]
             if len(amounts) > 1:
-                fields['vat_amount'] = amounts[-2]['value']
+                fields['vat_amount'] = amounts[-2]
         
-        ico_match = self.patterns['ico'].search(text)
-        if ico_match:
-            fields['supplier_ico'] = ico_match.group(1)
+        if found['ico']:
+            fields['supplier_ico'] = found['ico'][0]
         
-        dic_match = self.patterns['dic'].search(text)
-        if dic_match:
-            fields['supplier_dic'] = dic_match.group(1)
+        if found['dic']:
+            fields['supplier_dic'] = found['dic'][0]
         
         return fields
     
-    def _extract_purchase_agreement(self, text: str) -> Dict:
+    def _extract_purchase_agreement(self, found: Dict) -> Dict[str, ExtractedField]:
         """Extract fields from purchase agreement."""
         fields = {}
         
-        match = self.patterns['contract_number'].search(text)
-        if match:
-            fields['contract_number'] = match.group(1)
+        if found['contract_number']:
+            fields['contract_number'] = found['contract_number'][0]
         
-        dates = self.extract_dates(text)
-        if dates:
-            fields['contract_date'] = dates[0]['value']
+        if found['date']:
+            fields['contract_date'] = found['date'][0]
         
-        amounts = self.extract_amounts(text)
-        if amounts:
-            fields['purchase_price'] = amounts[0]['value']
+        if found['amount']:
+            fields['purchase_price'] = found['amount'][0]
         
         return fields
     
-    def _extract_lease_agreement(self, text: str) -> Dict:
+    def _extract_lease_agreement(self, found: Dict) -> Dict[str, ExtractedField]:
         """Extract fields from lease agreement."""
         fields = {}
         
-        match = self.patterns['contract_number'].search(text)
-        if match:
-            fields['contract_number'] = match.group(1)
+        if found['contract_number']:
+            fields['contract_number'] = found['contract_number'][0]
         
-        dates = self.extract_dates(text)
-        if dates:
-            fields['contract_date'] = dates[0]['value']
+        if found['date']:
+            fields['contract_date'] = found['date'][0]
         
-        amounts = self.extract_amounts(text)
+        amounts = found['amount']
         if amounts:
-            fields['monthly_rent'] = amounts[0]['value']
+            fields['monthly_rent'] = amounts[0]
             if len(amounts) > 1:
-                fields['deposit'] = amounts[1]['value']
+                fields['deposit'] = amounts[1]
         
         return fields
     
-    def _extract_generic(self, text: str) -> Dict:
+    def _extract_generic(self, found: Dict) -> Dict:
         """Generic extraction for unknown document types."""
-        return self.extract_all_fields(text)
+        return self._all_fields(found)
     
     def to_json(self, fields: Dict) -> str:
         """Convert extracted fields to JSON string."""
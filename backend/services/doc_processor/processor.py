@@ -10,7 +10,7 @@ import tempfile
 from typing import Dict, Optional
 from pathlib import Path
 
-from .storage import MinIOStorage
+from .storage import MinIOStorage, get_storage
 from .ocr_engine import OCREngine
 from .classifier import DocumentClassifier
 from .field_extractor import FieldExtractor
@@ -49,7 +49,7 @@ class DocumentProcessor:
             extractor: Field extractor
             filler: Template filler
         """
-        self.storage = storage or MinIOStorage()
+        self.storage = storage or get_storage()
         self.ocr = ocr or OCREngine(engine='auto')
         self.classifier = classifier or DocumentClassifier()
         self.extractor = extractor or FieldExtractor()
@@ -5,10 +5,16 @@ Enhanced storage service with multi-bucket support for document management.
 """
 
 import os
+import math
+import asyncio
+import hashlib
 import logging
-from typing import Optional, List, Dict
-from datetime import timedelta
+import threading
+from typing import Optional, List, Dict, BinaryIO, Iterator
+from datetime import datetime, timedelta, timezone
+import urllib3
 from minio import Minio
+from minio.datatypes import Part
 from minio.error import S3Error
 from io import BytesIO
 from pathlib import Path
@@ -16,6 +22,78 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 
+class _HashingReader:
+    """File-like wrapper that hashes and counts bytes as MinIO reads them."""
+    
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._stream.read(size)
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+
+class _MultipartUploads:
+    """
+    Multipart upload calls of a MinIO client.
+    
+    The minio SDK has no public API for driving a multipart upload step by
+    step, so these wrap its private methods (signatures as of minio
+    7.2.20, pinned in requirements.txt). Nothing else in the codebase
+    calls them; check this class when upgrading minio.
+    """
+    
+    def __init__(self, client: Minio):
+        self._client = client
+    
+    def create(self, bucket: str, object_name: str, content_type: str) -> str:
+        """Start an upload and return its upload ID."""
+        return self._client._create_multipart_upload(
+            bucket,
+            object_name,
+            {'Content-Type': content_type}
+        )
+    
+    def parts(self, bucket: str, object_name: str, upload_id: str) -> List[Part]:
+        """All parts uploaded so far, in part-number order."""
+        parts = []
+        marker = None
+        while True:
+            listing = self._client._list_parts(
+                bucket,
+                object_name,
+                upload_id,
+                part_number_marker=marker
+            )
+            parts.extend(Part(part.part_number, part.etag) for part in listing.parts)
+            if not listing.is_truncated:
+                break
+            marker = listing.next_part_number_marker
+        return sorted(parts, key=lambda part: part.part_number)
+    
+    def complete(self, bucket: str, object_name: str, upload_id: str, parts: List[Part]):
+        """Assemble the object from its parts."""
+        self._client._complete_multipart_upload(bucket, object_name, upload_id, parts)
+    
+    def abort(self, bucket: str, object_name: str, upload_id: str):
+        """Discard an upload and its parts."""
+        self._client._abort_multipart_upload(bucket, object_name, upload_id)
+    
+    def pending(self, bucket: str) -> Iterator:
+        """Uploads in a bucket that were neither completed nor aborted."""
+        key_marker = None
+        while True:
+            listing = self._client._list_multipart_uploads(bucket, key_marker=key_marker)
+            yield from listing.uploads
+            if not listing.is_truncated or not listing.next_key_marker:
+                break
+            key_marker = listing.next_key_marker
+
+
 class MinIOStorage:
     """
     Enhanced MinIO storage service with multi-bucket support.
@@ -32,6 +110,10 @@ class MinIOStorage:
     - Generate presigned URLs
     - File versioning
     - Metadata management
+    
+    Use get_storage() for the process-wide instance: it shares one pooled
+    HTTP client and checks buckets once, not on every request. The
+    ``*_async`` methods run the blocking S3 calls in a worker thread.
     """
     
     # Bucket names
@@ -40,6 +122,17 @@ class MinIOStorage:
     BUCKET_TEMPLATES = "templates"
     BUCKET_FILLED = "filled-docs"
     
+    # Multipart part size for streamed uploads (MinIO minimum is 5 MiB)
+    PART_SIZE = 10 * 1024 * 1024
+    # Presigned uploads above this size are split into parts
+    MULTIPART_THRESHOLD = 64 * 1024 * 1024
+    # S3 limit on parts per multipart upload
+    MAX_PARTS = 10000
+    # Largest file accepted through presigned direct uploads
+    MAX_DIRECT_UPLOAD_SIZE = int(os.getenv('MAX_DIRECT_UPLOAD_MB', '200')) * 1024 * 1024
+    # Direct uploads not completed within this time are aborted (URLs expire after 1 hour)
+    ABANDONED_UPLOAD_AGE = timedelta(hours=2)
+    
     def __init__(
         self,
         endpoint: Optional[str] = None,
@@ -61,20 +154,62 @@ class MinIOStorage:
         self.secret_key = secret_key or os.getenv('MINIO_ROOT_PASSWORD', 'minioadmin')
         self.secure = secure
         
+        # Pooled HTTP client shared by all requests through this instance
+        pool_size = int(os.getenv('MINIO_POOL_SIZE', '20'))
+        http_client = urllib3.PoolManager(
+            timeout=urllib3.Timeout(connect=5, read=60),
+            maxsize=pool_size,
+            retries=urllib3.Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504]
+            )
+        )
+        
         # Initialize MinIO client
         self.client = Minio(
             self.endpoint,
             access_key=self.access_key,
             secret_key=self.secret_key,
-            secure=self.secure
+            secure=self.secure,
+            http_client=http_client
         )
+        self.multipart = _MultipartUploads(self.client)
+        
+        # Presigned URLs must be signed for the host clients connect to
+        public_endpoint = os.getenv('MINIO_PUBLIC_ENDPOINT')
+        if public_endpoint:
+            self.presign_client = Minio(
+                public_endpoint,
+                access_key=self.access_key,
+                secret_key=self.secret_key,
+                secure=os.getenv('MINIO_PUBLIC_SECURE', 'false').lower() == 'true',
+                region=os.getenv('MINIO_REGION', 'us-east-1')
+            )
+        else:
+            self.presign_client = self.client
         
-        # Ensure all buckets exist
-        self._ensure_buckets()
+        # Buckets are checked on first upload (or at startup), not here
+        self._buckets_ready = False
+        self._buckets_lock = threading.Lock()
         
         logger.info(f"MinIO initialized: {self.endpoint}")
     
-    def _ensure_buckets(self):
+    def ensure_buckets(self):
+        """
+        Create all required buckets if they don't exist.
+        
+        Runs the bucket checks once per instance; if any check fails it is
+        retried on the next call.
+        """
+        if self._buckets_ready:
+            return
+        
+        with self._buckets_lock:
+            if not self._buckets_ready:
+                self._buckets_ready = self._ensure_buckets()
+    
+    def _ensure_buckets(self) -> bool:
         """Create all required buckets if they don't exist."""
         buckets = [
             self.BUCKET_RAW,
@@ -83,6 +218,7 @@ class MinIOStorage:
             self.BUCKET_FILLED
         ]
         
+        ready = True
         for bucket in buckets:
             try:
                 if not self.client.bucket_exists(bucket):
@@ -90,6 +226,23 @@ class MinIOStorage:
                     logger.info(f"Created bucket: {bucket}")
             except S3Error as e:
                 logger.error(f"Error ensuring bucket {bucket}: {e}")
+                ready = False
+        
+        return ready
+    
+    def is_available(self) -> bool:
+        """
+        Check MinIO connectivity with a single request.
+        
+        Returns:
+            True if MinIO answered, False otherwise
+        """
+        try:
+            self.client.bucket_exists(self.BUCKET_RAW)
+            return True
+        except Exception as e:
+            logger.error(f"MinIO not available: {e}")
+            return False
     
     def upload_raw_document(
         self,
@@ -246,6 +399,8 @@ class MinIOStorage:
         Returns:
             Object name
         """
+        self.ensure_buckets()
+        
         try:
             file_stream = BytesIO(file_data)
             file_size = len(file_data)
@@ -270,6 +425,218 @@ class MinIOStorage:
             logger.error(f"Error uploading file: {e}")
             raise
     
+    def upload_stream(
+        self,
+        bucket: str,
+        stream: BinaryIO,
+        object_name: str,
+        content_type: str = "application/octet-stream",
+        metadata: Optional[Dict] = None,
+        part_size: int = PART_SIZE
+    ) -> Dict:
+        """
+        Upload file-like object without reading it into memory.
+        
+        The stream is sent as a multipart upload in ``part_size`` chunks, so
+        memory use stays constant regardless of file size. Size and SHA-256
+        are computed while the parts are read.
+        
+        Args:
+            bucket: Bucket name
+            stream: Readable binary stream (e.g. ``UploadFile.file``)
+            object_name: Object name
+            content_type: MIME type
+            metadata: File metadata
+            part_size: Multipart part size in bytes
+            
+        Returns:
+            Dictionary with object_name, size, sha256 and etag
+        """
+        self.ensure_buckets()
+        
+        try:
+            reader = _HashingReader(stream)
+            
+            # Detect content type from filename if not provided
+            if not content_type or content_type == "application/octet-stream":
+                content_type = self._get_content_type(object_name)
+            
+            result = self.client.put_object(
+                bucket,
+                object_name,
+                reader,
+                length=-1,
+                part_size=part_size,
+                content_type=content_type,
+                metadata=metadata
+            )
+            
+            logger.info(f"Streamed to {bucket}/{object_name} ({reader.size} bytes)")
+            return {
+                'object_name': object_name,
+                'size': reader.size,
+                'sha256': reader.sha256.hexdigest(),
+                'etag': result.etag
+            }
+        
+        except S3Error as e:
+            logger.error(f"Error streaming file: {e}")
+            raise
+    
+    def create_presigned_upload(
+        self,
+        bucket: str,
+        object_name: str,
+        size: int,
+        content_type: Optional[str] = None,
+        expires: timedelta = timedelta(hours=1)
+    ) -> Dict:
+        """
+        Prepare a direct client-to-MinIO upload.
+        
+        Small files get a single presigned PUT URL. Files above
+        MULTIPART_THRESHOLD get a multipart upload with one presigned URL
+        per part; the client PUTs each byte range to its URL.
+        
+        Args:
+            bucket: Bucket name
+            object_name: Object name
+            size: Declared file size in bytes
+            content_type: MIME type
+            expires: URL expiration time
+            
+        Returns:
+            Upload plan dictionary
+        """
+        self.ensure_buckets()
+        content_type = content_type or self._get_content_type(object_name)
+        
+        try:
+            if size <= self.MULTIPART_THRESHOLD:
+                url = self.presign_client.presigned_put_object(
+                    bucket,
+                    object_name,
+                    expires=expires
+                )
+                
+                logger.info(f"Presigned PUT for {bucket}/{object_name} ({size} bytes)")
+                return {
+                    'object_name': object_name,
+                    'multipart': False,
+                    'url': url,
+                    'method': 'PUT'
+                }
+            
+            part_size = max(self.PART_SIZE, math.ceil(size / self.MAX_PARTS))
+            part_count = math.ceil(size / part_size)
+            
+            upload_id = self.multipart.create(bucket, object_name, content_type)
+            
+            parts = [
+                {
+                    'part_number': part_number,
+                    'url': self.presign_client.get_presigned_url(
+                        'PUT',
+                        bucket,
+                        object_name,
+                        expires=expires,
+                        extra_query_params={
+                            'partNumber': str(part_number),
+                            'uploadId': upload_id
+                        }
+                    )
+                }
+                for part_number in range(1, part_count + 1)
+            ]
+            
+            logger.info(f"Presigned multipart upload for {bucket}/{object_name} ({part_count} parts)")
+            return {
+                'object_name': object_name,
+                'multipart': True,
+                'upload_id': upload_id,
+                'part_size': part_size,
+                'parts': parts,
+                'method': 'PUT'
+            }
+        
+        except S3Error as e:
+            logger.error(f"Error creating presigned upload: {e}")
+            raise
+    
+    def complete_presigned_upload(
+        self,
+        bucket: str,
+        object_name: str,
+        upload_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Finish a presigned upload and verify the stored object.
+        
+        For multipart uploads the uploaded parts are listed on the server,
+        so clients don't have to report part ETags.
+        
+        Args:
+            bucket: Bucket name
+            object_name: Object name
+            upload_id: Multipart upload ID (None for single PUT)
+            
+        Returns:
+            Object metadata (size, etag, content_type)
+        """
+        try:
+            if upload_id:
+                parts = self.multipart.parts(bucket, object_name, upload_id)
+                if not parts:
+                    raise ValueError("No parts uploaded")
+                
+                self.multipart.complete(bucket, object_name, upload_id, parts)
+            
+            metadata = self.get_file_metadata(bucket, object_name)
+            logger.info(f"Completed upload {bucket}/{object_name} ({metadata['size']} bytes)")
+            return metadata
+        
+        except S3Error as e:
+            logger.error(f"Error completing upload: {e}")
+            raise
+    
+    def abort_presigned_upload(self, bucket: str, object_name: str, upload_id: str):
+        """
+        Abort a multipart upload and discard uploaded parts.
+        
+        Args:
+            bucket: Bucket name
+            object_name: Object name
+            upload_id: Multipart upload ID
+        """
+        try:
+            self.multipart.abort(bucket, object_name, upload_id)
+            logger.info(f"Aborted upload {bucket}/{object_name}")
+        except S3Error as e:
+            logger.error(f"Error aborting upload: {e}")
+            raise
+    
+    def abort_abandoned_uploads(self, bucket: str, older_than: Optional[timedelta] = None) -> int:
+        """
+        Abort multipart uploads started before a cutoff and never completed.
+        
+        Presigned multipart uploads whose client gave up keep their parts
+        in MinIO until aborted.
+        
+        Args:
+            bucket: Bucket name
+            older_than: Minimum upload age (default ABANDONED_UPLOAD_AGE)
+        
+        Returns:
+            Number of uploads aborted
+        """
+        cutoff = datetime.now(timezone.utc) - (older_than or self.ABANDONED_UPLOAD_AGE)
+        aborted = 0
+        for upload in self.multipart.pending(bucket):
+            if upload.initiated_time and upload.initiated_time < cutoff:
+                self.abort_presigned_upload(bucket, upload.object_name, upload.upload_id)
+                aborted += 1
+        return aborted
+    
     def download_file(self, bucket: str, object_name: str) -> bytes:
         """
         Download file from specified bucket.
@@ -476,4 +843,74 @@ class MinIOStorage:
         }
         
         return content_types.get(ext, 'application/octet-stream')
+    
+    # Async wrappers - run blocking S3 calls in a worker thread
+    
+    async def upload_stream_async(self, *args, **kwargs) -> Dict:
+        """Async version of upload_stream()."""
+        return await asyncio.to_thread(self.upload_stream, *args, **kwargs)
+    
+    async def upload_raw_document_async(self, *args, **kwargs) -> str:
+        """Async version of upload_raw_document()."""
+        return await asyncio.to_thread(self.upload_raw_document, *args, **kwargs)
+    
+    async def upload_processed_document_async(self, *args, **kwargs) -> str:
+        """Async version of upload_processed_document()."""
+        return await asyncio.to_thread(self.upload_processed_document, *args, **kwargs)
+    
+    async def download_file_async(self, bucket: str, object_name: str) -> bytes:
+        """Async version of download_file()."""
+        return await asyncio.to_thread(self.download_file, bucket, object_name)
+    
+    async def get_presigned_url_async(
+        self,
+        bucket: str,
+        object_name: str,
+        expires: timedelta = timedelta(hours=1)
+    ) -> str:
+        """Async version of get_presigned_url()."""
+        return await asyncio.to_thread(self.get_presigned_url, bucket, object_name, expires)
+    
+    async def delete_file_async(self, bucket: str, object_name: str):
+        """Async version of delete_file()."""
+        return await asyncio.to_thread(self.delete_file, bucket, object_name)
+    
+    async def file_exists_async(self, bucket: str, object_name: str) -> bool:
+        """Async version of file_exists()."""
+        return await asyncio.to_thread(self.file_exists, bucket, object_name)
+    
+    async def create_presigned_upload_async(self, *args, **kwargs) -> Dict:
+        """Async version of create_presigned_upload()."""
+        return await asyncio.to_thread(self.create_presigned_upload, *args, **kwargs)
+    
+    async def complete_presigned_upload_async(self, *args, **kwargs) -> Dict:
+        """Async version of complete_presigned_upload()."""
+        return await asyncio.to_thread(self.complete_presigned_upload, *args, **kwargs)
+    
+    async def abort_presigned_upload_async(self, *args, **kwargs):
+        """Async version of abort_presigned_upload()."""
+        return await asyncio.to_thread(self.abort_presigned_upload, *args, **kwargs)
+    
+    async def is_available_async(self) -> bool:
+        """Async version of is_available()."""
+        return await asyncio.to_thread(self.is_available)
+
 
+# Singleton instance
+_storage: Optional[MinIOStorage] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> MinIOStorage:
+    """
+    Get process-wide MinIO storage.
+    
+    Returns:
+        MinIOStorage instance
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = MinIOStorage()
+    return _storage
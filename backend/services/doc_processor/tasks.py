@@ -28,7 +28,7 @@ def process_document_task(self: Task, document_id: int):
     from database import SessionLocal
     from main import DocumentProcessingJob
     from services.doc_processor.processor import DocumentProcessor
-    from services.doc_processor.storage import MinIOStorage
+    from services.doc_processor.storage import get_storage
     
     db = SessionLocal()
     
@@ -47,10 +47,10 @@ def process_document_task(self: Task, document_id: int):
         
         # Ініціалізувати процесор
         processor = DocumentProcessor()
-        storage = MinIOStorage()
+        storage = get_storage()
         
         # Завантажити файл з MinIO
-        file_data = storage.download_file(job.raw_object_name)
+        file_data = storage.download_raw_document(job.raw_object_name)
         job.progress = 20
         db.commit()
         
@@ -111,10 +111,10 @@ def cleanup_old_documents():
     """
     from database import SessionLocal
     from main import DocumentProcessingJob
-    from services.doc_processor.storage import MinIOStorage
+    from services.doc_processor.storage import get_storage
     
     db = SessionLocal()
-    storage = MinIOStorage()
+    storage = get_storage()
     
     try:
         cutoff_date = datetime.now() - timedelta(days=90)
@@ -127,9 +127,9 @@ def cleanup_old_documents():
             try:
                 # Видалити файли з MinIO
                 if job.raw_object_name:
-                    storage.delete_file(job.raw_object_name)
+                    storage.delete_file(storage.BUCKET_RAW, job.raw_object_name)
                 if job.processed_object_name:
-                    storage.delete_file(job.processed_object_name)
+                    storage.delete_file(storage.BUCKET_PROCESSED, job.processed_object_name)
                 
                 # Видалити запис з БД
                 db.delete(job)
@@ -151,6 +151,58 @@ def cleanup_old_documents():
         db.close()
 
 
+@celery_app.task
+def cleanup_abandoned_uploads():
+    """
+    Прибрати незавершені прямі завантаження (presigned upload)
+    
+    Скасовує multipart-завантаження, які клієнт так і не завершив, і
+    видаляє задачі, що застрягли в статусі "uploading"
+    """
+    from database import SessionLocal
+    from main import DocumentProcessingJob
+    from services.doc_processor.storage import get_storage
+    
+    db = SessionLocal()
+    storage = get_storage()
+    
+    try:
+        aborted = storage.abort_abandoned_uploads(storage.BUCKET_RAW)
+        
+        cutoff_date = datetime.utcnow() - storage.ABANDONED_UPLOAD_AGE
+        stale_jobs = db.query(DocumentProcessingJob).filter(
+            DocumentProcessingJob.status == "uploading",
+            DocumentProcessingJob.uploaded_at < cutoff_date
+        ).all()
+        
+        for job in stale_jobs:
+            try:
+                # Одиночний PUT міг завершитися, але клієнт не підтвердив;
+                # об'єкт з тим самим ім'ям може належати іншій задачі
+                shared = db.query(DocumentProcessingJob).filter(
+                    DocumentProcessingJob.raw_object_name == job.raw_object_name,
+                    DocumentProcessingJob.document_id != job.document_id
+                ).first()
+                if not shared and storage.file_exists(storage.BUCKET_RAW, job.raw_object_name):
+                    storage.delete_file(storage.BUCKET_RAW, job.raw_object_name)
+                db.delete(job)
+            except Exception as e:
+                logger.error(f"Error cleaning up upload {job.document_id}: {e}")
+        
+        db.commit()
+        logger.info(f"Upload cleanup: aborted {aborted} uploads, removed {len(stale_jobs)} jobs")
+        
+        return {"aborted": aborted, "removed": len(stale_jobs)}
+        
+    except Exception as e:
+        logger.error(f"Error in upload cleanup task: {e}")
+        db.rollback()
+        return {"error": str(e)}
+        
+    finally:
+        db.close()
+
+
 @celery_app.task
 def generate_embeddings_batch(document_ids: list):
     """
@@ -201,4 +253,8 @@ celery_app.conf.beat_schedule = {
         'task': 'services.doc_processor.tasks.cleanup_old_documents',
         'schedule': crontab(hour=3, minute=0),  # Щодня о 3:00
     },
+    'cleanup-abandoned-uploads-hourly': {
+        'task': 'services.doc_processor.tasks.cleanup_abandoned_uploads',
+        'schedule': crontab(minute=30),  # Щогодини
+    },
 }
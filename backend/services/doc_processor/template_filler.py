@@ -13,7 +13,7 @@ from docx.shared import Pt, Inches
 from datetime import datetime
 from pathlib import Path
 
-from .storage import MinIOStorage
+from .storage import MinIOStorage, get_storage
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +31,7 @@ class TemplateFiller:
     
     def __init__(self, storage: Optional[MinIOStorage] = None):
         """Initialize template filler with optional MinIO storage."""
-        self.storage = storage or MinIOStorage()
+        self.storage = storage or get_storage()
         self.templates_dir = Path(__file__).parent / 'templates'
     
     def fill_template(
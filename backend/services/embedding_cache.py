@@ -0,0 +1,178 @@
+"""
+Embedding Cache
+
+Shared cache of OpenAI embeddings, used by every embedding caller
+(services/rag/embeddings.py, services/embedding_service.py and the
+retrieval chain).
+
+- Keys are the embedding model plus a hash of the normalized text (Unicode
+  NFC, collapsed whitespace), so repeated questions that differ only in
+  spacing share one entry; the normalized text is also what gets embedded.
+- An in-process LRU sits in front of Redis. Embeddings never change for a
+  given model, so both tiers keep them for a long time.
+- Vectors are stored as raw little-endian float32 (6 KB for 1536
+  dimensions) instead of JSON.
+- Concurrent requests for the same text in one event loop share a single
+  API call.
+"""
+
+import asyncio
+import hashlib
+import re
+import unicodedata
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from services.cache_service import LRUCache, cache
+from services.metrics import CACHE_EVENTS
+
+EMBEDDING_TTL = 2592000  # 30 days in Redis
+L1_TTL = 86400  # 1 day in process memory
+L1_MAX_ENTRIES = 2048  # ~12 MB at 1536 dimensions
+
+DTYPE = np.dtype("<f4")
+
+EmbedFunction = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def normalize(text: str) -> str:
+    """Canonical form of a text for keying and embedding"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def encode(vector) -> bytes:
+    return np.asarray(vector, dtype=DTYPE).tobytes()
+
+
+def decode(data: bytes) -> List[float]:
+    return np.frombuffer(data, dtype=DTYPE).tolist()
+
+
+class EmbeddingCache:
+    """Two-tier float32 embedding cache with request coalescing"""
+
+    def __init__(self, l1_max_entries: int = L1_MAX_ENTRIES, ttl: int = EMBEDDING_TTL):
+        self.l1 = LRUCache(l1_max_entries)
+        self.ttl = ttl
+        # (event loop id, key) -> future of the encoded vector
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    def key(self, model: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        return f"{cache.prefix}embedding:{model}:{digest}"
+
+    def _count(self, event: str, amount: int = 1):
+        if amount:
+            CACHE_EVENTS.inc(amount, event=f"embedding_{event}")
+
+    def _lookup(self, keys: List[str]) -> Dict[str, bytes]:
+        """Encoded vectors found in L1, then Redis (one MGET)"""
+        found = {}
+        for key in keys:
+            data = self.l1.get(key)
+            if data is not None:
+                found[key] = data
+        self._count("l1_hits", len(found))
+
+        remaining = [key for key in keys if key not in found]
+        if remaining:
+            try:
+                values = cache.redis_client.mget(remaining)
+            except Exception as e:
+                print(f"Embedding cache get error: {e}")
+                values = [None] * len(remaining)
+            for key, data in zip(remaining, values):
+                if data is not None:
+                    found[key] = data
+                    self.l1.set(key, data, L1_TTL)
+                    self._count("l2_hits")
+        return found
+
+    def _store(self, entries: Dict[str, bytes]):
+        for key, data in entries.items():
+            self.l1.set(key, data, L1_TTL)
+        try:
+            pipe = cache.redis_client.pipeline(transaction=False)
+            for key, data in entries.items():
+                pipe.setex(key, self.ttl, data)
+            pipe.execute()
+        except Exception as e:
+            print(f"Embedding cache set error: {e}")
+
+    async def get_many(self, model: str, texts: List[str], embed: EmbedFunction) -> List[List[float]]:
+        """
+        Embeddings for texts, calling embed() once for all uncached ones.
+
+        Args:
+            model: Embedding model name (part of the key)
+            texts: Texts to embed
+            embed: Coroutine function embedding a list of (normalized) texts
+
+        Returns:
+            One vector per input text, in order
+
+        Raises:
+            Whatever embed() raises; nothing is cached in that case
+        """
+        normalized = [normalize(text) for text in texts]
+        keys = [self.key(model, text) for text in normalized]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        loop_id = id(asyncio.get_running_loop())
+        waiting: Dict[str, asyncio.Future] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, normalized):
+            if key in found or key in waiting or key in missing:
+                continue
+            future = self._inflight.get((loop_id, key))
+            if future is not None:
+                waiting[key] = future
+            else:
+                missing[key] = text
+
+        if missing:
+            self._count("misses", len(missing))
+            futures = {}
+            for key in missing:
+                futures[key] = asyncio.get_running_loop().create_future()
+                self._inflight[(loop_id, key)] = futures[key]
+            try:
+                vectors = await embed(list(missing.values()))
+                computed = {key: encode(vector) for key, vector in zip(missing, vectors)}
+                self._store(computed)
+                found.update(computed)
+                for key, future in futures.items():
+                    future.set_result(computed[key])
+            except BaseException as e:
+                for future in futures.values():
+                    if future.done():
+                        continue
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+                        future.exception()  # mark retrieved; waiters re-raise it themselves
+                raise
+            finally:
+                for key in futures:
+                    self._inflight.pop((loop_id, key), None)
+
+        if waiting:
+            self._count("coalesced", len(waiting))
+            for key, future in waiting.items():
+                found[key] = await asyncio.shield(future)
+
+        return [decode(found[key]) for key in keys]
+
+    async def get(self, model: str, text: str, embed: EmbedFunction) -> List[float]:
+        """Embedding for a single text (see get_many)"""
+        return (await self.get_many(model, [text], embed))[0]
+
+    def clear(self):
+        """Drop the in-process tier (Redis entries expire on their own)"""
+        self.l1.clear()
+
+
+# Global embedding cache instance
+embedding_cache = EmbeddingCache()
@@ -11,6 +11,8 @@ from typing import List, Dict
 from openai import AsyncOpenAI
 from sqlalchemy.orm import Session
 
+from services.embedding_cache import embedding_cache
+
 
 class EmbeddingService:
     """Service for generating and storing vector embeddings"""
@@ -35,17 +37,20 @@ class EmbeddingService:
             if len(text) > 30000:  # Rough estimate
                 text = text[:30000]
             
-            response = await self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            
-            return response.data[0].embedding
+            return await embedding_cache.get(self.model, text, self._generate)
             
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return []
     
+    async def _generate(self, texts: List[str]) -> List[List[float]]:
+        """Call the embeddings API for texts not found in the cache"""
+        response = await self.client.embeddings.create(
+            model=self.model,
+            input=texts
+        )
+        return [item.embedding for item in response.data]
+    
     async def store_embedding(
         self, 
         db: Session, 
@@ -7,9 +7,20 @@ Supports all 11 platform languages with RAG
 """
 
 import os
+import time
 from typing import List, Dict, Optional
 from openai import AsyncOpenAI
 
+from services import openai_usage
+from services.answer_cache import agencies_tag, answer_cache
+from services.context_assembler import allocate, count_tokens, fit_history, prompt_budget, truncate_to_tokens
+from services.language_detection import detect_language
+
+CHAT_MODEL = "gpt-4"
+CHAT_MAX_TOKENS = 800
+OVERRIDE_PROBABILITY = 0.9  # detector confidence needed to override the frontend language
+OVERRIDE_MIN_WORDS = 4  # shorter messages (names, replies) are not guessed statistically
+
 
 class HousingChatService:
     """Conversational housing consultant service with RAG"""
@@ -23,46 +34,13 @@ class HousingChatService:
         Detect language from message content
         Returns language code (sk, cs, pl, en, de, fr, es, uk, it, ru, pt) or None
         """
-        message_lower = message.lower()
-        
-        # Check for Cyrillic script (Ukrainian/Russian)
-        has_cyrillic = any('\u0400' <= char <= '\u04FF' for char in message)
-        
-        if has_cyrillic:
-            # Ukrainian-specific: і, ї, є, ґ
-            ukrainian_chars = ['і', 'ї', 'є', 'ґ']
-            ukrainian_words = ['шукаю', 'житло', 'квартиру', 'гуртожиток', 'пиши', 'українською']
-            
-            if any(char in message_lower for char in ukrainian_chars) or \
-               any(word in message_lower for word in ukrainian_words):
-                return 'uk'
-            
-            # Russian-specific: ы, э, ъ
-            russian_words = ['ищу', 'жилье', 'квартиру', 'общежитие', 'пиши', 'по-русски']
-            if any(word in message_lower for word in russian_words):
-                return 'ru'
-            
-            # Default Cyrillic to Ukrainian (more common on platform)
-            return 'uk'
-        
-        # Check for specific language keywords
-        lang_keywords = {
-            'sk': ['hľadám', 'bývanie', 'byt', 'slovensky', 'slovenčina'],
-            'cs': ['hledám', 'bydlení', 'česky', 'čeština'],
-            'pl': ['szukam', 'mieszkania', 'po polsku', 'polski'],
-            'de': ['suche', 'wohnung', 'auf deutsch', 'deutsch'],
-            'fr': ['cherche', 'logement', 'en français', 'français'],
-            'es': ['busco', 'vivienda', 'en español', 'español'],
-            'it': ['cerco', 'alloggio', 'in italiano', 'italiano'],
-            'pt': ['procuro', 'moradia', 'em português', 'português'],
-        }
-        
-        for lang, keywords in lang_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
-                return lang
-        
-        # No clear language detected
-        return None
+        # Only a confident detection overrides the frontend language
+        return detect_language(
+            message,
+            default=None,
+            min_probability=OVERRIDE_PROBABILITY,
+            min_words=OVERRIDE_MIN_WORDS
+        )
 
 
     async def chat(
@@ -114,18 +92,40 @@ class HousingChatService:
         else:
             print(f"❌ Skipping city detection: db={bool(db)}, not city={not city}")
         
+        # AUTOMATIC LANGUAGE DETECTION - Override frontend language if message is in different language
+        detected_language = self._detect_message_language(message)
+        if detected_language and detected_language != language:
+            print(f"🌍 Language auto-detected: {language} → {detected_language} (from message content)")
+            language = detected_language
+        
+        # Repeated first-turn questions are answered from the semantic cache.
+        # user_name is not part of the scope: the prompt does not use it, so
+        # the answer is the same for every user.
+        cache_scope = ("housing_chat", jurisdiction, city or "", language)
+        cache_tags = []
+        cached_answer, question_embedding = (None, None)
+        if not conversation_history:
+            cached_answer, question_embedding = await answer_cache.lookup(cache_scope, message)
+            if cached_answer:
+                print(f"⚡ Answered from cache ({jurisdiction}, {city}, {language})")
+                return cached_answer
+        
         # Retrieve agencies context from database if city available
         agencies_context = ""
         if db and city:
             # Use the provided jurisdiction for agency search
             agencies_context = self._get_agencies_context(db, city, jurisdiction)
+            cache_tags = [agencies_tag("housing", jurisdiction, city)]
             print(f"Retrieved {len(agencies_context)} chars of agency context for {city} (Country: {jurisdiction})")
         
-        # AUTOMATIC LANGUAGE DETECTION - Override frontend language if message is in different language
-        detected_language = self._detect_message_language(message)
-        if detected_language and detected_language != language:
-            print(f"🌍 Language auto-detected: {language} → {detected_language} (from message content)")
-            language = detected_language
+        # Split the prompt budget between agencies context and history
+        context_budget, history_budget = allocate(
+            prompt_budget(CHAT_MODEL, CHAT_MAX_TOKENS),
+            [self._get_system_prompt(language, user_name, jurisdiction), message],
+            conversation_history,
+            count_tokens(agencies_context)
+        )
+        agencies_context = truncate_to_tokens(agencies_context, context_budget)
         
         # System prompt - defines AI behavior with RAG context
         system_prompt = self._get_system_prompt(language, user_name, jurisdiction, agencies_context)
@@ -133,27 +133,29 @@ class HousingChatService:
         # Build messages for OpenAI
         messages = [{"role": "system", "content": system_prompt}]
         
-        # Add conversation history
-        for msg in conversation_history:
-            messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
+        # Add conversation history (older turns digested if over budget)
+        messages.extend(fit_history(conversation_history, history_budget))
         
         # Add current message
         messages.append({"role": "user", "content": message})
         
+        openai_start = time.time()
         try:
             response = await self.client.chat.completions.create(
-                model="gpt-4",
+                model=CHAT_MODEL,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=800
+                max_tokens=CHAT_MAX_TOKENS
             )
+            openai_usage.record("housing_chat", CHAT_MODEL, time.time() - openai_start, response.usage)
             
-            return response.choices[0].message.content.strip()
+            answer = response.choices[0].message.content.strip()
+            if not conversation_history:
+                answer_cache.store(cache_scope, message, answer, question_embedding, tags=cache_tags)
+            return answer
             
         except Exception as e:
+            openai_usage.record("housing_chat", CHAT_MODEL, time.time() - openai_start, error=True)
             print(f"Error in housing chat: {e}")
             return self._get_error_message(language)
     
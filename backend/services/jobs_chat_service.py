@@ -7,9 +7,19 @@ Supports all 11 platform languages with RAG
 """
 
 import os
+import time
 from typing import List, Dict, Optional
 from openai import AsyncOpenAI
 
+from services.cache_service import cache
+from services import openai_usage
+from services.answer_cache import agencies_tag, answer_cache
+from services.context_assembler import allocate, count_tokens, fit_history, prompt_budget, truncate_to_tokens
+
+AGENCIES_CONTEXT_TTL = 600  # seconds
+CHAT_MODEL = "gpt-4"
+CHAT_MAX_TOKENS = 800
+
 
 class JobsChatService:
     """Conversational jobs consultant service with RAG"""
@@ -56,6 +66,18 @@ class JobsChatService:
         else:
             print(f"❌ Skipping city detection: db={bool(db)}, not city={not city}")
         
+        # Repeated first-turn questions are answered from the semantic cache.
+        # user_name is not part of the scope: the prompt does not use it, so
+        # the answer is the same for every user.
+        cache_scope = ("jobs_chat", jurisdiction, city or "", language)
+        cache_tags = []
+        cached_answer, question_embedding = (None, None)
+        if not conversation_history:
+            cached_answer, question_embedding = await answer_cache.lookup(cache_scope, message)
+            if cached_answer:
+                print(f"⚡ Answered from cache ({jurisdiction}, {city}, {language})")
+                return cached_answer
+        
         # Retrieve agencies context from database if city available
         agencies_context = ""
         if db and city:
@@ -66,35 +88,47 @@ class JobsChatService:
             search_jurisdiction = city_country if city_country else jurisdiction
             
             agencies_context = self._get_agencies_context(db, city, search_jurisdiction)
+            cache_tags = [agencies_tag("jobs", search_jurisdiction, city)]
             print(f"Retrieved {len(agencies_context)} chars of agency context for {city} (Country: {search_jurisdiction})")
         
+        # Split the prompt budget between agencies context and history
+        context_budget, history_budget = allocate(
+            prompt_budget(CHAT_MODEL, CHAT_MAX_TOKENS),
+            [self._get_system_prompt(language, user_name, jurisdiction), message],
+            conversation_history,
+            count_tokens(agencies_context)
+        )
+        agencies_context = truncate_to_tokens(agencies_context, context_budget)
+        
         # System prompt - defines AI behavior with RAG context
         system_prompt = self._get_system_prompt(language, user_name, jurisdiction, agencies_context)
         
         # Build messages for OpenAI
         messages = [{"role": "system", "content": system_prompt}]
         
-        # Add conversation history
-        for msg in conversation_history:
-            messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
+        # Add conversation history (older turns digested if over budget)
+        messages.extend(fit_history(conversation_history, history_budget))
         
         # Add current message
         messages.append({"role": "user", "content": message})
         
+        openai_start = time.time()
         try:
             response = await self.client.chat.completions.create(
-                model="gpt-4",
+                model=CHAT_MODEL,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=800
+                max_tokens=CHAT_MAX_TOKENS
             )
+            openai_usage.record("jobs_chat", CHAT_MODEL, time.time() - openai_start, response.usage)
             
-            return response.choices[0].message.content.strip()
+            answer = response.choices[0].message.content.strip()
+            if not conversation_history:
+                answer_cache.store(cache_scope, message, answer, question_embedding, tags=cache_tags)
+            return answer
             
         except Exception as e:
+            openai_usage.record("jobs_chat", CHAT_MODEL, time.time() - openai_start, error=True)
             print(f"Error in jobs chat: {e}")
             return self._get_error_message(language)
     
@@ -887,6 +921,29 @@ class JobsChatService:
         return best_match
 
     def _get_agencies_context(self, db, city: str, country_code: str = 'SK') -> str:
+        """
+        Cached agencies context for a city (see _build_agencies_context)
+        
+        Args:
+            db: Database session
+            city: City name
+            country_code: Country code (default: SK)
+            
+        Returns:
+            Formatted context with real agencies data
+        """
+        try:
+            return cache.get_or_set(
+                cache.make_key("agencies_context", country_code, city),
+                lambda: self._build_agencies_context(db, city, country_code),
+                ttl=AGENCIES_CONTEXT_TTL,
+                tags=[agencies_tag("jobs", country_code, city)]
+            )
+        except Exception as e:
+            print(f"Error retrieving agencies: {e}")
+            return "Database error - unable to retrieve agencies."
+
+    def _build_agencies_context(self, db, city: str, country_code: str = 'SK') -> str:
         """
         Retrieve job agencies from database for given city
         
@@ -1226,7 +1283,7 @@ class JobsChatService:
             
         except Exception as e:
             print(f"Error retrieving agencies: {e}")
-            return "Database error - unable to retrieve agencies."
+            raise
     
     def _get_system_prompt(self, language: str, user_name: str, jurisdiction: str, agencies_context: str = "") -> str:
         """Get system prompt in user's language - ALL 10 LANGUAGES SUPPORTED"""
@@ -0,0 +1,229 @@
+"""
+Language Detection
+
+Shared language identification for the 11 platform languages
+(sk, cs, pl, en, de, fr, es, it, ru, uk, pt).
+
+Most chat messages are settled without the statistical detector:
+- script: Cyrillic text is Ukrainian or Russian; text in another non-Latin
+  script is not a platform language;
+- letters used by only one platform language (ł, ř, ľ, ñ, ã, ї, ы, ...),
+  when they are a real share of the letters or the function words agree:
+  one ł in "University of Wrocław" is a place name, not Polish;
+- common function words and greetings, when one language clearly leads.
+
+Everything else goes to langdetect, with a detector factory that holds only
+the platform profiles (loaded once, see preload()) and a fixed seed, so the
+same text always gets the same answer. With only 11 profiles it is confident
+about almost anything, so it is not asked about texts shorter than
+MIN_DETECTOR_LETTERS ("Hello!", "Help"). Results for short texts are cached.
+"""
+
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+LANGUAGES = ('sk', 'cs', 'pl', 'en', 'de', 'fr', 'es', 'it', 'ru', 'uk', 'pt')
+CYRILLIC_LANGUAGES = ('ru', 'uk')
+
+MAX_TEXT_CHARS = 2000  # detector sample; enough for a page, bounds the cost
+CACHE_MAX_CHARS = 500  # texts up to this length (chat messages) are memoized
+CACHE_SIZE = 4096
+MIN_DETECTOR_LETTERS = 10  # shorter texts are not guessed statistically
+MARKER_SHARE = 0.04  # share of marker letters that settles the language alone
+MIN_MARKERS = 2
+
+# Letters that, among the platform languages, only one uses
+MARKERS = {
+    'pl': 'łśźżąęńć',
+    'cs': 'řůě',
+    'sk': 'ľĺŕ',  # not ô: French and Portuguese use it too
+    'de': 'ßö',
+    'es': 'ñ¿¡',
+    'pt': 'ãõ',
+    'fr': 'œëïîû',
+    'it': 'ìò',
+    'uk': 'іїєґ',
+    'ru': 'ыэъё',
+}
+MARKER_LANGUAGE = {char: lang for lang, chars in MARKERS.items() for char in chars}
+
+# Frequent short words, greetings and common chat words of each language;
+# a word shared by several languages counts for each of them fractionally
+FUNCTION_WORDS = {
+    'en': 'the is are what how where when which can do does i my you your and of for to cost hello hi please',
+    'de': 'der die das und ist sind wie was wo ich du dir nicht ein eine für mit es hallo bitte',
+    'fr': 'le la les est et je des une pour quel quelle comment vous où bonjour merci',
+    'es': 'el los las es y que como para una cuál cuánto hay dónde cuesta hola gracias',
+    'it': 'il gli che è per come una sono di non quanto dove costa ciao grazie',
+    'pt': 'os as é que como para uma não quanto onde custa você olá obrigado',
+    'sk': 'je sú ako na sa som aké koľko pre kde ahoj prosím',
+    'cs': 'je jsou jak na se jsem jaké kolik pro kde ahoj prosím',
+    'pl': 'jest są jak na się czy ile dla gdzie jestem proszę',
+    'ru': 'как что где это привет сколько есть мне можно ищу жилье квартиру',
+    'uk': 'як що де це привіт скільки є мені можна шукаю житло квартиру',
+}
+WORD_LANGUAGES = {}
+for _lang, _words in FUNCTION_WORDS.items():
+    for _word in _words.split():
+        WORD_LANGUAGES.setdefault(_word, []).append(_lang)
+
+WORD_RE = re.compile(r"\w+")
+
+_factory = None
+_factory_lock = threading.Lock()
+
+
+def preload():
+    """Load the detector profiles of the platform languages (once per process)"""
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+                import os
+
+                factory = DetectorFactory()
+                profiles = []
+                for lang in LANGUAGES:
+                    with open(os.path.join(PROFILES_DIRECTORY, lang), encoding='utf-8') as f:
+                        profiles.append(f.read())
+                factory.load_json_profile(profiles)
+                factory.set_seed(0)
+                _factory = factory
+    return _factory
+
+
+def _script(text: str) -> Optional[str]:
+    """'cyrillic', 'latin', 'other' by the majority of letters; None without letters"""
+    counts = Counter()
+    for char in text:
+        if char.isalpha():
+            if 'Ѐ' <= char <= 'ӿ':
+                counts['cyrillic'] += 1
+            elif char < 'ɐ':
+                counts['latin'] += 1
+            else:
+                counts['other'] += 1
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def _leader(counts: Counter) -> Optional[str]:
+    """Language with a score of at least 1.5 and twice that of any other"""
+    ranked = counts.most_common(2)
+    if not ranked or ranked[0][1] < 1.5:
+        return None
+    if len(ranked) > 1 and ranked[0][1] < 2 * ranked[1][1]:
+        return None
+    return ranked[0][0]
+
+
+def _fast_path(text: str, script: str) -> Optional[str]:
+    lowered = text.lower()
+    candidates = CYRILLIC_LANGUAGES if script == 'cyrillic' else LANGUAGES
+
+    words = Counter()
+    for word in WORD_RE.findall(lowered):
+        languages = [lang for lang in WORD_LANGUAGES.get(word, ()) if lang in candidates]
+        for lang in languages:
+            words[lang] += 1 / len(languages)
+
+    leader = _leader(words)
+    markers = Counter(
+        MARKER_LANGUAGE[char] for char in lowered
+        if char in MARKER_LANGUAGE and MARKER_LANGUAGE[char] in candidates
+    )
+    if leader or len(markers) != 1:
+        return leader
+
+    lang, count = markers.popitem()
+    letters = sum(char.isalpha() for char in lowered)
+    if count >= MIN_MARKERS and count >= MARKER_SHARE * letters:
+        return lang
+    # A stray marker (a name) counts only if the function words agree
+    if words[lang] and words[lang] == max(words.values()):
+        return lang
+    return None
+
+
+def _detector(text: str, script: str) -> Optional[Tuple[str, float]]:
+    """Most probable platform language of the script, with its probability"""
+    from langdetect.lang_detect_exception import LangDetectException
+
+    detector = preload().create()
+    detector.set_max_text_length(MAX_TEXT_CHARS)
+    try:
+        detector.append(text)
+        probabilities = detector.get_probabilities()
+    except LangDetectException:
+        return None
+
+    for candidate in probabilities:
+        if (candidate.lang in CYRILLIC_LANGUAGES) == (script == 'cyrillic'):
+            return candidate.lang, candidate.prob
+    return None
+
+
+def _identify(text: str) -> Optional[Tuple[str, float, bool]]:
+    """
+    (language, confidence, statistical) of a text, or None if not a
+    platform language; statistical is False for fast-path answers
+    """
+    script = _script(text)
+    if script is None or script == 'other':
+        return None
+    lang = _fast_path(text, script)
+    if lang:
+        return lang, 1.0, False
+    if sum(char.isalpha() for char in text) < MIN_DETECTOR_LETTERS:
+        return None
+    guess = _detector(text, script)
+    return (*guess, True) if guess else None
+
+
+_identify_cached = lru_cache(maxsize=CACHE_SIZE)(_identify)
+
+
+def detect_language(
+    text: str,
+    default: Optional[str] = 'en',
+    min_probability: float = 0.0,
+    min_words: int = 0
+) -> Optional[str]:
+    """
+    Platform language of a text.
+
+    Args:
+        text: Message or page text
+        default: Returned if the text is not (confidently) a platform language
+        min_probability: Minimum detector probability to accept a guess
+        min_words: Minimum words for a statistical guess; script, marker
+            letters and function words are trusted on texts of any length
+
+    Returns:
+        Language code, or default
+    """
+    if not text or not text.strip():
+        return default
+    if len(text) <= CACHE_MAX_CHARS:
+        result = _identify_cached(text.strip())
+    else:
+        result = _identify(text[:MAX_TEXT_CHARS])
+    if result is None or result[1] < min_probability:
+        return default
+    lang, _, statistical = result
+    if statistical and len(WORD_RE.findall(text)) < min_words:
+        return default
+    return lang
+
+
+def detect_languages(texts: List[str], default: Optional[str] = 'en') -> List[Optional[str]]:
+    """Platform language of each text (e.g. all pages of a scrape), in order"""
+    preload()
+    results = {}
+    for text in texts:
+        if text not in results:
+            results[text] = detect_language(text, default)
+    return [results[text] for text in texts]
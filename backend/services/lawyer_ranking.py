@@ -0,0 +1,267 @@
+"""
+LAWYER RANKING ENGINE
+Array-backed snapshot of marketplace lawyers and vectorized match scoring
+
+The matching scenarios used to load every verified lawyer as an ORM object
+and score them one by one. Instead, the features that scoring and sorting
+need are kept in a compact NumPy snapshot that is rebuilt at most every
+SNAPSHOT_TTL seconds (or when invalidate() is called after a profile
+change). Scores for all candidates are computed at once and the top k are
+selected with argpartition, so only the lawyers actually returned are
+loaded from the database.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+SNAPSHOT_TTL = 60  # seconds
+
+# Scoring weights (see matching_service._calculate_match_score)
+SPECIALIZATION_MATCH = 40
+SPECIALIZATION_PARTIAL = 10
+RATING_WEIGHT = 25
+SUCCESS_RATE_DEFAULT = 15
+AVAILABILITY = 10
+PRICE_DEFAULT = 3
+MAX_SCORE = 100
+
+
+def _vocabulary(values: Sequence[Optional[list]]) -> Dict[str, int]:
+    """Map every distinct tag in a list-valued column to a column index"""
+    vocab: Dict[str, int] = {}
+    for tags in values:
+        for tag in tags or []:
+            if tag not in vocab:
+                vocab[tag] = len(vocab)
+    return vocab
+
+
+def _membership(values: Sequence[Optional[list]], vocab: Dict[str, int]) -> np.ndarray:
+    """Boolean (lawyers x tags) matrix; row i flags the tags lawyer i has"""
+    matrix = np.zeros((len(values), max(len(vocab), 1)), dtype=bool)
+    for row, tags in enumerate(values):
+        for tag in tags or []:
+            matrix[row, vocab[tag]] = True
+    return matrix
+
+
+class LawyerSnapshot:
+    """
+    Column-oriented features of all verified, active lawyers.
+
+    Rows are ordered by lawyer id so ties resolve deterministically.
+    Specializations, jurisdictions and languages are stored as boolean
+    membership matrices against per-snapshot vocabularies.
+    """
+
+    def __init__(self, rows: Sequence):
+        rows = sorted(rows, key=lambda r: r.id)
+        self.size = len(rows)
+        self.ids = np.array([r.id for r in rows], dtype=np.int64)
+        self.rating = np.array([r.average_rating or 0 for r in rows], dtype=np.float64)
+        self.has_rating = np.array([r.average_rating is not None for r in rows], dtype=bool)
+        self.price = np.array(
+            [r.hourly_rate if r.hourly_rate is not None else np.inf for r in rows],
+            dtype=np.float64
+        )
+        self.created = np.array(
+            [r.created_at.timestamp() if r.created_at else 0.0 for r in rows],
+            dtype=np.float64
+        )
+
+        specializations = [r.specializations for r in rows]
+        jurisdictions = [r.jurisdictions for r in rows]
+        languages = [r.languages for r in rows]
+        self.specialization_index = _vocabulary(specializations)
+        self.jurisdiction_index = _vocabulary(jurisdictions)
+        self.language_index = _vocabulary(languages)
+        self.specializations = _membership(specializations, self.specialization_index)
+        self.jurisdictions = _membership(jurisdictions, self.jurisdiction_index)
+        self.languages = _membership(languages, self.language_index)
+
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def load(cls, db: Session) -> "LawyerSnapshot":
+        """Build a snapshot from the lawyers table (feature columns only)"""
+        from main import Lawyer
+
+        rows = db.query(
+            Lawyer.id,
+            Lawyer.average_rating,
+            Lawyer.hourly_rate,
+            Lawyer.created_at,
+            Lawyer.specializations,
+            Lawyer.jurisdictions,
+            Lawyer.languages
+        ).filter(
+            Lawyer.is_verified == True,
+            Lawyer.is_active == True
+        ).all()
+        return cls(rows)
+
+    def _has(self, matrix: np.ndarray, index: Dict[str, int], tag: str) -> np.ndarray:
+        """Per-lawyer flag for one tag; all False if nobody has it"""
+        column = index.get(tag)
+        if column is None:
+            return np.zeros(self.size, dtype=bool)
+        return matrix[:, column]
+
+    def candidates(self, jurisdiction: Optional[str] = None, language: Optional[str] = None) -> np.ndarray:
+        """Boolean mask of lawyers licensed in the jurisdiction and speaking the language"""
+        mask = np.ones(self.size, dtype=bool)
+        if jurisdiction:
+            mask &= self._has(self.jurisdictions, self.jurisdiction_index, jurisdiction)
+        if language:
+            mask &= self._has(self.languages, self.language_index, language)
+        return mask
+
+    def score(self, category: Optional[str]) -> np.ndarray:
+        """
+        Match score (0-100) of every lawyer for a case category.
+
+        Mirrors matching_service._calculate_match_score; lawyers in the
+        snapshot are all active, so the availability points always apply.
+        A category of None skips the specialization points entirely, as for
+        cases without a category attribute.
+        """
+        scores = np.full(self.size, SUCCESS_RATE_DEFAULT + AVAILABILITY + PRICE_DEFAULT, dtype=np.int64)
+
+        if category is not None:
+            matches = self._has(self.specializations, self.specialization_index, category)
+            scores += np.where(matches, SPECIALIZATION_MATCH, SPECIALIZATION_PARTIAL)
+
+        scores += np.floor(self.rating / 5.0 * RATING_WEIGHT).astype(np.int64)
+        return np.minimum(scores, MAX_SCORE)
+
+    def order_key(self, sort: str, scores: np.ndarray) -> np.ndarray:
+        """
+        Sort key per lawyer where larger ranks first.
+
+        Every key is made unique by folding in the row position (lower id
+        wins ties), so top-k selection and paging are stable.
+        """
+        n = self.size
+        position = np.arange(n, 0, -1, dtype=np.int64)  # lower id -> larger
+
+        if sort == "rating":
+            # NULL ratings last
+            primary = np.where(self.has_rating, self.rating, -1.0)
+        elif sort == "price":
+            # Cheapest first, missing rates last
+            primary = np.where(np.isfinite(self.price), -self.price, -np.inf)
+        elif sort == "speed":
+            # Mock - would sort by average_response_time
+            primary = self.created
+        else:  # recommended
+            primary = scores.astype(np.float64)
+
+        # Dense-rank the primary key so it can be combined with position exactly
+        _, dense = np.unique(primary, return_inverse=True)
+        return dense.astype(np.int64) * (n + 1) + position
+
+
+def top_k(keys: np.ndarray, mask: np.ndarray, k: int, offset: int = 0) -> np.ndarray:
+    """
+    Row positions of ranks [offset, offset + k) among masked rows, best first.
+
+    Uses argpartition to avoid sorting the whole candidate set.
+    """
+    rows = np.flatnonzero(mask)
+    end = min(offset + k, rows.size)
+    if end <= offset:
+        return np.empty(0, dtype=np.int64)
+
+    candidate_keys = -keys[rows]
+    if end < rows.size:
+        head = np.argpartition(candidate_keys, end - 1)[:end]
+    else:
+        head = np.arange(rows.size)
+    head = head[np.argsort(candidate_keys[head], kind="stable")]
+    return rows[head[offset:end]]
+
+
+_snapshot: Optional[LawyerSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot(db: Session) -> LawyerSnapshot:
+    """Get the shared lawyer snapshot, rebuilding it when older than SNAPSHOT_TTL"""
+    global _snapshot
+
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.built_at < SNAPSHOT_TTL:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None or time.monotonic() - _snapshot.built_at >= SNAPSHOT_TTL:
+            _snapshot = LawyerSnapshot.load(db)
+        return _snapshot
+
+
+def invalidate():
+    """Drop the cached snapshot so the next ranking sees fresh lawyer data"""
+    global _snapshot
+    _snapshot = None
+
+
+def rank(
+    db: Session,
+    category: Optional[str],
+    sort: str = "recommended",
+    limit: int = 20,
+    offset: int = 0,
+    jurisdiction: Optional[str] = None,
+    language: Optional[str] = None
+) -> List[tuple]:
+    """
+    Rank available lawyers and load the requested page.
+
+    Args:
+        db: Database session
+        category: Case category used for the specialization match
+        sort: recommended (by score), rating, price or speed
+        limit: Page size
+        offset: Number of ranked lawyers to skip
+        jurisdiction: Only lawyers licensed here (optional)
+        language: Only lawyers speaking this language (optional)
+
+    Returns:
+        List of (Lawyer, match score) in rank order
+    """
+    from main import Lawyer
+
+    snapshot = get_snapshot(db)
+    if not snapshot.size:
+        return []
+
+    scores = snapshot.score(category)
+    mask = snapshot.candidates(jurisdiction, language)
+    rows = top_k(snapshot.order_key(sort, scores), mask, limit, offset)
+    if not rows.size:
+        return []
+
+    ids = snapshot.ids[rows].tolist()
+    lawyers = {
+        lawyer.id: lawyer
+        for lawyer in db.query(Lawyer).filter(
+            Lawyer.id.in_(ids),
+            Lawyer.is_verified == True,
+            Lawyer.is_active == True
+        ).all()
+    }
+    return [
+        (lawyers[lawyer_id], int(score))
+        for lawyer_id, score in zip(ids, scores[rows].tolist())
+        if lawyer_id in lawyers
+    ]
+
+
+def count_available(db: Session, jurisdiction: Optional[str] = None, language: Optional[str] = None) -> int:
+    """Number of available lawyers matching the candidate filters"""
+    snapshot = get_snapshot(db)
+    return int(snapshot.candidates(jurisdiction, language).sum())
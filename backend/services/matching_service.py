@@ -7,8 +7,23 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from typing import Optional, List
 from models.client import LawyerMatchResponse, Top3LawyersResponse
+from services import lawyer_ranking
 
-async def find_best_match(db: Session, case, service_type: str) -> Optional[LawyerMatchResponse]:
+def _case_category(case) -> Optional[str]:
+    """Case category as a plain string, or None if the case has no category"""
+    if not hasattr(case, 'category'):
+        return None
+    category = case.category
+    return getattr(category, 'value', category) or ""
+
+
+async def find_best_match(
+    db: Session,
+    case,
+    service_type: str,
+    jurisdiction: Optional[str] = None,
+    language: Optional[str] = None
+) -> Optional[LawyerMatchResponse]:
     """
     SCENARIO 1: Find best matching lawyer
     
@@ -18,36 +33,32 @@ async def find_best_match(db: Session, case, service_type: str) -> Optional[Lawy
     - Success rate: 20 points
     - Availability: 10 points
     - Price competitiveness: 5 points
-    """
-    from main import Lawyer
     
-    # Get all verified and active lawyers
-    lawyers = db.query(Lawyer).filter(
-        Lawyer.is_verified == True,
-        Lawyer.is_active == True
-    ).all()
+    All verified lawyers are scored at once by the ranking engine; only the
+    winner is loaded from the database.
+    """
+    ranked = lawyer_ranking.rank(
+        db,
+        _case_category(case),
+        limit=1,
+        jurisdiction=jurisdiction,
+        language=language
+    )
     
-    if not lawyers:
+    if not ranked:
         return None
     
-    # Score each lawyer
-    scored_lawyers = []
-    for lawyer in lawyers:
-        score = _calculate_match_score(lawyer, case, service_type)
-        scored_lawyers.append((lawyer, score))
-    
-    # Sort by score
-    scored_lawyers.sort(key=lambda x: x[1], reverse=True)
-    
-    # Return best match
-    if scored_lawyers:
-        best_lawyer, best_score = scored_lawyers[0]
-        return _lawyer_to_match_response(best_lawyer, best_score, service_type)
-    
-    return None
+    best_lawyer, best_score = ranked[0]
+    return _lawyer_to_match_response(best_lawyer, best_score, service_type)
 
 
-async def find_top_3(db: Session, case, service_type: str) -> Top3LawyersResponse:
+async def find_top_3(
+    db: Session,
+    case,
+    service_type: str,
+    jurisdiction: Optional[str] = None,
+    language: Optional[str] = None
+) -> Top3LawyersResponse:
     """
     SCENARIO 2: Find top 3 lawyers with different profiles
     
@@ -56,54 +67,32 @@ async def find_top_3(db: Session, case, service_type: str) -> Top3LawyersRespons
     2. Fastest delivery
     3. Best price
     """
-    from main import Lawyer
-    
-    # Get all verified and active lawyers
-    lawyers = db.query(Lawyer).filter(
-        Lawyer.is_verified == True,
-        Lawyer.is_active == True
-    ).all()
+    total_available = lawyer_ranking.count_available(db, jurisdiction, language)
     
-    if not lawyers:
+    if not total_available:
         return Top3LawyersResponse(
             lawyers=[],
             total_available=0,
             recommendation={}
         )
     
-    # Score all lawyers
-    scored_lawyers = []
-    for lawyer in lawyers:
-        score = _calculate_match_score(lawyer, case, service_type)
-        scored_lawyers.append((lawyer, score))
-    
-    # Sort by score
-    scored_lawyers.sort(key=lambda x: x[1], reverse=True)
-    
-    # Select top 3 with different profiles
-    top_3_lawyers = []
-    
-    # 1. Best overall
-    if scored_lawyers:
-        best_lawyer, best_score = scored_lawyers[0]
-        match = _lawyer_to_match_response(best_lawyer, best_score, service_type)
-        top_3_lawyers.append(match)
-    
-    # 2. Fastest (mock - would check average_response_time)
-    if len(scored_lawyers) > 1:
-        fast_lawyer, fast_score = scored_lawyers[1]
-        match = _lawyer_to_match_response(fast_lawyer, fast_score, service_type)
-        top_3_lawyers.append(match)
-    
+    # 1. Best overall, 2. Fastest (mock - would check average_response_time),
     # 3. Best price (mock - would check hourly_rate)
-    if len(scored_lawyers) > 2:
-        cheap_lawyer, cheap_score = scored_lawyers[2]
-        match = _lawyer_to_match_response(cheap_lawyer, cheap_score, service_type)
-        top_3_lawyers.append(match)
+    ranked = lawyer_ranking.rank(
+        db,
+        _case_category(case),
+        limit=3,
+        jurisdiction=jurisdiction,
+        language=language
+    )
+    top_3_lawyers = [
+        _lawyer_to_match_response(lawyer, score, service_type)
+        for lawyer, score in ranked
+    ]
     
     return Top3LawyersResponse(
         lawyers=top_3_lawyers,
-        total_available=len(lawyers),
+        total_available=total_available,
         recommendation={
             "lawyer_id": top_3_lawyers[0].lawyer_id if top_3_lawyers else None,
             "reason": "Highest success rate for similar cases"
@@ -117,45 +106,38 @@ async def find_all_available(
     service_type: str,
     sort: str = "recommended",
     limit: int = 20,
-    offset: int = 0
+    offset: int = 0,
+    jurisdiction: Optional[str] = None,
+    language: Optional[str] = None
 ) -> List[LawyerMatchResponse]:
     """
     SCENARIO 3: Get all available lawyers with sorting
-    """
-    from main import Lawyer
     
-    query = db.query(Lawyer).filter(
-        Lawyer.is_verified == True,
-        Lawyer.is_active == True
+    Every sort order, including "recommended" (by match score), is applied
+    over all candidates before paging, so pages are consistent.
+    """
+    ranked = lawyer_ranking.rank(
+        db,
+        _case_category(case),
+        sort=sort,
+        limit=limit,
+        offset=offset,
+        jurisdiction=jurisdiction,
+        language=language
     )
     
-    # Apply sorting
-    if sort == "rating":
-        query = query.order_by(Lawyer.average_rating.desc().nullslast())
-    elif sort == "price":
-        query = query.order_by(Lawyer.hourly_rate.asc())
-    elif sort == "speed":
-        # Mock - would sort by average_response_time
-        query = query.order_by(Lawyer.created_at.desc())
-    else:  # recommended
-        # Score-based sorting (mock - would calculate scores)
-        query = query.order_by(Lawyer.average_rating.desc().nullslast())
-    
-    lawyers = query.offset(offset).limit(limit).all()
-    
-    # Convert to response models
-    result = []
-    for lawyer in lawyers:
-        score = _calculate_match_score(lawyer, case, service_type)
-        match = _lawyer_to_match_response(lawyer, score, service_type)
-        result.append(match)
-    
-    return result
+    return [
+        _lawyer_to_match_response(lawyer, score, service_type)
+        for lawyer, score in ranked
+    ]
 
 
 def _calculate_match_score(lawyer, case, service_type: str) -> int:
     """
-    Calculate match score (0-100)
+    Calculate match score (0-100) for a single lawyer
+    
+    Reference implementation of the vectorized
+    lawyer_ranking.LawyerSnapshot.score.
     
     Scoring:
     - Specialization match: 40 points
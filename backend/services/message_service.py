@@ -4,11 +4,55 @@ Business logic for messaging system
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import and_, or_, desc, case, update
 from typing import List, Optional
 from datetime import datetime
+from collections import Counter
 import json
 
+from services import unread_counters
+
+def _format_message(msg, sender_name: Optional[str]) -> dict:
+    """Convert a Message row and its sender's name to a response dict"""
+    return {
+        "id": msg.id,
+        "order_id": msg.order_id,
+        "sender_id": msg.sender_id,
+        "recipient_id": msg.recipient_id,
+        "sender_name": sender_name or "Unknown",
+        "sender_role": "client",  # Would determine from user type
+        "subject": msg.subject,
+        "body": msg.body,
+        "attachments": msg.attachments,
+        "is_read": msg.is_read,
+        "read_at": msg.read_at,
+        "created_at": msg.created_at
+    }
+
+
+def _adjust_unread(db: Session, order_id: int, user_id: int, delta: int):
+    """
+    Atomically add delta to a recipient's unread counter for an order.
+    
+    The counter never goes below zero; a missing row is created on increment.
+    """
+    from main import ConversationCounter
+    
+    new_value = ConversationCounter.unread_count + delta
+    updated = db.query(ConversationCounter).filter(
+        and_(
+            ConversationCounter.order_id == order_id,
+            ConversationCounter.user_id == user_id
+        )
+    ).update({
+        "unread_count": case((new_value < 0, 0), else_=new_value),
+        "updated_at": datetime.utcnow()
+    }, synchronize_session=False)
+    
+    if not updated and delta > 0:
+        db.add(ConversationCounter(order_id=order_id, user_id=user_id, unread_count=delta))
+
+
 async def create_message(
     db: Session,
     order_id: int,
@@ -18,8 +62,8 @@ async def create_message(
     subject: Optional[str] = None,
     attachments: Optional[List[dict]] = None
 ):
-    """Create a new message"""
-    from main import Message, User
+    """Create a new message and update the order's conversation counters"""
+    from main import Message, Order, User
     
     msg = Message(
         order_id=order_id,
@@ -32,29 +76,20 @@ async def create_message(
     )
     
     db.add(msg)
+    if order_id is not None:
+        db.query(Order).filter(Order.id == order_id).update({
+            "message_count": Order.message_count + 1
+        }, synchronize_session=False)
+        _adjust_unread(db, order_id, recipient_id, 1)
+    unread_counters.adjust(db, recipient_id, unread_counters.MESSAGES, 1)
     db.commit()
     db.refresh(msg)
+    await unread_counters.publish(db, [recipient_id])
     
     # Get sender info
-    sender = db.query(User).filter(User.id == sender_id).first()
-    
-    # Convert to dict with sender info
-    result = {
-        "id": msg.id,
-        "order_id": msg.order_id,
-        "sender_id": msg.sender_id,
-        "recipient_id": msg.recipient_id,
-        "sender_name": f"{sender.first_name} {sender.last_name}" if sender else "Unknown",
-        "sender_role": "client",  # Would determine from user type
-        "subject": msg.subject,
-        "body": msg.body,
-        "attachments": msg.attachments,
-        "is_read": msg.is_read,
-        "read_at": msg.read_at,
-        "created_at": msg.created_at
-    }
+    sender_name = db.query(User.name).filter(User.id == sender_id).scalar()
     
-    return result
+    return _format_message(msg, sender_name)
 
 
 async def get_conversation(
@@ -62,85 +97,100 @@ async def get_conversation(
     order_id: int,
     user_id: int,
     limit: int = 50,
-    offset: int = 0
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None
 ):
-    """Get conversation messages for an order"""
-    from main import Message, Order, User
+    """
+    Get conversation messages for an order using keyset pagination.
+    
+    Without a cursor the newest page is returned. before_id pages back through
+    older messages, after_id fetches messages newer than the given id. Messages
+    come back in chronological order either way, and has_more tells whether
+    further messages exist in the direction being paged.
+    
+    Costs two queries regardless of page size or scroll depth: the page with
+    sender names joined in, and the order with its maintained counters.
+    """
+    from main import Message, Order, User, ConversationCounter
     
-    # Get messages
-    messages = db.query(Message).filter(
-        Message.order_id == order_id
-    ).order_by(desc(Message.created_at)).limit(limit).offset(offset).all()
+    query = db.query(Message, User.name).outerjoin(
+        User, User.id == Message.sender_id
+    ).filter(Message.order_id == order_id)
     
-    # Get order
-    order = db.query(Order).filter(Order.id == order_id).first()
+    if after_id is not None:
+        query = query.filter(Message.id > after_id).order_by(Message.id)
+    else:
+        if before_id is not None:
+            query = query.filter(Message.id < before_id)
+        query = query.order_by(desc(Message.id))
     
-    # Get unread count
-    unread_count = db.query(Message).filter(
+    # One extra row tells whether another page exists
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after_id is None:
+        rows.reverse()
+    
+    # Order with its counters
+    summary = db.query(
+        Order.order_number,
+        Order.message_count,
+        ConversationCounter.unread_count
+    ).outerjoin(
+        ConversationCounter,
         and_(
-            Message.order_id == order_id,
-            Message.recipient_id == user_id,
-            Message.is_read == False
+            ConversationCounter.order_id == Order.id,
+            ConversationCounter.user_id == user_id
         )
-    ).count()
-    
-    # Get total count
-    total_messages = db.query(Message).filter(Message.order_id == order_id).count()
-    
-    # Format messages
-    formatted_messages = []
-    for msg in messages:
-        sender = db.query(User).filter(User.id == msg.sender_id).first()
-        formatted_messages.append({
-            "id": msg.id,
-            "order_id": msg.order_id,
-            "sender_id": msg.sender_id,
-            "recipient_id": msg.recipient_id,
-            "sender_name": f"{sender.first_name} {sender.last_name}" if sender else "Unknown",
-            "sender_role": "client",
-            "subject": msg.subject,
-            "body": msg.body,
-            "attachments": msg.attachments,
-            "is_read": msg.is_read,
-            "read_at": msg.read_at,
-            "created_at": msg.created_at
-        })
+    ).filter(Order.id == order_id).first()
     
     return {
         "order_id": order_id,
-        "order_number": order.order_number if order else "",
-        "messages": list(reversed(formatted_messages)),
-        "unread_count": unread_count,
-        "total_messages": total_messages,
-        "has_more": (offset + limit) < total_messages,
+        "order_number": summary.order_number if summary else "",
+        "messages": [_format_message(msg, name) for msg, name in rows],
+        "unread_count": (summary.unread_count or 0) if summary else 0,
+        "total_messages": (summary.message_count or 0) if summary else 0,
+        "has_more": has_more,
         "other_party": {}
     }
 
 
 async def mark_as_read(db: Session, message_ids: List[int], user_id: int):
-    """Mark messages as read"""
+    """Mark messages as read and decrement the per-order unread counters"""
     from main import Message
     
-    db.query(Message).filter(
-        and_(
-            Message.id.in_(message_ids),
-            Message.recipient_id == user_id
-        )
-    ).update({
-        "is_read": True,
-        "read_at": datetime.now()
-    }, synchronize_session=False)
+    if not message_ids:
+        return
+    
+    unread_filter = and_(
+        Message.id.in_(message_ids),
+        Message.recipient_id == user_id,
+        Message.is_read == False
+    )
     
+    # Only messages this UPDATE actually flipped move the counters, so a
+    # concurrent mark_as_read of the same messages cannot decrement twice
+    updated = db.execute(
+        update(Message)
+        .where(unread_filter)
+        .values(is_read=True, read_at=datetime.now())
+        .returning(Message.order_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    per_order = Counter(updated)
+    
+    for order_id, count in per_order.items():
+        if order_id is not None:
+            _adjust_unread(db, order_id, user_id, -count)
+    
+    read_count = len(updated)
+    unread_counters.adjust(db, user_id, unread_counters.MESSAGES, -read_count)
     db.commit()
+    
+    if read_count:
+        await unread_counters.publish(db, [user_id])
 
 
 async def get_unread_count(db: Session, user_id: int) -> int:
-    """Get total unread messages count"""
-    from main import Message
-    
-    return db.query(Message).filter(
-        and_(
-            Message.recipient_id == user_id,
-            Message.is_read == False
-        )
-    ).count()
+    """Get total unread messages count from the maintained counter"""
+    return unread_counters.get_count(db, user_id, unread_counters.MESSAGES)
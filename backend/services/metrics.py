@@ -0,0 +1,449 @@
+"""
+METRICS
+Process-wide metrics registry with Prometheus text exposition
+
+Counters, histograms and gauges are recorded in memory (a dict update under
+a lock, no I/O on the request path) and flushed every FLUSH_INTERVAL seconds
+by a background thread:
+- counter and histogram deltas are added to one shared Redis hash, so the
+  totals cover every worker process and replica;
+- gauges are written per instance and summed over the instances that
+  reported recently.
+
+GET /metrics renders the aggregated values in the Prometheus text format.
+Without Redis each process falls back to exposing its own values.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5  # seconds
+GAUGE_STALE_AFTER = FLUSH_INTERVAL * 3  # instances silent for longer are dropped
+
+REDIS_COUNTERS_KEY = "sa:metrics:counters"
+REDIS_GAUGES_KEY = "sa:metrics:gauges:{instance}"
+REDIS_INSTANCES_KEY = "sa:metrics:instances"
+
+# Seconds; covers fast API calls up to slow LLM completions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (sample name, sorted label pairs)
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _redis():
+    """Shared Redis client, or None when the cache layer is unavailable"""
+    try:
+        from services.cache_service import cache
+        return cache.redis_client
+    except Exception:
+        return None
+
+
+def _encode(series: SeriesKey) -> str:
+    """Redis hash field for a series"""
+    return json.dumps([series[0], series[1]], separators=(',', ':'))
+
+
+def _decode(field) -> SeriesKey:
+    name, labels = json.loads(field)
+    return name, tuple(tuple(pair) for pair in labels)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class: a named family of series distinguished by label values"""
+
+    type = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, labels: Dict[str, object]) -> Tuple[Tuple[str, str], ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def sample_names(self) -> Tuple[str, ...]:
+        return (self.name,)
+
+
+class Counter(_Metric):
+    """Monotonically increasing total, summed across processes"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self.registry._add((self.name, self._labels(labels)), amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, summed across processes"""
+
+    type = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        if "le" in labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        base = self._labels(labels)
+        updates = [((f"{self.name}_sum", base), value), ((f"{self.name}_count", base), 1)]
+        # Every bucket is written (0 when above the bound) so all series exist from the first observation
+        for bound in self.buckets:
+            updates.append(((f"{self.name}_bucket", base + (("le", _format_value(bound)),)), 1 if value <= bound else 0))
+        self.registry._add_many(updates)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def sample_names(self) -> Tuple[str, ...]:
+        return (f"{self.name}_bucket", f"{self.name}_sum", f"{self.name}_count")
+
+
+class Gauge(_Metric):
+    """Current value per process; the exposed value is the sum over live instances"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self.registry._set_gauge((self.name, self._labels(labels)), value)
+
+
+class MetricsRegistry:
+    """Holds metric definitions and their pending and local values"""
+
+    def __init__(self, instance: Optional[str] = None):
+        self.instance = instance or f"{socket.gethostname()}:{os.getpid()}"
+        self._metrics: Dict[str, _Metric] = {}
+        self._families: Dict[str, _Metric] = {}  # sample name -> metric
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._pending: Dict[SeriesKey, float] = {}  # not yet in Redis
+        self._local: Dict[SeriesKey, float] = {}  # this process since start
+        self._gauges: Dict[SeriesKey, float] = {}
+        self._flusher: Optional[threading.Thread] = None
+
+    # ----------------------------------------
+    # Definitions
+    # ----------------------------------------
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+            for sample in metric.sample_names():
+                self._families[sample] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Register a callback that sets gauges right before each flush"""
+        self._collectors.append(collector)
+
+    # ----------------------------------------
+    # Recording
+    # ----------------------------------------
+
+    def _add(self, series: SeriesKey, amount: float):
+        self._add_many([(series, amount)])
+
+    def _add_many(self, updates: List[Tuple[SeriesKey, float]]):
+        with self._lock:
+            for series, amount in updates:
+                self._pending[series] = self._pending.get(series, 0) + amount
+                self._local[series] = self._local.get(series, 0) + amount
+        self._ensure_flusher()
+
+    def _set_gauge(self, series: SeriesKey, value: float):
+        with self._lock:
+            self._gauges[series] = value
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    # ----------------------------------------
+    # Aggregation
+    # ----------------------------------------
+
+    def _run_collectors(self):
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+
+    def flush(self) -> bool:
+        """
+        Push pending deltas and current gauges to Redis.
+
+        On failure the deltas are kept and retried on the next flush.
+
+        Returns:
+            True if Redis was updated
+        """
+        self._run_collectors()
+        client = _redis()
+        if client is None:
+            return False
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            gauges = dict(self._gauges)
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            for series, amount in pending.items():
+                pipe.hincrbyfloat(REDIS_COUNTERS_KEY, _encode(series), amount)
+            if gauges:
+                gauges_key = REDIS_GAUGES_KEY.format(instance=self.instance)
+                pipe.delete(gauges_key)
+                pipe.hset(gauges_key, mapping={_encode(series): value for series, value in gauges.items()})
+                pipe.expire(gauges_key, GAUGE_STALE_AFTER)
+                pipe.zadd(REDIS_INSTANCES_KEY, {self.instance: time.time()})
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Metrics flush failed: {e}")
+            with self._lock:
+                for series, amount in pending.items():
+                    self._pending[series] = self._pending.get(series, 0) + amount
+            return False
+
+    def _read_shared(self) -> Optional[Tuple[Dict[SeriesKey, float], Dict[SeriesKey, float]]]:
+        """Aggregated (counters, gauges) from Redis, or None if unavailable"""
+        client = _redis()
+        if client is None:
+            return None
+        try:
+            counters = {_decode(field): float(value) for field, value in client.hgetall(REDIS_COUNTERS_KEY).items()}
+
+            cutoff = time.time() - GAUGE_STALE_AFTER
+            client.zremrangebyscore(REDIS_INSTANCES_KEY, '-inf', cutoff)
+            instances = client.zrange(REDIS_INSTANCES_KEY, 0, -1)
+            pipe = client.pipeline(transaction=False)
+            for instance in instances:
+                instance = instance.decode() if isinstance(instance, bytes) else instance
+                pipe.hgetall(REDIS_GAUGES_KEY.format(instance=instance))
+            gauges: Dict[SeriesKey, float] = {}
+            for values in pipe.execute() if instances else []:
+                for field, value in values.items():
+                    series = _decode(field)
+                    gauges[series] = gauges.get(series, 0) + float(value)
+            return counters, gauges
+        except Exception as e:
+            logger.warning(f"Metrics read failed: {e}")
+            return None
+
+    def snapshot(self) -> Dict[SeriesKey, float]:
+        """
+        Current value of every series.
+
+        Totals across all processes when Redis is reachable, otherwise the
+        values recorded by this process.
+        """
+        shared = self._read_shared() if self.flush() else None
+        if shared is not None:
+            counters, gauges = shared
+            return {**counters, **gauges}
+        with self._lock:
+            return {**self._local, **self._gauges}
+
+    def reset(self, **labels):
+        """
+        Drop recorded counter values (shared and local) of the series whose
+        labels include the given ones; all of them if none are given.
+        Gauges refill on the next flush.
+        """
+        wanted = {(key, str(value)) for key, value in labels.items()}
+
+        def matches(series: SeriesKey) -> bool:
+            return wanted <= set(series[1])
+
+        with self._lock:
+            for values in (self._pending, self._local):
+                for series in [series for series in values if matches(series)]:
+                    del values[series]
+        client = _redis()
+        if client is None:
+            return
+        try:
+            if not wanted:
+                client.delete(REDIS_COUNTERS_KEY)
+                return
+            fields = [field for field in client.hkeys(REDIS_COUNTERS_KEY) if matches(_decode(field))]
+            if fields:
+                client.hdel(REDIS_COUNTERS_KEY, *fields)
+        except Exception as e:
+            logger.warning(f"Metrics reset failed: {e}")
+
+    # ----------------------------------------
+    # Exposition
+    # ----------------------------------------
+
+    def exposition(self) -> str:
+        """Render all metrics in the Prometheus text format (version 0.0.4)"""
+        by_metric: Dict[str, List[Tuple[SeriesKey, float]]] = {}
+        for series, value in self.snapshot().items():
+            metric = self._families.get(series[0])
+            if metric is not None:
+                by_metric.setdefault(metric.name, []).append((series, value))
+
+        def order(item):
+            (sample, labels), _ = item
+            le = dict(labels).get("le")
+            return (
+                sample,
+                tuple(pair for pair in labels if pair[0] != "le"),
+                float(le) if le is not None else 0.0
+            )
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for (sample, labels), value in sorted(by_metric.get(name, []), key=order):
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+                lines.append(f"{sample}{{{label_text}}} {_format_value(value)}" if labels
+                             else f"{sample} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ============================================
+# APPLICATION METRICS
+# ============================================
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+
+OPENAI_REQUESTS = registry.counter(
+    "openai_requests_total", "OpenAI API calls", ["service", "model", "status"]
+)
+OPENAI_LATENCY = registry.histogram(
+    "openai_request_duration_seconds", "OpenAI API call latency", ["service", "model"]
+)
+OPENAI_TOKENS = registry.counter(
+    "openai_tokens_total", "OpenAI tokens used", ["service", "model", "kind"]
+)
+OPENAI_COST = registry.counter(
+    "openai_cost_usd_total", "Estimated OpenAI spend in USD", ["service", "model"]
+)
+
+CHAT_REQUESTS = registry.counter(
+    "chat_requests_total", "AI chat requests", ["service", "status"]
+)
+RAG_LOOKUPS = registry.counter(
+    "rag_lookups_total", "RAG retrievals by outcome (hit: enough context found)", ["service", "result"]
+)
+WEB_SEARCHES = registry.counter(
+    "web_searches_total", "Web search fallbacks after a RAG miss", ["service"]
+)
+
+CACHE_EVENTS = registry.counter(
+    "cache_events_total", "Cache layer events (l1_hits, l2_hits, misses, stale, ...)", ["event"]
+)
+
+DB_POOL_CONNECTIONS = registry.gauge(
+    "db_pool_connections", "SQLAlchemy pool connections by state", ["state"]
+)
+
+
+def total(values: Dict[SeriesKey, float], name: str, **labels) -> float:
+    """Sum a sample from a snapshot() over all series whose labels include the given ones"""
+    wanted = {(key, str(value)) for key, value in labels.items()}
+    return sum(
+        value for (sample, series_labels), value in values.items()
+        if sample == name and wanted <= set(series_labels)
+    )
+
+
+def record_openai_call(service: str, model: str, duration: float, usage=None, cost_usd: float = 0.0,
+                       error: bool = False):
+    """
+    Record one OpenAI API call.
+
+    Args:
+        service: Calling service (e.g. "university_chat")
+        model: Model name
+        duration: Call latency in seconds
+        usage: Response usage object (prompt_tokens / completion_tokens), if any
+        cost_usd: Estimated cost of the call
+        error: Whether the call failed
+    """
+    OPENAI_REQUESTS.inc(service=service, model=model, status="error" if error else "ok")
+    OPENAI_LATENCY.observe(duration, service=service, model=model)
+    if usage is not None:
+        OPENAI_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, service=service, model=model, kind="prompt")
+        OPENAI_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, service=service, model=model, kind="completion")
+    if cost_usd:
+        OPENAI_COST.inc(cost_usd, service=service, model=model)
+
+
+def watch_pool(engine):
+    """Report an SQLAlchemy engine's pool usage as DB_POOL_CONNECTIONS"""
+    def collect():
+        pool = engine.pool
+        DB_POOL_CONNECTIONS.set(pool.checkedout(), state="checked_out")
+        DB_POOL_CONNECTIONS.set(pool.checkedin(), state="idle")
+        DB_POOL_CONNECTIONS.set(max(pool.overflow(), 0), state="overflow")
+        DB_POOL_CONNECTIONS.set(pool.size(), state="size")
+
+    registry.add_collector(collect)
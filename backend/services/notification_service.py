@@ -8,6 +8,8 @@ from sqlalchemy import and_, desc
 from typing import List, Optional
 from datetime import datetime
 
+from services import unread_counters
+
 async def create_notification(
     db: Session,
     user_id: int,
@@ -33,8 +35,10 @@ async def create_notification(
     )
     
     db.add(notification)
+    unread_counters.adjust(db, user_id, unread_counters.NOTIFICATIONS, 1)
     db.commit()
     db.refresh(notification)
+    await unread_counters.publish(db, [user_id])
     
     return notification
 
@@ -70,36 +74,38 @@ async def mark_as_read(db: Session, notification_id: int, user_id: int):
         )
     ).first()
     
-    if notification:
+    if notification and not notification.is_read:
         notification.is_read = True
         notification.read_at = datetime.now()
+        unread_counters.adjust(db, user_id, unread_counters.NOTIFICATIONS, -1)
         db.commit()
+        await unread_counters.publish(db, [user_id])
 
 
 async def mark_all_as_read(db: Session, user_id: int):
     """Mark all notifications as read"""
     from main import Notification
     
-    db.query(Notification).filter(
-        Notification.user_id == user_id
+    updated = db.query(Notification).filter(
+        and_(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        )
     ).update({
         "is_read": True,
         "read_at": datetime.now()
     }, synchronize_session=False)
     
+    unread_counters.adjust(db, user_id, unread_counters.NOTIFICATIONS, -updated)
     db.commit()
+    
+    if updated:
+        await unread_counters.publish(db, [user_id])
 
 
 async def get_unread_count(db: Session, user_id: int) -> int:
-    """Get count of unread notifications"""
-    from main import Notification
-    
-    return db.query(Notification).filter(
-        and_(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        )
-    ).count()
+    """Get count of unread notifications from the maintained counter"""
+    return unread_counters.get_count(db, user_id, unread_counters.NOTIFICATIONS)
 
 
 async def send_email_notification(receiver_id: int, subject: str, template: str, data: dict):
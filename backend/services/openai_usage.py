@@ -0,0 +1,410 @@
+"""
+OPENAI USAGE
+Per-call OpenAI usage events with hourly and daily rollups
+
+record() is called right after every OpenAI API call. It updates the live
+metrics (services/metrics.py) and appends an event to a Redis stream, which
+is cheap enough for the request path. A periodic task calls drain(): it
+moves events into the openai_usage table and adds them to the
+openai_usage_rollups buckets in the same transaction.
+
+When Redis is unavailable, events are buffered in process (up to
+FALLBACK_MAX_EVENTS, newer ones are dropped) and a background thread
+writes them straight to Postgres, so record() never blocks on the database.
+
+Events are stored under their stream entry id (unique), and only rows
+actually inserted are added to the rollups, so an entry delivered twice
+(re-delivery after a crash, a claim by another drain) is counted once.
+
+Cost reports (price monitoring) read the rollups, so their cost depends on
+the length of the period, not on how much history exists.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "sa:openai_usage"
+STREAM_GROUP = "rollup"
+STREAM_MAXLEN = 100000  # approximate cap if the drain task stops
+DRAIN_BATCH = 1000
+CLAIM_IDLE_MS = 300000  # pending this long, the consumer is presumed dead (5 minutes)
+FALLBACK_MAX_EVENTS = 10000  # buffered while Redis is down; further events are dropped
+FALLBACK_FLUSH_INTERVAL = 5  # seconds between direct writes of buffered events
+
+HOUR = "hour"
+DAY = "day"
+
+MICRO = 1_000_000
+
+_fallback: List[Dict] = []  # events waiting for a direct write
+_fallback_lock = threading.Lock()
+_fallback_writer: Optional[threading.Thread] = None
+
+# USD per 1K tokens (input, output)
+MODEL_PRICES = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated cost in USD of a call (0 for unknown models)"""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return prompt_tokens / 1000 * input_price + completion_tokens / 1000 * output_price
+
+
+def _redis():
+    """Shared Redis client, or None when the cache layer is unavailable"""
+    try:
+        from services.cache_service import cache
+        return cache.redis_client
+    except Exception:
+        return None
+
+
+def record(
+    service: str,
+    model: str,
+    duration: float,
+    usage=None,
+    cost_usd: Optional[float] = None,
+    user_id: Optional[int] = None,
+    error: bool = False
+):
+    """
+    Record one OpenAI API call.
+
+    Never raises: usage tracking must not fail the request.
+
+    Args:
+        service: Calling service (e.g. "university_chat")
+        model: Model name
+        duration: Call latency in seconds
+        usage: Response usage object (prompt_tokens / completion_tokens), if any
+        cost_usd: Cost of the call; estimated from MODEL_PRICES if omitted
+        user_id: User the call was made for (optional)
+        error: Whether the call failed (only metrics are recorded)
+    """
+    prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+    completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+    if cost_usd is None:
+        cost_usd = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    try:
+        metrics.record_openai_call(service, model, duration, usage, cost_usd, error=error)
+    except Exception as e:
+        logger.warning(f"OpenAI metrics update failed: {e}")
+
+    if error:
+        return
+
+    event = {
+        "ts": f"{time.time():.3f}",
+        "service": service,
+        "model": model,
+        "user_id": user_id if user_id is not None else "",
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_microusd": round(cost_usd * MICRO),
+        "duration_ms": int(duration * 1000),
+    }
+
+    client = _redis()
+    if client is not None:
+        try:
+            client.xadd(STREAM_KEY, event, maxlen=STREAM_MAXLEN, approximate=True)
+            return
+        except Exception as e:
+            logger.warning(f"OpenAI usage stream write failed, buffering for a direct write: {e}")
+
+    _buffer(event)
+
+
+def _buffer(event: Dict):
+    """Fallback without Redis: queue the event for the writer thread"""
+    global _fallback_writer
+    with _fallback_lock:
+        full = len(_fallback) >= FALLBACK_MAX_EVENTS
+        if not full:
+            _fallback.append(event)
+        if _fallback_writer is None:
+            _fallback_writer = threading.Thread(target=_write_loop, name="openai-usage-write", daemon=True)
+            _fallback_writer.start()
+    if full:
+        logger.error("OpenAI usage event dropped: fallback buffer full")
+
+
+def _write_loop():
+    while True:
+        time.sleep(FALLBACK_FLUSH_INTERVAL)
+        write_buffered()
+
+
+def write_buffered() -> int:
+    """
+    Store buffered events and their rollups directly in Postgres.
+
+    On failure the events are kept (up to FALLBACK_MAX_EVENTS) and retried
+    on the next write.
+
+    Returns:
+        Number of events stored
+    """
+    with _fallback_lock:
+        events = _fallback[:]
+        del _fallback[:]
+    if not events:
+        return 0
+
+    try:
+        from main import SessionLocal
+        db = SessionLocal()
+        try:
+            stored = _persist(db, events)
+            db.commit()
+            return stored
+        finally:
+            db.close()
+    except Exception as e:
+        with _fallback_lock:
+            kept = events[:max(FALLBACK_MAX_EVENTS - len(_fallback), 0)]
+            _fallback[:0] = kept
+        logger.error(f"OpenAI usage direct write failed, {len(kept)} of {len(events)} events kept for retry: {e}")
+        return 0
+
+
+def _decode(fields: Dict) -> Dict:
+    return {
+        (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+        for key, value in fields.items()
+    }
+
+
+def _bucket(moment: datetime, granularity: str) -> datetime:
+    if granularity == DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _persist(db: Session, events: list) -> int:
+    """
+    Insert events and add them to their hour and day buckets (no commit).
+
+    Events carrying a "stream_id" that is already stored are skipped.
+
+    Returns:
+        Number of events inserted
+    """
+    from main import OpenAIUsage, OpenAIUsageRollup
+
+    rows = [
+        {
+            "stream_id": event.get("stream_id"),
+            "created_at": datetime.utcfromtimestamp(float(event["ts"])),
+            "service": event["service"],
+            "model": event["model"],
+            "user_id": int(event["user_id"]) if event.get("user_id") not in (None, "") else None,
+            "prompt_tokens": int(event["prompt_tokens"]),
+            "completion_tokens": int(event["completion_tokens"]),
+            "cost_microusd": int(event["cost_microusd"]),
+            "duration_ms": int(event["duration_ms"]),
+        }
+        for event in events
+    ]
+    if not rows:
+        return 0
+
+    inserted = db.execute(
+        insert(OpenAIUsage).values(rows).on_conflict_do_nothing(
+            index_elements=["stream_id"]
+        ).returning(
+            OpenAIUsage.created_at,
+            OpenAIUsage.service,
+            OpenAIUsage.model,
+            OpenAIUsage.prompt_tokens,
+            OpenAIUsage.completion_tokens,
+            OpenAIUsage.cost_microusd
+        )
+    ).all()
+
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    for row in inserted:
+        for granularity in (HOUR, DAY):
+            bucket = totals[(granularity, _bucket(row.created_at, granularity), row.service, row.model)]
+            bucket[0] += 1
+            bucket[1] += row.prompt_tokens
+            bucket[2] += row.completion_tokens
+            bucket[3] += row.cost_microusd
+
+    if not totals:
+        return 0
+
+    stmt = insert(OpenAIUsageRollup).values([
+        {
+            "granularity": granularity,
+            "bucket_start": bucket_start,
+            "service": service,
+            "model": model,
+            "calls": calls,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_microusd": cost,
+        }
+        for (granularity, bucket_start, service, model), (calls, prompt_tokens, completion_tokens, cost) in totals.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "service", "model"],
+        set_={
+            column: getattr(OpenAIUsageRollup, column) + getattr(stmt.excluded, column)
+            for column in ("calls", "prompt_tokens", "completion_tokens", "cost_microusd")
+        }
+    ))
+    return len(inserted)
+
+
+def consumer_name() -> str:
+    """Stream consumer of this process (host and pid)"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _store_entries(db: Session, client, entries: list) -> int:
+    """Persist stream entries, then acknowledge and delete them"""
+    events = []
+    for entry_id, fields in entries:
+        # Entries deleted while pending come back without fields
+        if fields:
+            event = _decode(fields)
+            event["stream_id"] = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            events.append(event)
+    stored = _persist(db, events)
+    db.commit()
+
+    entry_ids = [entry_id for entry_id, _ in entries]
+    client.xack(STREAM_KEY, STREAM_GROUP, *entry_ids)
+    client.xdel(STREAM_KEY, *entry_ids)
+    return stored
+
+
+def _read_group(db: Session, client, consumer: str, start: str, batch: int) -> int:
+    """Store entries read by this consumer from a stream position ("0" or ">")"""
+    stored = 0
+    while True:
+        response = client.xreadgroup(STREAM_GROUP, consumer, {STREAM_KEY: start}, count=batch)
+        entries = response[0][1] if response else []
+        if not entries:
+            return stored
+        stored += _store_entries(db, client, entries)
+        if len(entries) < batch:
+            return stored
+
+
+def _claim_idle(db: Session, client, consumer: str, batch: int) -> int:
+    """Claim and store entries pending on other consumers for CLAIM_IDLE_MS"""
+    stored = 0
+    start = "0-0"
+    while True:
+        response = client.xautoclaim(STREAM_KEY, STREAM_GROUP, consumer, CLAIM_IDLE_MS, start_id=start, count=batch)
+        start, entries = response[0], response[1]
+        if entries:
+            stored += _store_entries(db, client, entries)
+        if start in (b"0-0", "0-0"):
+            return stored
+
+
+def drain(db: Session, consumer: Optional[str] = None, batch: int = DRAIN_BATCH) -> int:
+    """
+    Move pending stream events into Postgres.
+
+    Reads through a consumer group, one consumer per process. In order:
+    entries delivered to this consumer but never acknowledged, entries
+    pending on another consumer for CLAIM_IDLE_MS (its process died), then
+    new entries. Concurrent drains can still see the same entry (a claim
+    racing a slow consumer, a crash between commit and acknowledgement);
+    storing events by stream entry id makes that harmless.
+
+    Returns:
+        Number of events stored
+    """
+    client = _redis()
+    if client is None:
+        return 0
+
+    consumer = consumer or consumer_name()
+    try:
+        client.xgroup_create(STREAM_KEY, STREAM_GROUP, id="0", mkstream=True)
+    except Exception:
+        pass  # Group already exists
+
+    # Own unacknowledged entries first, then stalled ones, then new ones
+    stored = _read_group(db, client, consumer, "0", batch)
+    stored += _claim_idle(db, client, consumer, batch)
+    stored += _read_group(db, client, consumer, ">", batch)
+    return stored
+
+
+def total_cost(db: Session, start: datetime, end: Optional[datetime] = None, granularity: str = HOUR) -> float:
+    """
+    OpenAI cost in USD of the buckets starting in [start, end).
+
+    start is rounded down to its bucket, so the result is accurate to the
+    hour (or day).
+    """
+    from main import OpenAIUsageRollup
+
+    query = db.query(func.coalesce(func.sum(OpenAIUsageRollup.cost_microusd), 0)).filter(
+        OpenAIUsageRollup.granularity == granularity,
+        OpenAIUsageRollup.bucket_start >= _bucket(start, granularity)
+    )
+    if end is not None:
+        query = query.filter(OpenAIUsageRollup.bucket_start < _bucket(end, granularity))
+    return int(query.scalar()) / MICRO
+
+
+def usage_summary(db: Session, days: int = 7) -> Dict:
+    """
+    Daily OpenAI usage per service and model over the last `days` days.
+
+    Returns:
+        Dict with "days" (one entry per bucket, service and model) and totals
+    """
+    from main import OpenAIUsageRollup
+
+    since = _bucket(datetime.utcnow() - timedelta(days=days - 1), DAY)
+    rows = db.query(OpenAIUsageRollup).filter(
+        OpenAIUsageRollup.granularity == DAY,
+        OpenAIUsageRollup.bucket_start >= since
+    ).order_by(OpenAIUsageRollup.bucket_start, OpenAIUsageRollup.service, OpenAIUsageRollup.model).all()
+
+    return {
+        "days": [
+            {
+                "date": row.bucket_start.date().isoformat(),
+                "service": row.service,
+                "model": row.model,
+                "calls": row.calls,
+                "prompt_tokens": row.prompt_tokens,
+                "completion_tokens": row.completion_tokens,
+                "cost_usd": row.cost_microusd / MICRO,
+            }
+            for row in rows
+        ],
+        "total_calls": sum(row.calls for row in rows),
+        "total_cost_usd": sum(row.cost_microusd for row in rows) / MICRO,
+    }
@@ -8,8 +8,7 @@ Provides caching and batch processing capabilities.
 import os
 from typing import List, Optional
 import openai
-from functools import lru_cache
-from services.cache import cache
+from services.embedding_cache import embedding_cache
 
 
 class EmbeddingService:
@@ -18,7 +17,7 @@ class EmbeddingService:
     
     Features:
     - Automatic batching for efficiency
-    - Caching for repeated queries
+    - Shared embedding cache for repeated queries (services/embedding_cache.py)
     - Fallback to zero vectors when API unavailable
     """
     
@@ -56,30 +55,21 @@ class EmbeddingService:
             # Return zero vector as fallback
             return [0.0] * self.embedding_dimension
         
-        # Try to get from Redis cache first
-        cache_key = cache.generate_key("embedding", text)
-        cached_embedding = cache.get(cache_key)
-        
-        if cached_embedding:
-            print(f"✅ Embedding з кешу")
-            return cached_embedding
-        
         try:
-            print(f"🔄 Генерую новий embedding")
-            response = await openai.Embedding.acreate(
-                model=self.model,
-                input=text
-            )
-            embedding = response['data'][0]['embedding']
-            
-            # Store in Redis cache for 7 days
-            cache.set(cache_key, embedding, expire=604800)
-            
-            return embedding
+            return await embedding_cache.get(self.model, text, self._generate)
         except Exception as e:
             print(f"Embedding generation failed: {e}")
             return [0.0] * self.embedding_dimension
     
+    async def _generate(self, texts: List[str]) -> List[List[float]]:
+        """Call the embeddings API for texts not found in the cache."""
+        print(f"🔄 Генерую {len(texts)} нових embeddings")
+        response = await openai.Embedding.acreate(
+            model=self.model,
+            input=texts
+        )
+        return [item['embedding'] for item in response['data']]
+    
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts (batch processing).
@@ -94,25 +84,11 @@ class EmbeddingService:
             return [[0.0] * self.embedding_dimension for _ in texts]
         
         try:
-            response = await openai.Embedding.acreate(
-                model=self.model,
-                input=texts
-            )
-            return [item['embedding'] for item in response['data']]
+            return await embedding_cache.get_many(self.model, texts, self._generate)
         except Exception as e:
             print(f"Batch embedding generation failed: {e}")
             return [[0.0] * self.embedding_dimension for _ in texts]
     
-    @lru_cache(maxsize=1000)
-    def embed_text_cached(self, text: str) -> tuple:
-        """
-        Cached version of embed_text for frequently used queries.
-        Returns tuple for hashability.
-        """
-        import asyncio
-        embedding = asyncio.run(self.embed_text(text))
-        return tuple(embedding)
-    
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings produced by this service."""
         return self.embedding_dimension
@@ -13,12 +13,17 @@ Usage:
     result = await chain.query("Aké sú podmienky platnosti zmluvy?", k=3)
 """
 
+import asyncio
 import os
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from openai import OpenAI
 
+from services.embedding_cache import embedding_cache
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
 
 class RetrievalChain:
     """
@@ -111,9 +116,10 @@ class RetrievalChain:
 Odpovedaj v slovenčine, jasne a profesionálne."""
 
     
-    def _get_embedding(self, text: str) -> List[float]:
+    async def _get_embedding(self, text: str) -> List[float]:
         """
-        Get embedding for text using OpenAI (v1.0+ syntax).
+        Get embedding for text using OpenAI (v1.0+ syntax), through the
+        shared embedding cache.
         
         Args:
             text: Text to embed
@@ -121,12 +127,16 @@ Odpovedaj v slovenčine, jasne a profesionálne."""
         Returns:
             Embedding vector
         """
-        try:
-            response = self.client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text
+        async def generate(texts: List[str]) -> List[List[float]]:
+            response = await asyncio.to_thread(
+                self.client.embeddings.create,
+                model=EMBEDDING_MODEL,
+                input=texts
             )
-            return response.data[0].embedding
+            return [item.embedding for item in response.data]
+        
+        try:
+            return await embedding_cache.get(EMBEDDING_MODEL, text, generate)
         except Exception as e:
             print(f"Embedding error: {e}")
             raise
@@ -149,7 +159,7 @@ Odpovedaj v slovenčine, jasne a profesionálne."""
             List of document chunks with metadata
         """
         # Step 1: Generate query embedding
-        query_embedding = self._get_embedding(query)
+        query_embedding = await self._get_embedding(query)
         
         # Step 2: Build SQL query with filters
         filter_conditions = []
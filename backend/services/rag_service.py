@@ -9,8 +9,12 @@ Searches in ANY language (website language), AI translates to user language
 import json
 from typing import List, Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from services.embedding_service import EmbeddingService
+from services.context_assembler import select_chunks
+from services.university_index import hybrid_search
+
+CONTEXT_TOKENS = 3000  # default budget for retrieved content in a prompt
+MAX_SOURCE_TOKENS = 1250  # ~5000 chars: enough for faculty lists, programs, etc.
 
 
 class RAGService:
@@ -30,6 +34,9 @@ class RAGService:
         Search for relevant content in ANY language (website's language)
         AI will translate the content to user's language
         
+        Hybrid search: BM25 over the question expanded with the scraper's
+        multilingual keywords, fused with embedding similarity (RRF)
+        
         Args:
             db: Database session
             university_id: University ID
@@ -42,38 +49,15 @@ class RAGService:
         try:
             print(f"RAG: Searching ANY language for university_id={university_id}")
             
-            # Simple query - get any content for this university
-            sql = text("""
-                SELECT 
-                    uc.id,
-                    uc.title,
-                    uc.content,
-                    uc.url,
-                    uc.content_type,
-                    uc.language
-                FROM university_content uc
-                WHERE uc.university_id = :university_id
-                  AND uc.is_active = TRUE
-                ORDER BY uc.id
-                LIMIT :top_k
-            """)
-            
-            result = db.execute(sql, {
-                'university_id': university_id,
-                'top_k': top_k
-            })
-            
-            results = []
-            for row in result:
-                results.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'content': row[2],
-                    'url': row[3],
-                    'content_type': row[4],
-                    'language': row[5],
-                    'similarity': 1.0
-                })
+            # Keyword (BM25, expanded across languages) and vector rankings, fused
+            embedding = await self.embedding_service.generate_embedding(query)
+            results = hybrid_search(
+                db=db,
+                university_id=university_id,
+                query=query,
+                embedding=embedding or None,
+                top_k=top_k
+            )
             
             print(f"RAG: Found {len(results)} results in ANY language")
             return results
@@ -82,27 +66,31 @@ class RAGService:
             print(f"Error searching content: {e}")
             return []
     
-    def format_context_for_prompt(self, results: List[Dict]) -> str:
+    def format_context_for_prompt(self, results: List[Dict], max_tokens: int = CONTEXT_TOKENS) -> str:
         """
         Format search results into context for AI prompt
         
         Args:
             results: Search results
+            max_tokens: Token budget for the formatted context
             
         Returns:
-            Formatted context string
+            Formatted context string, most relevant sources first
         """
         if not results:
             return "No relevant information found in the university database."
         
-        context_parts = []
-        for i, result in enumerate(results, 1):
-            # Include language info so AI knows to translate
-            # 5000 chars per source = enough for faculty lists, programs, etc.
-            context_parts.append(
+        # Include language info so AI knows to translate
+        context_parts = select_chunks(
+            results,
+            max_tokens,
+            lambda i, result: (
                 f"[Source {i}] {result['title']} (Language: {result['language']})\n"
                 f"URL: {result['url']}\n"
-                f"Content: {result['content'][:5000]}...\n"
-            )
+                f"Content: {result['content']}\n"
+            ),
+            score_key='score',
+            max_chunk_tokens=MAX_SOURCE_TOKENS
+        )
         
         return "\n\n".join(context_parts)
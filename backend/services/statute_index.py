@@ -0,0 +1,301 @@
+"""
+Statute Index
+
+In-process index of the statutes in legal_docs/, keyed by code and paragraph
+number (§), used to resolve, validate and attach legal citations without
+another LLM round-trip.
+
+Each "§ N Title" section becomes one paragraph with its subsections. Two
+retrieval paths are built over the paragraphs:
+- an inverted index (BM25) over accent-folded, prefix-stemmed tokens, always
+  available and loaded once per process;
+- paragraph embeddings (OpenAI, cached in the shared cache for a week) for
+  semantic matching, used when the embedding API is configured.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.cache_service import cache
+
+LEGAL_DOCS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legal_docs")
+
+EMBEDDINGS_TTL = 604800  # 7 days; the key changes whenever the statute text does
+STEM_LENGTH = 6  # crude prefix stemming for Slovak inflection (zmluva/zmluvy/zmluvou)
+MIN_TOKEN_LENGTH = 3
+BM25_K1 = 1.5
+BM25_B = 0.75
+SEMANTIC_WEIGHT = 0.5  # share of the hybrid score taken by embedding similarity
+LEXICAL_HALF_SCORE = 5.0  # BM25 score mapped to 0.5; one shared common word scores ~2
+
+# Canonical code names and their abbreviations. Other names refer to a code
+# if their stemmed words contain the code's words in order ("Občianskeho
+# zákonníka"), so "Občiansky súdny poriadok" is not the civil code.
+CODES = {
+    "Občiansky zákonník": ("oz",),
+    "Zákonník práce": ("zp",),
+    "Obchodný zákonník": ("obz",),
+}
+
+PARAGRAPH_RE = re.compile(r"^§\s*(\d+[a-z]?)\s*(.*)$")
+SUBSECTION_RE = re.compile(r"^\((\d+)\)\s*(.*)$")
+SECTION_RE = re.compile(r"^[A-ZÁÄČĎÉÍĹĽŇÓÔŔŠŤÚÝŽ0-9 .,\-–]+$")  # all-caps part headings
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip diacritics ("Občiansky" -> "obciansky")"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent-folded, prefix-stemmed tokens used by the inverted index"""
+    return [
+        token[:STEM_LENGTH]
+        for token in re.findall(r"\w+", fold(text))
+        if len(token) >= MIN_TOKEN_LENGTH and not token.isdigit()
+    ]
+
+
+_CODE_WORDS = {code: tokenize(code) for code in CODES}
+
+
+def resolve_code(name: Optional[str]) -> Optional[str]:
+    """Canonical code name for a law name as written in a citation"""
+    if not name:
+        return None
+    folded = fold(name).strip(" *")
+    words = tokenize(name)
+    for code, abbreviations in CODES.items():
+        if folded in abbreviations:
+            return code
+        code_words = _CODE_WORDS[code]
+        if any(words[start:start + len(code_words)] == code_words for start in range(len(words))):
+            return code
+    return None
+
+
+class StatuteParagraph:
+    """One § of a code with its subsections"""
+
+    def __init__(self, code: str, number: str, title: str, text: str, source: str):
+        self.code = code
+        self.number = number
+        self.title = title
+        self.text = text
+        self.source = source
+        self.subsections: Dict[str, str] = {}
+        for line in text.splitlines():
+            match = SUBSECTION_RE.match(line.strip())
+            if match:
+                self.subsections[match.group(1)] = match.group(2)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.code, self.number
+
+    def document(self) -> str:
+        """Text that is indexed and embedded"""
+        return f"{self.code} § {self.number} {self.title}\n{self.text}"
+
+
+class StatuteIndex:
+    """Paragraph lookup, BM25 search and semantic search over loaded statutes"""
+
+    def __init__(self, paragraphs: List[StatuteParagraph]):
+        self.paragraphs = paragraphs
+        self.by_key = {paragraph.key: paragraph for paragraph in paragraphs}
+        self.fingerprint = hashlib.sha256(
+            "\n".join(paragraph.document() for paragraph in paragraphs).encode("utf-8")
+        ).hexdigest()[:16]
+
+        # Inverted index: token -> [(paragraph position, term frequency)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths = np.zeros(len(paragraphs), dtype=np.float64)
+        for position, paragraph in enumerate(paragraphs):
+            counts = Counter(tokenize(paragraph.document()))
+            self.lengths[position] = sum(counts.values())
+            for token, frequency in counts.items():
+                self.postings[token].append((position, frequency))
+        self.average_length = float(self.lengths.mean()) if paragraphs else 0.0
+
+        self.embeddings: Optional[np.ndarray] = None  # (paragraphs x dim), L2-normalized
+        self._embeddings_lock = asyncio.Lock()
+
+    @classmethod
+    def load(cls, directory: str = LEGAL_DOCS_DIR) -> "StatuteIndex":
+        """
+        Parse every .txt file under directory.
+
+        The code is taken from the file's heading; files that are not a
+        recognized code (guides, handbooks) or have no § sections are
+        skipped. The first occurrence of a paragraph wins, so full texts
+        should sort before excerpts.
+        """
+        paragraphs: List[StatuteParagraph] = []
+        seen = set()
+
+        for root, _, files in sorted(os.walk(directory)):
+            for filename in sorted(files):
+                if not filename.endswith(".txt"):
+                    continue
+                path = os.path.join(root, filename)
+                with open(path, encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+
+                code = resolve_code(lines[0]) if lines else None
+                if code is None:
+                    continue
+
+                for paragraph in _parse_paragraphs(code, lines, os.path.relpath(path, directory)):
+                    if paragraph.key not in seen:
+                        seen.add(paragraph.key)
+                        paragraphs.append(paragraph)
+
+        return cls(paragraphs)
+
+    # ----------------------------------------
+    # Lookup
+    # ----------------------------------------
+
+    def get(self, law_name: Optional[str], number: str) -> Optional[StatuteParagraph]:
+        """
+        Paragraph for a citation.
+
+        A law name that is not an indexed code never matches. Without a law
+        name, the paragraph is returned only if exactly one indexed code has
+        that number.
+        """
+        number = str(number).strip().lower()
+        if law_name and law_name.strip(" *"):
+            code = resolve_code(law_name)
+            return self.by_key.get((code, number)) if code else None
+
+        matches = [paragraph for paragraph in self.paragraphs if paragraph.number == number]
+        return matches[0] if len(matches) == 1 else None
+
+    # ----------------------------------------
+    # Search
+    # ----------------------------------------
+
+    def lexical_scores(self, text: str) -> np.ndarray:
+        """BM25 score of every paragraph for the text"""
+        scores = np.zeros(len(self.paragraphs), dtype=np.float64)
+        total = len(self.paragraphs)
+        for token in set(tokenize(text)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[position] / self.average_length)
+                scores[position] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    async def ensure_embeddings(self, embedding_service) -> bool:
+        """
+        Load or compute paragraph embeddings once per process.
+
+        Returns:
+            True if usable (non-zero) embeddings are available
+        """
+        if self.embeddings is None and self.paragraphs:
+            async with self._embeddings_lock:
+                if self.embeddings is None:
+                    async def compute():
+                        return await embedding_service.embed_texts(
+                            [paragraph.document() for paragraph in self.paragraphs]
+                        )
+
+                    vectors = np.asarray(await cache.aget_or_set(
+                        cache.make_key("statute_embeddings", embedding_service.model, self.fingerprint),
+                        compute,
+                        ttl=EMBEDDINGS_TTL
+                    ), dtype=np.float32)
+                    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                    self.embeddings = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+        return self.embeddings is not None and bool(np.any(self.embeddings))
+
+    async def search(self, text: str, top_k: int = 3, embedding_service=None) -> List[Tuple[StatuteParagraph, float]]:
+        """
+        Paragraphs most relevant to a text, best first.
+
+        Combines BM25, mapped to 0..1 by bm25 / (bm25 + LEXICAL_HALF_SCORE),
+        with cosine similarity of embeddings when an embedding service is
+        given and the API is available. Scores do not depend on the other
+        results, so a fixed threshold filters weak matches.
+
+        Returns:
+            List of (paragraph, score in 0..1)
+        """
+        if not self.paragraphs:
+            return []
+
+        lexical = self.lexical_scores(text)
+        scores = lexical / (lexical + LEXICAL_HALF_SCORE)
+
+        if embedding_service is not None:
+            try:
+                if await self.ensure_embeddings(embedding_service):
+                    query = np.asarray(await embedding_service.embed_text(text[:8000]), dtype=np.float32)
+                    norm = np.linalg.norm(query)
+                    if norm > 0:
+                        similarity = np.clip(self.embeddings @ (query / norm), 0, 1)
+                        scores = (1 - SEMANTIC_WEIGHT) * scores + SEMANTIC_WEIGHT * similarity
+            except Exception as e:
+                print(f"Statute semantic search unavailable, using lexical only: {e}")
+
+        top = np.argsort(-scores, kind="stable")[:top_k]
+        return [(self.paragraphs[position], float(scores[position])) for position in top if scores[position] > 0]
+
+
+def _parse_paragraphs(code: str, lines: List[str], source: str) -> List[StatuteParagraph]:
+    """Split a statute into § sections; part headings end the current section"""
+    paragraphs = []
+    current = None
+    body: List[str] = []
+
+    def close():
+        if current is not None:
+            number, title = current
+            paragraphs.append(StatuteParagraph(code, number, title, "\n".join(body).strip(), source))
+
+    for line in lines:
+        stripped = line.strip()
+        match = PARAGRAPH_RE.match(stripped)
+        if match:
+            close()
+            current = (match.group(1).lower(), match.group(2).strip())
+            body = []
+        elif current is not None and stripped and SECTION_RE.match(stripped) and not SUBSECTION_RE.match(stripped):
+            close()
+            current = None
+        elif current is not None:
+            body.append(line)
+    close()
+
+    return paragraphs
+
+
+_index: Optional[StatuteIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_statute_index() -> StatuteIndex:
+    """Shared statute index, parsed from legal_docs/ on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = StatuteIndex.load()
+    return _index
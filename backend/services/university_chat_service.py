@@ -11,30 +11,29 @@ import time
 from datetime import datetime
 from typing import List, Dict, Optional
 from openai import AsyncOpenAI
-from langdetect import detect
 from sqlalchemy.orm import Session
 import logging
 
+from services import metrics, openai_usage, web_search
+from services.answer_cache import answer_cache, university_tag
+from services.context_assembler import allocate, count_tokens, fit_history, prompt_budget, truncate_to_tokens
+from services.language_detection import detect_language
+
 # Configure structured logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+METRICS_SERVICE = "university_chat"
+CHAT_MODEL = "gpt-4-turbo"
+CHAT_MAX_TOKENS = 1000
+RAG_TOP_K = 4  # hybrid retrieval ranks the relevant pages first, so fewer are sent
+
 
 class UniversityChatService:
     """AI chat service for university information with RAG"""
     
     def __init__(self):
         self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.metrics = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "rag_hits": 0,
-            "rag_misses": 0,
-            "web_searches": 0,
-            "total_tokens_used": 0,
-            "total_cost_usd": 0.0
-        }
         
     async def chat(
         self,
@@ -45,7 +44,8 @@ class UniversityChatService:
         university_website: str,
         university_description: str,
         conversation_history: List[Dict],
-        language: Optional[str] = None  # Add language parameter
+        language: Optional[str] = None,  # Add language parameter
+        conversation_summary: Optional[str] = None
     ) -> str:
         """
         Process user message and generate AI response with RAG
@@ -57,16 +57,20 @@ class UniversityChatService:
             university_name: Name of the university
             university_website: University website URL
             university_description: University description
-            conversation_history: Previous messages
+            conversation_history: Previous messages (user/assistant turns only)
             language: User's preferred language (if not provided, auto-detect)
+            conversation_summary: Server-side summary of older turns, if any
             
         Returns:
             AI assistant's response
+        
+        Raises:
+            Exception: If no answer could be generated; callers must not
+                store the turn
         """
         
         # Start timing
         start_time = time.time()
-        self.metrics["total_requests"] += 1
         
         # 1. Use provided language or detect from message
         if not language:
@@ -80,10 +84,29 @@ class UniversityChatService:
                 "message_length": len(message),
                 "language": language,
                 "language_source": "provided" if language else "detected",
-                "has_history": len(conversation_history) > 0
+                "has_history": bool(conversation_history or conversation_summary)
             }
         )
         
+        # Repeated first-turn questions are answered from the semantic cache
+        first_turn = not conversation_history and not conversation_summary
+        cache_scope = (METRICS_SERVICE, university_id, language)
+        cache_tags = [university_tag(university_id)]
+        cached_answer, question_embedding = (None, None)
+        if first_turn:
+            cached_answer, question_embedding = await answer_cache.lookup(cache_scope, message)
+            if cached_answer:
+                metrics.CHAT_REQUESTS.inc(service=METRICS_SERVICE, status="cached")
+                logger.info(
+                    "university_chat_answer_cached",
+                    extra={
+                        "university_id": university_id,
+                        "language": language,
+                        "duration_ms": int((time.time() - start_time) * 1000)
+                    }
+                )
+                return cached_answer
+
         # 2. Retrieve relevant content using RAG
         # NOTE: Search in ANY language (website's language), AI will translate to user's language
         from services.rag_service import RAGService
@@ -93,7 +116,7 @@ class UniversityChatService:
             db=db,
             university_id=university_id,
             query=message,
-            top_k=5
+            top_k=RAG_TOP_K
         )
         
         # 3. Build context from retrieved content
@@ -112,8 +135,8 @@ class UniversityChatService:
         web_search_results = None
         
         if not has_rag_data or "No relevant information" in context:
-            self.metrics["rag_misses"] += 1
-            self.metrics["web_searches"] += 1
+            metrics.RAG_LOOKUPS.inc(service=METRICS_SERVICE, result="miss")
+            metrics.WEB_SEARCHES.inc(service=METRICS_SERVICE)
             
             logger.warning(
                 "insufficient_rag_data_web_search",
@@ -124,6 +147,8 @@ class UniversityChatService:
                 }
             )
             web_search_results = await self._search_web_for_university(
+                db=db,
+                university_id=university_id,
                 university_name=university_name,
                 university_website=university_website,
                 query=message,
@@ -141,48 +166,65 @@ class UniversityChatService:
                     }
                 )
         else:
-            self.metrics["rag_hits"] += 1
+            metrics.RAG_LOOKUPS.inc(service=METRICS_SERVICE, result="hit")
+        
+        # 5. Split the prompt budget between retrieved context and history
+        def build_system_prompt(context: str) -> str:
+            return self._get_system_prompt_with_rag(
+                language=language,
+                university_name=university_name,
+                university_website=university_website,
+                university_description=university_description,
+                context=context,
+                has_rag_data=len(relevant_content) > 0
+            )
+        
+        # The summary is written by the server, never taken from the client's history
+        summary_messages = [
+            {"role": "system", "content": f"Summary of the earlier conversation: {conversation_summary}"}
+        ] if conversation_summary else []
         
-        # 5. Generate system prompt with context
-        system_prompt = self._get_system_prompt_with_rag(
-            language=language,
-            university_name=university_name,
-            university_website=university_website,
-            university_description=university_description,
-            context=context,
-            has_rag_data=len(relevant_content) > 0
+        context_budget, history_budget = allocate(
+            prompt_budget(CHAT_MODEL, CHAT_MAX_TOKENS),
+            [build_system_prompt(""), message] + [msg["content"] for msg in summary_messages],
+            conversation_history,
+            count_tokens(context)
         )
+        if count_tokens(context) > context_budget:
+            if web_search_results:
+                context = truncate_to_tokens(context, context_budget)
+            else:
+                context = rag_service.format_context_for_prompt(relevant_content, max_tokens=context_budget)
         
-        # 5. Build messages for OpenAI
-        messages = [{"role": "system", "content": system_prompt}]
+        # 6. Generate system prompt with context
+        system_prompt = build_system_prompt(context)
         
-        # Add conversation history
-        for msg in conversation_history:
-            if isinstance(msg, dict) and 'role' in msg and 'content' in msg:
-                messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+        # 7. Build messages for OpenAI
+        messages = [{"role": "system", "content": system_prompt}] + summary_messages
+        
+        # Add conversation history (older turns digested if over budget)
+        messages.extend(fit_history(conversation_history, history_budget))
         
         # Add current message
         messages.append({"role": "user", "content": message})
         
+        openai_start = None
         try:
             openai_start = time.time()
             response = await self.client.chat.completions.create(
-                model="gpt-4-turbo",
+                model=CHAT_MODEL,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=CHAT_MAX_TOKENS
             )
             openai_duration = time.time() - openai_start
+            openai_start = None
             
             # Track metrics
             tokens_used = response.usage.total_tokens
             cost_usd = self._calculate_cost(response.usage)
-            self.metrics["total_tokens_used"] += tokens_used
-            self.metrics["total_cost_usd"] += cost_usd
-            self.metrics["successful_requests"] += 1
+            openai_usage.record(METRICS_SERVICE, CHAT_MODEL, openai_duration, response.usage, cost_usd)
+            metrics.CHAT_REQUESTS.inc(service=METRICS_SERVICE, status="success")
             
             total_duration = time.time() - start_time
             
@@ -200,10 +242,15 @@ class UniversityChatService:
                 }
             )
             
-            return response.choices[0].message.content.strip()
-            
+            answer = response.choices[0].message.content.strip()
+            if first_turn:
+                answer_cache.store(cache_scope, message, answer, question_embedding, tags=cache_tags)
+            return answer
+
         except Exception as e:
-            self.metrics["failed_requests"] += 1
+            if openai_start is not None:
+                openai_usage.record(METRICS_SERVICE, CHAT_MODEL, time.time() - openai_start, error=True)
+            metrics.CHAT_REQUESTS.inc(service=METRICS_SERVICE, status="failed")
             
             logger.error(
                 "university_chat_request_failed",
@@ -215,33 +262,13 @@ class UniversityChatService:
                 },
                 exc_info=True
             )
-            
-            return self._get_error_message(language)
+            raise
     
     def _detect_language(self, message: str) -> str:
         """Detect language from user message"""
-        try:
-            lang = detect(message)
-            # Map to supported languages
-            lang_map = {
-                'uk': 'uk',  # Ukrainian
-                'ru': 'ru',  # Russian
-                'sk': 'sk',  # Slovak
-                'cs': 'cs',  # Czech
-                'pl': 'pl',  # Polish
-                'en': 'en',  # English
-                'de': 'de',  # German
-                'fr': 'fr',  # French
-                'es': 'es',  # Spanish
-                'it': 'it',  # Italian
-                'pt': 'pt',  # Portuguese
-            }
-            detected = lang_map.get(lang, 'en')
-            print(f"Detected language: {detected} from message: {message[:50]}")
-            return detected
-        except Exception as e:
-            print(f"Language detection error: {e}")
-            return 'en'  # Default to English
+        detected = detect_language(message)
+        print(f"Detected language: {detected} from message: {message[:50]}")
+        return detected
     
     def _get_system_prompt_with_rag(
         self, 
@@ -870,69 +897,31 @@ Responda em português. Para perguntas específicas, recomende visitar {universi
 
     async def _search_web_for_university(
         self,
+        db: Session,
+        university_id: int,
         university_name: str,
         university_website: str,
         query: str,
         language: str
-    ) -> str:
+    ) -> Optional[str]:
         """
         Search the web for university information when RAG data unavailable
         Returns formatted context with sources
+        
+        Results are cached per university and question, and their snippets
+        stored as university content for later RAG lookups.
         """
         try:
-            import requests
-            from urllib.parse import quote
-            
-            # Construct search query
-            search_query = f"{university_name} {query}"
-            
-            # Use DuckDuckGo HTML search (no API key needed)
-            search_url = f"https://html.duckduckgo.com/html/?q={quote(search_query)}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extract search results
-                results = []
-                for result in soup.find_all('div', class_='result')[:3]:  # Top 3 results
-                    title_elem = result.find('a', class_='result__a')
-                    snippet_elem = result.find('a', class_='result__snippet')
-                    
-                    if title_elem and snippet_elem:
-                        title = title_elem.get_text().strip()
-                        url = title_elem.get('href', '')
-                        snippet = snippet_elem.get_text().strip()
-                        
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'snippet': snippet
-                        })
-                
-                # Format results as context
-                if results:
-                    context_parts = []
-                    for i, result in enumerate(results, 1):
-                        context_parts.append(
-                            f"[Web Source {i}] {result['title']}\n"
-                            f"URL: {result['url']}\n"
-                            f"Content: {result['snippet']}\n"
-                        )
-                    
-                    return "\n\n".join(context_parts)
-            
-            return None
-            
+            results = await web_search.search_university(university_id, university_name, query)
         except Exception as e:
             print(f"Error searching web: {e}")
             return None
+        
+        if not results:
+            return None
+        
+        web_search.store_results(db, university_id, results, language)
+        return web_search.format_results(results)
 
     def _calculate_cost(self, usage) -> float:
         """
@@ -948,18 +937,39 @@ Responda em português. Para perguntas específicas, recomende visitar {universi
     
     def get_metrics(self) -> Dict:
         """Get current metrics for monitoring"""
-        return {
-            **self.metrics,
-            "success_rate": (
-                self.metrics["successful_requests"] / self.metrics["total_requests"]
-                if self.metrics["total_requests"] > 0 else 0
-            ),
-            "rag_hit_rate": (
-                self.metrics["rag_hits"] / (self.metrics["rag_hits"] + self.metrics["rag_misses"])
-                if (self.metrics["rag_hits"] + self.metrics["rag_misses"]) > 0 else 0
-            ),
-            "avg_cost_per_request": (
-                self.metrics["total_cost_usd"] / self.metrics["successful_requests"]
-                if self.metrics["successful_requests"] > 0 else 0
-            )
-        }
+        return get_chat_metrics()
+
+
+def get_chat_metrics() -> Dict:
+    """
+    University chat metrics aggregated over all worker processes
+    
+    Returns:
+        Dict with request counts, RAG hit rate and OpenAI usage
+    """
+    values = metrics.registry.snapshot()
+    
+    def total(sample: str, **labels) -> float:
+        return metrics.total(values, sample, service=METRICS_SERVICE, **labels)
+    
+    successful = int(total("chat_requests_total", status="success"))
+    failed = int(total("chat_requests_total", status="failed"))
+    cached = int(total("chat_requests_total", status="cached"))
+    rag_hits = int(total("rag_lookups_total", result="hit"))
+    rag_misses = int(total("rag_lookups_total", result="miss"))
+    cost = total("openai_cost_usd_total")
+    
+    return {
+        "total_requests": successful + failed + cached,
+        "successful_requests": successful,
+        "failed_requests": failed,
+        "cached_answers": cached,
+        "rag_hits": rag_hits,
+        "rag_misses": rag_misses,
+        "web_searches": int(total("web_searches_total")),
+        "total_tokens_used": int(total("openai_tokens_total")),
+        "total_cost_usd": cost,
+        "success_rate": successful / (successful + failed) if successful + failed > 0 else 0,
+        "rag_hit_rate": rag_hits / (rag_hits + rag_misses) if rag_hits + rag_misses > 0 else 0,
+        "avg_cost_per_request": cost / successful if successful > 0 else 0
+    }
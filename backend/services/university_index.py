@@ -0,0 +1,231 @@
+"""
+University Index
+
+Hybrid retrieval over a university's scraped content (university_content).
+
+Pages come in the website's language (11 languages), questions in the
+user's, so neither keyword nor embedding search alone is reliable. Two
+rankings are fused with reciprocal-rank fusion (RRF):
+- BM25 over accent-folded, prefix-stemmed tokens (see statute_index),
+  built in process per university and rebuilt when the university's cache
+  tag is invalidated (re-scrape) or after INDEX_TTL;
+- cosine similarity of the question embedding to the page embeddings in
+  university_embeddings (pgvector).
+
+Before the BM25 search the question is expanded with the multilingual
+keyword table of the scraper: a question mentioning "tuition" also matches
+"školné", "czesne" or "studiengebühren" pages, at a lower weight.
+"""
+
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.answer_cache import university_tag
+from services.cache_service import cache
+from services.statute_index import BM25_B, BM25_K1, tokenize
+
+INDEX_TTL = 600  # seconds before a university's index is rebuilt regardless of tags
+MAX_INDEXES = 200  # universities indexed per process
+RRF_K = 60  # standard RRF constant; damps the influence of top ranks
+CANDIDATES = 20  # results taken from each ranking before fusion
+EXPANSION_WEIGHT = 0.5  # query weight of keywords added by expansion
+
+_expansions: Optional[List[Tuple[frozenset, frozenset]]] = None
+
+
+def _keyword_groups() -> List[Tuple[frozenset, frozenset]]:
+    """(tokens of one keyword, tokens of its whole category) for every keyword"""
+    global _expansions
+    if _expansions is None:
+        from services.university_scraper import KEYWORDS
+
+        groups = []
+        for languages in KEYWORDS.values():
+            keywords = [keyword for words in languages.values() for keyword in words]
+            category = frozenset(token for keyword in keywords for token in tokenize(keyword))
+            for keyword in keywords:
+                tokens = frozenset(tokenize(keyword))
+                if tokens:
+                    groups.append((tokens, category))
+        _expansions = groups
+    return _expansions
+
+
+def expand_query(query: str) -> Dict[str, float]:
+    """
+    Weighted query tokens: the question's own tokens (weight 1) plus the
+    keywords, in all languages, of every category the question mentions.
+    """
+    tokens = set(tokenize(query))
+    weights = {token: 1.0 for token in tokens}
+    for keyword, category in _keyword_groups():
+        if keyword <= tokens:
+            for token in category:
+                weights.setdefault(token, EXPANSION_WEIGHT)
+    return weights
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = RRF_K) -> Dict[int, float]:
+    """Fused score of every id appearing in any of the rankings (best first lists)"""
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] += 1.0 / (k + rank)
+    return dict(scores)
+
+
+class UniversityIndex:
+    """BM25 index over the active content of one university"""
+
+    def __init__(self, rows: List[Dict]):
+        self.rows = rows
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths = [0] * len(rows)
+        for position, row in enumerate(rows):
+            counts = Counter(tokenize(f"{row['title'] or ''}\n{row['content'] or ''}"))
+            self.lengths[position] = sum(counts.values())
+            for token, frequency in counts.items():
+                self.postings[token].append((position, frequency))
+        self.average_length = sum(self.lengths) / len(rows) if rows else 0.0
+
+    @classmethod
+    def load(cls, db: Session, university_id: int) -> "UniversityIndex":
+        result = db.execute(text("""
+            SELECT id, title, content, url, content_type, language
+            FROM university_content
+            WHERE university_id = :university_id
+              AND is_active = TRUE
+            ORDER BY id
+        """), {'university_id': university_id})
+        return cls([
+            {
+                'id': row[0],
+                'title': row[1],
+                'content': row[2],
+                'url': row[3],
+                'content_type': row[4],
+                'language': row[5],
+            }
+            for row in result
+        ])
+
+    def search(self, weights: Dict[str, float], top_k: int = CANDIDATES) -> List[int]:
+        """Positions of the best BM25 matches for weighted query tokens"""
+        scores: Dict[int, float] = defaultdict(float)
+        total = len(self.rows)
+        for token, weight in weights.items():
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[position] / self.average_length)
+                scores[position] += weight * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return sorted(scores, key=lambda position: (-scores[position], position))[:top_k]
+
+
+# university_id -> (tag version, built at, index)
+_indexes: Dict[int, Tuple[int, float, UniversityIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_university_index(db: Session, university_id: int) -> UniversityIndex:
+    """Index of a university's content, rebuilt after a re-scrape or INDEX_TTL"""
+    tag = university_tag(university_id)
+    try:
+        version = cache.tag_versions([tag])[tag]
+    except Exception:
+        version = 0
+
+    with _indexes_lock:
+        entry = _indexes.get(university_id)
+    if entry and entry[0] == version and time.monotonic() - entry[1] < INDEX_TTL:
+        return entry[2]
+
+    index = UniversityIndex.load(db, university_id)
+    with _indexes_lock:
+        if len(_indexes) >= MAX_INDEXES and university_id not in _indexes:
+            _indexes.pop(min(_indexes, key=lambda key: _indexes[key][1]))
+        _indexes[university_id] = (version, time.monotonic(), index)
+    return index
+
+
+def forget_university_index(university_id: int):
+    """Rebuild a university's index on next use in this process (content added)"""
+    with _indexes_lock:
+        _indexes.pop(university_id, None)
+
+
+def vector_ranking(db: Session, university_id: int, embedding: List[float], top_k: int = CANDIDATES) -> Dict[int, float]:
+    """Content ids closest to the embedding, with cosine similarity (best first)"""
+    result = db.execute(text("""
+        SELECT uc.id, 1 - (ue.embedding <=> CAST(:embedding AS vector)) AS similarity
+        FROM university_embeddings ue
+        JOIN university_content uc ON uc.id = ue.content_id
+        WHERE uc.university_id = :university_id
+          AND uc.is_active = TRUE
+        ORDER BY ue.embedding <=> CAST(:embedding AS vector)
+        LIMIT :top_k
+    """), {
+        'embedding': '[' + ','.join(map(str, embedding)) + ']',
+        'university_id': university_id,
+        'top_k': top_k,
+    })
+    return {row[0]: float(row[1]) for row in result}
+
+
+def hybrid_search(
+    db: Session,
+    university_id: int,
+    query: str,
+    embedding: Optional[List[float]],
+    top_k: int = 5,
+    expand: bool = True
+) -> List[Dict]:
+    """
+    Content of a university most relevant to a question, best first.
+
+    Args:
+        db: Database session
+        university_id: University ID
+        query: User's question (any language)
+        embedding: Question embedding, or None for keyword search only
+        top_k: Number of results to return
+        expand: Expand the question with the multilingual keyword table
+
+    Returns:
+        Content rows with 'score' (fused RRF score) and 'similarity'
+        (cosine similarity, 0 if the page has no embedding in the top results)
+    """
+    index = get_university_index(db, university_id)
+    if not index.rows:
+        return []
+
+    weights = expand_query(query) if expand else {token: 1.0 for token in tokenize(query)}
+    lexical = [index.rows[position]['id'] for position in index.search(weights)]
+
+    similarities: Dict[int, float] = {}
+    if embedding:
+        try:
+            similarities = vector_ranking(db, university_id, embedding)
+        except Exception as e:
+            db.rollback()
+            print(f"University vector search unavailable, using keywords only: {e}")
+
+    fused = reciprocal_rank_fusion([lexical, list(similarities)])
+    by_id = {row['id']: row for row in index.rows}
+    ranked = sorted(
+        (content_id for content_id in fused if content_id in by_id),
+        key=lambda content_id: (-fused[content_id], content_id)
+    )[:top_k]
+
+    return [
+        {**by_id[content_id], 'score': fused[content_id], 'similarity': similarities.get(content_id, 0.0)}
+        for content_id in ranked
+    ]
@@ -8,15 +8,109 @@ Scrapes applicant-critical information in 11 languages
 import requests
 from bs4 import BeautifulSoup
 from typing import List, Dict, Optional
-from langdetect import detect, DetectorFactory
 from urllib.parse import urljoin, urlparse
 import re
 import time
 from sqlalchemy.orm import Session
 from datetime import datetime
 
-# Make language detection deterministic
-DetectorFactory.seed = 0
+from services.language_detection import detect_languages
+
+
+# Applicant-critical keywords in 11 languages
+KEYWORDS = {
+    'tuition': {
+        'en': ['tuition', 'fees', 'cost', 'price', 'payment'],
+        'sk': ['školné', 'poplatky', 'cena', 'platba'],
+        'cs': ['školné', 'poplatky', 'cena', 'platba'],
+        'pl': ['czesne', 'opłaty', 'cena', 'płatność'],
+        'de': ['studiengebühren', 'kosten', 'preis', 'zahlung'],
+        'uk': ['плата', 'вартість', 'ціна', 'оплата'],
+        'ru': ['плата', 'стоимость', 'цена', 'оплата'],
+        'fr': ['frais', 'coût', 'prix', 'paiement'],
+        'es': ['matrícula', 'tasas', 'costo', 'precio'],
+        'it': ['tasse', 'costi', 'prezzo', 'pagamento'],
+        'pt': ['propinas', 'taxas', 'custo', 'preço', 'pagamento']
+    },
+    'faculties': {
+        'en': ['faculty', 'faculties', 'school', 'department'],
+        'sk': ['fakulta', 'fakulty', 'škola', 'katedra'],
+        'cs': ['fakulta', 'fakulty', 'škola', 'katedra'],
+        'pl': ['wydział', 'wydziały', 'szkoła', 'katedra'],
+        'de': ['fakultät', 'fakultäten', 'schule', 'abteilung'],
+        'uk': ['факультет', 'факультети', 'школа', 'кафедра'],
+        'ru': ['факультет', 'факультеты', 'школа', 'кафедра'],
+        'fr': ['faculté', 'facultés', 'école', 'département'],
+        'es': ['facultad', 'facultades', 'escuela', 'departamento'],
+        'it': ['facoltà', 'scuola', 'dipartimento'],
+        'pt': ['faculdade', 'faculdades', 'escola', 'departamento']
+    },
+    'programs': {
+        'en': ['programs', 'programme', 'bachelor', 'master', 'phd', 'courses'],
+        'sk': ['programy', 'bakalár', 'magister', 'doktorát', 'kurzy'],
+        'cs': ['programy', 'bakalář', 'magistr', 'doktorát', 'kurzy'],
+        'pl': ['programy', 'licencjat', 'magister', 'doktorat', 'kursy'],
+        'de': ['programme', 'bachelor', 'master', 'doktorat', 'kurse'],
+        'uk': ['програми', 'бакалавр', 'магістр', 'докторат', 'курси'],
+        'ru': ['программы', 'бакалавр', 'магистр', 'докторат', 'курсы'],
+        'fr': ['programmes', 'licence', 'master', 'doctorat', 'cours'],
+        'es': ['programas', 'grado', 'máster', 'doctorado', 'cursos'],
+        'it': ['programmi', 'laurea', 'magistrale', 'dottorato', 'corsi'],
+        'pt': ['programas', 'licenciatura', 'mestrado', 'doutorado', 'cursos']
+    },
+    'admission': {
+        'en': ['admission', 'application', 'apply', 'requirements', 'entrance'],
+        'sk': ['prijímanie', 'prihláška', 'požiadavky', 'prijímačky'],
+        'cs': ['přijímání', 'přihláška', 'požadavky', 'přijímačky'],
+        'pl': ['rekrutacja', 'aplikacja', 'wymagania', 'egzamin'],
+        'de': ['zulassung', 'bewerbung', 'anforderungen', 'prüfung'],
+        'uk': ['вступ', 'заява', 'вимоги', 'іспит'],
+        'ru': ['поступление', 'заявка', 'требования', 'экзамен'],
+        'fr': ['admission', 'candidature', 'exigences', 'examen'],
+        'es': ['admisión', 'solicitud', 'requisitos', 'examen'],
+        'it': ['ammissione', 'domanda', 'requisiti', 'esame'],
+        'pt': ['admissão', 'candidatura', 'requisitos', 'exame']
+    },
+    'dormitory': {
+        'en': ['dormitory', 'housing', 'accommodation', 'residence'],
+        'sk': ['internát', 'ubytovanie', 'kolej'],
+        'cs': ['kolej', 'ubytování', 'internát'],
+        'pl': ['akademik', 'zakwaterowanie', 'dom studencki'],
+        'de': ['wohnheim', 'unterkunft', 'studentenwohnheim'],
+        'uk': ['гуртожиток', 'житло', 'проживання'],
+        'ru': ['общежитие', 'жилье', 'проживание'],
+        'fr': ['résidence', 'logement', 'hébergement'],
+        'es': ['residencia', 'alojamiento', 'vivienda'],
+        'it': ['residenza', 'alloggio', 'abitazione'],
+        'pt': ['residência', 'alojamento', 'habitação']
+    },
+    'scholarship': {
+        'en': ['scholarship', 'financial aid', 'grant', 'funding'],
+        'sk': ['štipendium', 'finančná pomoc', 'grant'],
+        'cs': ['stipendium', 'finanční pomoc', 'grant'],
+        'pl': ['stypendium', 'pomoc finansowa', 'grant'],
+        'de': ['stipendium', 'finanzielle hilfe', 'förderung'],
+        'uk': ['стипендія', 'фінансова допомога', 'грант'],
+        'ru': ['стипендия', 'финансовая помощь', 'грант'],
+        'fr': ['bourse', 'aide financière', 'subvention'],
+        'es': ['beca', 'ayuda financiera', 'subvención'],
+        'it': ['borsa di studio', 'aiuto finanziario', 'sovvenzione'],
+        'pt': ['bolsa', 'ajuda financeira', 'subsídio']
+    },
+    'deadlines': {
+        'en': ['deadline', 'dates', 'calendar', 'schedule'],
+        'sk': ['termín', 'dátumy', 'kalendár', 'rozvrh'],
+        'cs': ['termín', 'data', 'kalendář', 'rozvrh'],
+        'pl': ['termin', 'daty', 'kalendarz', 'harmonogram'],
+        'de': ['frist', 'termine', 'kalender', 'zeitplan'],
+        'uk': ['термін', 'дати', 'календар', 'розклад'],
+        'ru': ['срок', 'даты', 'календарь', 'расписание'],
+        'fr': ['délai', 'dates', 'calendrier', 'horaire'],
+        'es': ['plazo', 'fechas', 'calendario', 'horario'],
+        'it': ['scadenza', 'date', 'calendario', 'orario'],
+        'pt': ['prazo', 'datas', 'calendário', 'horário']
+    }
+}
 
 
 class UniversityScraper:
@@ -37,100 +131,7 @@ class UniversityScraper:
             '/press', '/media', '/tiskove', '/press-release'
         ]
         
-        # Applicant-critical keywords in 11 languages
-        self.keywords = {
-            'tuition': {
-                'en': ['tuition', 'fees', 'cost', 'price', 'payment'],
-                'sk': ['školné', 'poplatky', 'cena', 'platba'],
-                'cs': ['školné', 'poplatky', 'cena', 'platba'],
-                'pl': ['czesne', 'opłaty', 'cena', 'płatność'],
-                'de': ['studiengebühren', 'kosten', 'preis', 'zahlung'],
-                'uk': ['плата', 'вартість', 'ціна', 'оплата'],
-                'ru': ['плата', 'стоимость', 'цена', 'оплата'],
-                'fr': ['frais', 'coût', 'prix', 'paiement'],
-                'es': ['matrícula', 'tasas', 'costo', 'precio'],
-                'it': ['tasse', 'costi', 'prezzo', 'pagamento'],
-                'pt': ['propinas', 'taxas', 'custo', 'preço', 'pagamento']
-            },
-            'faculties': {
-                'en': ['faculty', 'faculties', 'school', 'department'],
-                'sk': ['fakulta', 'fakulty', 'škola', 'katedra'],
-                'cs': ['fakulta', 'fakulty', 'škola', 'katedra'],
-                'pl': ['wydział', 'wydziały', 'szkoła', 'katedra'],
-                'de': ['fakultät', 'fakultäten', 'schule', 'abteilung'],
-                'uk': ['факультет', 'факультети', 'школа', 'кафедра'],
-                'ru': ['факультет', 'факультеты', 'школа', 'кафедра'],
-                'fr': ['faculté', 'facultés', 'école', 'département'],
-                'es': ['facultad', 'facultades', 'escuela', 'departamento'],
-                'it': ['facoltà', 'scuola', 'dipartimento'],
-                'pt': ['faculdade', 'faculdades', 'escola', 'departamento']
-            },
-            'programs': {
-                'en': ['programs', 'programme', 'bachelor', 'master', 'phd', 'courses'],
-                'sk': ['programy', 'bakalár', 'magister', 'doktorát', 'kurzy'],
-                'cs': ['programy', 'bakalář', 'magistr', 'doktorát', 'kurzy'],
-                'pl': ['programy', 'licencjat', 'magister', 'doktorat', 'kursy'],
-                'de': ['programme', 'bachelor', 'master', 'doktorat', 'kurse'],
-                'uk': ['програми', 'бакалавр', 'магістр', 'докторат', 'курси'],
-                'ru': ['программы', 'бакалавр', 'магистр', 'докторат', 'курсы'],
-                'fr': ['programmes', 'licence', 'master', 'doctorat', 'cours'],
-                'es': ['programas', 'grado', 'máster', 'doctorado', 'cursos'],
-                'it': ['programmi', 'laurea', 'magistrale', 'dottorato', 'corsi'],
-                'pt': ['programas', 'licenciatura', 'mestrado', 'doutorado', 'cursos']
-            },
-            'admission': {
-                'en': ['admission', 'application', 'apply', 'requirements', 'entrance'],
-                'sk': ['prijímanie', 'prihláška', 'požiadavky', 'prijímačky'],
-                'cs': ['přijímání', 'přihláška', 'požadavky', 'přijímačky'],
-                'pl': ['rekrutacja', 'aplikacja', 'wymagania', 'egzamin'],
-                'de': ['zulassung', 'bewerbung', 'anforderungen', 'prüfung'],
-                'uk': ['вступ', 'заява', 'вимоги', 'іспит'],
-                'ru': ['поступление', 'заявка', 'требования', 'экзамен'],
-                'fr': ['admission', 'candidature', 'exigences', 'examen'],
-                'es': ['admisión', 'solicitud', 'requisitos', 'examen'],
-                'it': ['ammissione', 'domanda', 'requisiti', 'esame'],
-                'pt': ['admissão', 'candidatura', 'requisitos', 'exame']
-            },
-            'dormitory': {
-                'en': ['dormitory', 'housing', 'accommodation', 'residence'],
-                'sk': ['internát', 'ubytovanie', 'kolej'],
-                'cs': ['kolej', 'ubytování', 'internát'],
-                'pl': ['akademik', 'zakwaterowanie', 'dom studencki'],
-                'de': ['wohnheim', 'unterkunft', 'studentenwohnheim'],
-                'uk': ['гуртожиток', 'житло', 'проживання'],
-                'ru': ['общежитие', 'жилье', 'проживание'],
-                'fr': ['résidence', 'logement', 'hébergement'],
-                'es': ['residencia', 'alojamiento', 'vivienda'],
-                'it': ['residenza', 'alloggio', 'abitazione'],
-                'pt': ['residência', 'alojamento', 'habitação']
-            },
-            'scholarship': {
-                'en': ['scholarship', 'financial aid', 'grant', 'funding'],
-                'sk': ['štipendium', 'finančná pomoc', 'grant'],
-                'cs': ['stipendium', 'finanční pomoc', 'grant'],
-                'pl': ['stypendium', 'pomoc finansowa', 'grant'],
-                'de': ['stipendium', 'finanzielle hilfe', 'förderung'],
-                'uk': ['стипендія', 'фінансова допомога', 'грант'],
-                'ru': ['стипендия', 'финансовая помощь', 'грант'],
-                'fr': ['bourse', 'aide financière', 'subvention'],
-                'es': ['beca', 'ayuda financiera', 'subvención'],
-                'it': ['borsa di studio', 'aiuto finanziario', 'sovvenzione'],
-                'pt': ['bolsa', 'ajuda financeira', 'subsídio']
-            },
-            'deadlines': {
-                'en': ['deadline', 'dates', 'calendar', 'schedule'],
-                'sk': ['termín', 'dátumy', 'kalendár', 'rozvrh'],
-                'cs': ['termín', 'data', 'kalendář', 'rozvrh'],
-                'pl': ['termin', 'daty', 'kalendarz', 'harmonogram'],
-                'de': ['frist', 'termine', 'kalender', 'zeitplan'],
-                'uk': ['термін', 'дати', 'календар', 'розклад'],
-                'ru': ['срок', 'даты', 'календарь', 'расписание'],
-                'fr': ['délai', 'dates', 'calendrier', 'horaire'],
-                'es': ['plazo', 'fechas', 'calendario', 'horario'],
-                'it': ['scadenza', 'date', 'calendario', 'orario'],
-                'pt': ['prazo', 'datas', 'calendário', 'horário']
-            }
-        }
+        self.keywords = KEYWORDS
         
     async def scrape_university(self, university_id: int, website_url: str) -> Dict:
         """
@@ -174,7 +175,6 @@ class UniversityScraper:
                     'title': homepage_content['title'],
                     'content': homepage_content['content'],
                     'content_type': 'general',
-                    'language': homepage_content['language']
                 })
                 pages_scraped += 1
             
@@ -191,11 +191,15 @@ class UniversityScraper:
                         'title': page_content['title'],
                         'content': page_content['content'],
                         'content_type': page_type,
-                        'language': page_content['language']
                     })
                     pages_scraped += 1
                     time.sleep(1)  # Be polite
             
+            # Detect page languages in one batch
+            languages = detect_languages([item['content'] for item in content_items])
+            for item, language in zip(content_items, languages):
+                item['language'] = language
+            
             # Store content in database
             for item in content_items:
                 existing = self.db.query(UniversityContent).filter_by(
@@ -271,13 +275,9 @@ class UniversityScraper:
             if len(text) > 10000:
                 text = text[:10000]
             
-            # Detect language
-            language = self._detect_language(text)
-            
             return {
                 'title': title_text,
-                'content': text,
-                'language': language
+                'content': text
             }
             
         except Exception as e:
@@ -358,26 +358,3 @@ class UniversityScraper:
             print(f"Error finding key pages: {e}")
         
         return key_pages[:self.max_pages]
-    
-    
-    def _detect_language(self, text: str) -> str:
-        """Detect language of text"""
-        try:
-            lang = detect(text)
-            # Map to supported languages (11 languages)
-            lang_map = {
-                'sk': 'sk',
-                'cs': 'cs',
-                'pl': 'pl',
-                'en': 'en',
-                'de': 'de',
-                'fr': 'fr',
-                'es': 'es',
-                'it': 'it',
-                'ru': 'ru',
-                'uk': 'uk',
-                'pt': 'pt'
-            }
-            return lang_map.get(lang, 'en')
-        except:
-            return 'en'
@@ -0,0 +1,203 @@
+"""
+UNREAD COUNTERS
+Per-user unread message/notification counters
+
+Counts live in two places:
+- users.unread_messages_count / users.unread_notifications_count, updated
+  atomically in the same transaction as the row that changes them. This is
+  the source of truth and the fallback when Redis is unavailable.
+- A Redis hash ``unread:{user_id}`` that badge endpoints read from, refilled
+  from the columns on a miss. Every commit that changes a counter bumps the
+  user's generation (``unread:{user_id}:gen``) and drops the hash. A refill
+  is tagged with the generation read before loading the columns, and a
+  cached hash is used only while its tag is current: a reader that loaded
+  the columns just before a writer committed may still write its older
+  counts back, but they are ignored and reloaded on the next read.
+
+Whenever a counter changes, the new values are pushed to the user's
+WebSocket so clients do not need to poll.
+"""
+
+import logging
+from typing import Dict, Iterable
+
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+MESSAGES = "messages"
+NOTIFICATIONS = "notifications"
+
+_COLUMNS = {
+    MESSAGES: "unread_messages_count",
+    NOTIFICATIONS: "unread_notifications_count",
+}
+
+REDIS_KEY = "unread:{user_id}"
+REDIS_GENERATION_KEY = "unread:{user_id}:gen"
+REDIS_TTL = 86400  # 24 hours; refilled from Postgres on miss
+GENERATION_TTL = 2 * REDIS_TTL  # outlives every hash tagged with an older generation
+GENERATION = "generation"
+
+
+def _redis():
+    """Shared Redis client, or None when the cache layer is unavailable"""
+    try:
+        from services.cache_service import cache
+        return cache.redis_client
+    except Exception:
+        return None
+
+
+def adjust(db: Session, user_id: int, kind: str, delta: int):
+    """
+    Add delta to a user's unread counter inside the current transaction.
+
+    The counter is clamped at zero. Call publish() after committing so Redis
+    and connected clients see the new value.
+
+    Args:
+        db: Database session
+        user_id: Counter owner
+        kind: MESSAGES or NOTIFICATIONS
+        delta: Amount to add (negative to decrement)
+    """
+    if not delta:
+        return
+
+    from main import User
+
+    column = getattr(User, _COLUMNS[kind])
+    new_value = column + delta
+    db.query(User).filter(User.id == user_id).update({
+        column: case((new_value < 0, 0), else_=new_value)
+    }, synchronize_session=False)
+
+
+def _load(db: Session, user_id: int) -> Dict[str, int]:
+    """Read both counters from Postgres"""
+    from main import User
+
+    row = db.query(
+        User.unread_messages_count,
+        User.unread_notifications_count
+    ).filter(User.id == user_id).first()
+
+    if not row:
+        return {MESSAGES: 0, NOTIFICATIONS: 0}
+    return {
+        MESSAGES: row.unread_messages_count or 0,
+        NOTIFICATIONS: row.unread_notifications_count or 0,
+    }
+
+
+def _store(user_id: int, counts: Dict[str, int], generation: int):
+    """Write counters loaded at a generation to Redis, ignoring cache failures"""
+    client = _redis()
+    if client is None:
+        return
+
+    key = REDIS_KEY.format(user_id=user_id)
+    try:
+        pipe = client.pipeline()
+        pipe.hset(key, mapping={**counts, GENERATION: generation})
+        pipe.expire(key, REDIS_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Unread counter cache write failed for user {user_id}: {e}")
+
+
+def get_counts(db: Session, user_id: int) -> Dict[str, int]:
+    """
+    Get a user's unread counters.
+
+    Reads the Redis hash; on a miss, a stale generation or a Redis error
+    falls back to the Postgres columns and refills the cache (unless Redis
+    is unavailable).
+
+    Returns:
+        Dict with "messages" and "notifications" counts
+    """
+    generation = None
+    client = _redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.get(REDIS_GENERATION_KEY.format(user_id=user_id))
+            pipe.hgetall(REDIS_KEY.format(user_id=user_id))
+            raw_generation, raw_counts = pipe.execute()
+            generation = int(raw_generation or 0)
+            cached = {
+                (field.decode() if isinstance(field, bytes) else field): int(value)
+                for field, value in raw_counts.items()
+            }
+            if MESSAGES in cached and NOTIFICATIONS in cached and cached.get(GENERATION) == generation:
+                return {MESSAGES: cached[MESSAGES], NOTIFICATIONS: cached[NOTIFICATIONS]}
+        except Exception as e:
+            logger.warning(f"Unread counter cache read failed for user {user_id}: {e}")
+
+    counts = _load(db, user_id)
+    if generation is not None:
+        _store(user_id, counts, generation)
+    return counts
+
+
+def get_count(db: Session, user_id: int, kind: str) -> int:
+    """Get a single unread counter (MESSAGES or NOTIFICATIONS)"""
+    return get_counts(db, user_id)[kind]
+
+
+def _invalidate(user_ids: Iterable[int]):
+    """Bump the users' generations and drop cached counters, ignoring cache failures"""
+    client = _redis()
+    if client is None:
+        return
+
+    user_ids = list(user_ids)
+    try:
+        pipe = client.pipeline(transaction=False)
+        for user_id in user_ids:
+            generation_key = REDIS_GENERATION_KEY.format(user_id=user_id)
+            pipe.incr(generation_key)
+            pipe.expire(generation_key, GENERATION_TTL)
+            pipe.delete(REDIS_KEY.format(user_id=user_id))
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Unread counter cache invalidation failed for users {user_ids}: {e}")
+
+
+def refresh(db: Session, user_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Drop the cached counters and read the committed ones.
+
+    The cache is not written here: the next get_counts() refills it. For
+    synchronous callers that cannot push over the WebSocket; async code
+    should use publish() instead.
+
+    Returns:
+        Dict of user_id -> counts
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    _invalidate(user_ids)
+    return {user_id: _load(db, user_id) for user_id in user_ids}
+
+
+async def publish(db: Session, user_ids: Iterable[int]):
+    """
+    Drop the cached counters and push the committed ones to connected users.
+
+    Must be called after the transaction that changed the counters commits.
+    """
+    from websocket_manager import ws_manager
+
+    for user_id, counts in refresh(db, user_ids).items():
+        await ws_manager.send_personal_message(
+            {
+                "type": "unread_counts",
+                "data": counts
+            },
+            user_id
+        )
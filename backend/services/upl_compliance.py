@@ -8,9 +8,12 @@ Author: Student Advisor Team
 Date: 2025-12-19
 """
 
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import re
 
+from services.language_detection import detect_language as _detect_language
+
 
 class UPLCompliance:
     """
@@ -235,6 +238,8 @@ Respond in English, clearly and professionally."""
         """
         Validate if AI response complies with UPL regulations.
         
+        One pass over the response (see ComplianceScanner).
+        
         Args:
             response: AI response to validate
             language: Language code
@@ -245,77 +250,243 @@ Respond in English, clearly and professionally."""
             - violations: list of detected violations
             - warnings: list of potential issues
         """
-        violations = []
-        warnings = []
+        return ComplianceScanner.scan(response, language)
+    
+    @staticmethod
+    def detect_language(text: str) -> str:
+        """
+        Detect language from text.
         
-        # Check for forbidden phrases (Slovak)
-        if language == 'sk':
-            forbidden_patterns = [
-                (r'\bvy by ste mali\b', "Uses 'vy by ste mali' (you should)"),
-                (r'\bvýš prípad\b', "Uses 'váš prípad' (your case)"),
-                (r'\burčite vyhráte\b', "Guarantees outcome 'určite vyhráte'"),
-                (r'\bnapíšem (pozov|žalobu) za vás\b', "Offers to write legal documents"),
-                (r'\bmáte nárok na\b', "States specific entitlement 'máte nárok na'"),
-            ]
+        Args:
+            text: Text to analyze
             
-            for pattern, violation in forbidden_patterns:
-                if re.search(pattern, response, re.IGNORECASE):
-                    violations.append(violation)
+        Returns:
+            Detected language code (Slovak if undetermined)
+        """
+        return _detect_language(text, default='sk')
+
+
+# Forbidden phrases per language: personal advice, "your case", guaranteed
+# outcomes, offers to draft documents, specific entitlements. Each rule lists
+# literal phrases, matched case-insensitively as whole words with any
+# whitespace between them, its message, and whether the phrase is allowed
+# when it leads into a recommendation to see a lawyer ("you should consult a
+# lawyer" is exactly what the disclaimer asks for).
+FORBIDDEN_PHRASES = {
+    'sk': [
+        (("vy by ste mali",), "Uses 'vy by ste mali' (you should)", True),
+        (("váš prípad",), "Uses 'váš prípad' (your case)", False),
+        (("určite vyhráte",), "Guarantees outcome 'určite vyhráte'", False),
+        (("napíšem pozov za vás", "napíšem žalobu za vás"), "Offers to write legal documents", False),
+        (("máte nárok na",), "States specific entitlement 'máte nárok na'", False),
+    ],
+    'cs': [
+        (("byste měli",), "Uses 'byste měli' (you should)", True),
+        (("váš případ",), "Uses 'váš případ' (your case)", False),
+        (("určitě vyhrajete",), "Guarantees outcome 'určitě vyhrajete'", False),
+        (("napíšu žalobu za vás", "napíšu podání za vás"), "Offers to write legal documents", False),
+        (("máte nárok na",), "States specific entitlement 'máte nárok na'", False),
+    ],
+    'pl': [
+        (("powinien pan", "powinna pani", "powinieneś", "powinnaś"), "Uses 'powinien pan' (you should)", True),
+        (("pana sprawa", "pani sprawa", "twoja sprawa"), "Uses 'pana sprawa' (your case)", False),
+        (("na pewno pan wygra", "na pewno pani wygra", "na pewno wygrasz"), "Guarantees outcome 'na pewno pan wygra'", False),
+        (("napiszę pozew za pana", "napiszę pozew za panią", "napiszę pozew za ciebie"), "Offers to write legal documents", False),
+        (("przysługuje panu", "przysługuje pani", "ma pan prawo do", "ma pani prawo do"), "States specific entitlement 'przysługuje panu'", False),
+    ],
+    'en': [
+        (("you should",), "Uses 'you should'", True),
+        (("your case",), "Uses 'your case'", False),
+        (("you will definitely win", "you will certainly win"), "Guarantees outcome 'you will definitely win'", False),
+        (("i will write the lawsuit for you", "i'll write the lawsuit for you", "i will draft the complaint for you",
+          "i'll draft the complaint for you"), "Offers to write legal documents", False),
+        (("you are entitled to",), "States specific entitlement 'you are entitled to'", False),
+    ],
+    'de': [
+        (("sie sollten",), "Uses 'Sie sollten' (you should)", True),
+        (("ihr fall",), "Uses 'Ihr Fall' (your case)", False),
+        (("sie werden sicher gewinnen", "sie werden bestimmt gewinnen"), "Guarantees outcome 'Sie werden sicher gewinnen'", False),
+        (("ich schreibe die klage für sie", "ich verfasse die klage für sie"), "Offers to write legal documents", False),
+        (("sie haben anspruch auf", "sie haben einen anspruch auf"), "States specific entitlement 'Sie haben Anspruch auf'", False),
+    ],
+    'fr': [
+        (("vous devriez",), "Uses 'vous devriez' (you should)", True),
+        (("votre cas",), "Uses 'votre cas' (your case)", False),
+        (("vous allez certainement gagner", "vous gagnerez certainement"), "Guarantees outcome 'vous allez certainement gagner'", False),
+        (("je rédigerai la plainte pour vous", "je vais rédiger la plainte pour vous"), "Offers to write legal documents", False),
+        (("vous avez droit à",), "States specific entitlement 'vous avez droit à'", False),
+    ],
+    'es': [
+        (("usted debería", "deberías"), "Uses 'usted debería' (you should)", True),
+        (("su caso", "tu caso"), "Uses 'su caso' (your case)", False),
+        (("seguramente ganará", "seguramente ganarás", "sin duda ganará"), "Guarantees outcome 'seguramente ganará'", False),
+        (("escribiré la demanda por usted", "redactaré la demanda por usted"), "Offers to write legal documents", False),
+        (("usted tiene derecho a", "tienes derecho a"), "States specific entitlement 'tiene derecho a'", False),
+    ],
+    'it': [
+        (("lei dovrebbe", "dovresti"), "Uses 'lei dovrebbe' (you should)", True),
+        (("il suo caso", "il tuo caso"), "Uses 'il suo caso' (your case)", False),
+        (("sicuramente vincerà", "sicuramente vincerai"), "Guarantees outcome 'sicuramente vincerà'", False),
+        (("scriverò il ricorso per lei", "redigerò il ricorso per lei"), "Offers to write legal documents", False),
+        (("lei ha diritto a", "hai diritto a"), "States specific entitlement 'ha diritto a'", False),
+    ],
+    'pt': [
+        (("você deveria", "você deve"), "Uses 'você deveria' (you should)", True),
+        (("o seu caso", "o teu caso"), "Uses 'o seu caso' (your case)", False),
+        (("certamente vai ganhar", "com certeza vai ganhar"), "Guarantees outcome 'certamente vai ganhar'", False),
+        (("escreverei a petição por você", "redigirei a petição por você"), "Offers to write legal documents", False),
+        (("você tem direito a",), "States specific entitlement 'você tem direito a'", False),
+    ],
+    'ru': [
+        (("вам следует", "вам стоит"), "Uses 'вам следует' (you should)", True),
+        (("ваше дело",), "Uses 'ваше дело' (your case)", False),
+        (("вы обязательно выиграете", "вы точно выиграете"), "Guarantees outcome 'вы обязательно выиграете'", False),
+        (("я напишу иск за вас", "я напишу заявление за вас"), "Offers to write legal documents", False),
+        (("вы имеете право на",), "States specific entitlement 'вы имеете право на'", False),
+    ],
+    'uk': [
+        (("вам слід", "вам варто"), "Uses 'вам слід' (you should)", True),
+        (("ваша справа",), "Uses 'ваша справа' (your case)", False),
+        (("ви обов'язково виграєте", "ви точно виграєте"), "Guarantees outcome 'ви обов'язково виграєте'", False),
+        (("я напишу позов за вас", "я напишу заяву за вас"), "Offers to write legal documents", False),
+        (("ви маєте право на",), "States specific entitlement 'ви маєте право на'", False),
+    ],
+}
+
+# Word stems that show the response recommends consulting a professional
+LAWYER_KEYWORDS = {
+    'sk': ['advokát', 'právnik', 'konzultáci'],
+    'cs': ['advokát', 'právník', 'konzultac'],
+    'pl': ['adwokat', 'prawnik', 'radc', 'konsultac'],
+    'en': ['attorney', 'lawyer', 'consult'],
+    'de': ['anwalt', 'anwält', 'rechtsanwalt', 'rechtsanwält', 'berat'],
+    'fr': ['avocat', 'juriste', 'consult'],
+    'es': ['abogad', 'consult'],
+    'it': ['avvocat', 'consul'],
+    'pt': ['advogad', 'consult'],
+    'ru': ['адвокат', 'юрист', 'консультац'],
+    'uk': ['адвокат', 'юрист', 'консультац'],
+}
+
+DISCLAIMER_WINDOW = 300  # characters in which the disclaimer is expected
+RECOMMENDATION_MIN_LENGTH = 200  # shorter responses need no lawyer recommendation
+MAX_MATCH_CHARS = 200  # text kept across streamed chunks (phrase plus referral lookahead)
+REFERRAL_WORDS = 3  # words allowed between "you should" and the lawyer keyword
+REFERRAL_CHARS = 80  # matches this close to the end of a chunk wait for the next one
+
+
+def _phrase_pattern(phrase: str) -> str:
+    return r"\s+".join(re.escape(word) for word in phrase.lower().split())
+
+
+@lru_cache(maxsize=None)
+def _rule_set(language: str) -> Tuple[re.Pattern, Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Forbidden phrases of a language compiled into one pattern (once per
+    language), with the rule messages and lawyer keyword stems.
+
+    Rules become named groups r0, r1, ... The pattern starts with a
+    lookahead on the possible first letters, so the regex engine skips
+    ahead to candidate positions instead of trying every rule at every
+    character. It matches lowercased text. Unknown languages use the
+    Slovak rules.
+    """
+    if language not in FORBIDDEN_PHRASES:
+        language = 'sk'
+    rules = FORBIDDEN_PHRASES[language]
+
+    stems = "|".join(re.escape(stem) for stem in LAWYER_KEYWORDS[language])
+    # Within the same sentence: a few words, then a lawyer keyword
+    referral = rf"(?!(?:[^\w.!?]+\w+){{0,{REFERRAL_WORDS}}}?[^\w.!?]+\w*(?:{stems}))"
+
+    alternatives = []
+    for index, (phrases, _, allows_referral) in enumerate(rules):
+        words = "|".join(_phrase_pattern(phrase) for phrase in phrases)
+        alternatives.append(rf"(?P<r{index}>\b(?:{words})\b{referral if allows_referral else ''})")
+
+    first = {phrase.lower()[0] for phrases, _, _ in rules for phrase in phrases}
+    pattern = re.compile(rf"(?=[{re.escape(''.join(sorted(first)))}])(?:{'|'.join(alternatives)})")
+    return pattern, tuple(message for _, message, _ in rules), tuple(LAWYER_KEYWORDS[language])
+
+
+class ComplianceScanner:
+    """
+    Single-pass compliance scan of a response, whole or streamed.
+
+    feed() scans each streamed chunk as it arrives; the last words are kept
+    so phrases split across chunks are still found. finish() returns the
+    same result as UPLCompliance.validate_response_compliance().
+    """
+    
+    def __init__(self, language: str = 'sk'):
+        self.pattern, self.messages, self.stems = _rule_set(language)
+        self._buffer = ""
+        self._head = ""
+        self._length = 0
+        self._found = set()
+        self._recommended = False
+    
+    def _scan(self, final: bool) -> List[str]:
+        if not self._recommended:
+            self._recommended = any(stem in self._buffer for stem in self.stems)
         
-        # Check for disclaimer presence
-        if "⚠️" not in response[:300] and "Student Advisor" not in response[:300]:
-            warnings.append("Disclaimer may be missing or not at the beginning")
+        new = []
+        for match in self.pattern.finditer(self._buffer):
+            if not final and match.end() > len(self._buffer) - REFERRAL_CHARS:
+                break  # May continue in the next chunk; rescanned from the kept tail
+            rule = int(match.lastgroup[1:])
+            if rule not in self._found:
+                self._found.add(rule)
+                new.append(self.messages[rule])
+        return new
+    
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Scan a streamed chunk.
         
-        # Check for recommendation to consult lawyer
-        lawyer_keywords = {
-            'sk': ['advokát', 'právnik', 'konzultácia'],
-            'en': ['attorney', 'lawyer', 'consult'],
-            'uk': ['адвокат', 'юрист', 'консультація'],
-            'ru': ['адвокат', 'юрист', 'консультация'],
-        }
+        Returns:
+            Violations first found in this chunk
+        """
+        if not chunk:
+            return []
+        if len(self._head) < DISCLAIMER_WINDOW:
+            self._head = (self._head + chunk)[:DISCLAIMER_WINDOW]
+        self._length += len(chunk)
+        self._buffer += chunk.lower()
         
-        keywords = lawyer_keywords.get(language, lawyer_keywords['sk'])
-        has_lawyer_recommendation = any(keyword in response.lower() for keyword in keywords)
+        new = self._scan(final=False)
         
-        if not has_lawyer_recommendation and len(response) > 200:
+        if len(self._buffer) > MAX_MATCH_CHARS:
+            # Keep whole words only, so no word boundary appears mid-word
+            cut = len(self._buffer) - MAX_MATCH_CHARS
+            space = re.search(r"\s", self._buffer[cut:])
+            self._buffer = self._buffer[cut + space.start():] if space else self._buffer[cut:]
+        return new
+    
+    def finish(self) -> Dict[str, any]:
+        """Validation result of everything fed so far"""
+        self._scan(final=True)
+        self._buffer = ""
+        
+        warnings = []
+        if "⚠️" not in self._head and "Student Advisor" not in self._head:
+            warnings.append("Disclaimer may be missing or not at the beginning")
+        if not self._recommended and self._length > RECOMMENDATION_MIN_LENGTH:
             warnings.append("No recommendation to consult a lawyer")
         
+        violations = [self.messages[rule] for rule in sorted(self._found)]
         return {
             'is_compliant': len(violations) == 0,
             'violations': violations,
             'warnings': warnings
         }
     
-    @staticmethod
-    def detect_language(text: str) -> str:
-        """
-        Detect language from text (simple heuristic).
-        
-        Args:
-            text: Text to analyze
-            
-        Returns:
-            Detected language code
-        """
-        # Simple keyword-based detection
-        language_indicators = {
-            'sk': ['slovensko', 'zákon', 'právny', 'zmluva', 'súd'],
-            'en': ['law', 'legal', 'contract', 'court', 'attorney'],
-            'uk': ['україна', 'закон', 'юридичний', 'договір', 'суд'],
-            'ru': ['россия', 'закон', 'юридический', 'договор', 'суд'],
-            'de': ['deutschland', 'gesetz', 'rechtlich', 'vertrag', 'gericht'],
-            'pl': ['polska', 'prawo', 'prawny', 'umowa', 'sąd'],
-            'cs': ['česko', 'zákon', 'právní', 'smlouva', 'soud'],
-        }
-        
-        text_lower = text.lower()
-        
-        for lang, keywords in language_indicators.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return lang
-        
-        # Default to Slovak
-        return 'sk'
+    @classmethod
+    def scan(cls, response: str, language: str = 'sk') -> Dict[str, any]:
+        """Validation result of a complete response"""
+        scanner = cls(language)
+        scanner.feed(response)
+        return scanner.finish()
 
 
 # Convenience functions for easy import
@@ -0,0 +1,158 @@
+"""
+Web Search
+
+Web-search fallback for university chat when RAG finds nothing.
+
+Results come from DuckDuckGo's HTML endpoint, fetched asynchronously with a
+short timeout so a slow search never stalls the event loop. They are cached
+per (university, normalized query) under the university's cache tag, and
+their snippets are written back into university_content (content_type
+'web_search'), so the next question on the topic is answered from RAG.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.answer_cache import university_tag
+from services.cache_service import cache
+from services.embedding_cache import normalize
+
+SEARCH_URL = "https://html.duckduckgo.com/html/?q={query}"
+SEARCH_TIMEOUT = httpx.Timeout(4.0, connect=2.0)
+SEARCH_TTL = 86400  # 1 day
+MAX_RESULTS = 3
+CONTENT_TYPE = "web_search"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop = None
+
+
+def _http_client() -> httpx.AsyncClient:
+    """Shared client (connection reuse), recreated if the event loop changed"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(timeout=SEARCH_TIMEOUT, headers=HEADERS, follow_redirects=True)
+        _client_loop = loop
+    return _client
+
+
+def normalize_query(query: str) -> str:
+    """Cache form of a question: whitespace, case and end punctuation ignored"""
+    return normalize(query).lower().strip(" ?!.")
+
+
+def _result_url(href: str) -> str:
+    """Target of a DuckDuckGo redirect link (//duckduckgo.com/l/?uddg=...)"""
+    parsed = urlparse(href)
+    target = parse_qs(parsed.query).get('uddg')
+    if target:
+        return target[0]
+    return f"https:{href}" if href.startswith('//') else href
+
+
+def parse_results(html: str, limit: int = MAX_RESULTS) -> List[Dict]:
+    """Title, url and snippet of the top results of a search page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    results = []
+    for result in soup.find_all('div', class_='result'):
+        title_elem = result.find('a', class_='result__a')
+        snippet_elem = result.find('a', class_='result__snippet')
+        if title_elem and snippet_elem:
+            results.append({
+                'title': title_elem.get_text().strip(),
+                'url': _result_url(title_elem.get('href', '')),
+                'snippet': snippet_elem.get_text().strip()
+            })
+            if len(results) >= limit:
+                break
+    return results
+
+
+async def fetch_results(search_query: str) -> List[Dict]:
+    """
+    Search results for a query.
+
+    Raises:
+        httpx.HTTPError: On timeout or an error response (nothing is cached)
+    """
+    response = await _http_client().get(SEARCH_URL.format(query=quote(search_query)))
+    response.raise_for_status()
+    return parse_results(response.text)
+
+
+async def search_university(university_id: int, university_name: str, query: str) -> List[Dict]:
+    """
+    Cached web search results about a university.
+
+    Returns:
+        Up to MAX_RESULTS results ({title, url, snippet}); empty if none
+    """
+    return await cache.aget_or_set(
+        cache.make_key("web_search", university_id, normalize_query(query)),
+        lambda: fetch_results(f"{university_name} {query}"),
+        ttl=SEARCH_TTL,
+        tags=[university_tag(university_id)]
+    )
+
+
+def store_results(db: Session, university_id: int, results: List[Dict], language: Optional[str] = None) -> int:
+    """
+    Write result snippets into university_content.
+
+    Pages already stored for the university (e.g. scraped) are left
+    untouched.
+
+    Returns:
+        Number of rows added
+    """
+    added = 0
+    try:
+        for result in results:
+            if not result.get('url') or not result.get('snippet'):
+                continue
+            row = db.execute(text("""
+                INSERT INTO university_content (university_id, url, title, content, content_type, language, is_active)
+                VALUES (:university_id, :url, :title, :content, :content_type, :language, TRUE)
+                ON CONFLICT (university_id, url) DO NOTHING
+                RETURNING id
+            """), {
+                'university_id': university_id,
+                'url': result['url'],
+                'title': result['title'],
+                'content': result['snippet'],
+                'content_type': CONTENT_TYPE,
+                'language': language
+            }).first()
+            added += row is not None
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Web search results not stored: {e}")
+        return 0
+
+    if added:
+        from services.university_index import forget_university_index
+        forget_university_index(university_id)
+    return added
+
+
+def format_results(results: List[Dict]) -> str:
+    """Results as prompt context with sources"""
+    return "\n\n".join(
+        f"[Web Source {i}] {result['title']}\n"
+        f"URL: {result['url']}\n"
+        f"Content: {result['snippet']}\n"
+        for i, result in enumerate(results, 1)
+    )
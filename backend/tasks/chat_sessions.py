@@ -0,0 +1,21 @@
+"""
+Chat Session Persistence
+Periodically writes server-side chat sessions from Redis to Postgres
+"""
+
+from celery import shared_task
+
+
+@shared_task
+def persist_chat_sessions():
+    """
+    Append new turns and summaries of changed chat sessions to Postgres
+    """
+    from main import SessionLocal
+    from services.chat_memory import chat_memory
+    
+    db = SessionLocal()
+    try:
+        return {'persisted': chat_memory.persist(db)}
+    finally:
+        db.close()
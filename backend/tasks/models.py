@@ -2,7 +2,7 @@
 Database models for Celery tasks
 Defines SQLAlchemy models without importing from main
 """
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -58,3 +58,7 @@ class UniversityContent(Base):
     language = Column(String)
     scraped_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('university_id', 'url', name='uq_university_content_university_url'),
+    )
@@ -6,7 +6,6 @@ Monitors key metrics and alerts when pricing review is needed
 from celery import shared_task
 from datetime import datetime, timedelta
 from sqlalchemy import func
-import json
 import os
 from openai import OpenAI
 
@@ -53,8 +52,9 @@ def daily_price_monitoring():
                 'recommendation': 'Розгляньте підвищення цін або зменшення лімітів на базовому плані'
             })
         
-        # 2. Check profit margin from logs
-        margin_data = analyze_margin_from_logs()
+        # 2. Check profit margin from usage rollups (pick up the latest events first)
+        rollup_openai_usage()
+        margin_data = analyze_margin(db)
         if margin_data['margin_percent'] < THRESHOLDS['min_margin_percent']:
             alerts.append({
                 'type': 'LOW_MARGIN',
@@ -67,7 +67,7 @@ def daily_price_monitoring():
             })
         
         # 3. Check OpenAI cost trends
-        cost_trend = analyze_openai_cost_trend()
+        cost_trend = analyze_openai_cost_trend(db)
         if cost_trend['increase_percent'] > THRESHOLDS['openai_cost_increase']:
             alerts.append({
                 'type': 'OPENAI_COST_SPIKE',
@@ -100,33 +100,19 @@ def daily_price_monitoring():
         db.close()
 
 
-def analyze_margin_from_logs():
+def analyze_margin(db):
     """
-    Analyze profit margin from structured logs
+    Analyze profit margin over the last 7 days from the OpenAI usage rollups
     """
+    from services import openai_usage
+    
     try:
-        # Read last 7 days of logs
-        seven_days_ago = datetime.now() - timedelta(days=7)
-        
-        total_revenue = 0  # From subscriptions
-        total_openai_cost = 0
+        from main import User
         
-        # Parse logs for OpenAI costs
-        with open('/app/logs/codex.log', 'r') as f:
-            for line in f:
-                try:
-                    log = json.loads(line)
-                    if log.get('timestamp', '') > seven_days_ago.isoformat():
-                        if log.get('event') == 'openai_api_call':
-                            total_openai_cost += log.get('cost_usd', 0)
-                except:
-                    continue
+        total_openai_cost = openai_usage.total_cost(db, datetime.utcnow() - timedelta(days=7))
         
         # Estimate revenue (assuming $30/month average, 7 days = ~$7 per user)
-        from main import SessionLocal, User
-        db = SessionLocal()
         active_users = db.query(User).filter(User.is_active == True).count()
-        db.close()
         
         estimated_weekly_revenue = active_users * 7  # $7 per user per week
         
@@ -150,33 +136,19 @@ def analyze_margin_from_logs():
         }
 
 
-def analyze_openai_cost_trend():
+def analyze_openai_cost_trend(db):
     """
     Compare OpenAI costs: this week vs last week
     """
+    from services import openai_usage
+    
     try:
-        now = datetime.now()
+        now = datetime.utcnow()
         this_week_start = now - timedelta(days=7)
         last_week_start = now - timedelta(days=14)
         
-        this_week_cost = 0
-        last_week_cost = 0
-        
-        with open('/app/logs/codex.log', 'r') as f:
-            for line in f:
-                try:
-                    log = json.loads(line)
-                    timestamp = log.get('timestamp', '')
-                    
-                    if log.get('event') == 'openai_api_call':
-                        cost = log.get('cost_usd', 0)
-                        
-                        if timestamp > this_week_start.isoformat():
-                            this_week_cost += cost
-                        elif timestamp > last_week_start.isoformat():
-                            last_week_cost += cost
-                except:
-                    continue
+        this_week_cost = openai_usage.total_cost(db, this_week_start)
+        last_week_cost = openai_usage.total_cost(db, last_week_start, this_week_start)
         
         increase = this_week_cost - last_week_cost
         increase_percent = (increase / last_week_cost * 100) if last_week_cost > 0 else 0
@@ -197,6 +169,21 @@ def analyze_openai_cost_trend():
         }
 
 
+@shared_task
+def rollup_openai_usage():
+    """
+    Move OpenAI usage events from the Redis stream into Postgres and rollups
+    """
+    from main import SessionLocal
+    from services import openai_usage
+    
+    db = SessionLocal()
+    try:
+        return {'stored': openai_usage.drain(db)}
+    finally:
+        db.close()
+
+
 def send_price_alerts(alerts):
     """
     Send email alerts to admin
@@ -30,6 +30,17 @@ def get_db_session():
     return _SessionLocal()
 
 
+def _invalidate_university(university_id: int):
+    """
+    Drop cached answers and indexes built from a university's old content.
+    
+    Call only after the new content and its embeddings are committed, or the
+    next question refills the cache from the old ones.
+    """
+    from services.answer_cache import answer_cache, university_tag
+    answer_cache.invalidate(university_tag(university_id))
+
+
 
 @celery_app.task(name="scrape_university")
 def scrape_university_task(university_id: int):
@@ -60,31 +71,35 @@ def scrape_university_task(university_id: int):
         
         if not result['success']:
             return result
-        
-        # Generate embeddings for scraped content
-        from tasks.models import UniversityContent
-        content_items = db.query(UniversityContent).filter_by(
-            university_id=university_id
-        ).all()
-        
-        content_ids = [item.id for item in content_items]
-        
-        if content_ids:
-            embedding_service = EmbeddingService()
-            embedding_result = asyncio.run(
-                embedding_service.batch_generate_embeddings(db, content_ids)
-            )
-            
-            # Update scraping status
-            status = db.query(UniversityScrapingStatus).filter_by(
+
+        try:
+            # Generate embeddings for scraped content
+            from tasks.models import UniversityContent
+            content_items = db.query(UniversityContent).filter_by(
                 university_id=university_id
-            ).first()
+            ).all()
             
-            if status:
-                status.embeddings_generated = embedding_result['success_count']
-                db.commit()
+            content_ids = [item.id for item in content_items]
             
-            result['embeddings'] = embedding_result
+            if content_ids:
+                embedding_service = EmbeddingService()
+                embedding_result = asyncio.run(
+                    embedding_service.batch_generate_embeddings(db, content_ids)
+                )
+                
+                # Update scraping status
+                status = db.query(UniversityScrapingStatus).filter_by(
+                    university_id=university_id
+                ).first()
+                
+                if status:
+                    status.embeddings_generated = embedding_result['success_count']
+                    db.commit()
+                
+                result['embeddings'] = embedding_result
+        finally:
+            # The content changed even if embedding generation failed
+            _invalidate_university(university_id)
         
         return result
         
@@ -193,6 +208,9 @@ def generate_embeddings_task(university_id: int):
             embedding_service.batch_generate_embeddings(db, content_ids)
         )
         
+        # Embeddings are committed one by one; answers cached before used the old ones
+        _invalidate_university(university_id)
+        
         return result
         
     except Exception as e:
@@ -1,5 +1,8 @@
 """Test configuration and fixtures."""
 
+import threading
+import time
+
 import pytest
 
 
@@ -12,3 +15,275 @@ def test_config():
         "test_user_email": "test@example.com",
         "test_user_password": "testpassword123"
     }
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the Redis commands the services use.
+
+    Strings are stored as bytes and returned as bytes, like a client with
+    decode_responses=False; hashes, lists, sets and sorted sets live in
+    the same keyspace. Expiry is not simulated.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def _bytes(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    # Strings
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, ex=None, px=None):
+        with self.lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = self._bytes(value)
+            return True
+
+    def setex(self, key, ttl, value):
+        self.data[key] = self._bytes(value)
+        return True
+
+    def delete(self, *keys):
+        with self.lock:
+            return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def expire(self, key, seconds):
+        return int(key in self.data)
+
+    def incr(self, key, amount=1):
+        with self.lock:
+            value = int(self.data.get(key, 0)) + amount
+            self.data[key] = self._bytes(value)
+            return value
+
+    def eval(self, script, numkeys, key, token):
+        # Only the compare-and-delete lock release script is supported
+        with self.lock:
+            if self.data.get(key) == self._bytes(token):
+                del self.data[key]
+                return 1
+            return 0
+
+    # Hashes
+
+    def hincrbyfloat(self, key, field, amount):
+        with self.lock:
+            values = self.data.setdefault(key, {})
+            value = float(values.get(self._bytes(field), 0)) + amount
+            values[self._bytes(field)] = self._bytes(value)
+            return value
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        with self.lock:
+            values = self.data.setdefault(key, {})
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            values.update({self._bytes(name): self._bytes(item) for name, item in items.items()})
+            return len(items)
+
+    def hsetnx(self, key, field, value):
+        with self.lock:
+            values = self.data.setdefault(key, {})
+            if self._bytes(field) in values:
+                return 0
+            values[self._bytes(field)] = self._bytes(value)
+            return 1
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(self._bytes(field))
+
+    def hdel(self, key, *fields):
+        with self.lock:
+            values = self.data.get(key, {})
+            return sum(values.pop(self._bytes(field), None) is not None for field in fields)
+
+    def hkeys(self, key):
+        return list(self.data.get(key, {}))
+
+    def hlen(self, key):
+        return len(self.data.get(key, {}))
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    # Lists
+
+    def rpush(self, key, *values):
+        with self.lock:
+            items = self.data.setdefault(key, [])
+            items.extend(self._bytes(value) for value in values)
+            return len(items)
+
+    def lrange(self, key, start, end):
+        return list(self.data.get(key, [])[start:None if end == -1 else end + 1])
+
+    def llen(self, key):
+        return len(self.data.get(key, []))
+
+    # Sets
+
+    def sadd(self, key, *members):
+        with self.lock:
+            values = self.data.setdefault(key, set())
+            added = {self._bytes(member) for member in members} - values
+            values.update(added)
+            return len(added)
+
+    def spop(self, key, count=None):
+        with self.lock:
+            values = self.data.get(key, set())
+            popped = [values.pop() for _ in range(min(count or 1, len(values)))]
+            return popped if count is not None else (popped[0] if popped else None)
+
+    # Sorted sets
+
+    def zadd(self, key, mapping):
+        with self.lock:
+            self.data.setdefault(key, {}).update({self._bytes(member): score for member, score in mapping.items()})
+            return len(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        with self.lock:
+            members = self.data.get(key, {})
+            removed = [member for member, score in members.items() if float(low) <= score <= float(high)]
+            for member in removed:
+                del members[member]
+            return len(removed)
+
+    def zrange(self, key, start, end):
+        members = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        return [member for member, _ in members[start:None if end == -1 else end + 1]]
+
+    # Streams (groups track each pending entry's consumer and delivery time)
+
+    @staticmethod
+    def _stream_id(entry_id):
+        return tuple(int(part) for part in FakeRedis._bytes(entry_id).split(b"-"))
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        with self.lock:
+            stream = self.data.setdefault(key, {"entries": {}, "groups": {}, "seq": 0})
+            stream["seq"] += 1
+            entry_id = f"{int(time.time() * 1000)}-{stream['seq']}".encode()
+            stream["entries"][entry_id] = {self._bytes(name): self._bytes(value) for name, value in fields.items()}
+            return entry_id
+
+    def xgroup_create(self, key, group, id="0", mkstream=False):
+        with self.lock:
+            stream = self.data.setdefault(key, {"entries": {}, "groups": {}, "seq": 0})
+            if group in stream["groups"]:
+                raise Exception("BUSYGROUP Consumer Group name already exists")
+            stream["groups"][group] = {"last": (0, 0), "pending": {}}
+            return True
+
+    def xreadgroup(self, group, consumer, streams, count=None):
+        with self.lock:
+            (key, start), = streams.items()
+            stream = self.data[key]
+            state = stream["groups"][group]
+            if start == ">":
+                ids = [entry_id for entry_id in stream["entries"] if self._stream_id(entry_id) > state["last"]]
+                ids = sorted(ids, key=self._stream_id)[:count]
+                for entry_id in ids:
+                    state["pending"][entry_id] = (consumer, time.time())
+                    state["last"] = self._stream_id(entry_id)
+            else:
+                ids = sorted(
+                    (entry_id for entry_id, (owner, _) in state["pending"].items()
+                     if owner == consumer and self._stream_id(entry_id) > self._stream_id(start)),
+                    key=self._stream_id
+                )[:count]
+            if not ids:
+                return []
+            return [[key, [(entry_id, stream["entries"].get(entry_id)) for entry_id in ids]]]
+
+    def xautoclaim(self, key, group, consumer, min_idle_time, start_id="0-0", count=100):
+        with self.lock:
+            stream = self.data[key]
+            state = stream["groups"][group]
+            now = time.time()
+            ids = sorted(
+                (entry_id for entry_id, (_, delivered) in state["pending"].items()
+                 if self._stream_id(entry_id) >= self._stream_id(start_id)
+                 and (now - delivered) * 1000 >= min_idle_time),
+                key=self._stream_id
+            )
+            claimed, rest = ids[:count], ids[count:]
+            for entry_id in claimed:
+                state["pending"][entry_id] = (consumer, now)
+            entries = [(entry_id, stream["entries"][entry_id]) for entry_id in claimed if entry_id in stream["entries"]]
+            deleted = [entry_id for entry_id in claimed if entry_id not in stream["entries"]]
+            for entry_id in deleted:
+                del state["pending"][entry_id]
+            return [rest[0] if rest else b"0-0", entries, deleted]
+
+    def xack(self, key, group, *ids):
+        with self.lock:
+            pending = self.data[key]["groups"][group]["pending"]
+            return sum(pending.pop(self._bytes(entry_id), None) is not None for entry_id in ids)
+
+    def xdel(self, key, *ids):
+        with self.lock:
+            entries = self.data[key]["entries"]
+            return sum(entries.pop(self._bytes(entry_id), None) is not None for entry_id in ids)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them on execute(), returning their results"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.calls.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        with self.redis.lock:
+            return [method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+class UnreachableRedis:
+    """Redis that is down: every command raises ConnectionError"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("Redis unavailable")
+        return fail
+
+
+@pytest.fixture
+def fake_redis():
+    """Empty in-memory Redis"""
+    return FakeRedis()
+
+
+@pytest.fixture
+def unreachable_redis():
+    """Redis client whose every command fails"""
+    return UnreachableRedis()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the semantic answer cache
+Tests lookup, store and tag staleness, agency change tracking and
+the jobs chat cache scope, using fake Redis and a fake embedder
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services.answer_cache import AnswerCache, agencies_tag, answer_cache, invalidate_on_agency_change
+from services.cache_service import cache
+
+Base = declarative_base()
+
+
+class Agency(Base):
+    """Minimal agency table (city and country, like JobAgency)"""
+    __tablename__ = "agencies"
+    id = Column(Integer, primary_key=True)
+    city = Column(String(100), nullable=False)
+    country_code = Column(String(2), nullable=False)
+
+
+invalidate_on_agency_change(Agency, "jobs")
+
+
+class FakeEmbedder:
+    """Embedding service mapping each question to a fixed vector"""
+
+    VECTORS = {
+        "brigady v bratislave": [1.0, 0.0, 0.0],
+        "brigady v bratislave?": [0.99, 0.05, 0.0],
+        "kolko stoji internat": [0.0, 1.0, 0.0],
+    }
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate_embedding(self, text):
+        self.calls.append(text)
+        return self.VECTORS.get(text, [0.0, 0.0, 1.0])
+
+
+@pytest.fixture
+def redis(fake_redis):
+    with patch.object(cache, "redis_client", fake_redis), patch.object(cache, "_tags", {}):
+        yield fake_redis
+
+
+@pytest.fixture
+def answers(redis):
+    """Answer cache with a fake embedder"""
+    answers = AnswerCache()
+    answers._embedding_service = FakeEmbedder()
+    return answers
+
+
+@pytest.mark.asyncio
+class TestAnswerCache:
+    """Test lookup, store and staleness"""
+
+    SCOPE = ("jobs_chat", "SK", "Bratislava", "sk")
+
+    async def test_similar_question_hit(self, answers):
+        """Test that a paraphrase in the same scope is answered from cache"""
+        answer, embedding = await answers.lookup(self.SCOPE, "brigady v bratislave")
+        assert answer is None
+        answers.store(self.SCOPE, "brigady v bratislave", "Try Grafton.", embedding)
+
+        answer, _ = await answers.lookup(self.SCOPE, "brigady v bratislave?")
+
+        assert answer == "Try Grafton."
+
+    async def test_other_question_or_scope_miss(self, answers):
+        """Test that a different question or scope is not answered"""
+        _, embedding = await answers.lookup(self.SCOPE, "brigady v bratislave")
+        answers.store(self.SCOPE, "brigady v bratislave", "Try Grafton.", embedding)
+
+        assert (await answers.lookup(self.SCOPE, "kolko stoji internat"))[0] is None
+        assert (await answers.lookup(("jobs_chat", "SK", "Bratislava", "en"), "brigady v bratislave"))[0] is None
+
+    async def test_invalidated_tag_stale(self, answers, redis):
+        """Test that invalidating a tag the answer was stored under drops it"""
+        tag = agencies_tag("jobs", "SK", "Bratislava")
+        _, embedding = await answers.lookup(self.SCOPE, "brigady v bratislave")
+        answers.store(self.SCOPE, "brigady v bratislave", "Try Grafton.", embedding, tags=[tag])
+
+        answers.invalidate(tag)
+        answer, _ = await answers.lookup(self.SCOPE, "brigady v bratislave")
+
+        assert answer is None
+        assert redis.hlen(f"{answers._scope_key(self.SCOPE)}:answers") == 0
+
+    async def test_expired_stale(self, answers):
+        """Test that an entry past its TTL is not served"""
+        _, embedding = await answers.lookup(self.SCOPE, "brigady v bratislave")
+        answers.store(self.SCOPE, "brigady v bratislave", "Try Grafton.", embedding)
+
+        with patch("services.answer_cache.time.time", return_value=time.time() + answers.ttl + 1):
+            answer, _ = await answers.lookup(self.SCOPE, "brigady v bratislave")
+
+        assert answer is None
+
+
+class TestAgencyChanges:
+    """Test that committed agency writes invalidate their city's tag"""
+
+    @pytest.fixture
+    def session(self, redis):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    def _versions(self, *cities):
+        return cache.tag_versions([agencies_tag("jobs", "SK", city) for city in cities])
+
+    def test_tag_format(self):
+        """Test that the tag ignores city case and padding"""
+        assert agencies_tag("jobs", "sk", " Bratislava ") == agencies_tag("jobs", "SK", "bratislava")
+
+    def test_insert_invalidates_on_commit(self, session):
+        """Test that the tag is bumped when the insert commits, not when it flushes"""
+        session.add(Agency(city="Bratislava", country_code="SK"))
+        session.flush()
+        assert self._versions("Bratislava") == {agencies_tag("jobs", "SK", "Bratislava"): 0}
+
+        session.commit()
+
+        assert self._versions("Bratislava") == {agencies_tag("jobs", "SK", "Bratislava"): 1}
+
+    def test_move_invalidates_both_cities(self, session):
+        """Test that moving an agency invalidates its old and new city"""
+        agency = Agency(city="Bratislava", country_code="SK")
+        session.add(agency)
+        session.commit()
+
+        agency.city = "Košice"
+        session.commit()
+
+        assert list(self._versions("Bratislava", "Košice").values()) == [2, 1]
+
+    def test_rollback_discards(self, session):
+        """Test that a rolled back write invalidates nothing"""
+        session.add(Agency(city="Nitra", country_code="SK"))
+        session.flush()
+        session.rollback()
+        session.commit()
+
+        assert list(self._versions("Nitra").values()) == [0]
+
+
+@pytest.mark.asyncio
+class TestJobsChatCache:
+    """Test how the jobs chat uses the answer cache"""
+
+    @pytest.fixture
+    def service(self, redis):
+        from services.jobs_chat_service import JobsChatService
+
+        service = JobsChatService()
+        service.calls = []
+
+        async def create(**kwargs):
+            service.calls.append(kwargs)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=f"Answer {len(service.calls)}"))],
+                usage=None
+            )
+
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        service._get_agencies_context = lambda db, city, country_code: f"Agencies in {city}"
+        with patch.object(answer_cache, "_embedding_service", FakeEmbedder()), \
+                patch.object(answer_cache, "_mirror", {}), \
+                patch("services.jobs_chat_service.openai_usage.record"):
+            yield service
+
+    async def test_shared_across_users(self, service):
+        """Test that the answer is cached per city, not per user"""
+        first = await service.chat("brigady v bratislave", [], "Peter", db=object(), city="Bratislava")
+        second = await service.chat("brigady v bratislave", [], "Jana", db=object(), city="Bratislava")
+
+        assert first == second == "Answer 1"
+        assert len(service.calls) == 1
+
+    async def test_agency_change_refreshes_answer(self, service):
+        """Test that changing the city's agencies invalidates the cached answer"""
+        await service.chat("brigady v bratislave", [], "Peter", db=object(), city="Bratislava")
+
+        answer_cache.invalidate(agencies_tag("jobs", "SK", "Bratislava"))
+        answer = await service.chat("brigady v bratislave", [], "Peter", db=object(), city="Bratislava")
+
+        assert answer == "Answer 2"
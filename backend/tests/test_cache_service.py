@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the two-tier cache
+Tests single-flight recomputation across threads, tasks and workers and
+tag-version invalidation against an in-memory Redis
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services import cache_service
+from services.cache_service import CacheService
+
+
+def make_cache(redis):
+    service = CacheService(redis_url="redis://localhost:6379/0")
+    service.redis_client = redis
+    return service
+
+
+@pytest.fixture
+def cache(fake_redis):
+    return make_cache(fake_redis)
+
+
+class SlowCompute:
+    """Compute function that counts its calls"""
+
+    def __init__(self, value="value", delay=0.05, error=None):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.value
+
+    async def run(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+class TestGetOrSet:
+    """Test computing and storing values on a miss"""
+
+    def test_cached_after_compute(self, cache, fake_redis):
+        """Test that a computed value is stored in both tiers"""
+        compute = SlowCompute(delay=0)
+
+        assert cache.get_or_set("key", compute) == "value"
+        assert cache.get_or_set("key", compute) == "value"
+        assert compute.calls == 1
+        assert cache.prefix + "key" in fake_redis.data
+
+    def test_served_to_other_worker(self, cache, fake_redis):
+        """Test that another worker reads the value from Redis"""
+        cache.get_or_set("key", SlowCompute(delay=0))
+        compute = SlowCompute(delay=0)
+
+        assert make_cache(fake_redis).get_or_set("key", compute) == "value"
+        assert compute.calls == 0
+
+    def test_structured_values(self, cache):
+        """Test that dicts and lists survive serialization"""
+        value = {"name": "Univerzita Komenského", "faculties": [1, 2, 3]}
+
+        cache.get_or_set("key", lambda: value)
+
+        assert make_cache(cache.redis_client).get("key") == value
+
+
+class TestSingleFlight:
+    """Test that only one caller recomputes an expired key"""
+
+    def test_threads(self, cache):
+        """Test that concurrent threads of one process share a compute"""
+        compute = SlowCompute()
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_set("key", compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert compute.calls == 1
+        assert results == ["value"] * 8
+
+    @pytest.mark.asyncio
+    async def test_tasks(self, cache):
+        """Test that concurrent tasks share a compute"""
+        compute = SlowCompute()
+
+        results = await asyncio.gather(*[cache.aget_or_set("key", compute.run) for _ in range(8)])
+
+        assert compute.calls == 1
+        assert results == ["value"] * 8
+        assert cache._async_flights == {}
+
+    def test_waits_for_other_worker(self, cache, fake_redis):
+        """Test that a worker waits for the one holding the lock instead of computing"""
+        other = make_cache(fake_redis)
+        assert other._acquire("key", "other-token")
+
+        def finish():
+            time.sleep(0.1)
+            other.set("key", "from other worker")
+            other._release("key", "other-token")
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+        compute = SlowCompute(delay=0)
+
+        assert cache.get_or_set("key", compute) == "from other worker"
+        thread.join()
+        assert compute.calls == 0
+
+    def test_lock_released(self, cache, fake_redis):
+        """Test that the lock is released after computing"""
+        cache.get_or_set("key", SlowCompute(delay=0))
+
+        assert not any(key.startswith(cache.prefix + "lock:") for key in fake_redis.data)
+
+    def test_error_releases_lock(self, cache, fake_redis):
+        """Test that a failed compute propagates, stores nothing and frees the lock"""
+        with pytest.raises(RuntimeError):
+            cache.get_or_set("key", SlowCompute(delay=0, error=RuntimeError("database down")))
+
+        assert fake_redis.data == {}
+        assert cache._flights == {}
+        assert cache.get_or_set("key", SlowCompute(delay=0)) == "value"
+
+    def test_redis_down(self, unreachable_redis):
+        """Test that values are still computed when Redis is unavailable"""
+        cache = make_cache(unreachable_redis)
+        compute = SlowCompute(delay=0)
+
+        assert cache.get_or_set("key", compute) == "value"
+        assert cache.get_or_set("key", compute) == "value"
+        assert compute.calls == 1  # served from L1
+
+
+class TestTagVersioning:
+    """Test invalidation by tag version"""
+
+    def test_invalidate_in_same_worker(self, cache):
+        """Test that invalidating a tag makes its entries stale immediately"""
+        cache.set("universities:SK", ["UK"], tags=["universities", "universities:SK"])
+
+        assert cache.invalidate_tags("universities:SK")
+        assert cache.get("universities:SK") is None
+
+    def test_other_tags_unaffected(self, cache):
+        """Test that entries under other tags or no tags stay valid"""
+        cache.set("universities:SK", ["UK"], tags=["universities:SK"])
+        cache.set("universities:CZ", ["CUNI"], tags=["universities:CZ"])
+        cache.set("plain", 1)
+
+        cache.invalidate_tags("universities:SK")
+
+        assert cache.get("universities:CZ") == ["CUNI"]
+        assert cache.get("plain") == 1
+
+    def test_versions_counted(self, cache, fake_redis):
+        """Test that each invalidation is one INCR and nothing is deleted"""
+        cache.set("key", 1, tags=["tag"])
+        keys = set(fake_redis.data)
+
+        cache.invalidate_tags("tag")
+        cache.invalidate_tags("tag")
+
+        assert cache.tag_versions(["tag", "never"]) == {"tag": 2, "never": 0}
+        assert keys <= set(fake_redis.data)
+
+    def test_other_worker_after_ttl(self, cache, fake_redis, monkeypatch):
+        """Test that other workers see an invalidation once their tag copy expires"""
+        other = make_cache(fake_redis)
+        cache.set("key", "old", tags=["tag"])
+        assert other.get("key") == "old"
+
+        cache.invalidate_tags("tag")
+        assert other.get("key") == "old"  # within TAG_VERSION_TTL
+
+        monkeypatch.setattr(cache_service, "TAG_VERSION_TTL", 0)
+        other._tags.clear()
+        assert other.get("key") is None
+
+    def test_invalidation_during_compute(self, cache):
+        """Test that a value computed across an invalidation is stored already stale"""
+        def compute():
+            cache.invalidate_tags("tag")
+            return "computed before the change"
+
+        assert cache.get_or_set("key", compute, tags=["tag"]) == "computed before the change"
+        assert cache.get("key") is None
+
+    def test_invalidate_without_redis(self, cache, unreachable_redis):
+        """Test that a failed invalidation drops this worker's copies"""
+        cache.set("key", 1, tags=["tag"])
+        cache.redis_client = unreachable_redis
+
+        assert not cache.invalidate_tags("tag")
+        assert cache.get("key") is None
+        assert len(cache.l1) == 0
+
+    def test_cached_decorator_tags(self, cache, monkeypatch):
+        """Test that @cached stores entries under tags computed from the arguments"""
+        monkeypatch.setattr(cache_service, "cache", cache)
+        calls = []
+
+        @cache_service.cached(ttl=60, tags=lambda country, **_: [f"universities:{country}"])
+        def get_universities(db, country):
+            calls.append(country)
+            return [country]
+
+        get_universities(None, "SK")
+        get_universities(None, "CZ")
+        cache.invalidate_tags("universities:SK")
+        get_universities(None, "SK")
+        get_universities(None, "CZ")
+
+        assert calls == ["SK", "CZ", "SK"]
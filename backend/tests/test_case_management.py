@@ -396,7 +396,7 @@ class TestDocumentManagement:
         # Mock file upload
         files = {"file": ("test.pdf", b"fake pdf content", "application/pdf")}
         
-        with patch('services.doc_processor.storage.MinIOStorage.upload_file'):
+        with patch('services.doc_processor.storage.MinIOStorage.upload_stream'):
             response = client.post(
                 f"/api/cases/{case_id}/documents",
                 files=files,
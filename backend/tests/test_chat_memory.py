@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for server-side chat memory
+Tests session history, persistence to Postgres, rehydration after the
+session expired from Redis, and which turns the chat endpoint stores
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi import BackgroundTasks
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from services.cache_service import cache
+from services.chat_memory import ChatMemory, _key
+
+
+@pytest.fixture
+def redis(fake_redis):
+    with patch.object(cache, "redis_client", fake_redis):
+        yield fake_redis
+
+
+@pytest.fixture
+def db():
+    """Session on fresh chat session and message tables"""
+    from main import UniversityChatMessage, UniversityChatSession
+
+    engine = create_engine("sqlite://")
+    UniversityChatSession.__table__.create(bind=engine)
+    UniversityChatMessage.__table__.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def memory(redis):
+    return ChatMemory()
+
+
+def _expire(redis, session_id):
+    """Drop a session from Redis, as its TTL would"""
+    redis.delete(_key(session_id, "meta"), _key(session_id, "turns"))
+
+
+class TestHistory:
+    """Test reading and appending turns"""
+
+    def test_append_then_history(self, memory, db):
+        """Test that appended turns come back in order"""
+        memory.append("s1", 7, [("user", "Fees?"), ("assistant", "Free.")])
+        memory.append("s1", 7, [("user", "Dorms?"), ("assistant", "100 EUR.")])
+
+        history = memory.history(db, "s1", 7)
+
+        assert history == {
+            "summary": None,
+            "messages": [
+                {"role": "user", "content": "Fees?"},
+                {"role": "assistant", "content": "Free."},
+                {"role": "user", "content": "Dorms?"},
+                {"role": "assistant", "content": "100 EUR."},
+            ]
+        }
+
+    def test_unknown_or_foreign_session(self, memory, db):
+        """Test that unknown sessions and other universities' sessions are not returned"""
+        memory.append("s1", 7, [("user", "Fees?")])
+
+        assert memory.history(db, "missing", 7) is None
+        assert memory.history(db, "s1", 8) is None
+
+    def test_summary_replaces_old_turns(self, memory, db, redis):
+        """Test that turns covered by the summary are left out of the history"""
+        memory.append("s1", 7, [("user", "Fees?"), ("assistant", "Free."), ("user", "Dorms?")])
+        redis.hset(_key("s1", "meta"), mapping={"summary": "Asked about fees.", "summarized": "2"})
+
+        history = memory.history(db, "s1", 7)
+
+        assert history["summary"] == "Asked about fees."
+        assert history["messages"] == [{"role": "user", "content": "Dorms?"}]
+
+    def test_redis_down(self, db, unreachable_redis):
+        """Test that an unavailable Redis reads as no history and drops writes quietly"""
+        memory = ChatMemory()
+        with patch.object(cache, "redis_client", unreachable_redis):
+            memory.append("s1", 7, [("user", "Fees?")])
+            assert memory.history(db, "s1", 7) is None
+
+
+class TestPersist:
+    """Test writing sessions to Postgres and loading them back"""
+
+    def test_new_turns_appended(self, memory, db):
+        """Test that each persist stores only the turns not stored yet"""
+        from main import UniversityChatMessage, UniversityChatSession
+
+        memory.append("s1", 7, [("user", "Fees?"), ("assistant", "Free.")])
+        assert memory.persist(db) == 1
+        assert memory.persist(db) == 0  # Nothing changed since
+
+        memory.append("s1", 7, [("user", "Dorms?"), ("assistant", "100 EUR.")])
+        assert memory.persist(db) == 1
+
+        row = db.query(UniversityChatSession).filter_by(session_id="s1").one()
+        messages = db.query(UniversityChatMessage).filter_by(chat_session_id=row.id).order_by(UniversityChatMessage.seq).all()
+        assert row.university_id == 7
+        assert [(message.seq, message.content) for message in messages] == [
+            (0, "Fees?"), (1, "Free."), (2, "Dorms?"), (3, "100 EUR.")
+        ]
+
+    def test_rehydrated_after_expiry(self, memory, db, redis):
+        """Test that a session gone from Redis is reloaded from Postgres with its summary"""
+        memory.append("s1", 7, [("user", "Fees?"), ("assistant", "Free."), ("user", "Dorms?")])
+        redis.hset(_key("s1", "meta"), mapping={"summary": "Asked about fees.", "summarized": "2"})
+        memory.persist(db)
+        _expire(redis, "s1")
+
+        history = memory.history(db, "s1", 7)
+
+        assert history == {"summary": "Asked about fees.", "messages": [{"role": "user", "content": "Dorms?"}]}
+        assert [turn["content"] for turn in memory.transcript(db, "s1", 7)["messages"]] == ["Fees?", "Free.", "Dorms?"]
+
+    def test_rehydrated_session_keeps_growing(self, memory, db, redis):
+        """Test that turns added after rehydration persist after the old ones"""
+        from main import UniversityChatMessage
+
+        memory.append("s1", 7, [("user", "Fees?"), ("assistant", "Free.")])
+        memory.persist(db)
+        _expire(redis, "s1")
+
+        memory.history(db, "s1", 7)
+        memory.append("s1", 7, [("user", "Dorms?")])
+        memory.persist(db)
+
+        assert [message.seq for message in db.query(UniversityChatMessage).all()] == [0, 1, 2]
+
+    def test_expired_before_persist_skipped(self, memory, db, redis):
+        """Test that a dirty session that already expired is skipped"""
+        memory.append("s1", 7, [("user", "Fees?")])
+        _expire(redis, "s1")
+
+        assert memory.persist(db) == 0
+
+
+@pytest.mark.asyncio
+class TestChatEndpoint:
+    """Test which turns the university chat endpoint stores"""
+
+    @pytest.fixture
+    def endpoint(self, redis):
+        from api import university_chat
+
+        db = Mock()
+        db.query.return_value.filter_by.return_value.first.return_value = SimpleNamespace(
+            name="Test University", website_url="https://test.edu", description="A test university"
+        )
+        request = university_chat.UniversityChatRequest(message="Fees?", language="en")
+
+        async def call(chat_service):
+            background_tasks = BackgroundTasks()
+            with patch.object(university_chat, "chat_memory", ChatMemory()):
+                response = await university_chat.chat_with_university(7, request, background_tasks, db, chat_service)
+            return response, background_tasks
+        return call
+
+    async def test_answer_stored(self, endpoint, redis):
+        """Test that a generated answer is stored with the question"""
+        response, background_tasks = await endpoint(Mock(chat=AsyncMock(return_value="Free.")))
+
+        assert response.response == "Free."
+        assert redis.llen(_key(response.session_id, "turns")) == 2
+        assert len(background_tasks.tasks) == 1
+
+    async def test_failure_not_stored(self, endpoint, redis):
+        """Test that a failed completion stores nothing and schedules no summary"""
+        from services.university_chat_service import UniversityChatService
+
+        chat_service = UniversityChatService()
+        chat_service.client = Mock()
+        chat_service.client.chat.completions.create = AsyncMock(side_effect=Exception("OpenAI down"))
+        rag_service = Mock(
+            search_any_language_content=AsyncMock(return_value=[{"content": "Tuition is free. " * 10}]),
+            format_context_for_prompt=Mock(return_value="Tuition is free. " * 10)
+        )
+        with patch("services.rag_service.RAGService", return_value=rag_service), \
+                patch("services.university_chat_service.answer_cache.lookup", AsyncMock(return_value=(None, None))), \
+                patch("services.university_chat_service.openai_usage.record"):
+            response, background_tasks = await endpoint(chat_service)
+
+        assert "error" in response.response
+        assert redis.llen(_key(response.session_id, "turns")) == 0
+        assert background_tasks.tasks == []
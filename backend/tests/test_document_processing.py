@@ -6,14 +6,21 @@ Tests for OCR, Classification, and Field Extraction.
 
 import pytest
 import os
+import hashlib
+from io import BytesIO
 from pathlib import Path
 from datetime import datetime
+from unittest.mock import patch
 
 from services.doc_processor import (
     perform_ocr,
     classify_document,
     extract_document_fields,
     DocumentType,
+    DocumentClassificationModel,
+    get_storage,
+    FieldExtractor,
+    FieldType,
     MinIOStorage
 )
 
@@ -142,6 +149,36 @@ class TestClassification:
         result = classify_document(text)
         
         assert 0.0 <= result['confidence'] <= 1.0
+    
+    def test_overlapping_keywords_counted(self):
+        """Test that nested keywords are counted like separate scans."""
+        model = DocumentClassificationModel()
+        text = "Zmluva o dielo. Objednávateľ diela prevezme dielo."
+        
+        explanation = model.get_classification_explanation(
+            text, {'document_type': DocumentType.WORK_CONTRACT}
+        )
+        counts = {k['keyword']: k['count'] for k in explanation['matched_keywords']}
+        
+        assert counts['zmluva o dielo'] == 1
+        assert counts['dielo'] == 2
+        assert counts['objednávateľ diela'] == 1
+    
+    def test_batch_classify_matches_single(self):
+        """Test that vectorized batch results match single classification."""
+        model = DocumentClassificationModel()
+        texts = [
+            "FAKTÚRA Dodávateľ Odberateľ Dátum splatnosti",
+            "NÁJOMNÁ ZMLUVA Prenajímateľ Nájomca Nájomné",
+            "",
+        ]
+        
+        batch = model.batch_classify(texts)
+        
+        for text, result in zip(texts, batch):
+            single = model.classify_document(text)
+            assert result['document_type'] == single['document_type']
+            assert result['confidence'] == pytest.approx(single['confidence'])
 
 
 class TestFieldExtraction:
@@ -253,6 +290,66 @@ class TestFieldExtraction:
         assert 'document_type' in fields['_metadata']
         assert 'extracted_at' in fields['_metadata']
         assert 'field_count' in fields['_metadata']
+    
+    def test_typed_field_values(self):
+        """Test that scanned fields carry typed values."""
+        extractor = FieldExtractor()
+        found = extractor.scan("Dátum: 15.12.2024, Suma: 1 500,00 Kč")
+        
+        date_field = found['date'][0]
+        assert date_field.field_type == FieldType.DATE
+        assert date_field.typed_value.isoformat() == '2024-12-15'
+        
+        amount_field = found['amount'][0]
+        assert amount_field.field_type == FieldType.AMOUNT
+        assert amount_field.typed_value == 1500.0
+        assert amount_field.currency == 'CZK'
+    
+    def test_streamed_pages_match_full_text(self):
+        """Test that page-by-page extraction matches one-shot extraction."""
+        extractor = FieldExtractor()
+        pages = [
+            "FAKTÚRA č. FA-123/2024\nDátum vystavenia: 15.12.2024",
+            "Dodávateľ: XYZ s.r.o., IČO: 87654321\nCelkom: 1500.00 EUR",
+        ]
+        
+        full = extractor.scan('\n\n'.join(pages))
+        streamed = extractor.scan_pages(
+            {'page_number': i + 1, 'text': text} for i, text in enumerate(pages)
+        )
+        
+        for kind, fields in full.items():
+            assert [f.value for f in streamed[kind]] == [f.value for f in fields]
+        assert streamed['ico'][0].page == 2
+    
+    def test_overlapping_kinds_independent(self):
+        """Test that one kind does not consume text another kind needs."""
+        extractor = FieldExtractor()
+        
+        contact = extractor.extract_contact_info("Kontakt: phone number 0905 123 456")
+        assert contact['phone'].endswith('123 456')
+        
+        identifiers = extractor.extract_identifiers("Faktúra č. 2024001")
+        assert identifiers['contract_number'] == '2024001'
+        assert extractor.scan("Faktúra č. 2024001")['invoice_number'][0].value == '2024001'
+    
+    def test_streamed_fields_in_document_order(self):
+        """Test that fields held back at a page break do not reorder output."""
+        extractor = FieldExtractor()
+        filler = "Text zmluvy bez údajov. " * 20
+        # The amount ends in the held-back tail of page 1; the phone number
+        # inside it ends before the tail and must wait for it
+        pages = [
+            "Dátum: 15.12.2024. " + filler + "Suma: 5 111 222 333" + " 4" * 60 + " EUR. " + filler,
+            "IČO: 12345678",
+        ]
+        
+        fields = list(extractor.iter_fields(pages))
+        
+        assert [f.kind for f in fields] == ['date', 'amount', 'phone', 'ico']
+        assert [f.position for f in fields] == sorted(f.position for f in fields)
+        assert fields[1].currency == 'EUR'
+        assert fields[3].page == 2
 
 
 class TestMinIOStorage:
@@ -281,6 +378,119 @@ class TestMinIOStorage:
         """Test generating presigned URL."""
         # This would require actual MinIO connection
         pytest.skip("Requires MinIO connection")
+    
+    def test_upload_stream_multipart(self):
+        """Test streamed upload hashes and counts bytes while MinIO reads."""
+        data = b"x" * (3 * 1024 * 1024 + 17)
+        
+        with patch('services.doc_processor.storage.Minio') as minio_cls:
+            client = minio_cls.return_value
+            
+            def put_object(bucket, object_name, reader, length, part_size, **kwargs):
+                while reader.read(part_size):
+                    pass
+                return type('Result', (), {'etag': 'etag-1'})()
+            
+            client.put_object.side_effect = put_object
+            storage = MinIOStorage()
+            result = storage.upload_stream(storage.BUCKET_RAW, BytesIO(data), "scan.pdf")
+        
+        kwargs = client.put_object.call_args.kwargs
+        assert kwargs['length'] == -1
+        assert kwargs['part_size'] == MinIOStorage.PART_SIZE
+        assert kwargs['content_type'] == 'application/pdf'
+        assert result['size'] == len(data)
+        assert result['sha256'] == hashlib.sha256(data).hexdigest()
+        assert result['etag'] == 'etag-1'
+    
+    def test_presigned_upload_plan(self):
+        """Test single PUT for small files and multipart plan for large ones."""
+        with patch('services.doc_processor.storage.Minio') as minio_cls:
+            client = minio_cls.return_value
+            client.bucket_exists.return_value = True
+            client.presigned_put_object.return_value = 'https://minio/put'
+            client.get_presigned_url.return_value = 'https://minio/part'
+            client._create_multipart_upload.return_value = 'upload-1'
+            storage = MinIOStorage()
+            
+            small = storage.create_presigned_upload(storage.BUCKET_RAW, "a.pdf", 1024)
+            large_size = MinIOStorage.MULTIPART_THRESHOLD + 1
+            large = storage.create_presigned_upload(storage.BUCKET_RAW, "b.pdf", large_size)
+        
+        assert small['multipart'] is False
+        assert small['url'] == 'https://minio/put'
+        
+        assert large['multipart'] is True
+        assert large['upload_id'] == 'upload-1'
+        assert len(large['parts']) * large['part_size'] >= large_size
+        assert large['parts'][0]['part_number'] == 1
+    
+    def test_complete_multipart_upload(self):
+        """Test that every listed page of parts is completed in part order."""
+        from types import SimpleNamespace
+        
+        pages = [
+            SimpleNamespace(
+                parts=[SimpleNamespace(part_number=2, etag='e2'), SimpleNamespace(part_number=1, etag='e1')],
+                is_truncated=True, next_part_number_marker='2'
+            ),
+            SimpleNamespace(
+                parts=[SimpleNamespace(part_number=3, etag='e3')],
+                is_truncated=False, next_part_number_marker=None
+            ),
+        ]
+        with patch('services.doc_processor.storage.Minio') as minio_cls:
+            client = minio_cls.return_value
+            client._list_parts.side_effect = pages
+            client.stat_object.return_value = SimpleNamespace(
+                size=30, etag='etag-1', content_type='application/pdf',
+                last_modified=datetime.now(), metadata={}
+            )
+            storage = MinIOStorage()
+        
+            storage.complete_presigned_upload(storage.BUCKET_RAW, "b.pdf", upload_id='upload-1')
+        
+        assert client._list_parts.call_args_list[1].kwargs['part_number_marker'] == '2'
+        bucket, object_name, upload_id, parts = client._complete_multipart_upload.call_args.args
+        assert [(part.part_number, part.etag) for part in parts] == [(1, 'e1'), (2, 'e2'), (3, 'e3')]
+
+    def test_abort_abandoned_uploads(self):
+        """Test that only multipart uploads older than the cutoff are aborted."""
+        from datetime import timedelta, timezone
+        from types import SimpleNamespace
+        
+        now = datetime.now(timezone.utc)
+        uploads = [
+            SimpleNamespace(object_name='old.pdf', upload_id='u-old', initiated_time=now - timedelta(hours=3)),
+            SimpleNamespace(object_name='new.pdf', upload_id='u-new', initiated_time=now - timedelta(minutes=5)),
+        ]
+        with patch('services.doc_processor.storage.Minio') as minio_cls:
+            client = minio_cls.return_value
+            client._list_multipart_uploads.return_value = SimpleNamespace(
+                uploads=uploads, is_truncated=False, next_key_marker=None
+            )
+            storage = MinIOStorage()
+        
+            aborted = storage.abort_abandoned_uploads(storage.BUCKET_RAW)
+        
+        assert aborted == 1
+        client._abort_multipart_upload.assert_called_once_with(storage.BUCKET_RAW, 'old.pdf', 'u-old')
+    
+    def test_buckets_checked_once(self):
+        """Test that the shared storage bootstraps buckets only once."""
+        with patch('services.doc_processor.storage.Minio') as minio_cls, \
+                patch('services.doc_processor.storage._storage', None):
+            client = minio_cls.return_value
+            client.bucket_exists.return_value = True
+            
+            storage = get_storage()
+            assert get_storage() is storage
+            assert client.bucket_exists.call_count == 0
+            
+            storage.upload_stream(storage.BUCKET_RAW, BytesIO(b"a"), "a.txt")
+            storage.upload_stream(storage.BUCKET_RAW, BytesIO(b"b"), "b.txt")
+        
+        assert client.bucket_exists.call_count == 4
 
 
 class TestIntegration:
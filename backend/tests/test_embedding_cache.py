@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the embedding cache
+Tests request coalescing, batch ordering and error propagation
+without Redis, using a fake embed coroutine
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from services.cache_service import cache
+from services.embedding_cache import EmbeddingCache, decode, encode
+
+
+class FakeEmbed:
+    """Embed coroutine returning [len(text), index] per text and recording calls"""
+
+    def __init__(self, delay=0.0, error=None):
+        self.calls = []
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [[float(len(text)), float(index)] for index, text in enumerate(texts)]
+
+
+@pytest.fixture
+def redis(fake_redis):
+    with patch.object(cache, "redis_client", fake_redis):
+        yield fake_redis
+
+
+@pytest.mark.asyncio
+class TestEmbeddingCache:
+    """Test the two-tier embedding cache"""
+
+    async def test_roundtrip_float32(self):
+        """Test that vectors survive float32 encoding"""
+        assert decode(encode([1.5, -2.0, 0.25])) == [1.5, -2.0, 0.25]
+
+    async def test_cached_after_first_call(self, redis):
+        """Test that a second request is served from cache"""
+        embedding_cache = EmbeddingCache()
+        embed = FakeEmbed()
+
+        first = await embedding_cache.get("model", "What is tuition?", embed)
+        second = await embedding_cache.get("model", "What  is\ttuition? ", embed)
+
+        assert first == second
+        assert len(embed.calls) == 1
+        assert len(redis.data) == 1
+
+    async def test_served_from_redis(self, redis):
+        """Test that another process's entry is read from Redis"""
+        embed = FakeEmbed()
+        await EmbeddingCache().get("model", "hello", embed)
+
+        assert await EmbeddingCache().get("model", "hello", embed) == [5.0, 0.0]
+        assert len(embed.calls) == 1
+
+    async def test_batch_miss_ordering(self, redis):
+        """Test that results follow the input order with mixed hits and misses"""
+        embedding_cache = EmbeddingCache()
+        await embedding_cache.get("model", "bb", FakeEmbed())
+        embed = FakeEmbed()
+
+        vectors = await embedding_cache.get_many("model", ["cccc", "bb", "a", "cccc"], embed)
+
+        assert embed.calls == [["cccc", "a"]]
+        assert [vector[0] for vector in vectors] == [4.0, 2.0, 1.0, 4.0]
+        assert vectors[0] == vectors[3]
+
+    async def test_coalescing(self, redis):
+        """Test that concurrent requests for one text share one embed call"""
+        embedding_cache = EmbeddingCache()
+        embed = FakeEmbed(delay=0.05)
+
+        results = await asyncio.gather(*[
+            embedding_cache.get("model", "same question", embed) for _ in range(5)
+        ])
+
+        assert len(embed.calls) == 1
+        assert all(result == results[0] for result in results)
+        assert embedding_cache._inflight == {}
+
+    async def test_error_propagates_to_waiters(self, redis):
+        """Test that an embed error reaches the caller and every waiting caller"""
+        embedding_cache = EmbeddingCache()
+        embed = FakeEmbed(delay=0.05, error=RuntimeError("rate limited"))
+
+        results = await asyncio.gather(
+            *[embedding_cache.get("model", "same question", embed) for _ in range(3)],
+            return_exceptions=True
+        )
+
+        assert len(embed.calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert redis.data == {}
+        assert embedding_cache._inflight == {}
+
+    async def test_retry_after_error(self, redis):
+        """Test that a failed text is embedded again on the next request"""
+        embedding_cache = EmbeddingCache()
+        with pytest.raises(RuntimeError):
+            await embedding_cache.get("model", "text", FakeEmbed(error=RuntimeError("boom")))
+
+        embed = FakeEmbed()
+        assert await embedding_cache.get("model", "text", embed) == [4.0, 0.0]
+        assert len(embed.calls) == 1
+
+    async def test_redis_down(self, unreachable_redis):
+        """Test that embeddings are still returned and cached in process when Redis is down"""
+        embedding_cache = EmbeddingCache()
+        embed = FakeEmbed()
+        with patch.object(cache, "redis_client", unreachable_redis):
+            await embedding_cache.get("model", "text", embed)
+            assert await embedding_cache.get("model", "text", embed) == [4.0, 0.0]
+
+        assert len(embed.calls) == 1
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the shared language detector
+Tests the marker-letter fast path, short texts and frontend overrides
+"""
+
+import pytest
+
+from services.housing_chat_service import HousingChatService
+from services.language_detection import detect_language
+
+
+class TestMarkerLetters:
+    """Test that marker letters decide only with enough support"""
+
+    def test_place_name_does_not_decide(self):
+        """Test that one marker letter in a name does not make a text Polish"""
+        assert detect_language("University of Wrocław") != "pl"
+        assert detect_language("Where is the dormitory in Łódź?") == "en"
+
+    def test_marker_share_decides(self):
+        """Test that frequent marker letters settle the language"""
+        assert detect_language("Cześć, jak się masz?") == "pl"
+        assert detect_language("Přijímací řízení na ČVUT") == "cs"
+
+    def test_marker_with_function_words(self):
+        """Test that a single marker counts when the function words agree"""
+        assert detect_language("Größe der Wohnung?") == "de"
+
+    def test_shared_letter_not_marker(self):
+        """Test that ô, used in Slovak and French, does not decide for Slovak"""
+        assert detect_language("Plutôt bientôt à côté du contrôle") == "fr"
+        assert detect_language("Môžem bývať na internáte?") == "sk"
+
+
+class TestShortTexts:
+    """Test that short texts fall back to the default"""
+
+    @pytest.mark.parametrize("text", ["Hello!", "Help", "Hi"])
+    def test_too_short_for_detector(self, text):
+        """Test that very short texts are not guessed statistically"""
+        assert detect_language(text, default=None) is None
+
+    def test_min_words_applies_to_statistical_guess(self):
+        """Test that min_words rejects detector guesses but not the fast path"""
+        assert detect_language("Prof. Müller-Schröder", default=None, min_words=4) is None
+        assert detect_language("Шукаю житло", default=None, min_words=4) == "uk"
+
+
+class TestHousingOverride:
+    """Test when a message overrides the frontend language"""
+
+    @pytest.mark.parametrize("message", ["Hello!", "Help", "University of Wrocław", "Prof. Müller-Schröder"])
+    def test_no_override(self, message):
+        """Test that greetings and names keep the frontend language"""
+        service = HousingChatService()
+        assert service._detect_message_language(message) is None
+
+    def test_override(self):
+        """Test that a real sentence in another language overrides it"""
+        service = HousingChatService()
+        assert service._detect_message_language("Ich suche eine Wohnung in Köln") == "de"
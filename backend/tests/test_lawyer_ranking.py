@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the lawyer ranking engine
+Tests the vectorized match score against the per-lawyer reference
+implementation and top-k selection against a full sort
+"""
+
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.lawyer_ranking import LawyerSnapshot, top_k
+from services.matching_service import _calculate_match_score
+
+CATEGORIES = ["civil_law", "criminal_law", "family_law", "labor_law"]
+
+
+def _lawyers(count, seed=7):
+    generator = random.Random(seed)
+    return [
+        SimpleNamespace(
+            id=lawyer_id,
+            average_rating=generator.choice([None, 0, 1.0, 2.5, 3.3, 4.2, 4.8, 5.0]),
+            hourly_rate=generator.choice([None, 5000, 8000, 12000]),
+            created_at=datetime(2026, 1, 1) + timedelta(days=generator.randint(0, 300)),
+            specializations=generator.sample(CATEGORIES, generator.randint(0, 2)) or generator.choice([None, []]),
+            jurisdictions=generator.sample(["SK", "CZ", "PL"], generator.randint(1, 2)),
+            languages=generator.sample(["sk", "en", "de"], generator.randint(1, 2)),
+            is_active=True,
+        )
+        for lawyer_id in generator.sample(range(1, 1000), count)
+    ]
+
+
+@pytest.fixture
+def lawyers():
+    return _lawyers(60)
+
+
+@pytest.fixture
+def snapshot(lawyers):
+    return LawyerSnapshot(lawyers)
+
+
+class TestScore:
+    """Test that the vectorized score matches _calculate_match_score"""
+
+    @pytest.mark.parametrize("category", CATEGORIES + ["tax_law"])
+    def test_matches_reference(self, lawyers, snapshot, category):
+        """Test every lawyer's score for a case category"""
+        case = SimpleNamespace(category=category)
+        by_id = {lawyer.id: lawyer for lawyer in lawyers}
+
+        expected = [_calculate_match_score(by_id[lawyer_id], case, "consultation") for lawyer_id in snapshot.ids]
+
+        assert snapshot.score(category).tolist() == expected
+
+    def test_case_without_category(self, lawyers, snapshot):
+        """Test that no category skips the specialization points"""
+        by_id = {lawyer.id: lawyer for lawyer in lawyers}
+
+        expected = [_calculate_match_score(by_id[lawyer_id], object(), "consultation") for lawyer_id in snapshot.ids]
+
+        assert snapshot.score(None).tolist() == expected
+
+    def test_empty_snapshot(self):
+        """Test scoring with no lawyers"""
+        assert LawyerSnapshot([]).score("civil_law").size == 0
+
+
+class TestTopK:
+    """Test top-k selection and candidate filtering"""
+
+    def _full_sort(self, snapshot, keys, mask):
+        rows = [row for row in range(snapshot.size) if mask[row]]
+        return sorted(rows, key=lambda row: -keys[row])
+
+    @pytest.mark.parametrize("sort", ["recommended", "rating", "price", "speed"])
+    def test_pages_match_full_sort(self, snapshot, sort):
+        """Test that every page equals the same slice of a full sort"""
+        keys = snapshot.order_key(sort, snapshot.score("civil_law"))
+        mask = snapshot.candidates("SK")
+        expected = self._full_sort(snapshot, keys, mask)
+
+        for offset in range(0, len(expected) + 10, 7):
+            assert top_k(keys, mask, 7, offset).tolist() == expected[offset:offset + 7]
+
+    def test_keys_unique(self, snapshot):
+        """Test that ties are broken so the ranking is deterministic"""
+        keys = snapshot.order_key("recommended", snapshot.score("civil_law"))
+
+        assert np.unique(keys).size == snapshot.size
+
+    def test_ties_lower_id_first(self):
+        """Test that equally scored lawyers rank by id"""
+        snapshot = LawyerSnapshot(_lawyers(5))
+        scores = np.zeros(snapshot.size, dtype=np.int64)
+
+        rows = top_k(snapshot.order_key("recommended", scores), np.ones(snapshot.size, dtype=bool), 5)
+
+        assert snapshot.ids[rows].tolist() == sorted(snapshot.ids.tolist())
+
+    def test_price_missing_last(self, snapshot):
+        """Test that lawyers without a rate rank after all priced ones"""
+        rows = top_k(snapshot.order_key("price", snapshot.score(None)), np.ones(snapshot.size, dtype=bool), snapshot.size)
+        prices = snapshot.price[rows]
+        priced = np.isfinite(prices)
+
+        assert priced.tolist() == sorted(priced.tolist(), reverse=True)
+        assert np.all(np.diff(prices[priced]) >= 0)
+
+    def test_candidates(self, lawyers, snapshot):
+        """Test filtering by jurisdiction and language"""
+        mask = snapshot.candidates("CZ", "en")
+        by_id = {lawyer.id: lawyer for lawyer in lawyers}
+
+        assert snapshot.ids[mask].tolist() == [
+            lawyer_id for lawyer_id in snapshot.ids.tolist()
+            if "CZ" in by_id[lawyer_id].jurisdictions and "en" in by_id[lawyer_id].languages
+        ]
+        assert not snapshot.candidates("HU").any()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the RAG document loader
+Tests embedding batches and incremental imports (unchanged, changed and
+duplicate documents, embedding reuse by chunk hash) with a stub
+embeddings model and in-memory document rows
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from services.rag import load_documents
+from services.rag.load_documents import DocumentLoader, content_hash, token_batches
+
+PARAGRAPHS = [
+    "Nájomca platí nájomné mesačne.",
+    "Prenajímateľ zabezpečí opravy.",
+    "Zmluva sa uzatvára na rok.",
+]
+
+
+class StubEmbeddings:
+    """Embeddings model returning [len(text)] per text and recording requests"""
+
+    def __init__(self, error=None):
+        self.requests = []
+        self.error = error
+
+    async def aembed_documents(self, texts):
+        self.requests.append(list(texts))
+        if self.error:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+class StoredDocuments:
+    """Document rows and chunk embeddings behind the loader's SQL helpers"""
+
+    def __init__(self):
+        self.documents = []  # (id, path, source, content_hash)
+        self.embeddings = {}  # chunk hash -> pgvector text
+        self.writes = []
+
+    def find(self, db, path, source):
+        return [(doc_id, doc_hash) for doc_id, doc_path, doc_source, doc_hash in self.documents
+                if (doc_path, doc_source) == (path, source)]
+
+    def known_embeddings(self, db, hashes):
+        return {chunk_hash: self.embeddings[chunk_hash] for chunk_hash in hashes if chunk_hash in self.embeddings}
+
+    def write(self, db, existing, filename, content, doc_hash, metadata, chunks, chunk_hashes, embeddings):
+        self.writes.append({'existing': list(existing), 'chunks': chunks})
+        self.documents = [row for row in self.documents if row[0] not in {doc_id for doc_id, _ in existing}]
+        document_id = existing[0][0] if existing else len(self.writes)
+        self.documents.append((document_id, metadata['path'], metadata['source'], doc_hash))
+        self.embeddings.update({chunk_hash: embeddings[chunk_hash] for chunk_hash in chunk_hashes})
+        return document_id
+
+
+@pytest.fixture
+def stored():
+    return StoredDocuments()
+
+
+@pytest.fixture
+def loader(stored):
+    """Loader splitting on paragraphs, with stub embeddings and stored rows"""
+    with patch.object(load_documents, 'create_engine'), patch.object(load_documents, 'OpenAIEmbeddings'):
+        loader = DocumentLoader(db_url="postgresql://", openai_api_key="test", chunk_size=40, chunk_overlap=0)
+    loader.embeddings_model = StubEmbeddings()
+    loader._find_document = stored.find
+    loader._known_embeddings = stored.known_embeddings
+    loader._write_document = stored.write
+    return loader
+
+
+async def _import(loader, paragraphs, path="zakony/najom.txt"):
+    return await loader.process_document(
+        "najom.txt", "\n\n".join(paragraphs), {'path': path, 'source': 'local'}, db=Mock()
+    )
+
+
+class TestTokenBatches:
+    """Test splitting embedding inputs into requests"""
+
+    def test_token_limit(self):
+        """Test that a batch closes before it would exceed max_tokens"""
+        assert token_batches(["aaa", "bbb", "ccc"], len, max_tokens=6) == [[0, 1], [2]]
+
+    def test_item_limit(self):
+        """Test that a batch holds at most max_items texts"""
+        assert token_batches(["a"] * 5, len, max_items=2) == [[0, 1], [2, 3], [4]]
+
+    def test_oversized_text_alone(self):
+        """Test that a text above the limit still gets a batch of its own"""
+        assert token_batches(["a" * 10, "b"], len, max_tokens=5) == [[0], [1]]
+
+    def test_empty(self):
+        """Test that no texts make no batches"""
+        assert token_batches([], len) == []
+
+
+@pytest.mark.asyncio
+class TestProcessDocument:
+    """Test incremental imports"""
+
+    async def test_created(self, loader, stored):
+        """Test that a new document is chunked, embedded and written"""
+        result = await _import(loader, PARAGRAPHS)
+
+        assert result['status'] == 'created'
+        assert (result['chunks'], result['embedded'], result['reused']) == (3, 3, 0)
+        assert loader.embeddings_model.requests == [PARAGRAPHS]
+        assert stored.writes[0]['chunks'] == PARAGRAPHS
+
+    async def test_unchanged_skipped(self, loader, stored):
+        """Test that re-importing the same text touches neither the API nor the database"""
+        await _import(loader, PARAGRAPHS)
+
+        result = await _import(loader, PARAGRAPHS)
+
+        assert result['status'] == 'unchanged'
+        assert len(loader.embeddings_model.requests) == 1
+        assert len(stored.writes) == 1
+
+    async def test_changed_reuses_embeddings(self, loader, stored):
+        """Test that only the edited chunk of a changed document is embedded"""
+        await _import(loader, PARAGRAPHS)
+        edited = PARAGRAPHS[:2] + ["Zmluva sa uzatvára na dva roky."]
+
+        result = await _import(loader, edited)
+
+        assert result['status'] == 'updated'
+        assert (result['embedded'], result['reused']) == (1, 2)
+        assert loader.embeddings_model.requests[-1] == [edited[2]]
+        assert stored.writes[-1]['existing'] == [(1, content_hash("\n\n".join(PARAGRAPHS)))]
+
+    async def test_embeddings_shared_across_documents(self, loader):
+        """Test that chunks already embedded for another document are reused"""
+        await _import(loader, PARAGRAPHS, path="zakony/a.txt")
+
+        result = await _import(loader, PARAGRAPHS[::-1], path="zakony/b.txt")
+
+        assert result['status'] == 'created'
+        assert (result['embedded'], result['reused']) == (0, 3)
+        assert len(loader.embeddings_model.requests) == 1
+
+    async def test_repeated_chunk_embedded_once(self, loader):
+        """Test that identical chunks within a document share one embedding"""
+        result = await _import(loader, PARAGRAPHS + PARAGRAPHS[:1])
+
+        assert (result['chunks'], result['embedded']) == (4, 3)
+        assert loader.embeddings_model.requests == [PARAGRAPHS]
+
+    async def test_duplicate_rows_replaced(self, loader, stored):
+        """Test that duplicate rows from old imports are rewritten even if the text is unchanged"""
+        doc_hash = content_hash("\n\n".join(PARAGRAPHS))
+        stored.documents = [(4, "zakony/najom.txt", "local", doc_hash), (9, "zakony/najom.txt", "local", doc_hash)]
+
+        result = await _import(loader, PARAGRAPHS)
+
+        assert result['status'] == 'updated'
+        assert stored.writes[0]['existing'] == [(4, doc_hash), (9, doc_hash)]
+        assert [row[0] for row in stored.documents] == [4]
+
+    async def test_token_bounded_requests(self, loader):
+        """Test that embedding requests stay under EMBED_BATCH_TOKENS"""
+        loader.count_tokens = lambda value: load_documents.EMBED_BATCH_TOKENS // 2 + 1
+
+        await _import(loader, PARAGRAPHS)
+
+        assert [len(request) for request in loader.embeddings_model.requests] == [1, 1, 1]
+
+    async def test_embedding_failure_rolls_back(self, loader, stored):
+        """Test that a failed embeddings request writes nothing"""
+        loader.embeddings_model = StubEmbeddings(error=RuntimeError("rate limited"))
+        db = Mock()
+
+        result = await loader.process_document("najom.txt", "\n\n".join(PARAGRAPHS), {'source': 'local'}, db=db)
+
+        assert result['status'] == 'failed'
+        assert result['error'] == "rate limited"
+        assert stored.writes == []
+        db.rollback.assert_called_once()
+
+
+class TestWriteDocument:
+    """Test the statements that replace a stored document"""
+
+    def test_duplicates_deleted(self):
+        """Test that the oldest row is updated in place and its duplicates deleted"""
+        loader = DocumentLoader.__new__(DocumentLoader)
+        db = Mock()
+        chunk_hash = content_hash("text")
+
+        with patch.object(load_documents, 'execute_values') as execute_values:
+            document_id = loader._write_document(
+                db, [(4, "old"), (9, "old")], "najom.txt", "text", "new", {'path': "zakony/najom.txt"},
+                ["text"], [chunk_hash], {chunk_hash: "[1.0]"}
+            )
+
+        statements = [(" ".join(str(call.args[0]).split()), call.args[1]) for call in db.execute.call_args_list]
+        assert document_id == 4
+        assert statements[0] == ("DELETE FROM document_chunks WHERE document_id = ANY(:ids)", {'ids': [4, 9]})
+        assert statements[1] == ("DELETE FROM documents WHERE id = ANY(:ids)", {'ids': [9]})
+        assert statements[2][0].startswith("UPDATE documents") and statements[2][1]['id'] == 4
+        rows = execute_values.call_args.args[2]
+        assert [(row[0], row[1], row[3], row[5]) for row in rows] == [(4, 0, "[1.0]", chunk_hash)]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the metrics registry
+Tests the Prometheus text exposition and aggregation across processes
+through an in-memory Redis
+"""
+
+import re
+
+import pytest
+
+from services import metrics
+from services.metrics import MetricsRegistry, total
+
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? \S+$')
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(metrics, "_redis", lambda: None)
+
+
+@pytest.fixture
+def redis(fake_redis, monkeypatch):
+    monkeypatch.setattr(metrics, "_redis", lambda: fake_redis)
+    return fake_redis
+
+
+def _define(registry):
+    requests = registry.counter("requests_total", "Requests by route", ["route", "status"])
+    latency = registry.histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    connections = registry.gauge("connections", "Open connections")
+    return requests, latency, connections
+
+
+class TestExposition:
+    """Test the Prometheus text format"""
+
+    def test_format(self, no_redis):
+        """Test HELP/TYPE headers, labels and histogram samples"""
+        registry = MetricsRegistry(instance="test")
+        requests, latency, connections = _define(registry)
+        requests.inc(route="/api", status=200)
+        requests.inc(2, route="/api", status=200)
+        latency.observe(0.05, route="/api")
+        latency.observe(0.5, route="/api")
+        connections.set(3)
+
+        assert registry.exposition() == (
+            "# HELP requests_total Requests by route\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{route="/api",status="200"} 3\n'
+            "# HELP latency_seconds Latency\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{route="/api",le="0.1"} 1\n'
+            'latency_seconds_bucket{route="/api",le="1"} 2\n'
+            'latency_seconds_bucket{route="/api",le="+Inf"} 2\n'
+            'latency_seconds_count{route="/api"} 2\n'
+            'latency_seconds_sum{route="/api"} 0.55\n'
+            "# HELP connections Open connections\n"
+            "# TYPE connections gauge\n"
+            "connections 3\n"
+        )
+
+    def test_every_line_valid(self, no_redis):
+        """Test that every line is a comment or a well-formed sample"""
+        registry = MetricsRegistry(instance="test")
+        requests, latency, _ = _define(registry)
+        requests.inc(route='/search?q="x"\\n', status=500)
+        latency.observe(12.0, route="/")
+
+        text = registry.exposition()
+
+        assert text.endswith("\n")
+        for line in text.splitlines():
+            assert line.startswith("# ") or SAMPLE_RE.match(line), line
+        assert 'route="/search?q=\\"x\\"\\\\n"' in text
+
+    def test_metric_without_values(self, no_redis):
+        """Test that a metric with no samples still has its headers"""
+        registry = MetricsRegistry(instance="test")
+        _define(registry)
+
+        assert registry.exposition().splitlines()[:2] == [
+            "# HELP requests_total Requests by route",
+            "# TYPE requests_total counter",
+        ]
+
+    def test_label_mismatch(self, no_redis):
+        """Test that wrong label names are rejected"""
+        requests, _, _ = _define(MetricsRegistry(instance="test"))
+
+        with pytest.raises(ValueError):
+            requests.inc(route="/api")
+
+
+class TestAggregation:
+    """Test totals across processes through Redis"""
+
+    def test_counters_summed(self, redis):
+        """Test that counters from two processes are added"""
+        first, second = MetricsRegistry(instance="a"), MetricsRegistry(instance="b")
+        first_requests, _, _ = _define(first)
+        second_requests, _, _ = _define(second)
+        first_requests.inc(route="/api", status=200)
+        second_requests.inc(4, route="/api", status=200)
+        second.flush()
+
+        assert total(first.snapshot(), "requests_total", route="/api") == 5
+
+    def test_gauges_summed_per_instance(self, redis):
+        """Test that gauges are the sum of the latest value of each live instance"""
+        first, second = MetricsRegistry(instance="a"), MetricsRegistry(instance="b")
+        _, _, first_connections = _define(first)
+        _, _, second_connections = _define(second)
+        first_connections.set(2)
+        first_connections.set(3)
+        second_connections.set(4)
+        second.flush()
+
+        assert "connections 7\n" in first.exposition()
+
+    def test_reset(self, redis):
+        """Test that reset clears shared counters"""
+        registry = MetricsRegistry(instance="a")
+        requests, _, _ = _define(registry)
+        requests.inc(route="/api", status=200)
+        registry.flush()
+
+        registry.reset()
+
+        assert total(registry.snapshot(), "requests_total") == 0
+
+    def test_reset_by_label(self, redis):
+        """Test that a labelled reset leaves other series, shared and local, untouched"""
+        first, second = MetricsRegistry(instance="a"), MetricsRegistry(instance="b")
+        first_requests, _, _ = _define(first)
+        second_requests, _, _ = _define(second)
+        first_requests.inc(route="/chat", status=200)
+        first_requests.inc(route="/api", status=200)
+        first.flush()
+        second_requests.inc(route="/chat", status=500)
+
+        second.reset(route="/chat")
+
+        values = first.snapshot()
+        assert total(values, "requests_total", route="/chat") == 0
+        assert total(values, "requests_total", route="/api") == 1
+        assert total(second.snapshot(), "requests_total", route="/chat") == 0
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for OpenAI usage tracking
+Tests the Redis-down fallback buffer, idempotent stream draining and
+rollup bucket boundaries of total_cost()
+"""
+
+import calendar
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from services import openai_usage
+from services.cache_service import cache
+
+USAGE = SimpleNamespace(prompt_tokens=1000, completion_tokens=500)  # gpt-4: 0.06 USD
+
+
+@pytest.fixture
+def redis(fake_redis):
+    with patch.object(cache, "redis_client", fake_redis):
+        yield fake_redis
+
+
+@pytest.fixture(autouse=True)
+def isolated():
+    """Empty fallback buffer, no writer thread and no live metrics"""
+    with patch.object(openai_usage, "_fallback", []), \
+            patch.object(openai_usage, "_fallback_writer", "not started in tests"), \
+            patch.object(openai_usage.metrics, "record_openai_call"):
+        yield
+
+
+@pytest.fixture
+def session_factory():
+    from main import OpenAIUsage, OpenAIUsageRollup
+
+    engine = create_engine("sqlite://")
+    OpenAIUsage.__table__.create(bind=engine)
+    OpenAIUsageRollup.__table__.create(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def _calls(db):
+    """Calls counted in the hour rollups"""
+    from main import OpenAIUsageRollup
+
+    return sum(row.calls for row in db.query(OpenAIUsageRollup).filter_by(granularity=openai_usage.HOUR))
+
+
+def _rows(db):
+    from main import OpenAIUsage
+
+    return db.query(OpenAIUsage).count()
+
+
+class TestFallback:
+    """Test recording while Redis is unavailable"""
+
+    def test_buffered_not_written_inline(self, unreachable_redis):
+        """Test that record() only buffers the event when Redis is down"""
+        with patch.object(cache, "redis_client", unreachable_redis), \
+                patch.object(openai_usage, "_persist") as persist:
+            openai_usage.record("jobs_chat", "gpt-4", 1.2, USAGE)
+
+        persist.assert_not_called()
+        assert [event["cost_microusd"] for event in openai_usage._fallback] == [60000]
+
+    def test_buffer_full_drops(self, unreachable_redis):
+        """Test that events beyond FALLBACK_MAX_EVENTS are dropped"""
+        with patch.object(cache, "redis_client", unreachable_redis), \
+                patch.object(openai_usage, "FALLBACK_MAX_EVENTS", 2):
+            for _ in range(3):
+                openai_usage.record("jobs_chat", "gpt-4", 1.2, USAGE)
+
+        assert len(openai_usage._fallback) == 2
+
+    def test_buffered_events_written(self, unreachable_redis, session_factory, db):
+        """Test that the writer stores buffered events with their rollups"""
+        with patch.object(cache, "redis_client", unreachable_redis):
+            openai_usage.record("jobs_chat", "gpt-4", 1.2, USAGE)
+            openai_usage.record("jobs_chat", "gpt-4", 0.8, USAGE)
+
+        with patch("main.SessionLocal", session_factory):
+            assert openai_usage.write_buffered() == 2
+
+        assert openai_usage._fallback == []
+        assert _calls(db) == 2
+
+    def test_failed_write_kept(self, unreachable_redis):
+        """Test that events are kept for the next write when Postgres fails"""
+        with patch.object(cache, "redis_client", unreachable_redis):
+            openai_usage.record("jobs_chat", "gpt-4", 1.2, USAGE)
+
+        with patch("main.SessionLocal", side_effect=ConnectionError("Postgres down")):
+            assert openai_usage.write_buffered() == 0
+
+        assert len(openai_usage._fallback) == 1
+
+
+class TestDrain:
+    """Test that every stream entry is counted exactly once"""
+
+    def _record(self, count):
+        for _ in range(count):
+            openai_usage.record("university_chat", "gpt-4", 1.0, USAGE)
+
+    def test_stored_once(self, redis, db):
+        """Test that drained entries are stored, acknowledged and deleted"""
+        self._record(3)
+
+        assert openai_usage.drain(db, consumer="worker-1") == 3
+        assert openai_usage.drain(db, consumer="worker-1") == 0
+
+        assert _rows(db) == 3
+        assert _calls(db) == 3
+        assert redis.data[openai_usage.STREAM_KEY]["entries"] == {}
+
+    def test_redelivered_after_crash(self, redis, db):
+        """Test that entries committed but not acknowledged are not counted twice"""
+        self._record(2)
+        with patch.object(redis, "xack", side_effect=ConnectionError("crashed before XACK")):
+            with pytest.raises(ConnectionError):
+                openai_usage.drain(db, consumer="worker-1")
+        assert _calls(db) == 2
+
+        assert openai_usage.drain(db, consumer="worker-1") == 0
+
+        assert _rows(db) == 2
+        assert _calls(db) == 2
+        assert redis.data[openai_usage.STREAM_KEY]["groups"][openai_usage.STREAM_GROUP]["pending"] == {}
+
+    def test_idle_entries_claimed(self, redis, db):
+        """Test that entries left pending by a dead consumer are claimed"""
+        self._record(2)
+        redis.xgroup_create(openai_usage.STREAM_KEY, openai_usage.STREAM_GROUP)
+        redis.xreadgroup(openai_usage.STREAM_GROUP, "dead", {openai_usage.STREAM_KEY: ">"}, count=10)
+
+        with patch.object(openai_usage, "CLAIM_IDLE_MS", 0):
+            assert openai_usage.drain(db, consumer="worker-1") == 2
+
+        assert _calls(db) == 2
+        assert redis.data[openai_usage.STREAM_KEY]["groups"][openai_usage.STREAM_GROUP]["pending"] == {}
+
+    def test_claimed_entries_already_stored(self, redis, db):
+        """Test that a claimed entry its dead consumer already stored is not counted again"""
+        self._record(2)
+        redis.xgroup_create(openai_usage.STREAM_KEY, openai_usage.STREAM_GROUP)
+        response = redis.xreadgroup(openai_usage.STREAM_GROUP, "dead", {openai_usage.STREAM_KEY: ">"}, count=10)
+        events = [
+            dict(openai_usage._decode(fields), stream_id=entry_id.decode())
+            for entry_id, fields in response[0][1]
+        ]
+        openai_usage._persist(db, events[:1])  # Stored, then the consumer died before XACK
+        db.commit()
+
+        with patch.object(openai_usage, "CLAIM_IDLE_MS", 0):
+            assert openai_usage.drain(db, consumer="worker-1") == 1
+
+        assert _rows(db) == 2
+        assert _calls(db) == 2
+
+    def test_recent_entries_not_claimed(self, redis, db):
+        """Test that entries another consumer is still working on are left alone"""
+        self._record(1)
+        redis.xgroup_create(openai_usage.STREAM_KEY, openai_usage.STREAM_GROUP)
+        redis.xreadgroup(openai_usage.STREAM_GROUP, "busy", {openai_usage.STREAM_KEY: ">"}, count=10)
+
+        assert openai_usage.drain(db, consumer="worker-1") == 0
+        assert _calls(db) == 0
+
+
+class TestTotalCost:
+    """Test which rollup buckets total_cost() sums"""
+
+    @staticmethod
+    def _event(moment, usd):
+        return {
+            "ts": str(calendar.timegm(moment.timetuple())),
+            "service": "university_chat",
+            "model": "gpt-4",
+            "user_id": "",
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost_microusd": usd * openai_usage.MICRO,
+            "duration_ms": 0,
+        }
+
+    @pytest.fixture
+    def costs(self, db):
+        openai_usage._persist(db, [
+            self._event(datetime(2026, 3, 1, 10, 59, 59), 1),
+            self._event(datetime(2026, 3, 1, 11, 0, 0), 2),
+            self._event(datetime(2026, 3, 1, 11, 59, 59), 4),
+            self._event(datetime(2026, 3, 1, 12, 0, 0), 8),
+            self._event(datetime(2026, 3, 2, 0, 0, 0), 16),
+        ])
+        db.commit()
+        return db
+
+    def test_start_rounded_down(self, costs):
+        """Test that start counts its whole hour"""
+        assert openai_usage.total_cost(costs, datetime(2026, 3, 1, 11, 30)) == 2 + 4 + 8 + 16
+
+    def test_end_exclusive(self, costs):
+        """Test that the bucket containing end is not counted"""
+        assert openai_usage.total_cost(costs, datetime(2026, 3, 1, 11), datetime(2026, 3, 1, 12)) == 2 + 4
+        assert openai_usage.total_cost(costs, datetime(2026, 3, 1, 11), datetime(2026, 3, 1, 12, 30)) == 2 + 4
+
+    def test_daily_buckets(self, costs):
+        """Test that day buckets split at midnight"""
+        day = openai_usage.DAY
+        assert openai_usage.total_cost(costs, datetime(2026, 3, 1, 18), granularity=day) == 1 + 2 + 4 + 8 + 16
+        assert openai_usage.total_cost(costs, datetime(2026, 3, 1), datetime(2026, 3, 2), granularity=day) == 1 + 2 + 4 + 8
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the statute index and citation resolution
+Tests code name resolution, paragraph parsing and lookup over legal_docs/,
+and citation validation and attachment in the case analyzer
+"""
+
+import pytest
+
+from services.statute_index import (
+    StatuteIndex,
+    _parse_paragraphs,
+    get_statute_index,
+    resolve_code,
+)
+
+CIVIL_CODE = "Občiansky zákonník"
+LABOR_CODE = "Zákonník práce"
+
+
+@pytest.fixture(scope="module")
+def statutes():
+    return get_statute_index()
+
+
+class TestResolveCode:
+    """Test mapping law names as written in citations to indexed codes"""
+
+    @pytest.mark.parametrize("name", [
+        "Občiansky zákonník",
+        "**Občiansky zákonník**",
+        "Občianskeho zákonníka",
+        "obciansky zakonnik",
+        "OZ",
+        "zákon č. 40/1964 Zb. Občiansky zákonník",
+    ])
+    def test_civil_code(self, name):
+        """Test that spellings, inflections and abbreviations resolve"""
+        assert resolve_code(name) == CIVIL_CODE
+
+    def test_other_codes(self):
+        """Test that the labor and commercial codes resolve"""
+        assert resolve_code("Zákonníka práce") == LABOR_CODE
+        assert resolve_code("Zákonníkom práce") == LABOR_CODE
+        assert resolve_code("ObZ") == "Obchodný zákonník"
+
+    @pytest.mark.parametrize("name", [
+        None,
+        "",
+        "Trestný zákon",
+        "Zákon o ochrane spotrebiteľa",
+        "Občiansky súdny poriadok",
+        "Občiansky sporový poriadok",
+        "zákonný zástupca",
+    ])
+    def test_unknown(self, name):
+        """Test that other laws do not resolve"""
+        assert resolve_code(name) is None
+
+
+class TestParseParagraphs:
+    """Test splitting a statute into paragraphs"""
+
+    def test_sections_and_subsections(self):
+        """Test that § sections are split and their subsections parsed"""
+        lines = [
+            "OBČIANSKY ZÁKONNÍK",
+            "",
+            "§ 420 Všeobecná zodpovednosť",
+            "(1) Každý zodpovedá za škodu.",
+            "(2) Zodpovednosť je objektívna.",
+            "§ 420a Zodpovednosť za prevádzku",
+            "(1) Každý zodpovedá aj za škodu spôsobenú prevádzkou.",
+        ]
+
+        paragraphs = _parse_paragraphs(CIVIL_CODE, lines, "test.txt")
+
+        assert [paragraph.number for paragraph in paragraphs] == ["420", "420a"]
+        assert paragraphs[0].title == "Všeobecná zodpovednosť"
+        assert paragraphs[0].subsections == {
+            "1": "Každý zodpovedá za škodu.",
+            "2": "Zodpovednosť je objektívna.",
+        }
+        assert paragraphs[0].key == (CIVIL_CODE, "420")
+        assert paragraphs[1].source == "test.txt"
+
+    def test_heading_ends_section(self):
+        """Test that an all-caps part heading is not part of the previous paragraph"""
+        lines = [
+            "§ 1 Základné zásady",
+            "(1) Text.",
+            "DRUHÁ ČASŤ",
+            "Úvodný text časti.",
+            "§ 2 Výkon práv",
+        ]
+
+        paragraphs = _parse_paragraphs(CIVIL_CODE, lines, "test.txt")
+
+        assert paragraphs[0].text == "(1) Text."
+        assert "DRUHÁ" not in paragraphs[1].text
+        assert len(paragraphs) == 2
+
+    def test_no_sections(self):
+        """Test that guides without § sections give no paragraphs"""
+        assert _parse_paragraphs(CIVIL_CODE, ["NÁHRADA ŠKODY", "Text bez paragrafov."], "guide.txt") == []
+
+
+class TestStatuteIndexGet:
+    """Test paragraph lookup"""
+
+    def test_loaded_from_legal_docs(self, statutes):
+        """Test that the civil code excerpts are indexed and guides skipped"""
+        assert statutes.get(CIVIL_CODE, "420") is not None
+        assert all(paragraph.code == CIVIL_CODE for paragraph in statutes.paragraphs)
+
+    def test_inflected_name(self, statutes):
+        """Test lookup by an inflected law name"""
+        paragraph = statutes.get("Občianskeho zákonníka", " 420 ")
+
+        assert paragraph.number == "420"
+        assert "1" in paragraph.subsections
+
+    def test_missing_paragraph(self, statutes):
+        """Test that a paragraph not in the index is not found"""
+        assert statutes.get(CIVIL_CODE, "9999") is None
+
+    def test_unknown_law_never_matches(self, statutes):
+        """Test that a number of another law is not matched to the civil code"""
+        assert statutes.get("Trestný zákon", "420") is None
+
+    def test_without_law_name(self):
+        """Test that a bare number matches only when one code has it"""
+        index = StatuteIndex(
+            _parse_paragraphs(CIVIL_CODE, ["§ 1 Zásady", "§ 420 Zodpovednosť"], "oz.txt")
+            + _parse_paragraphs(LABOR_CODE, ["§ 1 Zásady"], "zp.txt")
+        )
+
+        assert index.get(None, "420").code == CIVIL_CODE
+        assert index.get("", "1") is None
+
+
+class TestSearch:
+    """Test statute search scores"""
+
+    @pytest.mark.asyncio
+    async def test_scores_absolute(self, statutes):
+        """Test that a weak best match does not score 1"""
+        matches = await statutes.search("Sused mi parkuje auto pred domom každý deň")
+
+        assert matches
+        assert all(score < 0.4 for _, score in matches)
+
+    @pytest.mark.asyncio
+    async def test_relevant_match(self, statutes):
+        """Test that the paragraph on liability ranks first for a damage question"""
+        matches = await statutes.search("Sused mi spôsobil škodu na aute, kto zodpovedá za škodu?")
+
+        assert matches[0][0].number == "420"
+        assert matches[0][1] > 0.5
+
+
+class TestCitations:
+    """Test citation validation and attachment in the case analyzer"""
+
+    @pytest.fixture
+    def analyzer(self, statutes, monkeypatch):
+        ai_case_analyzer = pytest.importorskip("services.ai_case_analyzer")
+        monkeypatch.setattr(ai_case_analyzer, "get_embedding_service", lambda: None)
+        analyzer = ai_case_analyzer.AICaseAnalyzer.__new__(ai_case_analyzer.AICaseAnalyzer)
+        analyzer.statutes = statutes
+        return analyzer
+
+    def test_validate_citations(self, analyzer):
+        """Test that indexed citations are verified and get the statute text"""
+        citations = analyzer.validate_citations(analyzer.extract_citations(
+            "Podľa **Občianskeho zákonníka**, § 420, čl. 1 a **Trestného zákona**, § 123."
+        ))
+
+        assert citations[0].verified
+        assert citations[0].law_name == CIVIL_CODE
+        assert citations[0].text == analyzer.statutes.get(CIVIL_CODE, "420").subsections["1"]
+        assert not citations[1].verified
+        assert citations[1].text is None
+
+    @pytest.mark.asyncio
+    async def test_attach_citations(self, analyzer):
+        """Test that relevant statutes are attached to an answer without citations"""
+        response, citations = await analyzer._attach_citations(
+            "Sused mi spôsobil škodu na aute, kto zodpovedá za škodu?",
+            "Odpoveď."
+        )
+
+        assert citations
+        assert all(citation.verified for citation in citations)
+        assert response.startswith("Odpoveď.")
+        assert "**Právny základ:**" in response
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("text", ["xyzzy", "Sused mi parkuje auto pred domom každý deň"])
+    async def test_attach_nothing_relevant(self, analyzer, text):
+        """Test that nothing is attached when no statute matches well"""
+        response, citations = await analyzer._attach_citations(text, "Odpoveď.")
+
+        assert citations == []
+        assert response == "Odpoveď."
+
+    def test_other_law_not_verified(self, analyzer):
+        """Test that a citation of another code with the same § is not verified"""
+        citations = analyzer.validate_citations(analyzer.extract_citations(
+            "Podľa **Občianskeho súdneho poriadku**, § 420."
+        ))
+
+        assert not citations[0].verified
@@ -303,19 +303,17 @@ class TestChatFunctionality:
             with patch.object(service.client.chat.completions, 'create', new_callable=AsyncMock) as mock_openai:
                 mock_openai.side_effect = Exception("OpenAI API error")
                 
-                # Test chat - should return error message
-                response = await service.chat(
-                    db=mock_db,
-                    message="Test question",
-                    university_id=1,
-                    university_name="Test University",
-                    university_website="https://test.edu",
-                    university_description="A test university",
-                    conversation_history=[]
-                )
-                
-                # Should return error message in detected language
-                assert "помилка" in response or "error" in response or "chyba" in response
+                # Test chat - should raise, so the caller does not store an error as an answer
+                with pytest.raises(Exception, match="OpenAI API error"):
+                    await service.chat(
+                        db=mock_db,
+                        message="Test question",
+                        university_id=1,
+                        university_name="Test University",
+                        university_website="https://test.edu",
+                        university_description="A test university",
+                        conversation_history=[]
+                    )
 
 
 if __name__ == "__main__":
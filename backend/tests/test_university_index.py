@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the university index
+Tests query expansion, BM25 search over an in-memory index and rank fusion
+"""
+
+import pytest
+
+from services import university_index
+from services.statute_index import tokenize
+from services.university_index import (
+    EXPANSION_WEIGHT,
+    UniversityIndex,
+    expand_query,
+    hybrid_search,
+    reciprocal_rank_fusion,
+)
+
+
+def _row(content_id, title, content):
+    return {
+        'id': content_id,
+        'title': title,
+        'content': content,
+        'url': f"https://example.edu/{content_id}",
+        'content_type': 'page',
+        'language': 'en',
+    }
+
+
+@pytest.fixture
+def index():
+    return UniversityIndex([
+        _row(1, "Admission", "Application deadlines and admission requirements for bachelor programs."),
+        _row(2, "Školné", "Školné pre zahraničných študentov je 2000 EUR ročne."),
+        _row(3, "Dormitory", "Accommodation in the student dormitory near campus."),
+        _row(4, "Tuition", "Tuition for international students and payment of tuition in installments."),
+    ])
+
+
+class TestExpandQuery:
+    """Test multilingual query expansion"""
+
+    def test_own_tokens_full_weight(self):
+        """Test that the question's own tokens keep weight 1"""
+        weights = expand_query("dormitory campus")
+
+        for token in tokenize("dormitory campus"):
+            assert weights[token] == 1.0
+
+    def test_keywords_of_category_added(self):
+        """Test that a category keyword adds the other languages at lower weight"""
+        weights = expand_query("How much is the tuition?")
+
+        for keyword in ("školné", "czesne", "studiengebühren"):
+            for token in tokenize(keyword):
+                assert weights[token] == EXPANSION_WEIGHT
+        for token in tokenize("tuition"):
+            assert weights[token] == 1.0
+
+    def test_no_expansion_without_keyword(self):
+        """Test that a question without keywords is not expanded"""
+        assert set(expand_query("Hello there")) == set(tokenize("Hello there"))
+
+
+class TestUniversityIndexSearch:
+    """Test BM25 search over an in-memory index"""
+
+    def test_best_match_first(self, index):
+        """Test that the page mentioning the term most ranks first"""
+        positions = index.search({token: 1.0 for token in tokenize("tuition")})
+
+        assert index.rows[positions[0]]['id'] == 4
+
+    def test_expansion_finds_other_languages(self, index):
+        """Test that an English question finds a Slovak page through expansion"""
+        plain = [index.rows[position]['id'] for position in index.search({token: 1.0 for token in tokenize("tuition")})]
+        expanded = [index.rows[position]['id'] for position in index.search(expand_query("tuition"))]
+
+        assert 2 not in plain
+        assert expanded[0] == 4
+        assert 2 in expanded
+
+    def test_no_match(self, index):
+        """Test that unknown terms return nothing"""
+        assert index.search({"xyzzy": 1.0}) == []
+
+    def test_top_k(self, index):
+        """Test that at most top_k positions are returned"""
+        assert len(index.search(expand_query("tuition students"), top_k=1)) == 1
+
+    def test_empty_index(self):
+        """Test that an index without rows can be searched"""
+        assert UniversityIndex([]).search({"tuitio": 1.0}) == []
+
+
+class TestReciprocalRankFusion:
+    """Test reciprocal-rank fusion"""
+
+    def test_scores(self):
+        """Test that scores add 1 / (k + rank) over rankings"""
+        scores = reciprocal_rank_fusion([[10, 20], [20, 30]], k=60)
+
+        assert scores[10] == pytest.approx(1 / 61)
+        assert scores[20] == pytest.approx(1 / 62 + 1 / 61)
+        assert scores[30] == pytest.approx(1 / 62)
+
+    def test_agreement_wins(self):
+        """Test that an item ranked by both lists beats a single top rank"""
+        scores = reciprocal_rank_fusion([[1, 2], [3, 2]])
+
+        assert max(scores, key=scores.get) == 2
+
+    def test_empty(self):
+        """Test that no rankings give no scores"""
+        assert reciprocal_rank_fusion([[], []]) == {}
+
+
+class TestHybridSearch:
+    """Test hybrid search without embeddings"""
+
+    def test_keyword_only(self, index, monkeypatch):
+        """Test that without an embedding results come from BM25 alone"""
+        monkeypatch.setattr(university_index, "get_university_index", lambda db, university_id: index)
+
+        results = hybrid_search(None, 1, "tuition", None, top_k=2)
+
+        assert [result['id'] for result in results] == [4, 2]
+        assert all(result['similarity'] == 0.0 for result in results)
+        assert results[0]['score'] > results[1]['score']
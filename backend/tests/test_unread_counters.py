@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the unread counters cache
+Tests refills from Postgres and a refill racing a writer's invalidation
+"""
+
+import pytest
+
+from services import unread_counters
+from services.unread_counters import MESSAGES, NOTIFICATIONS
+
+
+class FakeColumns:
+    """users.unread_*_count of one user, with a hook run while a reader loads them"""
+
+    def __init__(self):
+        self.counts = {MESSAGES: 0, NOTIFICATIONS: 0}
+        self.loads = 0
+        self.during_load = None
+
+    def load(self, db, user_id):
+        self.loads += 1
+        counts = dict(self.counts)
+        if self.during_load:
+            hook, self.during_load = self.during_load, None
+            hook()
+        return counts
+
+
+@pytest.fixture
+def columns(fake_redis, monkeypatch):
+    fake = FakeColumns()
+    monkeypatch.setattr(unread_counters, "_redis", lambda: fake_redis)
+    monkeypatch.setattr(unread_counters, "_load", fake.load)
+    return fake
+
+
+def _commit(columns, messages):
+    """A writer changing the counter: commit, then invalidate"""
+    columns.counts[MESSAGES] = messages
+    unread_counters._invalidate([1])
+
+
+class TestGetCounts:
+    """Test reading counters through the cache"""
+
+    def test_refilled_once(self, columns):
+        """Test that a miss loads the columns and later reads hit the cache"""
+        columns.counts[MESSAGES] = 3
+
+        assert unread_counters.get_counts(None, 1) == {MESSAGES: 3, NOTIFICATIONS: 0}
+        assert unread_counters.get_count(None, 1, MESSAGES) == 3
+        assert columns.loads == 1
+
+    def test_invalidated_after_commit(self, columns):
+        """Test that a committed change is read back after invalidation"""
+        unread_counters.get_counts(None, 1)
+
+        _commit(columns, 5)
+
+        assert unread_counters.get_count(None, 1, MESSAGES) == 5
+
+    def test_stale_refill_ignored(self, columns, fake_redis):
+        """Test that a reader racing a writer cannot leave the older count cached"""
+        columns.counts[MESSAGES] = 1
+        columns.during_load = lambda: _commit(columns, 2)
+
+        # Loaded 1 before the writer committed 2 and invalidated, then stored 1
+        assert unread_counters.get_count(None, 1, MESSAGES) == 1
+        assert fake_redis.data[unread_counters.REDIS_KEY.format(user_id=1)][b"messages"] == b"1"
+
+        assert unread_counters.get_count(None, 1, MESSAGES) == 2
+        assert unread_counters.get_count(None, 1, MESSAGES) == 2
+        assert columns.loads == 2
+
+    def test_redis_down(self, columns, unreachable_redis, monkeypatch):
+        """Test that the columns are read when Redis is unavailable"""
+        monkeypatch.setattr(unread_counters, "_redis", lambda: unreachable_redis)
+        columns.counts[NOTIFICATIONS] = 4
+
+        assert unread_counters.get_count(None, 1, NOTIFICATIONS) == 4
+        unread_counters._invalidate([1])
+
+
+class TestRefresh:
+    """Test refresh() after a commit"""
+
+    def test_returns_committed_counts(self, columns):
+        """Test that refresh returns the columns and the next read sees them"""
+        unread_counters.get_counts(None, 1)
+        columns.counts[MESSAGES] = 7
+
+        assert unread_counters.refresh(None, [1]) == {1: {MESSAGES: 7, NOTIFICATIONS: 0}}
+        assert unread_counters.get_count(None, 1, MESSAGES) == 7
+
+    def test_no_users(self, columns):
+        """Test that nothing is done without users"""
+        assert unread_counters.refresh(None, []) == {}
@@ -6,6 +6,7 @@ Tests to ensure AI responses comply with Unauthorized Practice of Law regulation
 
 import pytest
 from services.upl_compliance import (
+    ComplianceScanner,
     UPLCompliance,
     get_disclaimer,
     get_system_prompt,
@@ -173,5 +174,65 @@ class TestDocumentDisclaimers:
             assert "AI" in disclaimer or "ai" in disclaimer.lower()
 
 
+
+class TestStreamingScan:
+    """Test incremental compliance scanning of streamed responses."""
+    
+    def test_stream_matches_full_scan(self):
+        """Phrases split across chunks are found as in a full scan."""
+        response = "Vy by ste mali podať žalobu. Váš prípad je silný a určite vyhráte súd."
+        
+        for size in (1, 4, 9):
+            scanner = ComplianceScanner('sk')
+            for start in range(0, len(response), size):
+                scanner.feed(response[start:start + size])
+            assert scanner.finish() == validate_compliance(response, 'sk')
+    
+    def test_no_match_across_word_continuation(self):
+        """A phrase at the end of a chunk is not reported if the word continues."""
+        scanner = ComplianceScanner('sk')
+        assert scanner.feed("Tu máte nárok na") == []
+        assert scanner.feed("hradu škody.") == []
+        assert scanner.finish()['violations'] == []
+    
+    def test_other_languages_have_rules(self):
+        """Forbidden phrases are checked beyond Slovak."""
+        result = validate_compliance("Sie sollten klagen, Sie werden sicher gewinnen.", 'de')
+        assert result['is_compliant'] == False
+        assert len(result['violations']) == 2
+
+
+class TestLawyerReferral:
+    """Test that recommending a lawyer is not reported as personal advice."""
+    
+    @pytest.mark.parametrize("language,response", [
+        ('en', "You should consult a lawyer about this."),
+        ('en', "You should contact a licensed attorney."),
+        ('sk', "Vy by ste mali kontaktovať advokáta."),
+        ('de', "Sie sollten einen Rechtsanwalt kontaktieren."),
+        ('uk', "Вам слід звернутися до адвоката."),
+    ])
+    def test_referral_allowed(self, language, response):
+        """'You should' followed by a lawyer keyword is compliant."""
+        assert validate_compliance(response, language)['violations'] == []
+    
+    def test_advice_still_reported(self):
+        """'You should' with any other advice is still a violation."""
+        assert validate_compliance("You should sue your landlord.", 'en')['violations'] == ["Uses 'you should'"]
+    
+    def test_referral_in_next_sentence_not_counted(self):
+        """A lawyer mentioned after the sentence ends does not excuse the advice."""
+        result = validate_compliance("You should sue. A lawyer can help.", 'en')
+        assert result['violations'] == ["Uses 'you should'"]
+    
+    def test_stream_waits_for_referral(self):
+        """A streamed 'you should' is judged only once the following words arrive."""
+        response = "Thanks for asking. You should consult a lawyer."
+        scanner = ComplianceScanner('en')
+        for char in response:
+            assert scanner.feed(char) == []
+        assert scanner.finish()['violations'] == []
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the web-search fallback
+Tests parsing of DuckDuckGo HTML results and query normalization
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from services.web_search import CONTENT_TYPE, normalize_query, parse_results, store_results
+
+RESULT = """
+<div class="result results_links web-result">
+  <h2 class="result__title">
+    <a class="result__a" href="{href}">{title}</a>
+  </h2>
+  <a class="result__snippet" href="{href}">{snippet}</a>
+</div>
+"""
+
+
+def _page(*results):
+    return "<html><body><div id=\"links\">" + "".join(
+        RESULT.format(href=href, title=title, snippet=snippet) for href, title, snippet in results
+    ) + "</div></body></html>"
+
+
+class TestParseResults:
+    """Test extraction of title, url and snippet"""
+
+    def test_redirect_url_resolved(self):
+        """Test that DuckDuckGo redirect links are replaced by their target"""
+        html = _page((
+            "//duckduckgo.com/l/?uddg=https%3A%2F%2Funiba.sk%2Fen%2Fadmission%2F&amp;rut=abc",
+            " Admission | Comenius University ",
+            "Applications for the <b>bachelor</b> programs close on 30 April.",
+        ))
+
+        assert parse_results(html) == [{
+            'title': "Admission | Comenius University",
+            'url': "https://uniba.sk/en/admission/",
+            'snippet': "Applications for the bachelor programs close on 30 April.",
+        }]
+
+    def test_plain_urls(self):
+        """Test protocol-relative and absolute links"""
+        html = _page(
+            ("//uniba.sk/tuition", "Tuition", "Fees for 2026."),
+            ("https://stuba.sk/dorms", "Dorms", "Accommodation."),
+        )
+
+        assert [result['url'] for result in parse_results(html)] == [
+            "https://uniba.sk/tuition",
+            "https://stuba.sk/dorms",
+        ]
+
+    def test_limit(self):
+        """Test that at most limit results are returned, in page order"""
+        html = _page(*[(f"https://example.edu/{number}", f"Result {number}", "Snippet") for number in range(5)])
+
+        assert [result['title'] for result in parse_results(html)] == ["Result 0", "Result 1", "Result 2"]
+        assert len(parse_results(html, limit=5)) == 5
+
+    def test_results_without_snippet_skipped(self):
+        """Test that ads and results without a snippet are ignored"""
+        html = _page(("https://example.edu/a", "With snippet", "Text")).replace(
+            "<div id=\"links\">",
+            "<div id=\"links\"><div class=\"result\"><a class=\"result__a\" href=\"https://ad.example\">Ad</a></div>"
+        )
+
+        assert [result['title'] for result in parse_results(html)] == ["With snippet"]
+
+    def test_no_results(self):
+        """Test an empty or unexpected page"""
+        assert parse_results("") == []
+        assert parse_results("<html><body>No results.</body></html>") == []
+
+
+class TestNormalizeQuery:
+    """Test the cache form of questions"""
+
+    def test_equivalent_questions(self):
+        """Test that spacing, case and end punctuation are ignored"""
+        assert normalize_query("  What is the  TUITION? ") == normalize_query("what is the tuition")
+
+
+@pytest.fixture
+def content_db():
+    """Session on a fresh university_content table, as create_all builds it"""
+    from main import UniversityContent
+
+    engine = create_engine("sqlite://")
+    UniversityContent.__table__.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+class TestStoreResults:
+    """Test writing search results back into university_content"""
+
+    RESULTS = [
+        {'url': "https://example.edu/fees", 'title': "Fees", 'snippet': "Tuition is free"},
+        {'url': "https://example.edu/dorms", 'title': "Dorms", 'snippet': "Dorms cost 100 EUR"},
+    ]
+
+    def test_rows_active(self, content_db):
+        """Test that stored rows are active, so retrieval sees them"""
+        from main import UniversityContent
+
+        assert store_results(content_db, 1, self.RESULTS, language="en") == 2
+
+        rows = content_db.query(UniversityContent).all()
+        assert {row.url for row in rows} == {"https://example.edu/fees", "https://example.edu/dorms"}
+        assert all(row.is_active is True for row in rows)
+        assert all(row.content_type == CONTENT_TYPE for row in rows)
+
+    def test_existing_page_untouched(self, content_db):
+        """Test that a page already stored for the university is skipped, not failed"""
+        from main import UniversityContent
+
+        content_db.add(UniversityContent(
+            university_id=1, url="https://example.edu/fees", title="Fees", content="Scraped page"
+        ))
+        content_db.commit()
+
+        assert store_results(content_db, 1, self.RESULTS) == 1
+        assert store_results(content_db, 1, self.RESULTS) == 0
+        assert store_results(content_db, 2, self.RESULTS) == 2
+
+        fees = content_db.query(UniversityContent).filter_by(university_id=1, url="https://example.edu/fees").one()
+        assert fees.content == "Scraped page"
@@ -34,7 +34,7 @@ export default function UniversityChatModal({
     useEffect(() => {
         if (isOpen) {
             setMessages([]);
-            setSessionId(`session_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`);
+            setSessionId(''); // Assigned by the server on the first response
         }
     }, [universityId, isOpen]);
 
@@ -70,21 +70,13 @@ export default function UniversityChatModal({
         try {
             const url = `/api/universities/${universityId}/chat`;
 
-            // Prepare conversation history
-            const conversationHistory = messages
-                .filter(msg => msg.role === 'user' || msg.role === 'assistant')
-                .map(msg => ({
-                    role: msg.role,
-                    content: msg.content
-                }));
-
             // Get current platform language
             const currentLanguage = t('language.code');
 
+            // History is kept server-side; send only the new message
             const requestBody = {
                 message: inputMessage,
-                session_id: sessionId,
-                conversation_history: conversationHistory,
+                session_id: sessionId || undefined,
                 language: currentLanguage
             };
 
@@ -101,6 +93,7 @@ export default function UniversityChatModal({
             }
 
             const data = await response.json();
+            setSessionId(data.session_id);
 
             const assistantMessage: Message = {
                 role: 'assistant',